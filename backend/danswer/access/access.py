@@ -1,12 +1,25 @@
+from uuid import UUID
+
 from sqlalchemy.orm import Session
 
 from danswer.access.models import DocumentAccess
+from danswer.configs.app_configs import USER_ACL_CACHE_SIZE
+from danswer.configs.app_configs import USER_ACL_CACHE_TTL_SECONDS
 from danswer.configs.constants import PUBLIC_DOC_PAT
 from danswer.db.document import get_acccess_info_for_documents
 from danswer.db.models import User
 from danswer.server.documents.models import ConnectorCredentialPairIdentifier
+from danswer.utils.logger import setup_logger
+from danswer.utils.ttl_cache import TTLCache
 from danswer.utils.variable_functionality import fetch_versioned_implementation
 
+logger = setup_logger()
+
+_USER_ACL_CACHE: TTLCache[str, frozenset[str]] = TTLCache(
+    max_size=USER_ACL_CACHE_SIZE, ttl_seconds=USER_ACL_CACHE_TTL_SECONDS
+)
+_ACL_CACHE_METRICS_LOG_INTERVAL = 1000
+
 
 def _get_access_for_documents(
     document_ids: list[str],
@@ -56,7 +69,32 @@ def _get_acl_for_user(user: User | None, db_session: Session) -> set[str]:
 
 
 def get_acl_for_user(user: User | None, db_session: Session | None = None) -> set[str]:
-    versioned_acl_for_user_fn = fetch_versioned_implementation(
-        "danswer.access.access", "_get_acl_for_user"
-    )
-    return versioned_acl_for_user_fn(user, db_session)  # type: ignore
+    # Anonymous users all have the same ACL
+    cache_key = str(user.id) if user else ""
+    user_acl = _USER_ACL_CACHE.get(cache_key)
+    if user_acl is None:
+        versioned_acl_for_user_fn = fetch_versioned_implementation(
+            "danswer.access.access", "_get_acl_for_user"
+        )
+        user_acl = frozenset(versioned_acl_for_user_fn(user, db_session))
+        _USER_ACL_CACHE.set(cache_key, user_acl)
+
+    num_lookups = _USER_ACL_CACHE.num_hits + _USER_ACL_CACHE.num_misses
+    if num_lookups % _ACL_CACHE_METRICS_LOG_INTERVAL == 0:
+        logger.info(
+            f"User ACL cache: {_USER_ACL_CACHE.num_hits} hits, "
+            f"{_USER_ACL_CACHE.num_misses} misses"
+        )
+    return set(user_acl)
+
+
+def invalidate_acl_cache(user_ids: list[UUID] | None = None) -> None:
+    """Needs to be called whenever the ACL of users changes, e.g. their user group
+    memberships or the public flag of connector credential pairs. Without user ids,
+    the cached ACLs of all users are dropped."""
+    if user_ids is None:
+        _USER_ACL_CACHE.clear()
+        return
+
+    for user_id in user_ids:
+        _USER_ACL_CACHE.delete(str(user_id))
@@ -31,6 +31,7 @@ from danswer.db.document_set import (
 from danswer.db.engine import get_sqlalchemy_engine
 from danswer.db.index_attempt import delete_index_attempts
 from danswer.db.models import ConnectorCredentialPair
+from danswer.document_index.document_index_utils import bump_index_generation
 from danswer.document_index.interfaces import DocumentIndex
 from danswer.document_index.interfaces import UpdateRequest
 from danswer.server.documents.models import ConnectorCredentialPairIdentifier
@@ -91,6 +92,7 @@ def _delete_connector_credential_pair_batch(
         logger.debug(f"Updating documents: {document_ids_to_update}")
 
         document_index.update(update_requests=update_requests)
+        bump_index_generation()
 
         delete_document_by_connector_credential_pair(
             db_session=db_session,
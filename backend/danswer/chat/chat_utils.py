@@ -13,19 +13,21 @@ from sqlalchemy.orm import Session
 from danswer.chat.models import CitationInfo
 from danswer.chat.models import DanswerAnswerPiece
 from danswer.chat.models import LlmDoc
+from danswer.configs.chat_configs import MAX_CHAT_CHAIN_MESSAGES
 from danswer.configs.chat_configs import MULTILINGUAL_QUERY_EXPANSION
 from danswer.configs.chat_configs import STOP_STREAM_PAT
 from danswer.configs.constants import DocumentSource
 from danswer.configs.constants import IGNORE_FOR_QA
 from danswer.configs.model_configs import GEN_AI_MODEL_VERSION
 from danswer.configs.model_configs import GEN_AI_SINGLE_USER_MESSAGE_EXPECTED_MAX_TOKENS
-from danswer.db.chat import get_chat_messages_by_session
+from danswer.db.chat import get_chat_message_chain
 from danswer.db.models import ChatMessage
 from danswer.db.models import Persona
 from danswer.db.models import Prompt
 from danswer.indexing.models import InferenceChunk
 from danswer.llm.utils import check_number_of_tokens
 from danswer.llm.utils import get_max_input_tokens
+from danswer.llm.utils import translate_danswer_msg_to_langchain
 from danswer.prompts.chat_prompts import CHAT_USER_CONTEXT_FREE_PROMPT
 from danswer.prompts.chat_prompts import CHAT_USER_PROMPT
 from danswer.prompts.chat_prompts import CITATION_REMINDER
@@ -328,44 +330,24 @@ def get_chunks_for_qa(
 def create_chat_chain(
     chat_session_id: int,
     db_session: Session,
+    max_messages: int | None = MAX_CHAT_CHAIN_MESSAGES or None,
 ) -> tuple[ChatMessage, list[ChatMessage]]:
-    """Build the linear chain of messages without including the root message"""
-    mainline_messages: list[ChatMessage] = []
-    all_chat_messages = get_chat_messages_by_session(
+    """Build the linear chain of messages without including the root message, only the
+    `max_messages` most recent messages of a very long chain are included"""
+    mainline_messages = get_chat_message_chain(
         chat_session_id=chat_session_id,
-        user_id=None,
         db_session=db_session,
-        skip_permission_check=True,
+        max_messages=max_messages,
     )
-    id_to_msg = {msg.id: msg for msg in all_chat_messages}
 
-    if not all_chat_messages:
-        raise ValueError("No messages in Chat Session")
+    if not mainline_messages:
+        raise RuntimeError("Could not trace chat message history")
 
-    root_message = all_chat_messages[0]
-    if root_message.parent_message is not None:
+    if mainline_messages[-1].latest_child_message is not None:
         raise RuntimeError(
-            "Invalid root message, unable to fetch valid chat message sequence"
+            "Invalid message chain," "could not find next message in the same session"
         )
 
-    current_message: ChatMessage | None = root_message
-    while current_message is not None:
-        child_msg = current_message.latest_child_message
-        if not child_msg:
-            break
-        current_message = id_to_msg.get(child_msg)
-
-        if current_message is None:
-            raise RuntimeError(
-                "Invalid message chain,"
-                "could not find next message in the same session"
-            )
-
-        mainline_messages.append(current_message)
-
-    if not mainline_messages:
-        raise RuntimeError("Could not trace chat message history")
-
     return mainline_messages[-1], mainline_messages[:-1]
 
 
@@ -388,68 +370,115 @@ def combine_message_chain(
             break
 
         role = message.message_type.value.upper()
-        message_strs.insert(0, f"{role}:\n{message.message}")
+        message_strs.append(f"{role}:\n{message.message}")
         total_token_count += message_token_count
 
-    return "\n\n".join(message_strs)
+    return "\n\n".join(reversed(message_strs))
 
 
 _PER_MESSAGE_TOKEN_BUFFER = 7
 
 
-def find_last_index(lst: list[int], max_prompt_tokens: int) -> int:
-    """From the back, find the index of the last element to include
-    before the list exceeds the maximum"""
-    running_sum = 0
-
-    last_ind = 0
-    for i in range(len(lst) - 1, -1, -1):
-        running_sum += lst[i] + _PER_MESSAGE_TOKEN_BUFFER
-        if running_sum > max_prompt_tokens:
-            last_ind = i + 1
-            break
-    if last_ind >= len(lst):
-        raise ValueError("Last message alone is too large!")
-    return last_ind
-
-
 def drop_messages_history_overflow(
     system_msg: BaseMessage | None,
     system_token_count: int,
-    history_msgs: list[BaseMessage],
-    history_token_counts: list[int],
+    history_msgs: list[ChatMessage],
     final_msg: BaseMessage,
     final_msg_token_count: int,
     max_allowed_tokens: int,
 ) -> list[BaseMessage]:
     """As message history grows, messages need to be dropped starting from the furthest in the past.
     The System message should be kept if at all possible and the latest user input which is inserted in the
-    prompt template must be included"""
-    if len(history_msgs) != len(history_token_counts):
-        # This should never happen
-        raise ValueError("Need exactly 1 token count per message for tracking overflow")
+    prompt template must be included. The history is budgeted with the token counts stored on the messages,
+    from the most recent one back, and only the messages that are kept are translated for the LLM
+    """
+    remaining_tokens = (
+        max_allowed_tokens - final_msg_token_count - _PER_MESSAGE_TOKEN_BUFFER
+    )
+    if remaining_tokens < 0:
+        raise ValueError("Last message alone is too large!")
 
     prompt: list[BaseMessage] = []
 
-    # Start dropping from the history if necessary
-    all_tokens = history_token_counts + [system_token_count, final_msg_token_count]
-    ind_prev_msg_start = find_last_index(
-        all_tokens, max_prompt_tokens=max_allowed_tokens
-    )
+    remaining_tokens -= system_token_count + _PER_MESSAGE_TOKEN_BUFFER
+    if remaining_tokens >= 0:
+        if system_msg:
+            prompt.append(system_msg)
 
-    if system_msg and ind_prev_msg_start <= len(history_msgs):
-        prompt.append(system_msg)
+        kept_history_msgs: list[ChatMessage] = []
+        for history_msg in reversed(history_msgs):
+            # Messages without tokens are not passed to the LLM (e.g. no prompt used)
+            if history_msg.token_count == 0:
+                continue
 
-    prompt.extend(history_msgs[ind_prev_msg_start:])
+            remaining_tokens -= history_msg.token_count + _PER_MESSAGE_TOKEN_BUFFER
+            if remaining_tokens < 0:
+                break
+            kept_history_msgs.append(history_msg)
+
+        prompt.extend(
+            translate_danswer_msg_to_langchain(history_msg)
+            for history_msg in reversed(kept_history_msgs)
+        )
 
     prompt.append(final_msg)
 
     return prompt
 
 
-def in_code_block(llm_text: str) -> bool:
-    count = llm_text.count(TRIPLE_BACKTICK)
-    return count % 2 != 0
+class _CodeBlockTracker:
+    """Keeps track of whether a text that is streamed in piece by piece ends inside of a
+    code block (an odd number of triple backticks), only looking at each new piece once
+    """
+
+    def __init__(self) -> None:
+        # `str.count` matches each run of N backticks N // 3 times
+        self.num_closed_run_matches = 0
+        self.trailing_run_len = 0
+
+    def update(self, text: str) -> None:
+        if "`" not in text:
+            if text:
+                self.num_closed_run_matches += self.trailing_run_len // 3
+                self.trailing_run_len = 0
+            return
+
+        body = text.lstrip("`")
+        if not body:
+            self.trailing_run_len += len(text)
+            return
+
+        self.num_closed_run_matches += (
+            self.trailing_run_len + len(text) - len(body)
+        ) // 3
+        inner = body.rstrip("`")
+        self.num_closed_run_matches += inner.count(TRIPLE_BACKTICK)
+        self.trailing_run_len = len(body) - len(inner)
+
+    @property
+    def in_code_block(self) -> bool:
+        count = self.num_closed_run_matches + self.trailing_run_len // 3
+        return count % 2 != 0
+
+
+_CITATION_PATTERN = re.compile(r"\[(\d+)\]")  # [1], [2] etc
+
+
+def _open_citation_start(
+    segment_open_citation_start: int | None, segment_len: int, text: str
+) -> int | None:
+    """Given where the trailing "[" + digits (e.g. "[", "[1") of a segment starts, if
+    it ends with one, returns where it starts after appending `text` to the segment"""
+    bracket_ind = text.rfind("[")
+    if bracket_ind == -1:
+        if not text or text.isdecimal():
+            return segment_open_citation_start
+        return None
+
+    after_bracket = text[bracket_ind + 1 :]
+    if not after_bracket or after_bracket.isdecimal():
+        return segment_len + bracket_ind
+    return None
 
 
 def extract_citations_from_stream(
@@ -458,9 +487,20 @@ def extract_citations_from_stream(
     doc_id_to_rank_map: dict[str, int],
     stop_stream: str | None = STOP_STREAM_PAT,
 ) -> Iterator[DanswerAnswerPiece | CitationInfo]:
-    llm_out = ""
+    """Replaces the citations of the streamed answer with links to the documents' rank
+    and yields the citations as they appear. The state of the current segment is
+    updated with each new token only, so every token is processed in amortized
+    constant time regardless of how long the answer already is."""
+    code_block_tracker = _CodeBlockTracker()
     max_citation_num = len(context_docs)
     curr_segment = ""
+    # start of a "[" + digits at the end of the segment (a citation in the making)
+    open_citation_start: int | None = None
+    # the same if the segment ends with a newline, ignoring that newline
+    open_citation_before_newline = False
+    # first complete citation of the segment, it stays the first one as tokens
+    # are only ever appended to the segment
+    citation_found: re.Match[str] | None = None
     prepend_bracket = False
     cited_inds = set()
     hold = ""
@@ -484,18 +524,43 @@ def extract_citations_from_stream(
         # This is where the model attempts to do consecutive citations like [1][2]
         if prepend_bracket:
             curr_segment += "[" + curr_segment
+            open_citation_start = len(curr_segment) - 1
             prepend_bracket = False
 
+        # a citation completed by this token can only start at the open "[", if any
+        may_complete_citation = open_citation_start is not None or "[" in token
+        search_start = (
+            open_citation_start
+            if open_citation_start is not None
+            else len(curr_segment)
+        )
+        if token:
+            if not may_complete_citation:
+                # most tokens, nothing to look for
+                open_citation_before_newline = False
+            else:
+                open_citation_before_newline = token.endswith("\n") and (
+                    _open_citation_start(
+                        open_citation_start, len(curr_segment), token[:-1]
+                    )
+                    is not None
+                )
+                open_citation_start = _open_citation_start(
+                    open_citation_start, len(curr_segment), token
+                )
+
         curr_segment += token
-        llm_out += token
+        code_block_tracker.update(token)
 
-        possible_citation_pattern = r"(\[\d*$)"  # [1, [, etc
-        possible_citation_found = re.search(possible_citation_pattern, curr_segment)
+        # [1, [, etc (also before a final newline, like `re.search(r"\[\d*$", ...)`)
+        possible_citation_found = (
+            open_citation_start is not None or open_citation_before_newline
+        )
 
-        citation_pattern = r"\[(\d+)\]"  # [1], [2] etc
-        citation_found = re.search(citation_pattern, curr_segment)
+        if citation_found is None and may_complete_citation:
+            citation_found = _CITATION_PATTERN.search(curr_segment, search_start)
 
-        if citation_found and not in_code_block(llm_out):
+        if citation_found and not code_block_tracker.in_code_block:
             numerical_value = int(citation_found.group(1))
             if 1 <= numerical_value <= max_citation_num:
                 context_llm_doc = context_docs[
@@ -523,7 +588,7 @@ def extract_citations_from_stream(
                     curr_segment = re.sub("]", f"]]({link})", curr_segment, count=1)
 
                 # In case there's another open bracket like [1][, don't want to match this
-            possible_citation_found = None
+            possible_citation_found = False
 
         # if we see "[", but haven't seen the right side, hold back - this may be a
         # citation that needs to be replaced with a link
@@ -537,6 +602,9 @@ def extract_citations_from_stream(
 
         yield DanswerAnswerPiece(answer_piece=curr_segment)
         curr_segment = ""
+        open_citation_start = None
+        open_citation_before_newline = False
+        citation_found = None
 
     if curr_segment:
         if prepend_bracket:
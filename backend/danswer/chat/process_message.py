@@ -1,5 +1,6 @@
 from collections.abc import Callable
 from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from typing import cast
 
@@ -8,6 +9,7 @@ from sqlalchemy.orm import Session
 from danswer.chat.chat_utils import build_chat_system_message
 from danswer.chat.chat_utils import build_chat_user_message
 from danswer.chat.chat_utils import build_doc_context_str
+from danswer.chat.chat_utils import combine_message_chain
 from danswer.chat.chat_utils import compute_max_document_tokens
 from danswer.chat.chat_utils import compute_max_llm_input_tokens
 from danswer.chat.chat_utils import create_chat_chain
@@ -23,12 +25,14 @@ from danswer.chat.models import LLMRelevanceFilterResponse
 from danswer.chat.models import QADocsResponse
 from danswer.chat.models import StreamingError
 from danswer.configs.chat_configs import CHAT_TARGET_CHUNK_PERCENTAGE
+from danswer.configs.chat_configs import ENABLE_SPECULATIVE_RETRIEVAL
 from danswer.configs.chat_configs import MAX_CHUNKS_FED_TO_CHAT
 from danswer.configs.constants import DISABLED_GEN_AI_MSG
 from danswer.configs.constants import MessageType
 from danswer.configs.model_configs import CHUNK_SIZE
+from danswer.configs.model_configs import GEN_AI_HISTORY_CUTOFF
 from danswer.configs.model_configs import GEN_AI_MODEL_VERSION
-from danswer.db.chat import create_db_search_doc
+from danswer.db.chat import create_db_search_docs
 from danswer.db.chat import create_new_chat_message
 from danswer.db.chat import get_chat_message
 from danswer.db.chat import get_chat_session_by_id
@@ -43,6 +47,7 @@ from danswer.db.models import Persona
 from danswer.db.models import SearchDoc as DbSearchDoc
 from danswer.db.models import User
 from danswer.document_index.factory import get_default_document_index
+from danswer.document_index.interfaces import DocumentIndex
 from danswer.indexing.models import InferenceChunk
 from danswer.llm.exceptions import GenAIDisabledException
 from danswer.llm.factory import get_default_llm
@@ -50,15 +55,19 @@ from danswer.llm.interfaces import LLM
 from danswer.llm.utils import get_default_llm_tokenizer
 from danswer.llm.utils import get_max_input_tokens
 from danswer.llm.utils import tokenizer_trim_content
-from danswer.llm.utils import translate_history_to_basemessages
 from danswer.search.models import OptionalSearchSetting
+from danswer.search.models import QueryFlow
 from danswer.search.models import RetrievalDetails
+from danswer.search.models import SearchQuery
+from danswer.search.models import SearchType
 from danswer.search.request_preprocessing import retrieval_preprocessing
 from danswer.search.search_runner import chunks_to_search_docs
 from danswer.search.search_runner import full_chunk_search_generator
 from danswer.search.search_runner import inference_documents_from_ids
 from danswer.secondary_llm_flows.choose_search import check_if_need_search
 from danswer.secondary_llm_flows.query_expansion import history_based_query_rephrase
+from danswer.secondary_llm_flows.query_expansion import query_rephrase_differs
+from danswer.secondary_llm_flows.query_expansion import thread_based_query_rephrase
 from danswer.server.query_and_chat.models import ChatMessageDetail
 from danswer.server.query_and_chat.models import CreateChatMessageRequest
 from danswer.server.utils import get_json_line
@@ -98,10 +107,6 @@ def generate_ai_chat_response(
             llm_tokenizer_encode_func=llm_tokenizer_encode_func,
         )
 
-        history_basemessages, history_token_counts = translate_history_to_basemessages(
-            history
-        )
-
         # Be sure the context_docs passed to build_chat_user_message
         # Is the same as passed in later for extracting citations
         user_message, user_tokens = build_chat_user_message(
@@ -115,8 +120,7 @@ def generate_ai_chat_response(
         prompt = drop_messages_history_overflow(
             system_msg=system_message_or_none,
             system_token_count=system_tokens,
-            history_msgs=history_basemessages,
-            history_token_counts=history_token_counts,
+            history_msgs=history,
             final_msg=user_message,
             final_msg_token_count=user_tokens,
             max_allowed_tokens=compute_max_llm_input_tokens(persona),
@@ -154,6 +158,117 @@ def translate_citations(
     return citation_to_saved_doc_id_map
 
 
+# The search request, predicted search type and flow, the search generator and the top
+# chunks already taken from it
+_FirstRetrieval = tuple[
+    SearchQuery,
+    SearchType | None,
+    QueryFlow | None,
+    Iterator[list[InferenceChunk] | list[bool]],
+    list[InferenceChunk],
+]
+
+
+def _run_first_retrieval(
+    query: str,
+    retrieval_details: RetrievalDetails,
+    persona: Persona,
+    user: User | None,
+    document_index: DocumentIndex,
+    db_session: Session,
+) -> _FirstRetrieval:
+    """Runs the search up to the top chunks, the generator then yields the LLM chunk
+    selection"""
+    (
+        retrieval_request,
+        predicted_search_type,
+        predicted_flow,
+    ) = retrieval_preprocessing(
+        query=query,
+        retrieval_details=retrieval_details,
+        persona=persona,
+        user=user,
+        db_session=db_session,
+    )
+
+    documents_generator = full_chunk_search_generator(
+        search_query=retrieval_request,
+        document_index=document_index,
+        db_session=db_session,
+    )
+    top_chunks = cast(list[InferenceChunk], next(documents_generator))
+    return (
+        retrieval_request,
+        predicted_search_type,
+        predicted_flow,
+        documents_generator,
+        top_chunks,
+    )
+
+
+def _rephrase_and_retrieve(
+    query_message: ChatMessage,
+    history: list[ChatMessage],
+    llm: LLM | None,
+    query_override: str | None,
+    retrieval_details: RetrievalDetails,
+    persona: Persona,
+    user: User | None,
+    document_index: DocumentIndex,
+    db_session: Session,
+    speculative_retrieval: bool = ENABLE_SPECULATIVE_RETRIEVAL,
+) -> tuple[str, _FirstRetrieval]:
+    """Returns the query that was searched for and the results of the first retrieval"""
+    if query_override is not None:
+        rephrased_query = query_override
+    elif speculative_retrieval:
+        user_query = cast(str, query_message.message)
+        if not user_query:
+            raise ValueError("Can't rephrase/search an empty query")
+
+        # The ORM objects belong to this thread's DB session, the rephrase only gets
+        # plain values
+        history_str = combine_message_chain(
+            messages=history, token_limit=GEN_AI_HISTORY_CUTOFF
+        )
+        # Search with the user message while the LLM rephrases it, on follow up messages
+        # the rephrase is often close enough to keep these results
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            rephrase_future = executor.submit(
+                thread_based_query_rephrase,
+                user_query=user_query,
+                history_str=history_str,
+                llm=llm,
+                skip_without_history=False,
+            )
+            first_retrieval = _run_first_retrieval(
+                query=user_query,
+                retrieval_details=retrieval_details,
+                persona=persona,
+                user=user,
+                document_index=document_index,
+                db_session=db_session,
+            )
+            rephrased_query = rephrase_future.result()
+
+        if not query_rephrase_differs(user_query, rephrased_query):
+            return user_query, first_retrieval
+        logger.debug("Rephrased query differs from the user message, searching again")
+    else:
+        rephrased_query = history_based_query_rephrase(
+            query_message=query_message, history=history, llm=llm
+        )
+
+    return rephrased_query, _run_first_retrieval(
+        query=rephrased_query,
+        retrieval_details=retrieval_details,
+        persona=persona,
+        user=user,
+        document_index=document_index,
+        db_session=db_session,
+    )
+
+
 def stream_chat_message_objects(
     new_msg_req: CreateChatMessageRequest,
     user: User | None,
@@ -364,28 +479,23 @@ def stream_chat_message_objects(
             ]
 
         elif run_search:
-            rephrased_query = (
-                history_based_query_rephrase(
-                    query_message=final_msg, history=history_msgs, llm=llm
-                )
-                if query_override is None
-                else query_override
-            )
-
             (
-                retrieval_request,
-                predicted_search_type,
-                predicted_flow,
-            ) = retrieval_preprocessing(
-                query=rephrased_query,
+                rephrased_query,
+                (
+                    retrieval_request,
+                    predicted_search_type,
+                    predicted_flow,
+                    documents_generator,
+                    top_chunks,
+                ),
+            ) = _rephrase_and_retrieve(
+                query_message=final_msg,
+                history=history_msgs,
+                llm=llm,
+                query_override=query_override,
                 retrieval_details=cast(RetrievalDetails, retrieval_options),
                 persona=persona,
                 user=user,
-                db_session=db_session,
-            )
-
-            documents_generator = full_chunk_search_generator(
-                search_query=retrieval_request,
                 document_index=document_index,
                 db_session=db_session,
             )
@@ -393,10 +503,6 @@ def stream_chat_message_objects(
             recency_bias_multiplier = retrieval_request.recency_bias_multiplier
             run_llm_chunk_filter = not retrieval_request.skip_llm_chunk_filter
 
-            # First fetch and return the top chunks to the UI so the user can
-            # immediately see some results
-            top_chunks = cast(list[InferenceChunk], next(documents_generator))
-
             # Get ranking of the documents for citation purposes later
             doc_id_to_rank_map = map_document_id_order(
                 cast(list[InferenceChunk | LlmDoc], top_chunks)
@@ -404,10 +510,9 @@ def stream_chat_message_objects(
 
             top_docs = chunks_to_search_docs(top_chunks)
 
-            reference_db_search_docs = [
-                create_db_search_doc(server_search_doc=top_doc, db_session=db_session)
-                for top_doc in top_docs
-            ]
+            reference_db_search_docs = create_db_search_docs(
+                server_search_docs=top_docs, db_session=db_session
+            )
 
             response_docs = [
                 translate_db_search_doc_to_server_search_doc(db_search_doc)
@@ -48,6 +48,10 @@ SECRET = os.environ.get("SECRET", "")
 SESSION_EXPIRE_TIME_SECONDS = int(
     os.environ.get("SESSION_EXPIRE_TIME_SECONDS") or 86400 * 7
 )  # 7 days
+# Per process cache of the ACL entries of each user so that the user groups aren't
+# resolved on every search, changes made by another process show after the TTL
+USER_ACL_CACHE_SIZE = int(os.environ.get("USER_ACL_CACHE_SIZE") or 10000)
+USER_ACL_CACHE_TTL_SECONDS = int(os.environ.get("USER_ACL_CACHE_TTL_SECONDS") or 60)
 
 # set `VALID_EMAIL_DOMAINS` to a comma seperated list of domains in order to
 # restrict access to Danswer to only users with emails from those domains.
@@ -99,6 +103,41 @@ VESPA_TENANT_PORT = os.environ.get("VESPA_TENANT_PORT") or "19071"
 VESPA_DEPLOYMENT_ZIP = (
     os.environ.get("VESPA_DEPLOYMENT_ZIP") or "/app/danswer/vespa-app.zip"
 )
+# HNSW index for approximate nearest neighbor search on the chunk and title embeddings,
+# without it every vector search compares the query against all embeddings. Applies when
+# the Vespa schema is deployed on startup, Vespa builds the index from the stored vectors
+VESPA_HNSW_ENABLED = os.environ.get("VESPA_HNSW_ENABLED", "").lower() == "true"
+# More links per node / neighbors explored at insert give better recall at the cost of
+# memory and feeding speed
+VESPA_HNSW_MAX_LINKS_PER_NODE = int(
+    os.environ.get("VESPA_HNSW_MAX_LINKS_PER_NODE") or 16
+)
+VESPA_HNSW_NEIGHBORS_TO_EXPLORE_AT_INSERT = int(
+    os.environ.get("VESPA_HNSW_NEIGHBORS_TO_EXPLORE_AT_INSERT") or 200
+)
+# Query time, additional candidates explored beyond the target hits for better recall
+VESPA_HNSW_EXPLORE_ADDITIONAL_HITS = int(
+    os.environ.get("VESPA_HNSW_EXPLORE_ADDITIONAL_HITS") or 0
+)
+# Hybrid search nearest neighbor candidates (targetHits) from the number of hits, the number
+# of chunks passing the filters and the recall target instead of a fixed minimum of 1000
+VESPA_ADAPTIVE_TARGET_HITS = (
+    os.environ.get("VESPA_ADAPTIVE_TARGET_HITS", "").lower() == "true"
+)
+# Higher means more candidates, 0.95 gives 20 candidates per hit
+VESPA_TARGET_HITS_RECALL_TARGET = max(
+    0.0, min(0.999, float(os.environ.get("VESPA_TARGET_HITS_RECALL_TARGET") or 0.95))
+)
+# Tail latency protection, a query which Vespa hasn't answered within the given percentile
+# of the recent query latencies is sent a second time and the first answer is used. Adds
+# that share of the queries as extra load on Vespa, at most the given number of these
+# duplicate queries are in flight at once
+VESPA_HEDGED_QUERIES = os.environ.get("VESPA_HEDGED_QUERIES", "").lower() == "true"
+VESPA_HEDGE_LATENCY_PERCENTILE = max(
+    50.0, min(99.9, float(os.environ.get("VESPA_HEDGE_LATENCY_PERCENTILE") or 95))
+)
+VESPA_HEDGE_MIN_DELAY_MS = float(os.environ.get("VESPA_HEDGE_MIN_DELAY_MS") or 20)
+VESPA_MAX_HEDGES_IN_FLIGHT = int(os.environ.get("VESPA_MAX_HEDGES_IN_FLIGHT") or 4)
 # Number of documents in a batch during indexing (further batching done by chunks before passing to bi-encoder)
 try:
     INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE", 16))
@@ -127,6 +166,11 @@ ENABLE_EXPENSIVE_EXPERT_CALLS = False
 GOOGLE_DRIVE_INCLUDE_SHARED = False
 GOOGLE_DRIVE_FOLLOW_SHORTCUTS = False
 GOOGLE_DRIVE_ONLY_ORG_PUBLIC = False
+# Number of files exported / downloaded concurrently, set to 1 to fetch serially
+GOOGLE_DRIVE_NUM_THREADS = int(os.environ.get("GOOGLE_DRIVE_NUM_THREADS") or 8)
+GOOGLE_DRIVE_MAX_REQUESTS_PER_MINUTE = int(
+    os.environ.get("GOOGLE_DRIVE_MAX_REQUESTS_PER_MINUTE") or 12000
+)
 
 FILE_CONNECTOR_TMP_STORAGE_PATH = os.environ.get(
     "FILE_CONNECTOR_TMP_STORAGE_PATH", "/home/file_connector_storage"
@@ -139,6 +183,10 @@ WEB_CONNECTOR_IGNORED_CLASSES = os.environ.get(
 WEB_CONNECTOR_IGNORED_ELEMENTS = os.environ.get(
     "WEB_CONNECTOR_IGNORED_ELEMENTS", "nav,footer,meta,script,style,symbol,aside"
 ).split(",")
+# Parser backend used by BeautifulSoup when converting HTML to text for the Web, Zendesk,
+# Document360, Bookstack, Guru, Loopio and Google Sites connectors. Set to "lxml" for
+# significantly faster parsing, falls back to "html.parser" if lxml is not installed
+HTML_PARSER_BACKEND = os.environ.get("HTML_PARSER_BACKEND") or "html.parser"
 WEB_CONNECTOR_OAUTH_CLIENT_ID = os.environ.get("WEB_CONNECTOR_OAUTH_CLIENT_ID")
 WEB_CONNECTOR_OAUTH_CLIENT_SECRET = os.environ.get("WEB_CONNECTOR_OAUTH_CLIENT_SECRET")
 WEB_CONNECTOR_OAUTH_TOKEN_URL = os.environ.get("WEB_CONNECTOR_OAUTH_TOKEN_URL")
@@ -160,6 +208,26 @@ GONG_CONNECTOR_START_TIME = os.environ.get("GONG_CONNECTOR_START_TIME")
 
 GITHUB_CONNECTOR_BASE_URL = os.environ.get("GITHUB_CONNECTOR_BASE_URL") or None
 
+# Where rate limit budgets shared between connectors (same rate limit key) are kept.
+# "memory" shares them between the threads of a process, "file" also shares them with
+# the other processes on the same host (e.g. parallel indexing attempts for a source)
+CONNECTOR_RATE_LIMIT_BACKEND = (
+    os.environ.get("CONNECTOR_RATE_LIMIT_BACKEND") or "memory"
+).lower()
+CONNECTOR_RATE_LIMIT_STATE_DIR = (
+    os.environ.get("CONNECTOR_RATE_LIMIT_STATE_DIR") or "/tmp/danswer_rate_limits"
+)
+
+# Number of threads used to fetch Slack threads / channel histories concurrently, calls
+# are still kept within Slack's per method rate limit tiers. Set to 1 to fetch serially
+SLACK_CONNECTOR_NUM_THREADS = int(os.environ.get("SLACK_CONNECTOR_NUM_THREADS") or 8)
+
+# Number of result pages the paginated connectors (Confluence, GitHub, Notion) fetch in
+# the background while the current page is being processed. Set to 0 to fetch serially
+CONNECTOR_PAGINATION_LOOKAHEAD = int(
+    os.environ.get("CONNECTOR_PAGINATION_LOOKAHEAD") or 1
+)
+
 DASK_JOB_CLIENT_ENABLED = (
     os.environ.get("DASK_JOB_CLIENT_ENABLED", "").lower() == "true"
 )
@@ -28,6 +28,23 @@ DISABLE_LLM_QUERY_ANSWERABILITY = QA_PROMPT_OVERRIDE == "weak"
 DISABLE_LLM_FILTER_EXTRACTION = (
     os.environ.get("DISABLE_LLM_FILTER_EXTRACTION", "").lower() == "true"
 )
+# The LLM outputs of the filter extraction are reused for the same query (and LLM) for
+# this many seconds, set the size to 0 to always call the LLM
+FILTER_EXTRACTION_CACHE_SIZE = int(
+    os.environ.get("FILTER_EXTRACTION_CACHE_SIZE") or 1024
+)
+FILTER_EXTRACTION_CACHE_TTL_SECONDS = int(
+    os.environ.get("FILTER_EXTRACTION_CACHE_TTL_SECONDS") or 300
+)
+# Queries without any time expressions / source names skip the LLM filter extraction.
+# The check only knows English words, so it is never applied to queries with non-ASCII
+# characters or when MULTILINGUAL_QUERY_EXPANSION is set
+ENABLE_FILTER_EXTRACTION_PRECHECK = (
+    os.environ.get("ENABLE_FILTER_EXTRACTION_PRECHECK", "").lower() == "true"
+)
+# Connector changes made by this process are seen immediately, changes by other processes
+# (e.g. connector deletion in the background jobs) after at most this many seconds
+DOCUMENT_SOURCES_CACHE_TTL_SECONDS = 60
 # Whether the LLM should evaluate all of the document chunks passed in for usefulness
 # in relation to the user query
 DISABLE_LLM_CHUNK_FILTER = (
@@ -37,6 +54,15 @@ DISABLE_LLM_CHUNK_FILTER = (
 DISABLE_LLM_CHOOSE_SEARCH = (
     os.environ.get("DISABLE_LLM_CHOOSE_SEARCH", "").lower() == "true"
 )
+# Start the chat search with the user message while the LLM rephrases it using the chat
+# history, the search is only run again if the rephrased query shares less than
+# SPECULATIVE_RETRIEVAL_MIN_OVERLAP of its words with the user message
+ENABLE_SPECULATIVE_RETRIEVAL = (
+    os.environ.get("ENABLE_SPECULATIVE_RETRIEVAL", "").lower() == "true"
+)
+SPECULATIVE_RETRIEVAL_MIN_OVERLAP = float(
+    os.environ.get("SPECULATIVE_RETRIEVAL_MIN_OVERLAP") or 0.8
+)
 # 1 edit per 20 characters, currently unused due to fuzzy match being too slow
 QUOTE_ALLOWED_ERROR_PERCENT = 0.05
 QA_TIMEOUT = int(os.environ.get("QA_TIMEOUT") or "60")  # 60 seconds
@@ -49,6 +75,16 @@ if os.environ.get("EDIT_KEYWORD_QUERY"):
     EDIT_KEYWORD_QUERY = os.environ.get("EDIT_KEYWORD_QUERY", "").lower() == "true"
 else:
     EDIT_KEYWORD_QUERY = not os.environ.get("DOCUMENT_ENCODER_MODEL")
+# Number of processed (stop words removed, lemmatized) keyword queries to keep in
+# memory per process, set to 0 to disable the cache
+QUERY_PROCESSING_CACHE_SIZE = int(os.environ.get("QUERY_PROCESSING_CACHE_SIZE") or 1024)
+# Number of final search results (ranked chunks and LLM relevance filter results) of
+# identical searches to keep in memory per process, set to 0 to disable the cache. Any
+# change to the indexed documents invalidates the cached results.
+SEARCH_RESULT_CACHE_SIZE = int(os.environ.get("SEARCH_RESULT_CACHE_SIZE") or 256)
+SEARCH_RESULT_CACHE_TTL_SECONDS = int(
+    os.environ.get("SEARCH_RESULT_CACHE_TTL_SECONDS") or 600
+)
 # Weighting factor between Vector and Keyword Search, 1 for completely vector search
 HYBRID_ALPHA = max(0, min(1, float(os.environ.get("HYBRID_ALPHA") or 0.62)))
 # Weighting factor between Title and Content of documents during search, 1 for completely
@@ -67,3 +103,6 @@ STOP_STREAM_PAT = os.environ.get("STOP_STREAM_PAT") or None
 
 # The backend logic for this being True isn't fully supported yet
 HARD_DELETE_CHATS = False
+# Only the most recent messages of the current branch of a chat session are loaded for
+# the chat history, set to 0 to always load the full branch
+MAX_CHAT_CHAIN_MESSAGES = int(os.environ.get("MAX_CHAT_CHAIN_MESSAGES") or 1000)
@@ -19,6 +19,10 @@ DOCUMENT_SETS = "document_sets"
 TIME_FILTER = "time_filter"
 METADATA = "metadata"
 METADATA_LIST = "metadata_list"
+# Native Vespa maps replacing the json strings of the `metadata` and `source_links` fields
+METADATA_MAP = "metadata_map"
+METADATA_LIST_MAP = "metadata_list_map"
+SOURCE_LINK_MAP = "source_link_map"
 MATCH_HIGHLIGHTS = "match_highlights"
 # stored in the `metadata` of a chunk. Used to signify that this chunk should
 # not be used for QA. For example, Google Drive file types which can't be parsed
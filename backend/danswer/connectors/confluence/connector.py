@@ -1,5 +1,6 @@
 from collections.abc import Callable
 from collections.abc import Collection
+from collections.abc import Iterator
 from datetime import datetime
 from datetime import timezone
 from functools import lru_cache
@@ -12,10 +13,12 @@ from atlassian import Confluence  # type:ignore
 from requests import HTTPError
 
 from danswer.configs.app_configs import CONFLUENCE_CONNECTOR_LABELS_TO_SKIP
+from danswer.configs.app_configs import CONNECTOR_PAGINATION_LOOKAHEAD
 from danswer.configs.app_configs import CONTINUE_ON_CONNECTOR_FAILURE
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.constants import DocumentSource
 from danswer.connectors.cross_connector_utils.html_utils import format_document_soup
+from danswer.connectors.cross_connector_utils.pagination import prefetch_pages
 from danswer.connectors.interfaces import GenerateDocumentsOutput
 from danswer.connectors.interfaces import LoadConnector
 from danswer.connectors.interfaces import PollConnector
@@ -172,19 +175,22 @@ class ConfluenceConnector(LoadConnector, PollConnector):
         # skip it. This is generally used to avoid indexing extra sensitive
         # pages.
         labels_to_skip: list[str] = CONFLUENCE_CONNECTOR_LABELS_TO_SKIP,
+        prefetch_lookahead: int = CONNECTOR_PAGINATION_LOOKAHEAD,
     ) -> None:
         self.batch_size = batch_size
+        self.prefetch_lookahead = prefetch_lookahead
         self.continue_on_failure = continue_on_failure
         self.labels_to_skip = set(labels_to_skip)
         self.wiki_base, self.space, self.is_cloud = extract_confluence_keys_from_url(
             wiki_page_url
         )
+        self.credentials: dict[str, Any] | None = None
         self.confluence_client: Confluence | None = None
 
-    def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
+    def _build_confluence_client(self, credentials: dict[str, Any]) -> Confluence:
         username = credentials["confluence_username"]
         access_token = credentials["confluence_access_token"]
-        self.confluence_client = Confluence(
+        return Confluence(
             url=self.wiki_base,
             # passing in username causes issues for Confluence data center
             username=username if self.is_cloud else None,
@@ -192,6 +198,10 @@ class ConfluenceConnector(LoadConnector, PollConnector):
             token=access_token if not self.is_cloud else None,
             cloud=self.is_cloud,
         )
+
+    def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
+        self.credentials = credentials
+        self.confluence_client = self._build_confluence_client(credentials)
         return None
 
     def _fetch_pages(
@@ -294,15 +304,36 @@ class ConfluenceConnector(LoadConnector, PollConnector):
             logger.exception("Ran into exception when fetching labels from Confluence")
             return []
 
+    def _fetch_page_batches(
+        self, confluence_client: Confluence
+    ) -> Iterator[Collection[dict[str, Any]]]:
+        if self.prefetch_lookahead > 0 and self.credentials is not None:
+            # the pages are listed by a background thread while the labels / comments
+            # of the current batch are fetched with `confluence_client`, the requests
+            # session of a client must not be used by both threads
+            confluence_client = self._build_confluence_client(self.credentials)
+
+        def _fetch_batch(
+            start_ind: int,
+        ) -> tuple[Collection[dict[str, Any]], int | None]:
+            batch = self._fetch_pages(confluence_client, start_ind)
+            if len(batch) < self.batch_size:
+                return batch, None
+            return batch, start_ind + len(batch)
+
+        # the next batch of pages is fetched while the current one is processed
+        return prefetch_pages(_fetch_batch, 0, lookahead=self.prefetch_lookahead)
+
     def _get_doc_batch(
-        self, start_ind: int, time_filter: Callable[[datetime], bool] | None = None
-    ) -> tuple[list[Document], int]:
+        self,
+        batch: Collection[dict[str, Any]],
+        time_filter: Callable[[datetime], bool] | None = None,
+    ) -> list[Document]:
         doc_batch: list[Document] = []
 
         if self.confluence_client is None:
             raise ConnectorMissingCredentialError("Confluence")
 
-        batch = self._fetch_pages(self.confluence_client, start_ind)
         for page in batch:
             last_modified_str = page["version"]["when"]
             author = cast(str | None, page["version"].get("by", {}).get("email"))
@@ -357,22 +388,17 @@ class ConfluenceConnector(LoadConnector, PollConnector):
                         },
                     )
                 )
-        return doc_batch, len(batch)
+        return doc_batch
 
     def load_from_state(self) -> GenerateDocumentsOutput:
         if self.confluence_client is None:
             raise ConnectorMissingCredentialError("Confluence")
 
-        start_ind = 0
-        while True:
-            doc_batch, num_pages = self._get_doc_batch(start_ind)
-            start_ind += num_pages
+        for batch in self._fetch_page_batches(self.confluence_client):
+            doc_batch = self._get_doc_batch(batch)
             if doc_batch:
                 yield doc_batch
 
-            if num_pages < self.batch_size:
-                break
-
     def poll_source(
         self, start: SecondsSinceUnixEpoch, end: SecondsSinceUnixEpoch
     ) -> GenerateDocumentsOutput:
@@ -382,18 +408,13 @@ class ConfluenceConnector(LoadConnector, PollConnector):
         start_time = datetime.fromtimestamp(start, tz=timezone.utc)
         end_time = datetime.fromtimestamp(end, tz=timezone.utc)
 
-        start_ind = 0
-        while True:
-            doc_batch, num_pages = self._get_doc_batch(
-                start_ind, time_filter=lambda t: start_time <= t <= end_time
+        for batch in self._fetch_page_batches(self.confluence_client):
+            doc_batch = self._get_doc_batch(
+                batch, time_filter=lambda t: start_time <= t <= end_time
             )
-            start_ind += num_pages
             if doc_batch:
                 yield doc_batch
 
-            if num_pages < self.batch_size:
-                break
-
 
 if __name__ == "__main__":
     import os
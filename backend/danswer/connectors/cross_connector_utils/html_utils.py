@@ -1,13 +1,18 @@
 import re
-from copy import copy
 from dataclasses import dataclass
+from functools import lru_cache
 
 import bs4
 
+from danswer.configs.app_configs import HTML_PARSER_BACKEND
 from danswer.configs.app_configs import WEB_CONNECTOR_IGNORED_CLASSES
 from danswer.configs.app_configs import WEB_CONNECTOR_IGNORED_ELEMENTS
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
 
 MINTLIFY_UNWANTED = ["sticky", "hidden"]
+DEFAULT_HTML_PARSER = "html.parser"
 
 
 @dataclass
@@ -16,6 +21,30 @@ class ParsedHTML:
     cleaned_text: str
 
 
+@lru_cache(maxsize=None)
+def _resolve_html_parser(parser: str) -> str:
+    """Falls back to the stdlib parser if the requested backend is not installed"""
+    if parser == DEFAULT_HTML_PARSER:
+        return parser
+    try:
+        bs4.BeautifulSoup("", parser)
+    except bs4.FeatureNotFound:
+        logger.warning(
+            f"HTML parser '{parser}' is not available, "
+            f"falling back to '{DEFAULT_HTML_PARSER}'"
+        )
+        return DEFAULT_HTML_PARSER
+    return parser
+
+
+def parse_html_to_soup(
+    text: str | bytes, parser: str | None = None
+) -> bs4.BeautifulSoup:
+    """Builds the soup with the configured parser backend (HTML_PARSER_BACKEND),
+    all of the supported backends produce the same text via format_document_soup"""
+    return bs4.BeautifulSoup(text, _resolve_html_parser(parser or HTML_PARSER_BACKEND))
+
+
 def strip_excessive_newlines_and_spaces(document: str) -> str:
     # collapse repeated spaces into one
     document = re.sub(r" +", " ", document)
@@ -118,8 +147,8 @@ def format_document_soup(
     return strip_excessive_newlines_and_spaces(text)
 
 
-def parse_html_page_basic(text: str) -> str:
-    soup = bs4.BeautifulSoup(text, "html.parser")
+def parse_html_page_basic(text: str, parser: str | None = None) -> str:
+    soup = parse_html_to_soup(text, parser)
     return format_document_soup(soup)
 
 
@@ -127,9 +156,10 @@ def web_html_cleanup(
     page_content: str | bs4.BeautifulSoup,
     mintlify_cleanup_enabled: bool = True,
     additional_element_types_to_discard: list[str] | None = None,
+    parser: str | None = None,
 ) -> ParsedHTML:
     if isinstance(page_content, str):
-        soup = bs4.BeautifulSoup(page_content, "html.parser")
+        soup = parse_html_to_soup(page_content, parser)
     else:
         soup = page_content
 
@@ -140,23 +170,20 @@ def web_html_cleanup(
         title_tag.extract()
 
     # Heuristics based cleaning of elements based on css classes
-    unwanted_classes = copy(WEB_CONNECTOR_IGNORED_CLASSES)
+    unwanted_classes = set(WEB_CONNECTOR_IGNORED_CLASSES)
     if mintlify_cleanup_enabled:
-        unwanted_classes.extend(MINTLIFY_UNWANTED)
-    for undesired_element in unwanted_classes:
-        [
-            tag.extract()
-            for tag in soup.find_all(
-                class_=lambda x: x and undesired_element in x.split()
-            )
-        ]
-
-    for undesired_tag in WEB_CONNECTOR_IGNORED_ELEMENTS:
-        [tag.extract() for tag in soup.find_all(undesired_tag)]
-
+        unwanted_classes.update(MINTLIFY_UNWANTED)
+    unwanted_tags = set(WEB_CONNECTOR_IGNORED_ELEMENTS)
     if additional_element_types_to_discard:
-        for undesired_tag in additional_element_types_to_discard:
-            [tag.extract() for tag in soup.find_all(undesired_tag)]
+        unwanted_tags.update(additional_element_types_to_discard)
+
+    # Single walk over the tree instead of one find_all per class / element type
+    for tag in soup.find_all(True):
+        tag_classes = tag.get("class") or []
+        if isinstance(tag_classes, str):
+            tag_classes = tag_classes.split()
+        if tag.name in unwanted_tags or not unwanted_classes.isdisjoint(tag_classes):
+            tag.extract()
 
     # 200B is ZeroWidthSpace which we don't care for
     page_text = format_document_soup(soup).replace("\u200B", "")
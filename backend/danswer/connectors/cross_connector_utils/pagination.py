@@ -0,0 +1,45 @@
+from collections.abc import Callable
+from collections.abc import Generator
+from collections.abc import Iterator
+from typing import TypeVar
+
+from danswer.configs.app_configs import CONNECTOR_PAGINATION_LOOKAHEAD
+from danswer.utils.threadpool_concurrency import prefetch_iterator
+
+P = TypeVar("P")
+C = TypeVar("C")
+
+
+def _fetch_pages_serially(
+    fetch_page: Callable[[C], tuple[P, C | None]], first_cursor: C
+) -> Iterator[P]:
+    cursor: C | None = first_cursor
+    while cursor is not None:
+        page, cursor = fetch_page(cursor)
+        yield page
+
+
+def prefetch_pages(
+    fetch_page: Callable[[C], tuple[P, C | None]],
+    first_cursor: C,
+    lookahead: int = CONNECTOR_PAGINATION_LOOKAHEAD,
+) -> Generator[P, None, None]:
+    """Yields the pages of a paginated API in order. `fetch_page` takes a cursor (offset,
+    page number, query with a `start_cursor`, ...) and returns the page along with the
+    cursor of the next page, or None if it was the last one.
+
+    Up to `lookahead` pages are fetched by a background thread while the caller is still
+    processing the current page, so network latency overlaps with converting / indexing
+    the documents. With `lookahead=0` the pages are fetched serially in the calling
+    thread. The page requests are made one after the other, but they run concurrently
+    with whatever requests the caller makes while processing a page. `fetch_page` must
+    therefore not share a client / session that is not thread safe with the caller, and
+    rate limits have to account for both threads.
+
+    An exception raised by `fetch_page` is re-raised to the caller in place of the page
+    that failed, after the pages before it have been yielded. If the caller stops early,
+    no further pages are requested (the request in flight, if any, is left to finish).
+    """
+    yield from prefetch_iterator(
+        _fetch_pages_serially(fetch_page, first_cursor), lookahead=lookahead
+    )
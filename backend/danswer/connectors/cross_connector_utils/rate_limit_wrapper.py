@@ -1,10 +1,24 @@
+import abc
+import hashlib
+import os
+import re
+import struct
+import threading
 import time
+from collections import deque
 from collections.abc import Callable
+from copy import copy
+from dataclasses import dataclass
 from functools import wraps
+from pathlib import Path
 from typing import Any
 from typing import cast
 from typing import TypeVar
 
+from filelock import FileLock
+
+from danswer.configs.app_configs import CONNECTOR_RATE_LIMIT_BACKEND
+from danswer.configs.app_configs import CONNECTOR_RATE_LIMIT_STATE_DIR
 from danswer.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -12,11 +26,165 @@ logger = setup_logger()
 
 F = TypeVar("F", bound=Callable[..., Any])
 
+FILE_LOCK_TIMEOUT = 10
+
 
 class RateLimitTriedTooManyTimesError(Exception):
     pass
 
 
+@dataclass
+class RateLimitMetrics:
+    """Wait time statistics for a rate limit key within the current process"""
+
+    num_calls: int = 0
+    num_waits: int = 0
+    total_wait_time: float = 0  # in seconds
+    max_wait_time: float = 0  # in seconds
+
+    @property
+    def avg_wait_time(self) -> float:
+        return self.total_wait_time / self.num_calls if self.num_calls else 0
+
+
+_METRICS: dict[str, RateLimitMetrics] = {}
+_METRICS_LOCK = threading.Lock()
+
+
+def _record_call(key: str, wait_time: float) -> None:
+    with _METRICS_LOCK:
+        metrics = _METRICS.setdefault(key, RateLimitMetrics())
+        metrics.num_calls += 1
+        if wait_time > 0:
+            metrics.num_waits += 1
+            metrics.total_wait_time += wait_time
+            metrics.max_wait_time = max(metrics.max_wait_time, wait_time)
+
+
+def get_rate_limit_metrics() -> dict[str, RateLimitMetrics]:
+    with _METRICS_LOCK:
+        return {key: copy(metrics) for key, metrics in _METRICS.items()}
+
+
+def reset_rate_limit_metrics() -> None:
+    with _METRICS_LOCK:
+        _METRICS.clear()
+
+
+class RateLimitBackend(abc.ABC):
+    """Stores the call history of each rate limit key. Acquiring a slot is atomic
+    for all users of the same backend."""
+
+    @abc.abstractmethod
+    def try_acquire(self, key: str, max_calls: int, period: float) -> float:
+        """Records a call for `key` if fewer than `max_calls` happened in the last
+        `period` seconds and returns 0. Otherwise nothing is recorded and the number
+        of seconds until the oldest call expires is returned."""
+        raise NotImplementedError
+
+
+def _acquire_from_history(
+    call_history: deque[float], max_calls: int, period: float, now: float
+) -> float:
+    time_to_expire_before = now - period
+    while call_history and call_history[0] <= time_to_expire_before:
+        call_history.popleft()
+
+    if len(call_history) < max_calls:
+        call_history.append(now)
+        return 0
+    return call_history[0] - time_to_expire_before
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Lock protected call history, shared by all threads of the process"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self._call_histories: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, max_calls: int, period: float) -> float:
+        with self._lock:
+            call_history = self._call_histories.setdefault(key, deque())
+            return _acquire_from_history(call_history, max_calls, period, self.clock())
+
+
+# Ring buffer file layout: the index of the oldest slot followed by `max_calls` slots
+_RING_HEADER = struct.Struct("<Q")
+_RING_SLOT = struct.Struct("<d")
+
+
+class FileRateLimitBackend(RateLimitBackend):
+    """Times of the last `max_calls` calls of each key, stored in a ring buffer file
+    guarded by a file lock. Shared by all of the processes on the host, e.g. the indexing
+    attempts spawned by the background job client for the same source. Only the oldest
+    of those calls decides whether another one is allowed, so a call reads and writes a
+    single slot no matter how large `max_calls` is."""
+
+    def __init__(self, dir_path: str, clock: Callable[[], float] = time.time) -> None:
+        self.dir_path = Path(dir_path)
+        self.dir_path.mkdir(parents=True, exist_ok=True)
+        # wall clock time since monotonic clocks are not comparable across processes
+        self.clock = clock
+        # file locks are not meant to be shared across threads of the same process
+        self._thread_lock = threading.Lock()
+
+    def _get_file_path(self, key: str) -> Path:
+        return self.dir_path / (re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".calls")
+
+    def try_acquire(self, key: str, max_calls: int, period: float) -> float:
+        file_path = self._get_file_path(key)
+        file_size = _RING_HEADER.size + max_calls * _RING_SLOT.size
+        with self._thread_lock, FileLock(file_path.with_suffix(".lock")).acquire(
+            timeout=FILE_LOCK_TIMEOUT
+        ), os.fdopen(os.open(file_path, os.O_RDWR | os.O_CREAT), "r+b") as f:
+            if os.fstat(f.fileno()).st_size != file_size:
+                # new key or `max_calls` changed, all slots start out long expired
+                f.write(bytes(file_size))
+                f.truncate()
+
+            f.seek(0)
+            (oldest_ind,) = _RING_HEADER.unpack(f.read(_RING_HEADER.size))
+            slot_offset = _RING_HEADER.size + oldest_ind * _RING_SLOT.size
+            f.seek(slot_offset)
+            (oldest_call,) = _RING_SLOT.unpack(f.read(_RING_SLOT.size))
+
+            now = self.clock()
+            time_to_expire_before = now - period
+            if oldest_call > time_to_expire_before:
+                return oldest_call - time_to_expire_before
+
+            # the new call takes the place of the oldest one
+            f.seek(slot_offset)
+            f.write(_RING_SLOT.pack(now))
+            f.seek(0)
+            f.write(_RING_HEADER.pack((oldest_ind + 1) % max_calls))
+            return 0
+
+
+def credential_rate_limit_key(source: str, *credential_parts: str | None) -> str:
+    """Rate limit key for the budget of a single credential / tenant of `source`. The
+    credential is hashed since the keys end up in file names and metrics."""
+    credential_hash = hashlib.sha256(
+        "\0".join(part or "" for part in credential_parts).encode()
+    ).hexdigest()
+    return f"{source}_{credential_hash[:16]}"
+
+
+_DEFAULT_BACKEND: RateLimitBackend | None = None
+
+
+def get_default_rate_limit_backend() -> RateLimitBackend:
+    global _DEFAULT_BACKEND
+    if _DEFAULT_BACKEND is None:
+        if CONNECTOR_RATE_LIMIT_BACKEND == "file":
+            _DEFAULT_BACKEND = FileRateLimitBackend(CONNECTOR_RATE_LIMIT_STATE_DIR)
+        else:
+            _DEFAULT_BACKEND = InMemoryRateLimitBackend()
+    return _DEFAULT_BACKEND
+
+
 class _RateLimitDecorator:
     """Builds a generic wrapper/decorator for calls to external APIs that
     prevents making more than `max_calls` requests per `period`
@@ -24,63 +192,121 @@ class _RateLimitDecorator:
     Implementation inspired by the `ratelimit` library:
     https://github.com/tomasbasham/ratelimit.
 
-    NOTE: is not thread safe.
+    Thread safe. If a `key` is provided, all functions decorated with the same key
+    share a single budget through the configured backend (CONNECTOR_RATE_LIMIT_BACKEND),
+    which can also be shared across processes. The key can also be a function of the
+    call's arguments, e.g. so that every credential gets its own budget. Without a key,
+    the budget is private to the decorated function.
     """
 
     def __init__(
         self,
         max_calls: int,
         period: float,  # in seconds
-        sleep_time: float = 2,  # in seconds
-        sleep_backoff: float = 2,  # applies exponential backoff
+        sleep_time: float = 2,  # in seconds, max time for a single wait
+        sleep_backoff: float = 2,  # applies exponential backoff to `sleep_time`
         max_num_sleep: int = 0,
+        key: str | Callable[..., str] | None = None,
+        backend: RateLimitBackend | None = None,
     ):
         self.max_calls = max_calls
         self.period = period
         self.sleep_time = sleep_time
         self.sleep_backoff = sleep_backoff
         self.max_num_sleep = max_num_sleep
+        self.key = key
 
-        self.call_history: list[float] = []
-        self.curr_calls = 0
+        if backend is not None:
+            self.backend = backend
+        elif key is not None:
+            self.backend = get_default_rate_limit_backend()
+        else:
+            self.backend = InMemoryRateLimitBackend()
 
     def __call__(self, func: F) -> F:
+        default_key = f"{func.__module__}.{func.__qualname__}"
+
         @wraps(func)
         def wrapped_func(*args: list, **kwargs: dict[str, Any]) -> Any:
-            # cleanup calls which are no longer relevant
-            self._cleanup()
-
-            # check if we've exceeded the rate limit
+            key = (
+                self.key(*args, **kwargs)
+                if callable(self.key)
+                else self.key or default_key
+            )
+            total_wait_time = 0.0
             sleep_cnt = 0
-            while len(self.call_history) == self.max_calls:
-                sleep_time = self.sleep_time * (self.sleep_backoff**sleep_cnt)
-                logger.info(
-                    f"Rate limit exceeded for function {func.__name__}. "
-                    f"Waiting {sleep_time} seconds before retrying."
+            # check if we've exceeded the rate limit
+            while True:
+                time_until_free = self.backend.try_acquire(
+                    key, self.max_calls, self.period
                 )
-                time.sleep(sleep_time)
-                sleep_cnt += 1
+                if time_until_free <= 0:
+                    break
+
                 if self.max_num_sleep != 0 and sleep_cnt >= self.max_num_sleep:
                     raise RateLimitTriedTooManyTimesError(
                         f"Exceeded '{self.max_num_sleep}' retries for function '{func.__name__}'"
                     )
 
-                self._cleanup()
+                # sleep until a slot frees up, but no longer than the backoff allows
+                # since other threads / processes may be competing for the same slot
+                sleep_time = min(
+                    time_until_free, self.sleep_time * (self.sleep_backoff**sleep_cnt)
+                )
+                logger.info(
+                    f"Rate limit exceeded for function {func.__name__}. "
+                    f"Waiting {sleep_time:.2f} seconds before retrying."
+                )
+                time.sleep(sleep_time)
+                total_wait_time += sleep_time
+                sleep_cnt += 1
 
-            # add the current call to the call history
-            self.call_history.append(time.monotonic())
+            _record_call(key, total_wait_time)
             return func(*args, **kwargs)
 
         return cast(F, wrapped_func)
 
-    def _cleanup(self) -> None:
-        curr_time = time.monotonic()
-        time_to_expire_before = curr_time - self.period
-        self.call_history = [
-            call_time
-            for call_time in self.call_history
-            if call_time > time_to_expire_before
-        ]
-
 
 rate_limit_builder = _RateLimitDecorator
+
+
+class TokenBucket:
+    """Thread safe token bucket. Allows bursts of up to `capacity` calls and then
+    refills at `rate` tokens per second. `acquire` blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity if capacity is not None else rate, 1)
+
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._last_refill) * self.rate
+        )
+        self._last_refill = now
+
+    def try_acquire(self) -> float:
+        """Takes a token if one is available. Returns 0 on success, otherwise the
+        number of seconds until the next token will be available"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Blocks until a token is taken, returns the total time spent waiting"""
+        waited = 0.0
+        while True:
+            wait_time = self.try_acquire()
+            if wait_time <= 0:
+                return waited
+            time.sleep(wait_time)
+            waited += wait_time
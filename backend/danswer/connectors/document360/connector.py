@@ -9,6 +9,9 @@ import requests
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.constants import DocumentSource
 from danswer.connectors.cross_connector_utils.html_utils import parse_html_page_basic
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    credential_rate_limit_key,
+)
 from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
     rate_limit_builder,
 )
@@ -52,9 +55,16 @@ class Document360Connector(LoadConnector, PollConnector):
 
     # rate limiting set based on the enterprise plan: https://apidocs.document360.com/apidocs/rate-limiting
     # NOTE: retry will handle cases where user is not on enterprise plan - we will just hit the rate limit
-    # and then retry after a period
+    # and then retry after a period. Keyed by the API token so that concurrent indexing attempts
+    # with the same token share its budget
     @retry_builder()
-    @rate_limit_builder(max_calls=100, period=60)
+    @rate_limit_builder(
+        max_calls=100,
+        period=60,
+        key=lambda self, *args, **kwargs: credential_rate_limit_key(
+            "document360", self.api_token
+        ),
+    )
     def _make_request(self, endpoint: str, params: Optional[dict] = None) -> Any:
         if not self.api_token:
             raise ConnectorMissingCredentialError("Document360")
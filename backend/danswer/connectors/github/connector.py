@@ -13,9 +13,11 @@ from github.Issue import Issue
 from github.PaginatedList import PaginatedList
 from github.PullRequest import PullRequest
 
+from danswer.configs.app_configs import CONNECTOR_PAGINATION_LOOKAHEAD
 from danswer.configs.app_configs import GITHUB_CONNECTOR_BASE_URL
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.constants import DocumentSource
+from danswer.connectors.cross_connector_utils.pagination import prefetch_pages
 from danswer.connectors.interfaces import GenerateDocumentsOutput
 from danswer.connectors.interfaces import LoadConnector
 from danswer.connectors.interfaces import PollConnector
@@ -66,16 +68,19 @@ def _get_batch_rate_limited(
 
 
 def _batch_github_objects(
-    git_objs: PaginatedList, github_client: Github, batch_size: int
+    git_objs: PaginatedList,
+    github_client: Github,
+    batch_size: int,
+    prefetch_lookahead: int = CONNECTOR_PAGINATION_LOOKAHEAD,
 ) -> Iterator[list[Any]]:
-    page_num = 0
-    while True:
+    def _fetch_page(page_num: int) -> tuple[list[Any], int | None]:
         batch = _get_batch_rate_limited(git_objs, page_num, github_client)
-        page_num += 1
-
-        if not batch:
-            break
+        return batch, page_num + 1 if batch else None
 
+    # the next page is fetched while the objects of the current one are converted. They
+    # are fully loaded by `_get_batch_rate_limited`, so converting them makes no requests
+    # and `github_client` is only used by the fetching thread
+    for batch in prefetch_pages(_fetch_page, 0, lookahead=prefetch_lookahead):
         for mini_batch in batch_generator(batch, batch_size=batch_size):
             yield mini_batch
 
@@ -125,6 +130,7 @@ class GithubConnector(LoadConnector, PollConnector):
         state_filter: str = "all",
         include_prs: bool = True,
         include_issues: bool = False,
+        prefetch_lookahead: int = CONNECTOR_PAGINATION_LOOKAHEAD,
     ) -> None:
         self.repo_owner = repo_owner
         self.repo_name = repo_name
@@ -132,6 +138,7 @@ class GithubConnector(LoadConnector, PollConnector):
         self.state_filter = state_filter
         self.include_prs = include_prs
         self.include_issues = include_issues
+        self.prefetch_lookahead = prefetch_lookahead
         self.github_client: Github | None = None
 
     def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
@@ -172,7 +179,10 @@ class GithubConnector(LoadConnector, PollConnector):
             )
 
             for pr_batch in _batch_github_objects(
-                pull_requests, self.github_client, self.batch_size
+                pull_requests,
+                self.github_client,
+                self.batch_size,
+                prefetch_lookahead=self.prefetch_lookahead,
             ):
                 doc_batch: list[Document] = []
                 for pr in pr_batch:
@@ -190,7 +200,10 @@ class GithubConnector(LoadConnector, PollConnector):
             )
 
             for issue_batch in _batch_github_objects(
-                issues, self.github_client, self.batch_size
+                issues,
+                self.github_client,
+                self.batch_size,
+                prefetch_lookahead=self.prefetch_lookahead,
             ):
                 doc_batch = []
                 for issue in issue_batch:
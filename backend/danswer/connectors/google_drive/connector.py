@@ -1,5 +1,6 @@
 import io
 import tempfile
+import threading
 from collections.abc import Iterator
 from collections.abc import Sequence
 from datetime import datetime
@@ -11,17 +12,26 @@ from typing import cast
 
 import docx2txt  # type:ignore
 from google.auth.credentials import Credentials  # type: ignore
+from google.oauth2.service_account import Credentials as ServiceAccountCredentials  # type: ignore
 from googleapiclient import discovery  # type: ignore
 from googleapiclient.errors import HttpError  # type: ignore
 
 from danswer.configs.app_configs import CONTINUE_ON_CONNECTOR_FAILURE
 from danswer.configs.app_configs import GOOGLE_DRIVE_FOLLOW_SHORTCUTS
 from danswer.configs.app_configs import GOOGLE_DRIVE_INCLUDE_SHARED
+from danswer.configs.app_configs import GOOGLE_DRIVE_MAX_REQUESTS_PER_MINUTE
+from danswer.configs.app_configs import GOOGLE_DRIVE_NUM_THREADS
 from danswer.configs.app_configs import GOOGLE_DRIVE_ONLY_ORG_PUBLIC
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.constants import DocumentSource
 from danswer.configs.constants import IGNORE_FOR_QA
 from danswer.connectors.cross_connector_utils.file_utils import read_pdf_file
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    credential_rate_limit_key,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    rate_limit_builder,
+)
 from danswer.connectors.cross_connector_utils.retry_wrapper import retry_builder
 from danswer.connectors.google_drive.connector_auth import (
     get_google_drive_creds_for_authorized_user,
@@ -44,6 +54,7 @@ from danswer.connectors.models import Document
 from danswer.connectors.models import Section
 from danswer.utils.batching import batch_generator
 from danswer.utils.logger import setup_logger
+from danswer.utils.threadpool_concurrency import run_function_over_iterator_in_order
 
 logger = setup_logger()
 
@@ -299,35 +310,70 @@ def get_all_files_batched(
                 )
 
 
-def extract_text(file: dict[str, str], service: discovery.Resource) -> str:
+class _ThreadLocalDriveService:
+    """`discovery.Resource` objects (and the httplib2 connection under them) are not
+    thread safe, so every worker thread lazily builds its own Drive service."""
+
+    def __init__(
+        self, creds: Credentials, main_thread_service: discovery.Resource
+    ) -> None:
+        self._creds = creds
+        self._main_thread_id = threading.get_ident()
+        self._main_thread_service = main_thread_service
+        self._local = threading.local()
+
+    def get(self) -> discovery.Resource:
+        if threading.get_ident() == self._main_thread_id:
+            return self._main_thread_service
+        if not hasattr(self._local, "service"):
+            self._local.service = discovery.build(
+                "drive", "v3", credentials=self._creds
+            )
+        return self._local.service
+
+
+# Drive allows 12,000 queries per minute per user, exports / downloads of all of the
+# workers share the budget of the user the credential acts as
+@rate_limit_builder(
+    max_calls=GOOGLE_DRIVE_MAX_REQUESTS_PER_MINUTE,
+    period=60,
+    key=lambda request, rate_limit_key: rate_limit_key,
+)
+def _execute_drive_request(request: Any, rate_limit_key: str) -> Any:
+    return request.execute()
+
+
+def extract_text(
+    file: dict[str, str], service: discovery.Resource, rate_limit_key: str
+) -> str:
     mime_type = file["mimeType"]
     if mime_type not in set(item.value for item in GDriveMimeType):
         # Unsupported file types can still have a title, finding this way is still useful
         return UNSUPPORTED_FILE_TYPE_CONTENT
 
     if mime_type == GDriveMimeType.DOC.value:
-        return (
-            service.files()
-            .export(fileId=file["id"], mimeType="text/plain")
-            .execute()
-            .decode("utf-8")
-        )
+        return _execute_drive_request(
+            service.files().export(fileId=file["id"], mimeType="text/plain"),
+            rate_limit_key,
+        ).decode("utf-8")
     elif mime_type == GDriveMimeType.SPREADSHEET.value:
-        return (
-            service.files()
-            .export(fileId=file["id"], mimeType="text/csv")
-            .execute()
-            .decode("utf-8")
-        )
+        return _execute_drive_request(
+            service.files().export(fileId=file["id"], mimeType="text/csv"),
+            rate_limit_key,
+        ).decode("utf-8")
     elif mime_type == GDriveMimeType.WORD_DOC.value:
-        response = service.files().get_media(fileId=file["id"]).execute()
+        response = _execute_drive_request(
+            service.files().get_media(fileId=file["id"]), rate_limit_key
+        )
         word_stream = io.BytesIO(response)
         with tempfile.NamedTemporaryFile(delete=False) as temp:
             temp.write(word_stream.getvalue())
             temp_path = temp.name
         return docx2txt.process(temp_path)
     elif mime_type == GDriveMimeType.PDF.value:
-        response = service.files().get_media(fileId=file["id"]).execute()
+        response = _execute_drive_request(
+            service.files().get_media(fileId=file["id"]), rate_limit_key
+        )
         file_contents = read_pdf_file(file=io.BytesIO(response), file_name=file["name"])
         return file_contents
 
@@ -345,6 +391,7 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
         follow_shortcuts: bool = GOOGLE_DRIVE_FOLLOW_SHORTCUTS,
         only_org_public: bool = GOOGLE_DRIVE_ONLY_ORG_PUBLIC,
         continue_on_failure: bool = CONTINUE_ON_CONNECTOR_FAILURE,
+        num_threads: int = GOOGLE_DRIVE_NUM_THREADS,
     ) -> None:
         self.folder_paths = folder_paths or []
         self.batch_size = batch_size
@@ -352,7 +399,9 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
         self.follow_shortcuts = follow_shortcuts
         self.only_org_public = only_org_public
         self.continue_on_failure = continue_on_failure
+        self.num_threads = num_threads
         self.creds: Credentials | None = None
+        self.rate_limit_key: str | None = None
 
     @staticmethod
     def _process_folder_paths(
@@ -393,7 +442,7 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
         (2) A credential which holds a service account key JSON file, which
         can then be used to impersonate any user in the workspace.
         """
-        creds = None
+        creds: Credentials | None = None
         new_creds_dict = None
         if DB_CREDENTIALS_DICT_TOKEN_KEY in credentials:
             access_token_json_str = cast(
@@ -408,13 +457,20 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
             new_creds_json_str = creds.to_json() if creds else ""
             if new_creds_json_str != access_token_json_str:
                 new_creds_dict = {DB_CREDENTIALS_DICT_TOKEN_KEY: new_creds_json_str}
+            if creds:
+                # the refresh token stays the same when the access token is refreshed
+                self.rate_limit_key = credential_rate_limit_key(
+                    "google_drive", creds.client_id, creds.refresh_token
+                )
 
         if DB_CREDENTIALS_DICT_SERVICE_ACCOUNT_KEY in credentials:
             service_account_key_json_str = credentials[
                 DB_CREDENTIALS_DICT_SERVICE_ACCOUNT_KEY
             ]
-            creds = get_google_drive_creds_for_service_account(
-                service_account_key_json_str=service_account_key_json_str
+            service_account_creds: ServiceAccountCredentials | None = (
+                get_google_drive_creds_for_service_account(
+                    service_account_key_json_str=service_account_key_json_str
+                )
             )
 
             # "Impersonate" a user if one is specified
@@ -422,7 +478,18 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
                 str | None, credentials.get(DB_CREDENTIALS_DICT_DELEGATED_USER_KEY)
             )
             if delegated_user_email:
-                creds = creds.with_subject(delegated_user_email) if creds else None
+                service_account_creds = (
+                    service_account_creds.with_subject(delegated_user_email)
+                    if service_account_creds
+                    else None
+                )
+            if service_account_creds:
+                self.rate_limit_key = credential_rate_limit_key(
+                    "google_drive",
+                    service_account_creds.service_account_email,
+                    delegated_user_email,
+                )
+            creds = service_account_creds
 
         if creds is None:
             raise PermissionError(
@@ -437,7 +504,7 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
         start: SecondsSinceUnixEpoch | None = None,
         end: SecondsSinceUnixEpoch | None = None,
     ) -> GenerateDocumentsOutput:
-        if self.creds is None:
+        if self.creds is None or self.rate_limit_key is None:
             raise PermissionError("Not logged into Google Drive")
 
         service = discovery.build("drive", "v3", credentials=self.creds)
@@ -463,45 +530,75 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
                 for folder_id in folder_ids
             ]
         )
-        for files_batch in file_batches:
-            doc_batch = []
-            for file in files_batch:
-                try:
-                    if self.only_org_public:
-                        if "permissions" not in file:
-                            continue
-                        if not any(
-                            permission["type"] == "domain"
-                            for permission in file["permissions"]
-                        ):
-                            continue
-
-                    text_contents = extract_text(file, service) or ""
-
-                    doc_batch.append(
-                        Document(
-                            id=file["webViewLink"],
-                            sections=[
-                                Section(link=file["webViewLink"], text=text_contents)
-                            ],
-                            source=DocumentSource.GOOGLE_DRIVE,
-                            semantic_identifier=file["name"],
-                            doc_updated_at=datetime.fromisoformat(
-                                file["modifiedTime"]
-                            ).astimezone(timezone.utc),
-                            metadata={} if text_contents else {IGNORE_FOR_QA: "True"},
-                        )
-                    )
-                except Exception as e:
-                    if not self.continue_on_failure:
-                        raise e
 
-                    logger.exception(
-                        "Ran into exception when pulling a file from Google Drive"
-                    )
+        thread_local_service = _ThreadLocalDriveService(self.creds, service)
+        rate_limit_key = self.rate_limit_key
+
+        def _files_with_batch_ind() -> Iterator[tuple[int, GoogleDriveFileType]]:
+            for batch_ind, files_batch in enumerate(file_batches):
+                for file in files_batch:
+                    yield batch_ind, file
+
+        def _convert(
+            batch_ind_and_file: tuple[int, GoogleDriveFileType]
+        ) -> tuple[int, Document | None]:
+            batch_ind, file = batch_ind_and_file
+            return batch_ind, self._file_to_document(
+                file, thread_local_service, rate_limit_key
+            )
 
+        # files are exported / downloaded concurrently (across batch boundaries) but
+        # consumed in order, so batches are identical to the ones of a serial loop
+        current_batch_ind: int | None = None
+        doc_batch: list[Document] = []
+        for batch_ind, doc in run_function_over_iterator_in_order(
+            _convert, _files_with_batch_ind(), max_workers=self.num_threads
+        ):
+            if batch_ind != current_batch_ind:
+                if current_batch_ind is not None:
+                    yield doc_batch
+                current_batch_ind = batch_ind
+                doc_batch = []
+            if doc is not None:
+                doc_batch.append(doc)
+
+        if current_batch_ind is not None:
             yield doc_batch
 
+    def _file_to_document(
+        self,
+        file: GoogleDriveFileType,
+        service: _ThreadLocalDriveService,
+        rate_limit_key: str,
+    ) -> Document | None:
+        try:
+            if self.only_org_public:
+                if "permissions" not in file:
+                    return None
+                if not any(
+                    permission["type"] == "domain" for permission in file["permissions"]
+                ):
+                    return None
+
+            text_contents = extract_text(file, service.get(), rate_limit_key) or ""
+
+            return Document(
+                id=file["webViewLink"],
+                sections=[Section(link=file["webViewLink"], text=text_contents)],
+                source=DocumentSource.GOOGLE_DRIVE,
+                semantic_identifier=file["name"],
+                doc_updated_at=datetime.fromisoformat(file["modifiedTime"]).astimezone(
+                    timezone.utc
+                ),
+                metadata={} if text_contents else {IGNORE_FOR_QA: "True"},
+            )
+        except Exception as e:
+            if not self.continue_on_failure:
+                raise e
+
+            logger.exception("Ran into exception when pulling a file from Google Drive")
+            return None
+
     def load_from_state(self) -> GenerateDocumentsOutput:
         yield from self._fetch_docs_from_drive()
 
@@ -10,6 +10,7 @@ from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.constants import DocumentSource
 from danswer.connectors.cross_connector_utils.file_utils import load_files_from_zip
 from danswer.connectors.cross_connector_utils.file_utils import read_file
+from danswer.connectors.cross_connector_utils.html_utils import parse_html_to_soup
 from danswer.connectors.cross_connector_utils.html_utils import web_html_cleanup
 from danswer.connectors.interfaces import GenerateDocumentsOutput
 from danswer.connectors.interfaces import LoadConnector
@@ -79,7 +80,7 @@ class GoogleSitesConnector(LoadConnector):
                 continue
 
             file_content, _ = read_file(file_io)
-            soup = BeautifulSoup(file_content, "html.parser")
+            soup = parse_html_to_soup(file_content)
 
             # get the link out of the navbar
             header = cast(Tag, soup.find("header"))
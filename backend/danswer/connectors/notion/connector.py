@@ -1,5 +1,6 @@
 import time
 from collections.abc import Generator
+from collections.abc import Iterator
 from dataclasses import dataclass
 from dataclasses import fields
 from datetime import datetime
@@ -10,9 +11,11 @@ from typing import Optional
 import requests
 from retry import retry
 
+from danswer.configs.app_configs import CONNECTOR_PAGINATION_LOOKAHEAD
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.app_configs import NOTION_CONNECTOR_ENABLE_RECURSIVE_PAGE_LOOKUP
 from danswer.configs.constants import DocumentSource
+from danswer.connectors.cross_connector_utils.pagination import prefetch_pages
 from danswer.connectors.interfaces import GenerateDocumentsOutput
 from danswer.connectors.interfaces import LoadConnector
 from danswer.connectors.interfaces import PollConnector
@@ -67,6 +70,8 @@ class NotionConnector(LoadConnector, PollConnector):
 
     Arguments:
         batch_size (int): Number of objects to index in a batch
+        prefetch_lookahead (int): Number of search result pages fetched in the
+            background while the current ones are being read
     """
 
     def __init__(
@@ -74,9 +79,11 @@ class NotionConnector(LoadConnector, PollConnector):
         batch_size: int = INDEX_BATCH_SIZE,
         recursive_index_enabled: bool = NOTION_CONNECTOR_ENABLE_RECURSIVE_PAGE_LOOKUP,
         root_page_id: str | None = None,
+        prefetch_lookahead: int = CONNECTOR_PAGINATION_LOOKAHEAD,
     ) -> None:
         """Initialize with parameters."""
         self.batch_size = batch_size
+        self.prefetch_lookahead = prefetch_lookahead
         self.headers = {
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28",
@@ -319,6 +326,25 @@ class NotionConnector(LoadConnector, PollConnector):
         res.raise_for_status()
         return NotionSearchResponse(**res.json())
 
+    def _search_notion_pages(
+        self, query_dict: dict[str, Any]
+    ) -> Iterator[NotionSearchResponse]:
+        """Pages through all of the search results, the next page of results is fetched
+        while the pages of the current one are being read. Every request goes through
+        its own `requests` call, so no session is shared between the two threads."""
+
+        def _fetch_results(
+            query: dict[str, Any]
+        ) -> tuple[NotionSearchResponse, dict[str, Any] | None]:
+            db_res = self._search_notion(query)
+            if not db_res.has_more:
+                return db_res, None
+            return db_res, {**query, "start_cursor": db_res.next_cursor}
+
+        return prefetch_pages(
+            _fetch_results, query_dict, lookahead=self.prefetch_lookahead
+        )
+
     def _filter_pages_by_time(
         self,
         pages: list[dict[str, Any]],
@@ -381,14 +407,9 @@ class NotionConnector(LoadConnector, PollConnector):
             "filter": {"property": "object", "value": "page"},
             "page_size": self.batch_size,
         }
-        while True:
-            db_res = self._search_notion(query_dict)
+        for db_res in self._search_notion_pages(query_dict):
             pages = [NotionPage(**page) for page in db_res.results]
             yield from batch_generator(self._read_pages(pages), self.batch_size)
-            if db_res.has_more:
-                query_dict["start_cursor"] = db_res.next_cursor
-            else:
-                break
 
     def poll_source(
         self, start: SecondsSinceUnixEpoch, end: SecondsSinceUnixEpoch
@@ -409,17 +430,12 @@ class NotionConnector(LoadConnector, PollConnector):
             "sort": {"timestamp": "last_edited_time", "direction": "descending"},
             "filter": {"property": "object", "value": "page"},
         }
-        while True:
-            db_res = self._search_notion(query_dict)
+        for db_res in self._search_notion_pages(query_dict):
             pages = self._filter_pages_by_time(
                 db_res.results, start, end, filter_field="last_edited_time"
             )
             if len(pages) > 0:
                 yield from batch_generator(self._read_pages(pages), self.batch_size)
-            if db_res.has_more:
-                query_dict["start_cursor"] = db_res.next_cursor
-            else:
-                break
 
 
 if __name__ == "__main__":
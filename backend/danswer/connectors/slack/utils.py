@@ -1,4 +1,5 @@
 import re
+import threading
 import time
 from collections.abc import Callable
 from collections.abc import Generator
@@ -10,6 +11,7 @@ from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from slack_sdk.web import SlackResponse
 
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import TokenBucket
 from danswer.connectors.models import BasicExpertInfo
 from danswer.utils.logger import setup_logger
 
@@ -18,6 +20,22 @@ logger = setup_logger()
 # number of messages we request per page when fetching paginated slack messages
 _SLACK_LIMIT = 900
 
+# Slack's Web API rate limit tiers, in requests per minute per method per workspace
+# https://api.slack.com/docs/rate-limits#tiers
+SLACK_TIER_REQUESTS_PER_MINUTE: dict[int, float] = {1: 1, 2: 20, 3: 50, 4: 100}
+# keyed by the name of the `WebClient` method
+SLACK_METHOD_TIERS: dict[str, int] = {
+    "conversations_list": 2,
+    "conversations_info": 3,
+    "conversations_join": 3,
+    "conversations_history": 3,
+    "conversations_replies": 3,
+    "users_info": 4,
+}
+_DEFAULT_SLACK_TIER = 3
+# fraction of the per minute budget that can be used as an immediate burst
+_SLACK_BURST_FRACTION = 0.1
+
 
 def get_message_link(
     event: dict[str, Any], workspace: str, channel_id: str | None = None
@@ -105,6 +123,64 @@ def make_slack_api_rate_limited(
     return rate_limited_call
 
 
+class SlackMethodBudget:
+    """Per API method token buckets following Slack's rate limit tiers. Shared by all
+    of the threads fetching from the same workspace so that concurrent calls stay
+    within the tier limits instead of relying on `ratelimited` errors + sleeps."""
+
+    def __init__(
+        self,
+        requests_per_minute_by_tier: dict[int, float] | None = None,
+        method_tiers: dict[str, int] | None = None,
+    ) -> None:
+        self.requests_per_minute_by_tier = (
+            requests_per_minute_by_tier or SLACK_TIER_REQUESTS_PER_MINUTE
+        )
+        self.method_tiers = method_tiers or SLACK_METHOD_TIERS
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _get_bucket(self, method_name: str) -> TokenBucket:
+        with self._lock:
+            if method_name not in self._buckets:
+                tier = self.method_tiers.get(method_name, _DEFAULT_SLACK_TIER)
+                requests_per_minute = self.requests_per_minute_by_tier[tier]
+                burst = max(requests_per_minute * _SLACK_BURST_FRACTION, 1)
+                if requests_per_minute - burst >= 1:
+                    # burst + refill over any 60 second window stays within the limit
+                    rate = (requests_per_minute - burst) / 60
+                else:
+                    # too few calls for a burst (tier 1), a bucket can't go below one
+                    # token so the calls are spaced evenly instead, e.g. one per minute
+                    burst = 1
+                    rate = requests_per_minute / 60
+                self._buckets[method_name] = TokenBucket(rate=rate, capacity=burst)
+            return self._buckets[method_name]
+
+    def acquire(self, method_name: str) -> None:
+        waited = self._get_bucket(method_name).acquire()
+        if waited:
+            logger.debug(
+                f"Waited {waited:.2f}s for Slack API budget of '{method_name}'"
+            )
+
+
+def make_slack_api_call_budgeted(
+    call: Callable[..., SlackResponse], budget: SlackMethodBudget | None
+) -> Callable[..., SlackResponse]:
+    """Wraps calls to slack API so that they wait for the method's budget first"""
+    if budget is None:
+        return call
+    method_budget: SlackMethodBudget = budget
+
+    @wraps(call)
+    def budgeted_call(**kwargs: Any) -> SlackResponse:
+        method_budget.acquire(call.__name__)
+        return call(**kwargs)
+
+    return budgeted_call
+
+
 def expert_info_from_slack_id(
     user_id: str | None,
     client: WebClient,
@@ -20,6 +20,7 @@ from danswer.configs.app_configs import WEB_CONNECTOR_OAUTH_CLIENT_SECRET
 from danswer.configs.app_configs import WEB_CONNECTOR_OAUTH_TOKEN_URL
 from danswer.configs.constants import DocumentSource
 from danswer.connectors.cross_connector_utils.file_utils import read_pdf_file
+from danswer.connectors.cross_connector_utils.html_utils import parse_html_to_soup
 from danswer.connectors.cross_connector_utils.html_utils import web_html_cleanup
 from danswer.connectors.interfaces import GenerateDocumentsOutput
 from danswer.connectors.interfaces import LoadConnector
@@ -206,7 +207,7 @@ class WebConnector(LoadConnector):
                     visited_links.add(current_url)
 
                 content = page.content()
-                soup = BeautifulSoup(content, "html.parser")
+                soup = parse_html_to_soup(content)
 
                 if self.recursive:
                     internal_links = get_internal_links(base_url, current_url, soup)
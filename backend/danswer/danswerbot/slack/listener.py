@@ -44,6 +44,7 @@ from danswer.db.engine import get_sqlalchemy_engine
 from danswer.dynamic_configs.interface import ConfigNotFoundError
 from danswer.one_shot_answer.models import ThreadMessage
 from danswer.search.search_nlp_models import warm_up_models
+from danswer.search.search_runner import warm_up_query_processing
 from danswer.server.manage.models import SlackBotTokens
 from danswer.utils.logger import setup_logger
 
@@ -375,7 +376,9 @@ if __name__ == "__main__":
 
     logger.info("Verifying query preprocessing (NLTK) data is downloaded")
     nltk.download("stopwords", quiet=True)
+    nltk.download("wordnet", quiet=True)
     nltk.download("punkt", quiet=True)
+    warm_up_query_processing()
 
     while True:
         try:
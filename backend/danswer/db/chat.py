@@ -1,14 +1,19 @@
 from collections.abc import Sequence
+from typing import Any
 from uuid import UUID
 
 from sqlalchemy import delete
 from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import Integer
+from sqlalchemy import literal
 from sqlalchemy import not_
 from sqlalchemy import nullsfirst
 from sqlalchemy import or_
 from sqlalchemy import select
 from sqlalchemy import update
 from sqlalchemy.exc import MultipleResultsFound
+from sqlalchemy.orm import aliased
 from sqlalchemy.orm import Session
 
 from danswer.configs.chat_configs import HARD_DELETE_CHATS
@@ -179,6 +184,51 @@ def get_chat_messages_by_session(
     return list(result)
 
 
+def get_chat_message_chain(
+    chat_session_id: int,
+    db_session: Session,
+    max_messages: int | None = None,
+) -> list[ChatMessage]:
+    """Follows the latest child pointers from the root message of the session with a
+    recursive CTE, only the messages on this path (without the root message) are loaded.
+    If `max_messages` is set, only that many of the most recent ones are returned"""
+    chain = (
+        select(
+            ChatMessage.id,
+            ChatMessage.latest_child_message,
+            literal(0, type_=Integer).label("depth"),
+        )
+        .where(
+            ChatMessage.chat_session_id == chat_session_id,
+            ChatMessage.parent_message.is_(None),
+        )
+        .cte("chain", recursive=True)
+    )
+    child_message = aliased(ChatMessage)
+    chain = chain.union_all(
+        select(
+            child_message.id,
+            child_message.latest_child_message,
+            chain.c.depth + 1,
+        ).where(
+            child_message.id == chain.c.latest_child_message,
+            child_message.chat_session_id == chat_session_id,
+        )
+    )
+
+    stmt = (
+        select(ChatMessage)
+        .join(chain, ChatMessage.id == chain.c.id)
+        .where(chain.c.depth > 0)
+        .order_by(chain.c.depth.desc())
+        .limit(max_messages)
+    )
+
+    result = db_session.execute(stmt).scalars().all()
+
+    return list(reversed(result))
+
+
 def get_or_create_root_message(
     chat_session_id: int,
     db_session: Session,
@@ -659,26 +709,30 @@ def get_doc_query_identifiers_from_model(
     return doc_query_identifiers
 
 
+def _search_doc_values(server_search_doc: ServerSearchDoc) -> dict[str, Any]:
+    return {
+        "document_id": server_search_doc.document_id,
+        "chunk_ind": server_search_doc.chunk_ind,
+        "semantic_id": server_search_doc.semantic_identifier,
+        "link": server_search_doc.link,
+        "blurb": server_search_doc.blurb,
+        "source_type": server_search_doc.source_type,
+        "boost": server_search_doc.boost,
+        "hidden": server_search_doc.hidden,
+        "doc_metadata": server_search_doc.metadata,
+        "score": server_search_doc.score,
+        "match_highlights": server_search_doc.match_highlights,
+        "updated_at": server_search_doc.updated_at,
+        "primary_owners": server_search_doc.primary_owners,
+        "secondary_owners": server_search_doc.secondary_owners,
+    }
+
+
 def create_db_search_doc(
     server_search_doc: ServerSearchDoc,
     db_session: Session,
 ) -> SearchDoc:
-    db_search_doc = SearchDoc(
-        document_id=server_search_doc.document_id,
-        chunk_ind=server_search_doc.chunk_ind,
-        semantic_id=server_search_doc.semantic_identifier,
-        link=server_search_doc.link,
-        blurb=server_search_doc.blurb,
-        source_type=server_search_doc.source_type,
-        boost=server_search_doc.boost,
-        hidden=server_search_doc.hidden,
-        doc_metadata=server_search_doc.metadata,
-        score=server_search_doc.score,
-        match_highlights=server_search_doc.match_highlights,
-        updated_at=server_search_doc.updated_at,
-        primary_owners=server_search_doc.primary_owners,
-        secondary_owners=server_search_doc.secondary_owners,
-    )
+    db_search_doc = SearchDoc(**_search_doc_values(server_search_doc))
 
     db_session.add(db_search_doc)
     db_session.commit()
@@ -686,6 +740,30 @@ def create_db_search_doc(
     return db_search_doc
 
 
+def create_db_search_docs(
+    server_search_docs: list[ServerSearchDoc],
+    db_session: Session,
+    commit: bool = True,
+) -> list[SearchDoc]:
+    """Persists all the search docs of a chat turn in a single INSERT ... RETURNING
+    statement (rather than an insert and commit per doc), returned in input order"""
+    if not server_search_docs:
+        return []
+
+    db_search_docs = db_session.scalars(
+        insert(SearchDoc).returning(SearchDoc, sort_by_parameter_order=True),
+        [
+            _search_doc_values(server_search_doc)
+            for server_search_doc in server_search_docs
+        ],
+    ).all()
+
+    if commit:
+        db_session.commit()
+
+    return list(db_search_docs)
+
+
 def get_db_search_doc_by_id(doc_id: int, db_session: Session) -> DBSearchDoc | None:
     """There are no safety checks here like user permission etc., use with caution"""
     search_doc = db_session.query(SearchDoc).filter(SearchDoc.id == doc_id).first()
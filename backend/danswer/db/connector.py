@@ -7,6 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import aliased
 from sqlalchemy.orm import Session
 
+from danswer.configs.chat_configs import DOCUMENT_SOURCES_CACHE_TTL_SECONDS
 from danswer.configs.constants import DocumentSource
 from danswer.connectors.models import InputType
 from danswer.db.models import Connector
@@ -15,9 +16,14 @@ from danswer.server.documents.models import ConnectorBase
 from danswer.server.documents.models import ObjectCreationIdResponse
 from danswer.server.models import StatusResponse
 from danswer.utils.logger import setup_logger
+from danswer.utils.ttl_cache import TTLCache
 
 logger = setup_logger()
 
+_DOCUMENT_SOURCES_CACHE: TTLCache[str, list[DocumentSource]] = TTLCache(
+    max_size=1, ttl_seconds=DOCUMENT_SOURCES_CACHE_TTL_SECONDS
+)
+
 
 def fetch_connectors(
     db_session: Session,
@@ -88,6 +94,7 @@ def create_connector(
     )
     db_session.add(connector)
     db_session.commit()
+    _DOCUMENT_SOURCES_CACHE.clear()
 
     return ObjectCreationIdResponse(id=connector.id)
 
@@ -116,6 +123,7 @@ def update_connector(
     connector.disabled = connector_data.disabled
 
     db_session.commit()
+    _DOCUMENT_SOURCES_CACHE.clear()
     return connector
 
 
@@ -147,6 +155,8 @@ def delete_connector(
         )
 
     db_session.delete(connector)
+    db_session.commit()
+    _DOCUMENT_SOURCES_CACHE.clear()
     return StatusResponse(
         success=True, message="Connector deleted successfully", data=connector_id
     )
@@ -235,6 +245,16 @@ def fetch_unique_document_sources(db_session: Session) -> list[DocumentSource]:
     return sources
 
 
+def fetch_unique_document_sources_cached(db_session: Session) -> list[DocumentSource]:
+    """Same as `fetch_unique_document_sources` but only hits the DB again after a
+    connector was changed or the cached sources are too old"""
+    sources = _DOCUMENT_SOURCES_CACHE.get("sources")
+    if sources is None:
+        sources = fetch_unique_document_sources(db_session)
+        _DOCUMENT_SOURCES_CACHE.set("sources", sources)
+    return list(sources)
+
+
 def create_initial_default_connector(db_session: Session) -> None:
     default_connector_id = 0
     default_connector = fetch_connector_by_id(default_connector_id, db_session)
@@ -12,6 +12,7 @@ from danswer.db.chat import get_chat_message
 from danswer.db.models import ChatMessageFeedback
 from danswer.db.models import Document as DbDocument
 from danswer.db.models import DocumentRetrievalFeedback
+from danswer.document_index.document_index_utils import bump_index_generation
 from danswer.document_index.interfaces import DocumentIndex
 from danswer.document_index.interfaces import UpdateRequest
 
@@ -58,6 +59,7 @@ def update_document_boost(
     )
 
     document_index.update(update_requests=[update])
+    bump_index_generation()
 
     db_session.commit()
 
@@ -78,6 +80,7 @@ def update_document_hidden(
     )
 
     document_index.update(update_requests=[update])
+    bump_index_generation()
 
     db_session.commit()
 
@@ -124,6 +127,7 @@ def create_doc_retrieval_feedback(
         )
         # Updates are generally batched for efficiency, this case only 1 doc/value is updated
         document_index.update(update_requests=[update])
+        bump_index_generation()
 
     db_session.add(retrieval_feedback)
     db_session.commit()
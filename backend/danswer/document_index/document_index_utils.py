@@ -5,12 +5,18 @@ from sqlalchemy.orm import Session
 
 from danswer.db.embedding_model import get_current_db_embedding_model
 from danswer.db.embedding_model import get_secondary_db_embedding_model
+from danswer.dynamic_configs import get_dynamic_config_store
+from danswer.dynamic_configs.interface import ConfigNotFoundError
 from danswer.indexing.models import IndexChunk
 from danswer.indexing.models import InferenceChunk
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
 
 
 DEFAULT_BATCH_SIZE = 30
 DEFAULT_INDEX_NAME = "danswer_chunk"
+_INDEX_GENERATION_KEY = "index_generation"
 
 
 def get_both_index_names(db_session: Session) -> tuple[str, str | None]:
@@ -23,6 +29,27 @@ def get_both_index_names(db_session: Session) -> tuple[str, str | None]:
     return model.index_name, model_new.index_name
 
 
+def get_index_generation() -> str:
+    """Token of the last change to the documents in the document index, shared by all
+    the processes. Results computed from the index are outdated once it changes."""
+    try:
+        return str(get_dynamic_config_store().load(_INDEX_GENERATION_KEY))
+    except ConfigNotFoundError:
+        return ""
+
+
+def bump_index_generation() -> None:
+    """Needs to be called after every change to the documents in the document index,
+    i.e. indexing, deletions and updates of the document sets, ACL, boost or hidden flag.
+    Every bump stores a new random token rather than incrementing a counter, so that
+    concurrent bumps from different processes can't end up storing the same value."""
+    try:
+        get_dynamic_config_store().store(_INDEX_GENERATION_KEY, uuid.uuid4().hex)
+    except Exception:
+        # Outdated cached search results are still bounded by the cache TTL
+        logger.exception("Failed to bump the index generation")
+
+
 def translate_boost_count_to_multiplier(boost: int) -> float:
     """Mapping boost integer values to a multiplier according to a sigmoid curve
     Piecewise such that at many downvotes, its 0.5x the score and with many upvotes
@@ -36,6 +63,24 @@ def translate_boost_count_to_multiplier(boost: int) -> float:
     return 2 / (1 + math.exp(-1 * boost / 3))
 
 
+def compute_target_hits(
+    num_hits: int,
+    recall_target: float,
+    num_matching_chunks: int | None = None,
+) -> int:
+    """Number of nearest neighbor candidates (Vespa `targetHits`) for a query asking for
+    `num_hits` results. With fewer candidates per result, chunks which exact search would
+    have ranked into the results are more likely to be missed, the recall target sets
+    1 / (1 - recall_target) candidates per result. The filters are applied during the
+    neighbor search, so more candidates than chunks passing the filters are never needed.
+    """
+    # Rounding so that float noise doesn't add a candidate
+    target_hits = math.ceil(round(num_hits / (1 - recall_target), 6))
+    if num_matching_chunks is not None:
+        target_hits = min(target_hits, num_matching_chunks)
+    return max(target_hits, num_hits, 1)
+
+
 def get_uuid_from_chunk(
     chunk: IndexChunk | InferenceChunk, mini_chunk_ind: int = 0
 ) -> uuid.UUID:
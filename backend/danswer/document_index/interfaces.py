@@ -50,7 +50,7 @@ class Verifiable(abc.ABC):
         index_name: str,
         secondary_index_name: str | None,
         *args: Any,
-        **kwargs: Any
+        **kwargs: Any,
     ) -> None:
         super().__init__(*args, **kwargs)
         self.index_name = index_name
@@ -99,6 +99,17 @@ class IdRetrievalCapable(abc.ABC):
     ) -> list[InferenceChunk]:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def batch_id_based_retrieval(
+        self,
+        document_ids: list[str],
+        filters: IndexFilters,
+    ) -> dict[str, list[InferenceChunk]]:
+        """Fetches all chunks of the documents, in chunk order, by document id. Documents
+        without any chunks passing the filters map to an empty list, a failure to fetch
+        them is raised"""
+        raise NotImplementedError
+
 
 class KeywordCapable(abc.ABC):
     @abc.abstractmethod
@@ -138,9 +149,23 @@ class HybridCapable(abc.ABC):
         num_to_retrieve: int,
         offset: int = 0,
         hybrid_alpha: float | None = None,
+        *,
+        target_hits: int | None = None,
     ) -> list[InferenceChunk]:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def hybrid_target_hits(
+        self,
+        filters: IndexFilters,
+        num_to_retrieve: int,
+        offset: int = 0,
+    ) -> int:
+        """Number of nearest neighbor candidates the hybrid retrieval considers for each
+        embedding field if it is not passed a `target_hits`, reported with the retrieval
+        metrics"""
+        raise NotImplementedError
+
 
 class AdminCapable(abc.ABC):
     @abc.abstractmethod
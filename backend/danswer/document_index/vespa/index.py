@@ -5,6 +5,7 @@ import os
 import string
 import time
 import zipfile
+from collections import Counter
 from collections.abc import Callable
 from collections.abc import Mapping
 from dataclasses import dataclass
@@ -20,8 +21,18 @@ import requests
 from retry import retry
 
 from danswer.configs.app_configs import LOG_VESPA_TIMING_INFORMATION
+from danswer.configs.app_configs import VESPA_ADAPTIVE_TARGET_HITS
+from danswer.configs.app_configs import VESPA_HEDGE_LATENCY_PERCENTILE
+from danswer.configs.app_configs import VESPA_HEDGE_MIN_DELAY_MS
+from danswer.configs.app_configs import VESPA_HEDGED_QUERIES
+from danswer.configs.app_configs import VESPA_HNSW_ENABLED
+from danswer.configs.app_configs import VESPA_HNSW_EXPLORE_ADDITIONAL_HITS
+from danswer.configs.app_configs import VESPA_HNSW_MAX_LINKS_PER_NODE
+from danswer.configs.app_configs import VESPA_HNSW_NEIGHBORS_TO_EXPLORE_AT_INSERT
 from danswer.configs.app_configs import VESPA_HOST
+from danswer.configs.app_configs import VESPA_MAX_HEDGES_IN_FLIGHT
 from danswer.configs.app_configs import VESPA_PORT
+from danswer.configs.app_configs import VESPA_TARGET_HITS_RECALL_TARGET
 from danswer.configs.app_configs import VESPA_TENANT_PORT
 from danswer.configs.chat_configs import DOC_TIME_DECAY
 from danswer.configs.chat_configs import EDIT_KEYWORD_QUERY
@@ -41,12 +52,15 @@ from danswer.configs.constants import HIDDEN
 from danswer.configs.constants import INDEX_SEPARATOR
 from danswer.configs.constants import METADATA
 from danswer.configs.constants import METADATA_LIST
+from danswer.configs.constants import METADATA_LIST_MAP
+from danswer.configs.constants import METADATA_MAP
 from danswer.configs.constants import PRIMARY_OWNERS
 from danswer.configs.constants import RECENCY_BIAS
 from danswer.configs.constants import SECONDARY_OWNERS
 from danswer.configs.constants import SECTION_CONTINUATION
 from danswer.configs.constants import SEMANTIC_IDENTIFIER
 from danswer.configs.constants import SKIP_TITLE_EMBEDDING
+from danswer.configs.constants import SOURCE_LINK_MAP
 from danswer.configs.constants import SOURCE_LINKS
 from danswer.configs.constants import SOURCE_TYPE
 from danswer.configs.constants import TITLE
@@ -56,26 +70,50 @@ from danswer.configs.model_configs import SEARCH_DISTANCE_CUTOFF
 from danswer.connectors.cross_connector_utils.miscellaneous_utils import (
     get_experts_stores_representations,
 )
+from danswer.document_index.document_index_utils import compute_target_hits
 from danswer.document_index.document_index_utils import get_uuid_from_chunk
 from danswer.document_index.interfaces import DocumentIndex
 from danswer.document_index.interfaces import DocumentInsertionRecord
 from danswer.document_index.interfaces import UpdateRequest
+from danswer.document_index.vespa.utils import metadata_to_vespa_maps
 from danswer.document_index.vespa.utils import remove_invalid_unicode_chars
+from danswer.document_index.vespa.utils import vespa_json_dumps
+from danswer.document_index.vespa.utils import vespa_json_loads
+from danswer.document_index.vespa.utils import vespa_map_to_dict
 from danswer.indexing.models import DocMetadataAwareIndexChunk
 from danswer.indexing.models import InferenceChunk
 from danswer.search.models import IndexFilters
 from danswer.search.search_runner import query_processing
 from danswer.search.search_runner import remove_stop_words_and_punctuation
 from danswer.utils.batching import batch_generator
+from danswer.utils.hedging import HedgedCaller
 from danswer.utils.logger import setup_logger
 from danswer.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+from danswer.utils.ttl_cache import TTLCache
 
 logger = setup_logger()
 
+# Number of chunks passing the filters (which include the ACL) of the adaptive target hits
+_NUM_MATCHING_CHUNKS_CACHE: TTLCache[tuple[str, str], int] = TTLCache(
+    max_size=1024, ttl_seconds=300
+)
+# Sends the search queries Vespa is slow to answer a second time
+_VESPA_QUERY_HEDGER: HedgedCaller[requests.Response] | None = (
+    HedgedCaller(
+        latency_percentile=VESPA_HEDGE_LATENCY_PERCENTILE,
+        min_delay_seconds=VESPA_HEDGE_MIN_DELAY_MS / 1000,
+        max_hedges_in_flight=VESPA_MAX_HEDGES_IN_FLIGHT,
+    )
+    if VESPA_HEDGED_QUERIES
+    else None
+)
+
 VESPA_DIM_REPLACEMENT_PAT = "VARIABLE_DIM"
 DANSWER_CHUNK_REPLACEMENT_PAT = "DANSWER_CHUNK_NAME"
 DOCUMENT_REPLACEMENT_PAT = "DOCUMENT_REPLACEMENT"
 DATE_REPLACEMENT = "DATE_REPLACEMENT"
+VECTOR_INDEXING_REPLACEMENT_PAT = "VECTOR_INDEXING"
+HNSW_CONFIG_REPLACEMENT_PAT = "HNSW_CONFIG"
 VESPA_CONFIG_SERVER_URL = f"http://{VESPA_HOST}:{VESPA_TENANT_PORT}"
 VESPA_APP_CONTAINER_URL = f"http://{VESPA_HOST}:{VESPA_PORT}"
 VESPA_APPLICATION_ENDPOINT = f"{VESPA_CONFIG_SERVER_URL}/application/v2"
@@ -92,8 +130,20 @@ _NUM_THREADS = (
 # in the long term, we are looking to improve the performance of Vespa
 # so that we can bring this back to default
 _VESPA_TIMEOUT = "3s"
+# Documents fetched per query by the batched id retrieval and chunks per result page, a
+# page can't have more hits than the `maxHits` of Vespa (400 by default). Pages are
+# selected by chunk id range rather than by offset, which is capped by `maxOffset` (1000)
+_ID_RETRIEVAL_DOCS_PER_QUERY = 20
+_ID_RETRIEVAL_HITS_PER_PAGE = 400
+# Minimum targetHits of the hybrid search without adaptive target hits, needs to be at
+# least as much as the rerank-count of the hybrid_search rank profile
+_FIXED_MIN_TARGET_HITS = 1000
 # Specific to Vespa, needed for highlighting matching keywords / section
 CONTENT_SUMMARY = "content_summary"
+# Document summary classes defined in danswer_chunk.sd
+RETRIEVAL_SUMMARY = "retrieval_summary"
+ADMIN_SUMMARY = "admin_summary"
+ID_LOOKUP_SUMMARY = "id_lookup_summary"
 
 
 @dataclass
@@ -157,7 +207,13 @@ def _get_vespa_chunk_ids_by_document_id(
         "hits": hits_per_page,
     }
     while True:
-        results = requests.post(SEARCH_ENDPOINT, json=params).json()
+        results = vespa_json_loads(
+            requests.post(
+                SEARCH_ENDPOINT,
+                headers={"Content-Type": "application/json"},
+                data=vespa_json_dumps(params),
+            ).content
+        )
         hits = results["root"].get("children", [])
 
         doc_chunk_ids.extend(
@@ -267,6 +323,7 @@ def _index_vespa_chunk(
             embeddings_name_vector_map[f"mini_chunk_{ind}"] = m_c_embed
 
     title = document.get_title_for_document_index()
+    metadata_map, metadata_list_map = metadata_to_vespa_maps(document.metadata)
 
     vespa_document_fields = {
         DOCUMENT_ID: document.id,
@@ -278,10 +335,14 @@ def _index_vespa_chunk(
         # This duplication of `content` is needed for keyword highlighting :(
         CONTENT_SUMMARY: remove_invalid_unicode_chars(chunk.content),
         SOURCE_TYPE: str(document.source.value),
-        SOURCE_LINKS: json.dumps(chunk.source_links),
+        SOURCE_LINK_MAP: {
+            offset: remove_invalid_unicode_chars(link)
+            for offset, link in (chunk.source_links or {}).items()
+        },
         SEMANTIC_IDENTIFIER: remove_invalid_unicode_chars(document.semantic_identifier),
         SECTION_CONTINUATION: chunk.section_continuation,
-        METADATA: json.dumps(document.metadata),
+        METADATA_MAP: metadata_map,
+        METADATA_LIST_MAP: metadata_list_map,
         # Save as a list for efficient extraction as an Attribute
         METADATA_LIST: chunk.source_document.get_metadata_str_attributes(),
         EMBEDDINGS: embeddings_name_vector_map,
@@ -299,7 +360,9 @@ def _index_vespa_chunk(
     vespa_url = f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_chunk_id}"
     logger.debug(f'Indexing to URL "{vespa_url}"')
     res = http_client.post(
-        vespa_url, headers=json_header, json={"fields": vespa_document_fields}
+        vespa_url,
+        headers=json_header,
+        content=vespa_json_dumps({"fields": vespa_document_fields}),
     )
     try:
         res.raise_for_status()
@@ -488,11 +551,34 @@ def _process_dynamic_summary(
     return processed_summary
 
 
+def _metadata_from_vespa_fields(fields: dict[str, Any]) -> dict[str, str | list[str]]:
+    if METADATA_MAP in fields or METADATA_LIST_MAP in fields:
+        return {
+            **vespa_map_to_dict(fields.get(METADATA_MAP)),
+            **vespa_map_to_dict(fields.get(METADATA_LIST_MAP)),
+        }
+    # Chunks indexed before the map fields only have the json string
+    if fields.get(METADATA):
+        return vespa_json_loads(fields[METADATA])
+    return {}
+
+
+def _source_links_from_vespa_fields(fields: dict[str, Any]) -> dict[int, str]:
+    if SOURCE_LINK_MAP in fields:
+        source_links = vespa_map_to_dict(fields[SOURCE_LINK_MAP])
+    else:
+        # Chunks indexed before the map field only have the json string
+        source_links = fields.get(SOURCE_LINKS) or {}
+        if isinstance(source_links, str):
+            source_links = vespa_json_loads(source_links) or {}
+    return {int(offset): link for offset, link in source_links.items()}
+
+
 def _vespa_hit_to_inference_chunk(hit: dict[str, Any]) -> InferenceChunk:
     fields = cast(dict[str, Any], hit["fields"])
 
-    # parse fields that are stored as strings, but are really json / datetime
-    metadata = json.loads(fields[METADATA]) if METADATA in fields else {}
+    metadata = _metadata_from_vespa_fields(fields)
+    # parse fields that are stored as ints, but are really datetime
     updated_at = (
         datetime.fromtimestamp(fields[DOC_UPDATED_AT], tz=timezone.utc)
         if DOC_UPDATED_AT in fields
@@ -502,8 +588,8 @@ def _vespa_hit_to_inference_chunk(hit: dict[str, Any]) -> InferenceChunk:
     # The highlights might include the title but this is the best way we have so far to show the highlighting
     match_highlights = _process_dynamic_summary(
         # fallback to regular `content` if the `content_summary` field
-        # isn't present
-        dynamic_summary=hit["fields"].get(CONTENT_SUMMARY, hit["fields"][CONTENT]),
+        # isn't present (id lookups)
+        dynamic_summary=fields.get(CONTENT_SUMMARY, fields.get(CONTENT, "")),
     )
     semantic_identifier = fields.get(SEMANTIC_IDENTIFIER, "")
     if not semantic_identifier:
@@ -513,7 +599,8 @@ def _vespa_hit_to_inference_chunk(hit: dict[str, Any]) -> InferenceChunk:
 
     # Remove the title from the first chunk as every chunk already included
     # its semantic identifier for LLM
-    content = fields[CONTENT]
+    # Admin search results come without the content
+    content = fields.get(CONTENT, "")
     if fields[CHUNK_ID] == 0:
         parts = content.split(TITLE_SEPARATOR, maxsplit=1)
         content = parts[1] if len(parts) > 1 and "\n" not in parts[0] else content
@@ -524,14 +611,7 @@ def _vespa_hit_to_inference_chunk(hit: dict[str, Any]) -> InferenceChunk:
         logger.error(f"Chunk with id {fields.get(semantic_identifier)} ")
         blurb = ""
 
-    source_links = fields.get(SOURCE_LINKS, {})
-    source_links_dict_unprocessed = (
-        json.loads(source_links) if isinstance(source_links, str) else source_links
-    )
-    source_links_dict = {
-        int(k): v
-        for k, v in cast(dict[str, str], source_links_dict_unprocessed).items()
-    }
+    source_links_dict = _source_links_from_vespa_fields(fields)
 
     return InferenceChunk(
         chunk_id=fields[CHUNK_ID],
@@ -559,26 +639,45 @@ def _query_vespa(query_params: Mapping[str, str | int | float]) -> list[Inferenc
     if "query" in query_params and not cast(str, query_params["query"]).strip():
         raise ValueError("No/empty query received")
 
-    response = requests.post(
-        SEARCH_ENDPOINT,
-        json=dict(
+    body = vespa_json_dumps(
+        dict(
             **query_params,
             **{
                 "presentation.timing": True,
             }
             if LOG_VESPA_TIMING_INFORMATION
             else {},
-        ),
+        )
+    )
+
+    def _post_query() -> requests.Response:
+        response = requests.post(
+            SEARCH_ENDPOINT,
+            headers={"Content-Type": "application/json"},
+            data=body,
+        )
+        response.raise_for_status()
+        return response
+
+    response = (
+        _VESPA_QUERY_HEDGER.call(_post_query)
+        if _VESPA_QUERY_HEDGER is not None
+        else _post_query()
     )
-    response.raise_for_status()
 
-    response_json: dict[str, Any] = response.json()
+    response_json: dict[str, Any] = vespa_json_loads(response.content)
     if LOG_VESPA_TIMING_INFORMATION:
         logger.info("Vespa timing info: %s", response_json.get("timing"))
     hits = response_json["root"].get("children", [])
 
+    # The admin summary doesn't include the content, its dynamic summary is set alike
+    content_field = (
+        CONTENT_SUMMARY
+        if query_params.get("presentation.summary") == ADMIN_SUMMARY
+        else CONTENT
+    )
     for hit in hits:
-        if hit["fields"].get(CONTENT) is None:
+        if hit["fields"].get(content_field) is None:
             identifier = hit["fields"].get("documentid") or hit["id"]
             logger.error(
                 f"Vespa Index with Vespa ID {identifier} has no contents. "
@@ -586,21 +685,38 @@ def _query_vespa(query_params: Mapping[str, str | int | float]) -> list[Inferenc
                 f"fetch this document"
             )
 
-    filtered_hits = [hit for hit in hits if hit["fields"].get(CONTENT) is not None]
+    filtered_hits = [
+        hit for hit in hits if hit["fields"].get(content_field) is not None
+    ]
 
     inference_chunks = [_vespa_hit_to_inference_chunk(hit) for hit in filtered_hits]
     # Good Debugging Spot
     return inference_chunks
 
 
-@retry(tries=3, delay=1, backoff=2)
-def _inference_chunk_by_vespa_id(vespa_id: str, index_name: str) -> InferenceChunk:
-    res = requests.get(
-        f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_id}"
-    )
-    res.raise_for_status()
+def _fill_vector_index_config(
+    schema: str,
+    hnsw_enabled: bool = VESPA_HNSW_ENABLED,
+    max_links_per_node: int = VESPA_HNSW_MAX_LINKS_PER_NODE,
+    neighbors_to_explore_at_insert: int = VESPA_HNSW_NEIGHBORS_TO_EXPLORE_AT_INSERT,
+) -> str:
+    if not hnsw_enabled:
+        return schema.replace(VECTOR_INDEXING_REPLACEMENT_PAT, "").replace(
+            HNSW_CONFIG_REPLACEMENT_PAT, ""
+        )
 
-    return _vespa_hit_to_inference_chunk(res.json())
+    hnsw_config = (
+        "index {\n"
+        "                hnsw {\n"
+        f"                    max-links-per-node: {max_links_per_node}\n"
+        "                    neighbors-to-explore-at-insert: "
+        f"{neighbors_to_explore_at_insert}\n"
+        "                }\n"
+        "            }"
+    )
+    return schema.replace(VECTOR_INDEXING_REPLACEMENT_PAT, "| index").replace(
+        HNSW_CONFIG_REPLACEMENT_PAT, hnsw_config
+    )
 
 
 def in_memory_zip_from_file_bytes(file_contents: dict[str, bytes]) -> BinaryIO:
@@ -622,15 +738,16 @@ def _create_document_xml_lines(doc_names: list[str | None]) -> str:
 
 
 class VespaIndex(DocumentIndex):
+    # The selected fields must match the fields of the summary class of the query
     yql_base = (
         f"select "
-        f"documentid, "
         f"{DOCUMENT_ID}, "
         f"{CHUNK_ID}, "
         f"{BLURB}, "
         f"{CONTENT}, "
         f"{SOURCE_TYPE}, "
         f"{SOURCE_LINKS}, "
+        f"{SOURCE_LINK_MAP}, "
         f"{SEMANTIC_IDENTIFIER}, "
         f"{SECTION_CONTINUATION}, "
         f"{BOOST}, "
@@ -639,13 +756,87 @@ class VespaIndex(DocumentIndex):
         f"{PRIMARY_OWNERS}, "
         f"{SECONDARY_OWNERS}, "
         f"{METADATA}, "
+        f"{METADATA_MAP}, "
+        f"{METADATA_LIST_MAP}, "
         f"{CONTENT_SUMMARY} "
         f"from {{index_name}} where "
     )
+    admin_yql_base = yql_base.replace(f"{CONTENT}, ", "")
+    id_lookup_yql_base = yql_base.replace(f", {CONTENT_SUMMARY} ", " ")
 
-    def __init__(self, index_name: str, secondary_index_name: str | None) -> None:
+    def __init__(
+        self,
+        index_name: str,
+        secondary_index_name: str | None,
+        hnsw_explore_additional_hits: int = VESPA_HNSW_EXPLORE_ADDITIONAL_HITS,
+        adaptive_target_hits: bool = VESPA_ADAPTIVE_TARGET_HITS,
+        target_hits_recall_target: float = VESPA_TARGET_HITS_RECALL_TARGET,
+    ) -> None:
         self.index_name = index_name
         self.secondary_index_name = secondary_index_name
+        self.hnsw_explore_additional_hits = hnsw_explore_additional_hits
+        self.adaptive_target_hits = adaptive_target_hits
+        self.target_hits_recall_target = target_hits_recall_target
+
+    def _nearest_neighbor_annotation(self, target_hits: int) -> str:
+        # Ignored by Vespa if the embedding field has no HNSW index
+        if self.hnsw_explore_additional_hits:
+            return (
+                f"{{targetHits: {target_hits}, "
+                f"hnsw.exploreAdditionalHits: {self.hnsw_explore_additional_hits}}}"
+            )
+        return f"{{targetHits: {target_hits}}}"
+
+    def _num_matching_chunks(self, vespa_where_clauses: str) -> int | None:
+        cache_key = (self.index_name, vespa_where_clauses)
+        num_matching_chunks = _NUM_MATCHING_CHUNKS_CACHE.get(cache_key)
+        if num_matching_chunks is not None:
+            return num_matching_chunks
+
+        params: dict[str, str | int] = {
+            "yql": f"select documentid from {self.index_name} where "
+            f"{vespa_where_clauses}true",
+            "hits": 0,
+            "timeout": _VESPA_TIMEOUT,
+        }
+        try:
+            response = requests.post(
+                SEARCH_ENDPOINT,
+                headers={"Content-Type": "application/json"},
+                data=vespa_json_dumps(params),
+            )
+            response.raise_for_status()
+            num_matching_chunks = vespa_json_loads(response.content)["root"]["fields"][
+                "totalCount"
+            ]
+        except (requests.RequestException, KeyError, ValueError) as e:
+            # Only costs latency, the target hits are then not capped by the filters
+            logger.warning(f"Failed to count the chunks passing the filters: {e}")
+            return None
+
+        _NUM_MATCHING_CHUNKS_CACHE.set(cache_key, num_matching_chunks)
+        return num_matching_chunks
+
+    def hybrid_target_hits(
+        self,
+        filters: IndexFilters,
+        num_to_retrieve: int,
+        offset: int = 0,
+    ) -> int:
+        if not self.adaptive_target_hits:
+            return max(10 * num_to_retrieve, _FIXED_MIN_TARGET_HITS)
+
+        # The time cutoff is left out of the count, it differs for every time filtered
+        # query and would never hit the cache. The chunks outside of the cutoff are then
+        # counted too, which only makes the cap less tight
+        count_filters = filters.copy(update={"time_cutoff": None})
+        return compute_target_hits(
+            num_hits=num_to_retrieve + offset,
+            recall_target=self.target_hits_recall_target,
+            num_matching_chunks=self._num_matching_chunks(
+                _build_vespa_filters(count_filters)
+            ),
+        )
 
     def ensure_indices_exist(
         self,
@@ -689,6 +880,8 @@ class VespaIndex(DocumentIndex):
         with open(schema_file, "r") as schema_f:
             schema_template = schema_f.read()
 
+        schema_template = _fill_vector_index_config(schema_template)
+
         schema = schema_template.replace(
             DANSWER_CHUNK_REPLACEMENT_PAT, self.index_name
         ).replace(VESPA_DIM_REPLACEMENT_PAT, str(index_embedding_dim))
@@ -732,7 +925,7 @@ class VespaIndex(DocumentIndex):
             return http_client.put(
                 update.url,
                 headers={"Content-Type": "application/json"},
-                json=update.update_request,
+                content=vespa_json_dumps(update.update_request),
             )
 
         # NOTE: using `httpx` here since `requests` doesn't support HTTP2. This is beneficient for
@@ -830,37 +1023,92 @@ class VespaIndex(DocumentIndex):
         filters: IndexFilters,
     ) -> list[InferenceChunk]:
         if chunk_ind is None:
-            vespa_chunk_ids = _get_vespa_chunk_ids_by_document_id(
-                document_id=document_id,
-                index_name=self.index_name,
-                index_filters=filters,
-            )
-
-            if not vespa_chunk_ids:
-                return []
-
-            functions_with_args: list[tuple[Callable, tuple]] = [
-                (_inference_chunk_by_vespa_id, (vespa_chunk_id, self.index_name))
-                for vespa_chunk_id in vespa_chunk_ids
-            ]
-
-            logger.debug(
-                "Running LLM usefulness eval in parallel (following logging may be out of order)"
-            )
-            inference_chunks = run_functions_tuples_in_parallel(
-                functions_with_args, allow_failures=True
-            )
-            inference_chunks.sort(key=lambda chunk: chunk.chunk_id)
-            return inference_chunks
+            return self.batch_id_based_retrieval(
+                document_ids=[document_id], filters=filters
+            )[document_id]
 
         else:
             filters_str = _build_vespa_filters(filters=filters, include_hidden=True)
             yql = (
-                VespaIndex.yql_base.format(index_name=self.index_name)
+                VespaIndex.id_lookup_yql_base.format(index_name=self.index_name)
                 + filters_str
                 + f"({DOCUMENT_ID} contains '{document_id}' and {CHUNK_ID} contains '{chunk_ind}')"
             )
-        return _query_vespa({"yql": yql})
+        return _query_vespa({"yql": yql, "presentation.summary": ID_LOOKUP_SUMMARY})
+
+    def _retrieve_chunks_by_document_ids(
+        self, document_ids: list[str], filters_str: str
+    ) -> list[InferenceChunk]:
+        inference_chunks: list[InferenceChunk] = []
+        remaining_document_ids = list(document_ids)
+        min_chunk_id = 0
+        while remaining_document_ids:
+            # Every document has at most one chunk per chunk id, so a page never has
+            # more hits than fit in it
+            num_chunk_ids = max(
+                _ID_RETRIEVAL_HITS_PER_PAGE // len(remaining_document_ids), 1
+            )
+            # `in (...)` is not supported by the pinned Vespa version, one `contains`
+            # per document it is
+            doc_ids_clause = " or ".join(
+                f"{DOCUMENT_ID} contains {json.dumps(document_id, ensure_ascii=False)}"
+                for document_id in remaining_document_ids
+            )
+            yql = (
+                VespaIndex.id_lookup_yql_base.format(index_name=self.index_name)
+                + filters_str
+                + f"{CHUNK_ID} >= {min_chunk_id} and "
+                + f"{CHUNK_ID} < {min_chunk_id + num_chunk_ids} and "
+                + f"({doc_ids_clause})"
+            )
+            page_chunks = _query_vespa(
+                {
+                    "yql": yql,
+                    "presentation.summary": ID_LOOKUP_SUMMARY,
+                    "timeout": "10s",
+                    "hits": _ID_RETRIEVAL_HITS_PER_PAGE,
+                }
+            )
+            inference_chunks.extend(page_chunks)
+
+            # The chunk ids of a document are consecutive, a document without a chunk
+            # for every id of the range has no chunks past it
+            num_page_chunks = Counter(chunk.document_id for chunk in page_chunks)
+            remaining_document_ids = [
+                document_id
+                for document_id in remaining_document_ids
+                if num_page_chunks[document_id] >= num_chunk_ids
+            ]
+            min_chunk_id += num_chunk_ids
+        return inference_chunks
+
+    def batch_id_based_retrieval(
+        self,
+        document_ids: list[str],
+        filters: IndexFilters,
+    ) -> dict[str, list[InferenceChunk]]:
+        # One paginated query per batch of documents instead of one query per document
+        # and one GET per chunk
+        filters_str = _build_vespa_filters(filters=filters, include_hidden=True)
+        unique_document_ids = list(dict.fromkeys(document_ids))
+        functions_with_args: list[tuple[Callable, tuple]] = [
+            (self._retrieve_chunks_by_document_ids, (doc_id_batch, filters_str))
+            for doc_id_batch in batch_generator(
+                unique_document_ids, _ID_RETRIEVAL_DOCS_PER_QUERY
+            )
+        ]
+        # A failed batch is raised rather than passed off as documents without chunks
+        chunk_batches = run_functions_tuples_in_parallel(functions_with_args)
+
+        chunks_by_document_id: dict[str, list[InferenceChunk]] = {
+            document_id: [] for document_id in unique_document_ids
+        }
+        for chunk_batch in chunk_batches:
+            for chunk in chunk_batch:
+                chunks_by_document_id[chunk.document_id].append(chunk)
+        for doc_chunks in chunks_by_document_id.values():
+            doc_chunks.sort(key=lambda chunk: chunk.chunk_id)
+        return chunks_by_document_id
 
     def keyword_retrieval(
         self,
@@ -892,6 +1140,7 @@ class VespaIndex(DocumentIndex):
             "hits": num_to_retrieve,
             "offset": offset,
             "ranking.profile": "keyword_search",
+            "presentation.summary": RETRIEVAL_SUMMARY,
             "timeout": _VESPA_TIMEOUT,
         }
 
@@ -913,7 +1162,8 @@ class VespaIndex(DocumentIndex):
         yql = (
             VespaIndex.yql_base.format(index_name=self.index_name)
             + vespa_where_clauses
-            + f"(({{targetHits: {10 * num_to_retrieve}}}nearestNeighbor(embeddings, query_embedding)) "
+            + f"(({self._nearest_neighbor_annotation(10 * num_to_retrieve)}"
+            + "nearestNeighbor(embeddings, query_embedding)) "
             # `({defaultIndex: "content_summary"}userInput(@query))` section is
             # needed for highlighting while the N-gram highlighting is broken /
             # not working as desired
@@ -934,6 +1184,7 @@ class VespaIndex(DocumentIndex):
             "hits": num_to_retrieve,
             "offset": offset,
             "ranking.profile": f"hybrid_search{len(query_embedding)}",
+            "presentation.summary": RETRIEVAL_SUMMARY,
             "timeout": _VESPA_TIMEOUT,
         }
 
@@ -951,15 +1202,19 @@ class VespaIndex(DocumentIndex):
         title_content_ratio: float | None = TITLE_CONTENT_RATIO,
         distance_cutoff: float | None = SEARCH_DISTANCE_CUTOFF,
         edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
+        *,
+        target_hits: int | None = None,
     ) -> list[InferenceChunk]:
         vespa_where_clauses = _build_vespa_filters(filters)
-        # Needs to be at least as much as the value set in Vespa schema config
-        target_hits = max(10 * num_to_retrieve, 1000)
+        if target_hits is None:
+            target_hits = self.hybrid_target_hits(filters, num_to_retrieve, offset)
         yql = (
             VespaIndex.yql_base.format(index_name=self.index_name)
             + vespa_where_clauses
-            + f"(({{targetHits: {target_hits}}}nearestNeighbor(embeddings, query_embedding)) "
-            + f"or ({{targetHits: {target_hits}}}nearestNeighbor(title_embedding, query_embedding)) "
+            + f"(({self._nearest_neighbor_annotation(target_hits)}"
+            + "nearestNeighbor(embeddings, query_embedding)) "
+            + f"or ({self._nearest_neighbor_annotation(target_hits)}"
+            + "nearestNeighbor(title_embedding, query_embedding)) "
             + 'or ({grammar: "weakAnd"}userInput(@query)) '
             + f'or ({{defaultIndex: "{CONTENT_SUMMARY}"}}userInput(@query)))'
         )
@@ -984,6 +1239,7 @@ class VespaIndex(DocumentIndex):
             "hits": num_to_retrieve,
             "offset": offset,
             "ranking.profile": f"hybrid_search{len(query_embedding)}",
+            "presentation.summary": RETRIEVAL_SUMMARY,
             "timeout": _VESPA_TIMEOUT,
         }
 
@@ -998,7 +1254,7 @@ class VespaIndex(DocumentIndex):
     ) -> list[InferenceChunk]:
         vespa_where_clauses = _build_vespa_filters(filters, include_hidden=True)
         yql = (
-            VespaIndex.yql_base.format(index_name=self.index_name)
+            VespaIndex.admin_yql_base.format(index_name=self.index_name)
             + vespa_where_clauses
             + '({grammar: "weakAnd"}userInput(@query) '
             # `({defaultIndex: "content_summary"}userInput(@query))` section is
@@ -1013,6 +1269,7 @@ class VespaIndex(DocumentIndex):
             "hits": num_to_retrieve,
             "offset": 0,
             "ranking.profile": "admin_search",
+            "presentation.summary": ADMIN_SUMMARY,
             "timeout": _VESPA_TIMEOUT,
         }
 
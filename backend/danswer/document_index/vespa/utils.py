@@ -1,4 +1,11 @@
+import json
 import re
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
 
 
 _illegal_xml_chars_RE = re.compile(
@@ -10,3 +17,49 @@ def remove_invalid_unicode_chars(text: str) -> str:
     """Vespa does not take in unicode chars that aren't valid for XML.
     This removes them."""
     return _illegal_xml_chars_RE.sub("", text)
+
+
+def vespa_json_dumps(obj: Any) -> bytes:
+    """Serializes the bodies of the requests to Vespa, with orjson if it is installed.
+    The feed requests hold all the embeddings of the chunks, stdlib json is slow for
+    large lists of floats."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(obj).encode()
+
+
+def vespa_json_loads(data: bytes | str) -> Any:
+    """Parses the responses of Vespa and the json fields of the hits, with orjson if it
+    is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def metadata_to_vespa_maps(
+    metadata: dict[str, str | list[str]]
+) -> tuple[dict[str, str], dict[str, list[str]]]:
+    """Splits the metadata into the values for the `metadata_map` (single values) and
+    `metadata_list_map` (lists of values) fields. Unlike in the json string, the
+    characters Vespa doesn't take in would not be escaped, so they are removed."""
+    metadata_map: dict[str, str] = {}
+    metadata_list_map: dict[str, list[str]] = {}
+    for key, value in metadata.items():
+        key = remove_invalid_unicode_chars(key)
+        if isinstance(value, list):
+            metadata_list_map[key] = [remove_invalid_unicode_chars(v) for v in value]
+        else:
+            metadata_map[key] = remove_invalid_unicode_chars(value)
+    return metadata_map, metadata_list_map
+
+
+def vespa_map_to_dict(value: dict[str, Any] | list[dict[str, Any]] | None) -> dict:
+    """Map fields are rendered as json objects, or as lists of key / value objects when
+    Vespa is not set to render maps as json objects"""
+    if value is None:
+        return {}
+    if isinstance(value, list):
+        return {entry["key"]: entry["value"] for entry in value}
+    return value
@@ -19,6 +19,7 @@ from danswer.db.document_set import fetch_document_sets_for_documents
 from danswer.db.engine import get_sqlalchemy_engine
 from danswer.db.tag import create_or_add_document_tag
 from danswer.db.tag import create_or_add_document_tag_list
+from danswer.document_index.document_index_utils import bump_index_generation
 from danswer.document_index.interfaces import DocumentIndex
 from danswer.document_index.interfaces import DocumentMetadata
 from danswer.indexing.chunker import Chunker
@@ -186,6 +187,8 @@ def index_doc_batch(
         # documents with chunks in this set, are fully represented by the chunks
         # in this set
         insertion_records = document_index.index(chunks=access_aware_chunks)
+        if insertion_records:
+            bump_index_generation()
 
         successful_doc_ids = [record.document_id for record in insertion_records]
         successful_docs = [
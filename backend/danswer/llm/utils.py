@@ -94,18 +94,6 @@ def translate_danswer_msg_to_langchain(msg: ChatMessage) -> BaseMessage:
     raise ValueError(f"New message type {msg.message_type} not handled")
 
 
-def translate_history_to_basemessages(
-    history: list[ChatMessage],
-) -> tuple[list[BaseMessage], list[int]]:
-    history_basemessages = [
-        translate_danswer_msg_to_langchain(msg)
-        for msg in history
-        if msg.token_count != 0
-    ]
-    history_token_counts = [msg.token_count for msg in history if msg.token_count != 0]
-    return history_basemessages, history_token_counts
-
-
 def dict_based_prompt_to_langchain_prompt(
     messages: list[dict[str, str]]
 ) -> list[BaseMessage]:
@@ -53,6 +53,7 @@ from danswer.db.index_attempt import expire_index_attempts
 from danswer.document_index.factory import get_default_document_index
 from danswer.llm.factory import get_default_llm
 from danswer.search.search_nlp_models import warm_up_models
+from danswer.search.search_runner import warm_up_query_processing
 from danswer.server.danswer_api.ingestion import get_danswer_api_key
 from danswer.server.danswer_api.ingestion import router as danswer_api_router
 from danswer.server.documents.cc_pair import router as cc_pair_router
@@ -300,6 +301,7 @@ def get_application() -> FastAPI:
             nltk.download("stopwords", quiet=True)
             nltk.download("wordnet", quiet=True)
             nltk.download("punkt", quiet=True)
+            warm_up_query_processing()
 
             logger.info("Verifying default connector/credential exist.")
             create_initial_public_credential(db_session)
@@ -99,6 +99,20 @@ def separate_answer_quotes(
     return _extract_answer_quotes_freeform(clean_up_code_blocks(answer_raw))
 
 
+def _may_match_fuzzy(quote_clean: str, chunk_clean: str, max_edits: int) -> bool:
+    """With at most `max_edits` edits, one of `max_edits + 1` disjoint parts of the quote
+    must appear unchanged in the chunk. Plain substring search for these parts is much
+    cheaper than the fuzzy search and rules out most chunks that can't match."""
+    part_len = len(quote_clean) // (max_edits + 1)
+    if part_len == 0:
+        return True
+
+    return any(
+        quote_clean[part_offset : part_offset + part_len] in chunk_clean
+        for part_offset in range(0, part_len * (max_edits + 1), part_len)
+    )
+
+
 def match_quotes_to_docs(
     quotes: list[str],
     chunks: list[InferenceChunk],
@@ -107,20 +121,29 @@ def match_quotes_to_docs(
     prefix_only_length: int = 100,
 ) -> DanswerQuotes:
     danswer_quotes: list[DanswerQuote] = []
+    # each chunk is cleaned up at most once, when it is first compared to a quote
+    chunks_clean: dict[int, str] = {}
     for quote in quotes:
         max_edits = math.ceil(float(len(quote)) * max_error_percent)
+        quote_clean: str | None = None
 
-        for chunk in chunks:
+        for chunk_ind, chunk in enumerate(chunks):
             if not chunk.source_links:
                 continue
 
-            quote_clean = shared_precompare_cleanup(
-                clean_model_quote(quote, trim_length=prefix_only_length)
-            )
-            chunk_clean = shared_precompare_cleanup(chunk.content)
+            if quote_clean is None:
+                quote_clean = shared_precompare_cleanup(
+                    clean_model_quote(quote, trim_length=prefix_only_length)
+                )
+            chunk_clean = chunks_clean.get(chunk_ind)
+            if chunk_clean is None:
+                chunk_clean = shared_precompare_cleanup(chunk.content)
+                chunks_clean[chunk_ind] = chunk_clean
 
             # Finding the offset of the quote in the plain text
             if fuzzy_search:
+                if not _may_match_fuzzy(quote_clean, chunk_clean, max_edits):
+                    continue
                 re_search_str = (
                     r"(" + re.escape(quote_clean) + r"){e<=" + str(max_edits) + r"}"
                 )
@@ -129,9 +152,9 @@ def match_quotes_to_docs(
                     continue
                 offset = found.span()[0]
             else:
-                if quote_clean not in chunk_clean:
+                offset = chunk_clean.find(quote_clean)
+                if offset == -1:
                     continue
-                offset = chunk_clean.index(quote_clean)
 
             # Extracting the link from the offset
             curr_link = None
@@ -208,6 +231,10 @@ def _extract_quotes_from_completed_token_stream(
     return quotes
 
 
+_JSON_ANSWER_START = '{"answer":"'
+_WHITESPACE_PATTERN = re.compile(r"\s")
+
+
 def process_model_tokens(
     tokens: Iterator[str],
     context_docs: list[InferenceChunk],
@@ -218,35 +245,52 @@ def process_model_tokens(
 
     Yields Answer tokens back out in a dict for streaming to frontend
     When Answer section ends, yields dict with answer_finished key
-    Collects all the tokens at the end to form the complete model output"""
+    Collects all the tokens at the end to form the complete model output
+
+    Only the new token and a bounded amount of state is looked at for every token, the
+    full model output is only assembled once the stream is done"""
     quote_pat = f"\n{QUOTE_PAT}"
     # Sometimes worse model outputs new line instead of :
     quote_loose = f"\n{quote_pat[:-1]}\n"
     # Sometime model outputs two newlines before quote section
     quote_pat_full = f"\n{quote_pat}"
-    model_output: str = ""
+    model_output_tokens: list[str] = []
+    model_output_len = 0
+    last_char = ""
+    # end of the model output with whitespace removed, just long enough to find an
+    # answer start that spans multiple tokens
+    whitespace_free_tail = ""
     found_answer_start = False if is_json_prompt else True
     found_answer_end = False
     hold_quote = ""
     for token in tokens:
-        model_previous = model_output
-        model_output += token
-
-        if not found_answer_start and '{"answer":"' in re.sub(r"\s", "", model_output):
-            # Note, if the token that completes the pattern has additional text, for example if the token is "?
-            # Then the chars after " will not be streamed, but this is ok as it prevents streaming the ? in the
-            # event that the model outputs the UNCERTAINTY_PAT
-            found_answer_start = True
-
-            # Prevent heavy cases of hallucinations where model is not even providing a json until later
-            if is_json_prompt and len(model_output) > 40:
-                logger.warning("LLM did not produce json as prompted")
-                found_answer_end = True
+        previous_char = last_char
+        model_output_tokens.append(token)
+        model_output_len += len(token)
+        if token:
+            last_char = token[-1]
+
+        if not found_answer_start:
+            whitespace_free_end = whitespace_free_tail + _WHITESPACE_PATTERN.sub(
+                "", token
+            )
+            whitespace_free_tail = whitespace_free_end[1 - len(_JSON_ANSWER_START) :]
 
-            continue
+            if _JSON_ANSWER_START in whitespace_free_end:
+                # Note, if the token that completes the pattern has additional text, for example if the token is "?
+                # Then the chars after " will not be streamed, but this is ok as it prevents streaming the ? in the
+                # event that the model outputs the UNCERTAINTY_PAT
+                found_answer_start = True
+
+                # Prevent heavy cases of hallucinations where model is not even providing a json until later
+                if is_json_prompt and model_output_len > 40:
+                    logger.warning("LLM did not produce json as prompted")
+                    found_answer_end = True
+
+                continue
 
         if found_answer_start and not found_answer_end:
-            if is_json_prompt and _stream_json_answer_end(model_previous, token):
+            if is_json_prompt and _stream_json_answer_end(previous_char, token):
                 found_answer_end = True
                 yield DanswerAnswerPiece(answer_piece=None)
                 continue
@@ -261,6 +305,7 @@ def process_model_tokens(
             yield DanswerAnswerPiece(answer_piece=hold_quote + token)
             hold_quote = ""
 
+    model_output = "".join(model_output_tokens)
     logger.debug(f"Raw Model QnA Output: {model_output}")
 
     yield _extract_quotes_from_completed_token_stream(
@@ -155,6 +155,8 @@ class SearchResponse(RetrievalDocs):
 class RetrievalMetricsContainer(BaseModel):
     search_type: SearchType
     metrics: list[ChunkMetric]  # This contains the scores for retrieval as well
+    # Nearest neighbor candidates per embedding field, only for hybrid search
+    target_hits: int | None = None
 
 
 class RerankMetricsContainer(BaseModel):
@@ -0,0 +1,123 @@
+import copy
+import threading
+import time
+from dataclasses import dataclass
+
+from danswer.indexing.models import InferenceChunk
+from danswer.search.models import SearchQuery
+from danswer.utils.logger import setup_logger
+from danswer.utils.ttl_cache import TTLCache
+
+logger = setup_logger()
+
+_METRICS_LOG_INTERVAL = 1000
+
+
+@dataclass(frozen=True)
+class _CachedSearchResult:
+    index_generation: str
+    created_at: float
+    chunks: tuple[InferenceChunk, ...]
+    llm_chunk_selection: tuple[bool, ...]
+
+
+def search_result_cache_key(
+    search_query: SearchQuery,
+    index_name: str,
+    hybrid_alpha: float,
+    multilingual_expansion_str: str | None,
+) -> str:
+    """Everything which the final search results depend on, apart from the documents in
+    the index (see `get_index_generation`). The index name identifies the embedding
+    model. The ACL is a set so is sorted to not depend on the order of its entries."""
+    acl = search_query.filters.access_control_list
+    filters = search_query.filters.copy(
+        update={"access_control_list": sorted(acl) if acl is not None else None}
+    )
+    query_json = search_query.copy(update={"filters": filters}).json()
+    return f"{index_name}|{hybrid_alpha}|{multilingual_expansion_str}|{query_json}"
+
+
+class SearchResultCache:
+    """Final ranked chunks and LLM relevance filter results of searches, for the
+    searches repeated by dashboards, bot retries and evals. Results computed from an
+    older index generation are dropped on lookup. Logs the hit rate and staleness
+    (results dropped as outdated, age of the served results) every 1000 lookups."""
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self._cache: TTLCache[str, _CachedSearchResult] = TTLCache(
+            max_size=max_size, ttl_seconds=ttl_seconds
+        )
+        self._lock = threading.Lock()
+        self.num_hits = 0
+        self.num_misses = 0
+        self.num_outdated = 0
+        self.total_hit_age_seconds = 0.0
+        self.max_hit_age_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.max_size > 0
+
+    def get(
+        self, key: str, index_generation: str
+    ) -> tuple[list[InferenceChunk], list[bool]] | None:
+        cached_result = self._cache.get(key)
+        outdated = (
+            cached_result is not None
+            and cached_result.index_generation != index_generation
+        )
+        if outdated:
+            self._cache.delete(key)
+
+        with self._lock:
+            if cached_result is None or outdated:
+                self.num_misses += 1
+                self.num_outdated += outdated
+            else:
+                age = time.monotonic() - cached_result.created_at
+                self.num_hits += 1
+                self.total_hit_age_seconds += age
+                self.max_hit_age_seconds = max(self.max_hit_age_seconds, age)
+            if (self.num_hits + self.num_misses) % _METRICS_LOG_INTERVAL == 0:
+                self._log_metrics()
+
+        if cached_result is None or outdated:
+            return None
+        # Copies so that the callers modifying the chunks don't change the cached ones
+        return [copy.copy(chunk) for chunk in cached_result.chunks], list(
+            cached_result.llm_chunk_selection
+        )
+
+    def set(
+        self,
+        key: str,
+        index_generation: str,
+        chunks: list[InferenceChunk],
+        llm_chunk_selection: list[bool],
+    ) -> None:
+        """The chunks are cached as they are, they must not be modified afterwards"""
+        self._cache.set(
+            key,
+            _CachedSearchResult(
+                index_generation=index_generation,
+                created_at=time.monotonic(),
+                chunks=tuple(chunks),
+                llm_chunk_selection=tuple(llm_chunk_selection),
+            ),
+        )
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _log_metrics(self) -> None:
+        num_lookups = self.num_hits + self.num_misses
+        mean_hit_age = (
+            self.total_hit_age_seconds / self.num_hits if self.num_hits else 0
+        )
+        logger.info(
+            f"Search result cache: {self.num_hits} hits / {num_lookups} lookups "
+            f"({self.num_hits / num_lookups:.1%}), {self.num_outdated} outdated by "
+            f"index changes, served results age mean {mean_hit_age:.1f}s, "
+            f"max {self.max_hit_age_seconds:.1f}s"
+        )
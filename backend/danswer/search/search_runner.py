@@ -1,6 +1,8 @@
+import copy
 import string
 from collections.abc import Callable
 from collections.abc import Iterator
+from functools import lru_cache
 from typing import cast
 
 import numpy
@@ -15,11 +17,15 @@ from danswer.configs.app_configs import MODEL_SERVER_PORT
 from danswer.configs.chat_configs import HYBRID_ALPHA
 from danswer.configs.chat_configs import MULTILINGUAL_QUERY_EXPANSION
 from danswer.configs.chat_configs import NUM_RERANKED_RESULTS
+from danswer.configs.chat_configs import QUERY_PROCESSING_CACHE_SIZE
+from danswer.configs.chat_configs import SEARCH_RESULT_CACHE_SIZE
+from danswer.configs.chat_configs import SEARCH_RESULT_CACHE_TTL_SECONDS
 from danswer.configs.model_configs import CROSS_ENCODER_RANGE_MAX
 from danswer.configs.model_configs import CROSS_ENCODER_RANGE_MIN
 from danswer.configs.model_configs import SIM_SCORE_RANGE_HIGH
 from danswer.configs.model_configs import SIM_SCORE_RANGE_LOW
 from danswer.db.embedding_model import get_current_db_embedding_model
+from danswer.document_index.document_index_utils import get_index_generation
 from danswer.document_index.document_index_utils import (
     translate_boost_count_to_multiplier,
 )
@@ -36,6 +42,8 @@ from danswer.search.models import SearchType
 from danswer.search.search_nlp_models import CrossEncoderEnsembleModel
 from danswer.search.search_nlp_models import EmbeddingModel
 from danswer.search.search_nlp_models import EmbedTextType
+from danswer.search.search_result_cache import search_result_cache_key
+from danswer.search.search_result_cache import SearchResultCache
 from danswer.secondary_llm_flows.chunk_usefulness import llm_batch_eval_chunks
 from danswer.secondary_llm_flows.query_expansion import multilingual_query_expansion
 from danswer.utils.logger import setup_logger
@@ -47,6 +55,10 @@ from danswer.utils.timing import log_function_time
 
 logger = setup_logger()
 
+_SEARCH_RESULT_CACHE = SearchResultCache(
+    max_size=SEARCH_RESULT_CACHE_SIZE, ttl_seconds=SEARCH_RESULT_CACHE_TTL_SECONDS
+)
+
 
 def _log_top_chunk_links(search_flow: str, chunks: list[InferenceChunk]) -> None:
     top_links = [
@@ -55,14 +67,32 @@ def _log_top_chunk_links(search_flow: str, chunks: list[InferenceChunk]) -> None
     logger.info(f"Top links from {search_flow} search: {', '.join(top_links)}")
 
 
+_STOP_WORDS: set[str] | None = None
+_LEMMATIZER: WordNetLemmatizer | None = None
+
+
+def get_stop_words() -> set[str]:
+    global _STOP_WORDS
+    if _STOP_WORDS is None:
+        _STOP_WORDS = set(stopwords.words("english"))
+    return _STOP_WORDS
+
+
+def get_lemmatizer() -> WordNetLemmatizer:
+    global _LEMMATIZER
+    if _LEMMATIZER is None:
+        _LEMMATIZER = WordNetLemmatizer()
+    return _LEMMATIZER
+
+
 def lemmatize_text(text: str) -> list[str]:
-    lemmatizer = WordNetLemmatizer()
+    lemmatizer = get_lemmatizer()
     word_tokens = word_tokenize(text)
     return [lemmatizer.lemmatize(word) for word in word_tokens]
 
 
 def remove_stop_words_and_punctuation(text: str) -> list[str]:
-    stop_words = set(stopwords.words("english"))
+    stop_words = get_stop_words()
     word_tokens = word_tokenize(text)
     text_trimmed = [
         word
@@ -72,6 +102,7 @@ def remove_stop_words_and_punctuation(text: str) -> list[str]:
     return text_trimmed or word_tokens
 
 
+@lru_cache(maxsize=QUERY_PROCESSING_CACHE_SIZE)
 def query_processing(
     query: str,
 ) -> str:
@@ -80,6 +111,14 @@ def query_processing(
     return query
 
 
+def warm_up_query_processing() -> None:
+    """The NLTK resources (stop words, tokenizer, WordNet) are otherwise only loaded
+    when the first query is processed, adding to the latency of that query"""
+    warm_up_str = "Danswer is amazing! Check out our easy deployment guides"
+    remove_stop_words_and_punctuation(warm_up_str)
+    lemmatize_text(warm_up_str)
+
+
 def chunks_to_search_docs(chunks: list[InferenceChunk] | None) -> list[SearchDoc]:
     search_docs = (
         [
@@ -137,6 +176,7 @@ def doc_index_retrieval(
     document_index: DocumentIndex,
     db_session: Session,
     hybrid_alpha: float = HYBRID_ALPHA,
+    target_hits: int | None = None,  # Only applicable to hybrid search
 ) -> list[InferenceChunk]:
     if query.search_type == SearchType.KEYWORD:
         top_chunks = document_index.keyword_retrieval(
@@ -178,6 +218,7 @@ def doc_index_retrieval(
                 num_to_retrieve=query.num_hits,
                 offset=query.offset,
                 hybrid_alpha=hybrid_alpha,
+                target_hits=target_hits,
             )
 
         else:
@@ -186,6 +227,47 @@ def doc_index_retrieval(
     return top_chunks
 
 
+def _boost_multipliers(chunks: list[InferenceChunk]) -> numpy.ndarray:
+    # Few distinct boost values exist, so translate each once rather than once per chunk
+    boosts, chunk_boost_inds = numpy.unique(
+        [chunk.boost for chunk in chunks], return_inverse=True
+    )
+    multipliers = numpy.array(
+        [translate_boost_count_to_multiplier(int(boost)) for boost in boosts]
+    )
+    return multipliers[chunk_boost_inds]
+
+
+def _boost_and_rank_scores(
+    scores: numpy.ndarray,
+    chunks: list[InferenceChunk],
+    normalize: Callable[[numpy.ndarray], numpy.ndarray],
+    apply_recency: bool = True,
+) -> tuple[list[float], list[int]]:
+    """Multiplies the scores by the boost (and recency) multipliers of the chunks, then
+    normalizes them. Returns the final scores in descending order and the original
+    indices of the chunks in this order, ties keep the order of the chunks."""
+    boosted_scores = scores * _boost_multipliers(chunks)
+    if apply_recency:
+        boosted_scores = boosted_scores * numpy.fromiter(
+            (chunk.recency_bias for chunk in chunks), dtype=float, count=len(chunks)
+        )
+    final_scores = normalize(boosted_scores)
+    ranked_indices = numpy.argsort(-final_scores, kind="stable")
+    return final_scores[ranked_indices].tolist(), ranked_indices.tolist()
+
+
+def _assign_ranked_scores(
+    chunks: list[InferenceChunk],
+    ranked_scores: list[float],
+    ranked_indices: list[int],
+) -> list[InferenceChunk]:
+    ranked_chunks = [chunks[ind] for ind in ranked_indices]
+    for chunk, score in zip(ranked_chunks, ranked_scores):
+        chunk.score = score
+    return ranked_chunks
+
+
 @log_function_time(print_only=True)
 def semantic_reranking(
     query: str,
@@ -213,28 +295,23 @@ def semantic_reranking(
         [enc_n_scores - cross_models_min for enc_n_scores in sim_scores]
     ) / len(sim_scores)
 
-    boosts = [translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks]
-    recency_multiplier = [chunk.recency_bias for chunk in chunks]
-    boosted_sim_scores = shifted_sim_scores * boosts * recency_multiplier
-    normalized_b_s_scores = (boosted_sim_scores + cross_models_min - model_min) / (
-        model_max - model_min
-    )
-    orig_indices = [i for i in range(len(normalized_b_s_scores))]
-    scored_results = list(
-        zip(normalized_b_s_scores, raw_sim_scores, chunks, orig_indices)
-    )
-    scored_results.sort(key=lambda x: x[0], reverse=True)
-    ranked_sim_scores, ranked_raw_scores, ranked_chunks, ranked_indices = zip(
-        *scored_results
+    ranked_sim_scores, ranked_indices = _boost_and_rank_scores(
+        scores=shifted_sim_scores,
+        chunks=chunks,
+        normalize=lambda boosted_sim_scores: (
+            boosted_sim_scores + cross_models_min - model_min
+        )
+        / (model_max - model_min),
     )
+    ranked_raw_scores = raw_sim_scores[ranked_indices].tolist()
 
+    # Lazily formatted, formatting thousands of scores costs more than the scoring
     logger.debug(
-        f"Reranked (Boosted + Time Weighted) similarity scores: {ranked_sim_scores}"
+        "Reranked (Boosted + Time Weighted) similarity scores: %s", ranked_sim_scores
     )
 
     # Assign new chunk scores based on reranking
-    for ind, chunk in enumerate(ranked_chunks):
-        chunk.score = ranked_sim_scores[ind]
+    ranked_chunks = _assign_ranked_scores(chunks, ranked_sim_scores, ranked_indices)
 
     if rerank_metrics_callback is not None:
         chunk_metrics = [
@@ -253,7 +330,7 @@ def semantic_reranking(
             )
         )
 
-    return list(ranked_chunks), list(ranked_indices)
+    return ranked_chunks, ranked_indices
 
 
 def apply_boost_legacy(
@@ -261,51 +338,40 @@ def apply_boost_legacy(
     norm_min: float = SIM_SCORE_RANGE_LOW,
     norm_max: float = SIM_SCORE_RANGE_HIGH,
 ) -> list[InferenceChunk]:
-    scores = [chunk.score or 0 for chunk in chunks]
-    boosts = [translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks]
+    raw_scores = [chunk.score or 0 for chunk in chunks]
 
-    logger.debug(f"Raw similarity scores: {scores}")
+    logger.debug("Raw similarity scores: %s", raw_scores)
 
-    score_min = min(scores)
-    score_max = max(scores)
+    scores = numpy.array(raw_scores, dtype=float)
+    score_min = scores.min()
+    score_max = scores.max()
     score_range = score_max - score_min
 
-    if score_range != 0:
-        boosted_scores = [
-            ((score - score_min) / score_range) * boost
-            for score, boost in zip(scores, boosts)
-        ]
-        unnormed_boosted_scores = [
-            score * score_range + score_min for score in boosted_scores
-        ]
-    else:
-        unnormed_boosted_scores = [
-            score * boost for score, boost in zip(scores, boosts)
-        ]
-
-    norm_min = min(norm_min, min(scores))
-    norm_max = max(norm_max, max(scores))
+    norm_min = min(norm_min, score_min)
+    norm_max = max(norm_max, score_max)
     # This should never be 0 unless user has done some weird/wrong settings
     norm_range = norm_max - norm_min
 
-    # For score display purposes
-    if norm_range != 0:
-        re_normed_scores = [
-            ((score - norm_min) / norm_range) for score in unnormed_boosted_scores
-        ]
-    else:
-        re_normed_scores = unnormed_boosted_scores
-
-    rescored_chunks = list(zip(re_normed_scores, chunks))
-    rescored_chunks.sort(key=lambda x: x[0], reverse=True)
-    sorted_boosted_scores, boost_sorted_chunks = zip(*rescored_chunks)
-
-    final_chunks = list(boost_sorted_chunks)
-    final_scores = list(sorted_boosted_scores)
-    for ind, chunk in enumerate(final_chunks):
-        chunk.score = final_scores[ind]
+    def _normalize(boosted_scores: numpy.ndarray) -> numpy.ndarray:
+        unnormed_boosted_scores = (
+            boosted_scores * score_range + score_min
+            if score_range != 0
+            else boosted_scores
+        )
+        # For score display purposes
+        if norm_range != 0:
+            return (unnormed_boosted_scores - norm_min) / norm_range
+        return unnormed_boosted_scores
+
+    final_scores, ranked_indices = _boost_and_rank_scores(
+        scores=(scores - score_min) / score_range if score_range != 0 else scores,
+        chunks=chunks,
+        normalize=_normalize,
+        apply_recency=False,
+    )
+    final_chunks = _assign_ranked_scores(chunks, final_scores, ranked_indices)
 
-    logger.debug(f"Boost sorted similary scores: {list(final_scores)}")
+    logger.debug("Boost sorted similary scores: %s", final_scores)
 
     return final_chunks
 
@@ -318,34 +384,24 @@ def apply_boost(
     norm_min: float = SIM_SCORE_RANGE_LOW,
     norm_max: float = SIM_SCORE_RANGE_HIGH,
 ) -> list[InferenceChunk]:
-    scores = [chunk.score or 0.0 for chunk in chunks]
-    logger.debug(f"Raw similarity scores: {scores}")
+    raw_scores = [chunk.score or 0.0 for chunk in chunks]
+    logger.debug("Raw similarity scores: %s", raw_scores)
 
-    boosts = [translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks]
-    recency_multiplier = [chunk.recency_bias for chunk in chunks]
+    scores = numpy.array(raw_scores, dtype=float)
 
-    norm_min = min(norm_min, min(scores[:norm_cutoff]))
-    norm_max = max(norm_max, max(scores[:norm_cutoff]))
+    norm_min = min(norm_min, scores[:norm_cutoff].min())
+    norm_max = max(norm_max, scores[:norm_cutoff].max())
     # This should never be 0 unless user has done some weird/wrong settings
     norm_range = norm_max - norm_min
 
-    boosted_scores = [
-        max(0, (score - norm_min) * boost * recency / norm_range)
-        for score, boost, recency in zip(scores, boosts, recency_multiplier)
-    ]
-
-    rescored_chunks = list(zip(boosted_scores, chunks))
-    rescored_chunks.sort(key=lambda x: x[0], reverse=True)
-    sorted_boosted_scores, boost_sorted_chunks = zip(*rescored_chunks)
-
-    final_chunks = list(boost_sorted_chunks)
-    final_scores = list(sorted_boosted_scores)
-    for ind, chunk in enumerate(final_chunks):
-        chunk.score = final_scores[ind]
-
-    logger.debug(
-        f"Boosted + Time Weighted sorted similarity scores: {list(final_scores)}"
+    final_scores, ranked_indices = _boost_and_rank_scores(
+        scores=scores - norm_min,
+        chunks=chunks,
+        normalize=lambda boosted_scores: numpy.maximum(0, boosted_scores / norm_range),
     )
+    final_chunks = _assign_ranked_scores(chunks, final_scores, ranked_indices)
+
+    logger.debug("Boosted + Time Weighted sorted similarity scores: %s", final_scores)
 
     return final_chunks
 
@@ -366,6 +422,13 @@ def retrieve_chunks(
     | None = None,
 ) -> list[InferenceChunk]:
     """Returns a list of the best chunks from an initial keyword/semantic/ hybrid search."""
+    # Computed once so that the query rephrases and the metrics use the same value
+    target_hits = (
+        document_index.hybrid_target_hits(query.filters, query.num_hits, query.offset)
+        if query.search_type == SearchType.HYBRID
+        else None
+    )
+
     # Don't do query expansion on complex queries, rephrasings likely would not work well
     if not multilingual_expansion_str or "\n" in query.query or "\r" in query.query:
         top_chunks = doc_index_retrieval(
@@ -373,6 +436,7 @@ def retrieve_chunks(
             document_index=document_index,
             db_session=db_session,
             hybrid_alpha=hybrid_alpha,
+            target_hits=target_hits,
         )
     else:
         simplified_queries = set()
@@ -396,7 +460,7 @@ def retrieve_chunks(
             run_queries.append(
                 (
                     doc_index_retrieval,
-                    (q_copy, document_index, db_session, hybrid_alpha),
+                    (q_copy, document_index, db_session, hybrid_alpha, target_hits),
                 )
             )
         parallel_search_results = run_functions_tuples_in_parallel(run_queries)
@@ -421,7 +485,9 @@ def retrieve_chunks(
         ]
         retrieval_metrics_callback(
             RetrievalMetricsContainer(
-                search_type=query.search_type, metrics=chunk_metrics
+                search_type=query.search_type,
+                metrics=chunk_metrics,
+                target_hits=target_hits,
             )
         )
 
@@ -507,7 +573,7 @@ def empty_search_generator() -> Iterator[list[InferenceChunk] | list[bool]]:
     yield cast(list[bool], [])
 
 
-def full_chunk_search_generator(
+def _uncached_full_chunk_search_generator(
     search_query: SearchQuery,
     document_index: DocumentIndex,
     db_session: Session,
@@ -602,6 +668,66 @@ def full_chunk_search_generator(
         yield [False for _ in reranked_chunks or retrieved_chunks]
 
 
+def full_chunk_search_generator(
+    search_query: SearchQuery,
+    document_index: DocumentIndex,
+    db_session: Session,
+    hybrid_alpha: float = HYBRID_ALPHA,  # Only applicable to hybrid search
+    multilingual_expansion_str: str | None = MULTILINGUAL_QUERY_EXPANSION,
+    retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None]
+    | None = None,
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+) -> Iterator[list[InferenceChunk] | list[bool]]:
+    """Always yields twice. Once with the selected chunks and once with the LLM relevance filter result.
+    If LLM filter results are turned off, returns a list of False.
+    Identical searches on an unchanged index are served from the search result cache,
+    without calling the metrics callbacks.
+    """
+    search_generator = _uncached_full_chunk_search_generator(
+        search_query=search_query,
+        document_index=document_index,
+        db_session=db_session,
+        hybrid_alpha=hybrid_alpha,
+        multilingual_expansion_str=multilingual_expansion_str,
+        retrieval_metrics_callback=retrieval_metrics_callback,
+        rerank_metrics_callback=rerank_metrics_callback,
+    )
+    if not _SEARCH_RESULT_CACHE.enabled:
+        yield from search_generator
+        return
+
+    cache_key = search_result_cache_key(
+        search_query=search_query,
+        index_name=document_index.index_name,
+        hybrid_alpha=hybrid_alpha,
+        multilingual_expansion_str=multilingual_expansion_str,
+    )
+    try:
+        index_generation = get_index_generation()
+    except Exception:
+        logger.exception("Failed to get the index generation, skipping the cache")
+        yield from search_generator
+        return
+
+    cached_result = _SEARCH_RESULT_CACHE.get(cache_key, index_generation)
+    if cached_result is not None:
+        cached_chunks, cached_llm_chunk_selection = cached_result
+        _log_top_chunk_links(search_query.search_type.value, cached_chunks)
+        yield cached_chunks
+        yield cached_llm_chunk_selection
+        return
+
+    top_chunks = cast(list[InferenceChunk], next(search_generator))
+    # Cached before being handed out, callers may modify the chunks
+    cached_chunks = [copy.copy(chunk) for chunk in top_chunks]
+    yield top_chunks
+    llm_chunk_selection = cast(list[bool], next(search_generator))
+    _SEARCH_RESULT_CACHE.set(
+        cache_key, index_generation, cached_chunks, llm_chunk_selection
+    )
+    yield llm_chunk_selection
+
+
 def combine_inference_chunks(inf_chunks: list[InferenceChunk]) -> LlmDoc:
     if not inf_chunks:
         raise ValueError("Cannot combine empty list of chunks")
@@ -625,21 +751,18 @@ def inference_documents_from_ids(
     document_index: DocumentIndex,
 ) -> list[LlmDoc]:
     # Currently only fetches whole docs
-    doc_ids_set = set(doc_id for doc_id, chunk_id in doc_identifiers)
+    doc_ids = list(dict.fromkeys(doc_id for doc_id, chunk_id in doc_identifiers))
 
     # No need for ACL here because the doc ids were validated beforehand
     filters = IndexFilters(access_control_list=None)
 
-    functions_with_args: list[tuple[Callable, tuple]] = [
-        (document_index.id_based_retrieval, (doc_id, None, filters))
-        for doc_id in doc_ids_set
-    ]
-
-    parallel_results = run_functions_tuples_in_parallel(
-        functions_with_args, allow_failures=True
+    chunks_by_doc_id = document_index.batch_id_based_retrieval(
+        document_ids=doc_ids, filters=filters
     )
 
-    # Any failures to retrieve would give a None, drop the Nones and empty lists
-    inference_chunks_sets = [res for res in parallel_results if res]
-
-    return [combine_inference_chunks(chunk_set) for chunk_set in inference_chunks_sets]
+    # Drop the documents which are not in the index (anymore)
+    return [
+        combine_inference_chunks(chunk_set)
+        for chunk_set in chunks_by_doc_id.values()
+        if chunk_set
+    ]
@@ -1,7 +1,9 @@
+import re
 from collections.abc import Callable
 from typing import cast
 
 from danswer.chat.chat_utils import combine_message_chain
+from danswer.configs.chat_configs import SPECULATIVE_RETRIEVAL_MIN_OVERLAP
 from danswer.configs.model_configs import GEN_AI_HISTORY_CUTOFF
 from danswer.db.models import ChatMessage
 from danswer.llm.exceptions import GenAIDisabledException
@@ -85,6 +87,23 @@ def get_contextual_rephrase_messages(
     return messages
 
 
+def query_rephrase_differs(
+    query: str,
+    rephrased_query: str,
+    min_overlap: float = SPECULATIVE_RETRIEVAL_MIN_OVERLAP,
+) -> bool:
+    """True if the rephrased query would likely retrieve different documents, meaning
+    the two share less than `min_overlap` of their (case and punctuation insensitive)
+    words"""
+    words = set(re.findall(r"\w+", query.casefold()))
+    rephrased_words = set(re.findall(r"\w+", rephrased_query.casefold()))
+    if words == rephrased_words:
+        return False
+
+    overlap = len(words & rephrased_words) / len(words | rephrased_words)
+    return overlap < min_overlap
+
+
 def history_based_query_rephrase(
     query_message: ChatMessage,
     history: list[ChatMessage],
@@ -98,43 +117,24 @@ def history_based_query_rephrase(
     if not user_query:
         raise ValueError("Can't rephrase/search an empty query")
 
-    if llm is None:
-        try:
-            llm = get_default_llm()
-        except GenAIDisabledException:
-            # If Generative AI is turned off, just return the original query
-            return user_query
-
     # For some use cases, the first query should be untouched. Later queries must be rephrased
     # due to needing context but the first query has no context.
     if skip_first_rephrase and not history:
         return user_query
 
-    # If it's a very large query, assume it's a copy paste which we may want to find exactly
-    # or at least very closely, so don't rephrase it
-    if len(user_query) >= size_heuristic:
-        return user_query
-
-    # If there is an unusually high number of punctuations, it's probably not natural language
-    # so don't rephrase it
-    if count_punctuation(user_query) >= punctuation_heuristic:
-        return user_query
-
     history_str = combine_message_chain(
         messages=history, token_limit=GEN_AI_HISTORY_CUTOFF
     )
 
-    prompt_msgs = get_contextual_rephrase_messages(
-        question=user_query, history_str=history_str
+    return thread_based_query_rephrase(
+        user_query=user_query,
+        history_str=history_str,
+        llm=llm,
+        size_heuristic=size_heuristic,
+        punctuation_heuristic=punctuation_heuristic,
+        skip_without_history=False,
     )
 
-    filled_llm_prompt = dict_based_prompt_to_langchain_prompt(prompt_msgs)
-    rephrased_query = llm.invoke(filled_llm_prompt)
-
-    logger.debug(f"Rephrased combined query: {rephrased_query}")
-
-    return rephrased_query
-
 
 def thread_based_query_rephrase(
     user_query: str,
@@ -142,13 +142,20 @@ def thread_based_query_rephrase(
     llm: LLM | None = None,
     size_heuristic: int = 200,
     punctuation_heuristic: int = 10,
+    skip_without_history: bool = True,
 ) -> str:
-    if not history_str:
+    """Rephrases the query with the history already combined into a string. Only takes
+    plain values so it can also run outside of the thread owning the DB session"""
+    if skip_without_history and not history_str:
         return user_query
 
+    # If it's a very large query, assume it's a copy paste which we may want to find exactly
+    # or at least very closely, so don't rephrase it
     if len(user_query) >= size_heuristic:
         return user_query
 
+    # If there is an unusually high number of punctuations, it's probably not natural language
+    # so don't rephrase it
     if count_punctuation(user_query) >= punctuation_heuristic:
         return user_query
 
@@ -1,10 +1,16 @@
 import json
 import random
+import re
+from functools import lru_cache
 
 from sqlalchemy.orm import Session
 
+from danswer.configs.chat_configs import FILTER_EXTRACTION_CACHE_SIZE
+from danswer.configs.chat_configs import FILTER_EXTRACTION_CACHE_TTL_SECONDS
 from danswer.configs.constants import DocumentSource
-from danswer.db.connector import fetch_unique_document_sources
+from danswer.configs.model_configs import GEN_AI_MODEL_PROVIDER
+from danswer.configs.model_configs import GEN_AI_MODEL_VERSION
+from danswer.db.connector import fetch_unique_document_sources_cached
 from danswer.db.engine import get_sqlalchemy_engine
 from danswer.llm.exceptions import GenAIDisabledException
 from danswer.llm.factory import get_default_llm
@@ -13,11 +19,80 @@ from danswer.prompts.constants import SOURCES_KEY
 from danswer.prompts.filter_extration import FILE_SOURCE_WARNING
 from danswer.prompts.filter_extration import SOURCE_FILTER_PROMPT
 from danswer.prompts.filter_extration import WEB_SOURCE_WARNING
+from danswer.secondary_llm_flows.time_filter import filter_extraction_precheck_applies
 from danswer.utils.logger import setup_logger
 from danswer.utils.text_processing import extract_embedded_json
+from danswer.utils.ttl_cache import TTLCache
 
 logger = setup_logger()
 
+# Keyed on the available sources as well, a new connector source changes the prompt
+_SOURCE_FILTER_LLM_OUTPUT_CACHE: TTLCache[
+    tuple[str, str, str, tuple[DocumentSource, ...]], str
+] = TTLCache(
+    max_size=FILTER_EXTRACTION_CACHE_SIZE,
+    ttl_seconds=FILTER_EXTRACTION_CACHE_TTL_SECONDS,
+)
+
+
+# Besides its name (e.g. "google drive" for google_drive), the words users refer to a
+# source by. A query must mention one of the available sources for the LLM to be called
+_SOURCE_ALIASES: dict[DocumentSource, list[str]] = {
+    DocumentSource.INGESTION_API: ["api", "ingested"],
+    DocumentSource.SLACK: ["channel", "thread", "dm", "message", "chat"],
+    DocumentSource.WEB: ["website", "site", "webpage", "web page", "url", "link"],
+    DocumentSource.GOOGLE_DRIVE: ["drive", "gdrive", "google doc", "doc", "sheet"]
+    + ["spreadsheet", "slide", "presentation"],
+    DocumentSource.GMAIL: ["email", "e-mail", "mail", "inbox"],
+    DocumentSource.REQUESTTRACKER: ["request tracker", "rt", "ticket"],
+    DocumentSource.GITHUB: ["git", "repo", "repository", "code", "pr", "pull request"]
+    + ["issue", "commit"],
+    DocumentSource.GITLAB: ["git", "repo", "repository", "code", "mr"]
+    + ["merge request", "issue", "commit"],
+    DocumentSource.GURU: ["card"],
+    DocumentSource.BOOKSTACK: ["book", "shelf", "shelves", "chapter"],
+    DocumentSource.CONFLUENCE: ["wiki", "space", "page"],
+    DocumentSource.SLAB: ["post", "topic", "wiki"],
+    DocumentSource.JIRA: ["ticket", "issue", "epic", "story", "stories", "bug"],
+    DocumentSource.PRODUCTBOARD: ["feature", "roadmap", "product board"],
+    DocumentSource.FILE: ["file", "upload", "uploaded", "pdf", "attachment"],
+    DocumentSource.NOTION: ["page", "wiki", "database"],
+    DocumentSource.ZULIP: ["stream", "topic", "message", "chat"],
+    DocumentSource.LINEAR: ["ticket", "issue", "project", "cycle", "bug"],
+    DocumentSource.HUBSPOT: ["crm", "deal", "contact", "company", "companies"],
+    DocumentSource.DOCUMENT360: ["knowledge base", "kb", "article"],
+    DocumentSource.GONG: ["call", "recording", "transcript", "meeting"],
+    DocumentSource.GOOGLE_SITES: ["site", "website", "google site"],
+    DocumentSource.ZENDESK: ["ticket", "help center", "support", "article"],
+    DocumentSource.LOOPIO: ["rfp", "questionnaire", "library"],
+    DocumentSource.SHAREPOINT: ["share point", "site", "office", "onedrive"],
+}
+
+
+@lru_cache(maxsize=32)
+def _get_source_mention_pattern(
+    valid_sources: tuple[DocumentSource, ...]
+) -> re.Pattern[str]:
+    names = []
+    for source in valid_sources:
+        names.append(source.value)
+        names.extend(_SOURCE_ALIASES.get(source, []))
+    alternatives = sorted(
+        # "google_drive" / "google drive" / "google-drive" / "googledrive"
+        {r"[\s_-]?".join(map(re.escape, re.split(r"[\s_]", name))) for name in names},
+        key=len,
+        reverse=True,
+    )
+    return re.compile(rf"\b(?:{'|'.join(alternatives)})(?:e?s)?\b", re.IGNORECASE)
+
+
+def query_may_have_source_filter(
+    query: str, valid_sources: list[DocumentSource]
+) -> bool:
+    """Cheap check before calling the LLM, False only if the query refers to none of the
+    valid sources so the LLM would not find any source filter either"""
+    return _get_source_mention_pattern(tuple(valid_sources)).search(query) is not None
+
 
 def strings_to_document_sources(source_strs: list[str]) -> list[DocumentSource]:
     sources = []
@@ -151,14 +226,28 @@ def extract_source_filter(
     except GenAIDisabledException:
         return None
 
-    valid_sources = fetch_unique_document_sources(db_session)
+    valid_sources = fetch_unique_document_sources_cached(db_session)
     if not valid_sources:
         return None
 
-    messages = _get_source_filter_messages(query=query, valid_sources=valid_sources)
-    filled_llm_prompt = dict_based_prompt_to_langchain_prompt(messages)
-    model_output = llm.invoke(filled_llm_prompt)
-    logger.debug(model_output)
+    if filter_extraction_precheck_applies(query) and not query_may_have_source_filter(
+        query, valid_sources
+    ):
+        return None
+
+    cache_key = (
+        " ".join(query.casefold().split()),
+        GEN_AI_MODEL_PROVIDER,
+        GEN_AI_MODEL_VERSION,
+        tuple(valid_sources),
+    )
+    model_output = _SOURCE_FILTER_LLM_OUTPUT_CACHE.get(cache_key)
+    if model_output is None:
+        messages = _get_source_filter_messages(query=query, valid_sources=valid_sources)
+        filled_llm_prompt = dict_based_prompt_to_langchain_prompt(messages)
+        model_output = llm.invoke(filled_llm_prompt)
+        logger.debug(model_output)
+        _SOURCE_FILTER_LLM_OUTPUT_CACHE.set(cache_key, model_output)
 
     return _extract_source_filters_from_llm_out(model_output)
 
@@ -1,19 +1,70 @@
 import json
+import re
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 
 from dateutil.parser import parse
 
+from danswer.configs.chat_configs import ENABLE_FILTER_EXTRACTION_PRECHECK
+from danswer.configs.chat_configs import FILTER_EXTRACTION_CACHE_SIZE
+from danswer.configs.chat_configs import FILTER_EXTRACTION_CACHE_TTL_SECONDS
+from danswer.configs.chat_configs import MULTILINGUAL_QUERY_EXPANSION
+from danswer.configs.model_configs import GEN_AI_MODEL_PROVIDER
+from danswer.configs.model_configs import GEN_AI_MODEL_VERSION
 from danswer.llm.exceptions import GenAIDisabledException
 from danswer.llm.factory import get_default_llm
 from danswer.llm.utils import dict_based_prompt_to_langchain_prompt
 from danswer.prompts.filter_extration import TIME_FILTER_PROMPT
 from danswer.prompts.prompt_utils import get_current_llm_day_time
 from danswer.utils.logger import setup_logger
+from danswer.utils.ttl_cache import TTLCache
 
 logger = setup_logger()
 
+# Only the raw LLM output is cached, relative cutoffs (e.g. "last 2 weeks") must still
+# be computed from the current time on every query
+_TIME_FILTER_LLM_OUTPUT_CACHE: TTLCache[tuple[str, str, str], str] = TTLCache(
+    max_size=FILTER_EXTRACTION_CACHE_SIZE,
+    ttl_seconds=FILTER_EXTRACTION_CACHE_TTL_SECONDS,
+)
+
+
+# Anything that could make the LLM return a cutoff or a recency bias, it is fine to match
+# too much (costs an LLM call) but a miss drops a filter the LLM would have found
+_TIME_EXPRESSION_PATTERN = re.compile(
+    r"\b(?:"
+    # units, also for "quarterly", "daily", "weekly", "monthly", "yearly", "annual"
+    r"(?:hour|day|daily|week|weekend|month|quarter|year|yr|decade|annual|half)\w*"
+    r"|today|tonight|yesterday|tomorrow|now|ago|since|until|till|before|after"
+    r"|recent\w*|latest|newest|new|newer|last|past|previous\w*|current\w*|lately"
+    r"|upcoming|next|earlier|older|oldest|up to date|outdated|status|still|anymore"
+    r"|ongoing|changed|changelog"
+    r"|(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)s?"
+    r"|jan|feb|mar|apr|may|jun|jul|aug|sept?|oct|nov|dec"
+    r"|january|february|march|april|june|july|august|september|october|november"
+    r"|december|spring|summer|autumn|fall|winter"
+    r"|[qh][1-4]|fy\s?\d{2,4}|(?:19|20)\d{2}s?|\d{1,4}[/.-]\d{1,2}(?:[/.-]\d{1,4})?"
+    r")\b",
+    re.IGNORECASE,
+)
+
+
+def filter_extraction_precheck_applies(query: str) -> bool:
+    """The time and source prechecks only know English words, any other query always
+    goes to the LLM"""
+    return (
+        ENABLE_FILTER_EXTRACTION_PRECHECK
+        and not MULTILINGUAL_QUERY_EXPANSION
+        and query.isascii()
+    )
+
+
+def query_may_have_time_filter(query: str) -> bool:
+    """Cheap check before calling the LLM, False only if the query contains no words
+    related to time so the LLM would not find any time filter either"""
+    return _TIME_EXPRESSION_PATTERN.search(query) is not None
+
 
 def best_match_time(time_str: str) -> datetime | None:
     preferred_formats = ["%m/%d/%Y", "%m-%d-%Y"]
@@ -146,15 +197,28 @@ def extract_time_filter(query: str) -> tuple[datetime | None, bool]:
 
         return None, False
 
+    if filter_extraction_precheck_applies(query) and not query_may_have_time_filter(
+        query
+    ):
+        return None, False
+
     try:
         llm = get_default_llm()
     except GenAIDisabledException:
         return None, False
 
-    messages = _get_time_filter_messages(query)
-    filled_llm_prompt = dict_based_prompt_to_langchain_prompt(messages)
-    model_output = llm.invoke(filled_llm_prompt)
-    logger.debug(model_output)
+    cache_key = (
+        " ".join(query.casefold().split()),
+        GEN_AI_MODEL_PROVIDER,
+        GEN_AI_MODEL_VERSION,
+    )
+    model_output = _TIME_FILTER_LLM_OUTPUT_CACHE.get(cache_key)
+    if model_output is None:
+        messages = _get_time_filter_messages(query)
+        filled_llm_prompt = dict_based_prompt_to_langchain_prompt(messages)
+        model_output = llm.invoke(filled_llm_prompt)
+        logger.debug(model_output)
+        _TIME_FILTER_LLM_OUTPUT_CACHE.set(cache_key, model_output)
 
     return _extract_time_filter_from_llm_out(model_output)
 
@@ -484,8 +484,7 @@ def delete_connector_by_id(
     db_session: Session = Depends(get_session),
 ) -> StatusResponse[int]:
     try:
-        with db_session.begin():
-            return delete_connector(db_session=db_session, connector_id=connector_id)
+        return delete_connector(db_session=db_session, connector_id=connector_id)
     except AssertionError:
         raise HTTPException(status_code=400, detail="Connector is not deletable")
 
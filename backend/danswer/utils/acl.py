@@ -7,6 +7,7 @@ from danswer.access.models import DocumentAccess
 from danswer.db.document import get_acccess_info_for_documents
 from danswer.db.engine import get_sqlalchemy_engine
 from danswer.db.models import Document
+from danswer.document_index.document_index_utils import bump_index_generation
 from danswer.document_index.document_index_utils import get_both_index_names
 from danswer.document_index.factory import get_default_document_index
 from danswer.document_index.interfaces import UpdateRequest
@@ -57,6 +58,7 @@ def set_acl_for_vespa(should_check_if_already_done: bool = False) -> None:
             for document_id, user_ids, is_public in document_access_info
         ]
         vespa_index.update(update_requests=update_requests)
+        bump_index_generation()
 
     dynamic_config_store.store(_COMPLETED_ACL_UPDATE_KEY, True)
 
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Generic
+from typing import TypeVar
+
+import numpy
+
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
+
+R = TypeVar("R")
+
+# Latencies of the last calls the hedge delay is computed from, no hedging before there
+# are enough of them for a meaningful percentile
+_LATENCY_WINDOW_SIZE = 1000
+_MIN_LATENCY_SAMPLES = 20
+# The percentile is recomputed every this many calls rather than on every call
+_DELAY_UPDATE_INTERVAL = 50
+_METRICS_LOG_INTERVAL = 1000
+
+
+class HedgedCaller(Generic[R]):
+    """Calls a function and, if it hasn't returned by the `latency_percentile` of the
+    latencies of its recent calls (at least `min_delay_seconds`), calls it a second time.
+    The first successful result is returned, the slower call still runs to completion but
+    its result is dropped. Only for idempotent functions such as search queries.
+
+    At most `max_hedges_in_flight` second calls run at once, past that calls just wait
+    for their first call. The calls run in a thread pool, which starts its threads as
+    needed up to `max_workers`."""
+
+    def __init__(
+        self,
+        latency_percentile: float,
+        min_delay_seconds: float,
+        max_hedges_in_flight: int,
+        max_workers: int = 256,
+    ) -> None:
+        self.latency_percentile = latency_percentile
+        self.min_delay_seconds = min_delay_seconds
+        self._hedge_slots = threading.BoundedSemaphore(max(max_hedges_in_flight, 0))
+        self._max_hedges_in_flight = max_hedges_in_flight
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hedged_call"
+        )
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW_SIZE)
+        self._num_latencies = 0
+        self._hedge_delay: float | None = None
+        self._lock = threading.Lock()
+        self.num_calls = 0
+        self.num_hedges = 0
+        self.num_hedge_wins = 0
+        self.num_hedges_skipped = 0
+
+    def hedge_delay(self) -> float | None:
+        """Seconds after which a call is sent a second time, None until enough calls
+        completed to know their latencies"""
+        return self._hedge_delay
+
+    def _record_latency(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._num_latencies += 1
+            if len(self._latencies) >= _MIN_LATENCY_SAMPLES and (
+                self._hedge_delay is None
+                or self._num_latencies % _DELAY_UPDATE_INTERVAL == 0
+            ):
+                self._hedge_delay = max(
+                    float(numpy.percentile(self._latencies, self.latency_percentile)),
+                    self.min_delay_seconds,
+                )
+
+    def _submit(self, func: Callable[[], R], is_hedge: bool) -> Future[R]:
+        start = time.monotonic()
+
+        def _timed_call() -> R:
+            try:
+                result = func()
+            finally:
+                if is_hedge:
+                    self._hedge_slots.release()
+            self._record_latency(time.monotonic() - start)
+            return result
+
+        return self._executor.submit(_timed_call)
+
+    def call(self, func: Callable[[], R]) -> R:
+        with self._lock:
+            self.num_calls += 1
+            if self.num_calls % _METRICS_LOG_INTERVAL == 0:
+                logger.info(
+                    f"Hedged calls: {self.num_calls} calls, {self.num_hedges} hedged "
+                    f"({self.num_hedge_wins} answered first by the hedge, "
+                    f"{self.num_hedges_skipped} skipped over the limit of "
+                    f"{self._max_hedges_in_flight} in flight), hedge delay: "
+                    + (
+                        f"{self._hedge_delay * 1000:.1f}ms"
+                        if self._hedge_delay is not None
+                        else "not enough latencies yet"
+                    )
+                )
+
+        first_call = self._submit(func, is_hedge=False)
+        hedge_delay = self._hedge_delay
+        if hedge_delay is None:
+            return first_call.result()
+
+        done, _ = wait([first_call], timeout=hedge_delay)
+        if done:
+            return first_call.result()
+
+        if not self._hedge_slots.acquire(blocking=False):
+            with self._lock:
+                self.num_hedges_skipped += 1
+            return first_call.result()
+
+        hedge_call = self._submit(func, is_hedge=True)
+        with self._lock:
+            self.num_hedges += 1
+
+        pending: set[Future[R]] = {first_call, hedge_call}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge_call:
+                        with self._lock:
+                            self.num_hedge_wins += 1
+                    return future.result()
+            if not pending:
+                # Both failed, surface the error of the first call
+                return first_call.result()
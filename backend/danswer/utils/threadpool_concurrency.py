@@ -1,7 +1,12 @@
+import threading
 import uuid
+from collections import deque
 from collections.abc import Callable
+from collections.abc import Iterator
 from concurrent.futures import as_completed
+from concurrent.futures import Future
 from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
 from typing import Any
 from typing import Generic
 from typing import TypeVar
@@ -11,6 +16,7 @@ from danswer.utils.logger import setup_logger
 logger = setup_logger()
 
 R = TypeVar("R")
+T = TypeVar("T")
 
 
 def run_functions_tuples_in_parallel(
@@ -105,3 +111,96 @@ def run_functions_in_parallel(
                     raise
 
     return results
+
+
+def run_function_over_iterator_in_order(
+    func: Callable[[T], R],
+    items: Iterator[T],
+    max_workers: int,
+    max_in_flight: int | None = None,
+) -> Iterator[R]:
+    """
+    Lazily applies `func` to each element of `items` using a pool of threads and yields
+    the results in the same order as `items`, so the output is identical to a serial loop.
+    At most `max_in_flight` calls (defaults to 2 * max_workers) are started ahead of
+    the element currently being consumed, which bounds memory usage.
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    in_flight_limit = max(max_in_flight or 2 * max_workers, 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: deque[Future[R]] = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= in_flight_limit:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # consumer stopped early or a call failed, don't start the remaining work
+            for future in pending:
+                future.cancel()
+
+
+class _PrefetchFailure:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+_END_OF_ITEMS = object()
+
+
+def prefetch_iterator(items: Iterator[T], lookahead: int) -> Iterator[T]:
+    """
+    Yields the elements of `items` in order while a background thread already pulls up
+    to `lookahead` of the next ones, e.g. for a generator of API pages whose requests
+    should overlap with processing the current page. With `lookahead=0` the elements are
+    pulled serially in the calling thread. Only the background thread advances `items`.
+
+    An exception raised by `items` is re-raised to the caller once the elements before
+    it have been yielded. If the caller stops early, no further elements are pulled.
+    """
+    if lookahead <= 0:
+        yield from items
+        return
+
+    fetched: Queue[Any] = Queue()
+    # one slot per element that may be pulled before the caller asks for it
+    free_slots = threading.Semaphore(lookahead)
+    stopped = threading.Event()
+
+    def _pull_items_in_background() -> None:
+        try:
+            while True:
+                free_slots.acquire()
+                if stopped.is_set():
+                    return
+                item = next(items, _END_OF_ITEMS)
+                fetched.put(item)
+                if item is _END_OF_ITEMS:
+                    return
+        except BaseException as e:
+            fetched.put(_PrefetchFailure(e))
+
+    threading.Thread(
+        target=_pull_items_in_background, name="prefetcher", daemon=True
+    ).start()
+    try:
+        while True:
+            item = fetched.get()
+            if item is _END_OF_ITEMS:
+                return
+            if isinstance(item, _PrefetchFailure):
+                raise item.error
+            # the caller now owns this element, the next one may be pulled
+            free_slots.release()
+            yield item
+    finally:
+        stopped.set()
+        # wake up the background thread if it is waiting for a slot so that it exits
+        free_slots.release()
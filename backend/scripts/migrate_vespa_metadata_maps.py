@@ -0,0 +1,160 @@
+"""Script which copies the metadata and source links of the chunks indexed before the
+native map fields (`metadata_map`, `metadata_list_map` and `source_link_map`) from their
+json string fields into the maps, so that they are read without decoding json for every
+hit. Chunks which are not migrated are still read from the json strings, so this is not
+required. Run after the server has started at least once, which deploys the new schema:
+    python scripts/migrate_vespa_metadata_maps.py [--clear-legacy-fields]
+
+With `--clear-legacy-fields` the json strings are emptied, which frees their attribute
+memory, also for chunks migrated by an earlier run. Only use it once no older versions
+of Danswer read the index anymore."""
+import argparse
+import os
+import sys
+from typing import Any
+
+import requests
+from sqlalchemy.orm import Session
+
+# makes it so `PYTHONPATH=.` is not required when running this script
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from danswer.configs.app_configs import DOCUMENT_INDEX_NAME  # noqa: E402
+from danswer.configs.constants import METADATA  # noqa: E402
+from danswer.configs.constants import METADATA_LIST_MAP  # noqa: E402
+from danswer.configs.constants import METADATA_MAP  # noqa: E402
+from danswer.configs.constants import SOURCE_LINK_MAP  # noqa: E402
+from danswer.configs.constants import SOURCE_LINKS  # noqa: E402
+from danswer.db.engine import get_sqlalchemy_engine  # noqa: E402
+from danswer.document_index.document_index_utils import (  # noqa: E402
+    get_both_index_names,
+)
+from danswer.document_index.vespa.index import DOCUMENT_ID_ENDPOINT  # noqa: E402
+from danswer.document_index.vespa.utils import metadata_to_vespa_maps  # noqa: E402
+from danswer.document_index.vespa.utils import (  # noqa: E402
+    remove_invalid_unicode_chars,
+)
+from danswer.document_index.vespa.utils import vespa_json_dumps  # noqa: E402
+from danswer.document_index.vespa.utils import vespa_json_loads  # noqa: E402
+from danswer.utils.logger import setup_logger  # noqa: E402
+from danswer.utils.threadpool_concurrency import (  # noqa: E402
+    run_functions_tuples_in_parallel,
+)
+
+logger = setup_logger()
+
+_VISIT_BATCH_SIZE = 400
+_NUM_THREADS = 16
+
+
+def _build_migration_update(
+    fields: dict[str, Any], clear_legacy_fields: bool
+) -> dict[str, Any] | None:
+    has_legacy_fields = bool(fields.get(METADATA) or fields.get(SOURCE_LINKS))
+    if not has_legacy_fields:
+        # indexed with the map fields or already migrated and cleared
+        return None
+
+    update_fields: dict[str, Any] = {}
+    if clear_legacy_fields:
+        update_fields[METADATA] = {"assign": ""}
+        update_fields[SOURCE_LINKS] = {"assign": ""}
+
+    if (
+        METADATA_MAP in fields
+        or METADATA_LIST_MAP in fields
+        or SOURCE_LINK_MAP in fields
+    ):
+        # already migrated, only the legacy fields are left to clear
+        return {"fields": update_fields} if update_fields else None
+
+    metadata = vespa_json_loads(fields.get(METADATA) or "{}") or {}
+    source_links = vespa_json_loads(fields.get(SOURCE_LINKS) or "{}") or {}
+    if not metadata and not source_links:
+        return {"fields": update_fields} if update_fields else None
+
+    metadata_map, metadata_list_map = metadata_to_vespa_maps(metadata)
+    update_fields[METADATA_MAP] = {"assign": metadata_map}
+    update_fields[METADATA_LIST_MAP] = {"assign": metadata_list_map}
+    update_fields[SOURCE_LINK_MAP] = {
+        "assign": {
+            int(offset): remove_invalid_unicode_chars(link)
+            for offset, link in source_links.items()
+        }
+    }
+    return {"fields": update_fields}
+
+
+def _update_chunk(url: str, update: dict[str, Any]) -> None:
+    response = requests.put(
+        url,
+        headers={"Content-Type": "application/json"},
+        data=vespa_json_dumps(update),
+    )
+    response.raise_for_status()
+
+
+def migrate_index(index_name: str, clear_legacy_fields: bool) -> None:
+    document_endpoint = DOCUMENT_ID_ENDPOINT.format(index_name=index_name)
+    params: dict[str, str | int] = {
+        "selection": "true",
+        "cluster": DOCUMENT_INDEX_NAME,
+        "wantedDocumentCount": _VISIT_BATCH_SIZE,
+        "fieldSet": f"{index_name}:{METADATA},{SOURCE_LINKS},{METADATA_MAP},"
+        f"{METADATA_LIST_MAP},{SOURCE_LINK_MAP}",
+    }
+
+    num_visited = 0
+    num_migrated = 0
+    continuation: str | None = None
+    while True:
+        page_params = dict(params)
+        if continuation:
+            page_params["continuation"] = continuation
+        response = requests.get(document_endpoint, params=page_params)
+        response.raise_for_status()
+        response_json = vespa_json_loads(response.content)
+
+        updates: list[tuple[str, dict[str, Any]]] = []
+        for document in response_json.get("documents", []):
+            update = _build_migration_update(
+                document.get("fields", {}), clear_legacy_fields
+            )
+            if update is not None:
+                vespa_chunk_id = document["id"].split("::", 1)[-1]
+                updates.append((f"{document_endpoint}/{vespa_chunk_id}", update))
+
+        run_functions_tuples_in_parallel(
+            [(_update_chunk, update_args) for update_args in updates],
+            max_workers=_NUM_THREADS,
+        )
+        num_visited += len(response_json.get("documents", []))
+        num_migrated += len(updates)
+        logger.info(
+            f"{index_name}: visited {num_visited} chunks, migrated {num_migrated}"
+        )
+
+        continuation = response_json.get("continuation")
+        if not continuation:
+            break
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--clear-legacy-fields",
+        action="store_true",
+        help="Empty the json string fields of the migrated chunks",
+    )
+    args = parser.parse_args()
+
+    with Session(get_sqlalchemy_engine()) as db_session:
+        index_names = [
+            index_name
+            for index_name in get_both_index_names(db_session)
+            if index_name is not None
+        ]
+
+    for index_name in index_names:
+        migrate_index(index_name, args.clear_legacy_fields)
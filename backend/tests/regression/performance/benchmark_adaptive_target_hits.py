@@ -0,0 +1,124 @@
+"""Measures the hybrid retrieval latency and the overlap of the top k chunks with the
+adaptive targetHits (computed from the number of hits, the chunks passing the filters and
+the recall target) compared to the fixed targetHits of max(10 x hits, 1000), over the
+questions of the search quality regression set. Hit counts below the default and a
+source filter make the difference visible, the default 50 hits without filters give the
+same targetHits at the default recall target.
+
+Needs Postgres, the model server and Vespa with documents indexed. Run from the `backend`
+directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_adaptive_target_hits.py \
+        tests/regression/search_quality/test_questions.json --num-hits 10 20 50"""
+import argparse
+import json
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from danswer.configs.app_configs import MODEL_SERVER_HOST
+from danswer.configs.app_configs import MODEL_SERVER_PORT
+from danswer.configs.constants import DocumentSource
+from danswer.db.embedding_model import get_current_db_embedding_model
+from danswer.db.engine import get_sqlalchemy_engine
+from danswer.document_index.vespa.index import VespaIndex
+from danswer.search.models import IndexFilters
+from danswer.search.search_nlp_models import EmbeddingModel
+from danswer.search.search_nlp_models import EmbedTextType
+
+
+def _chunk_ids(
+    document_index: VespaIndex,
+    query: str,
+    query_embedding: list[float],
+    filters: IndexFilters,
+    num_hits: int,
+) -> tuple[float, list[tuple[str, int]]]:
+    start = time.perf_counter()
+    chunks = document_index.hybrid_retrieval(
+        query=query,
+        query_embedding=query_embedding,
+        filters=filters,
+        time_decay_multiplier=1.0,
+        num_to_retrieve=num_hits,
+    )
+    latency = time.perf_counter() - start
+    return latency, [(chunk.document_id, chunk.chunk_id) for chunk in chunks]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "regression_questions_json",
+        default="./tests/regression/search_quality/test_questions.json",
+        nargs="?",
+    )
+    parser.add_argument("--num-hits", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--recall-target", type=float, default=0.95)
+    parser.add_argument(
+        "--source-type",
+        type=str,
+        nargs="*",
+        default=[],
+        help="Filter on these sources to measure selective filters",
+    )
+    args = parser.parse_args()
+
+    with open(args.regression_questions_json, "r") as file:
+        questions = list(json.load(file).keys())
+
+    with Session(get_sqlalchemy_engine()) as db_session:
+        embedding_model = get_current_db_embedding_model(db_session)
+    model = EmbeddingModel(
+        model_name=embedding_model.model_name,
+        query_prefix=embedding_model.query_prefix,
+        passage_prefix=embedding_model.passage_prefix,
+        normalize=embedding_model.normalize,
+        server_host=MODEL_SERVER_HOST,
+        server_port=MODEL_SERVER_PORT,
+    )
+    query_embeddings = model.encode(questions, text_type=EmbedTextType.QUERY)
+
+    fixed_index = VespaIndex(
+        index_name=embedding_model.index_name,
+        secondary_index_name=None,
+        adaptive_target_hits=False,
+    )
+    adaptive_index = VespaIndex(
+        index_name=embedding_model.index_name,
+        secondary_index_name=None,
+        adaptive_target_hits=True,
+        target_hits_recall_target=args.recall_target,
+    )
+    filters = IndexFilters(
+        source_type=[DocumentSource(source) for source in args.source_type] or None,
+        access_control_list=None,
+    )
+
+    for num_hits in args.num_hits:
+        fixed_latencies = []
+        adaptive_latencies = []
+        overlaps = []
+        for question, query_embedding in zip(questions, query_embeddings):
+            fixed_latency, fixed_ids = _chunk_ids(
+                fixed_index, question, query_embedding, filters, num_hits
+            )
+            adaptive_latency, adaptive_ids = _chunk_ids(
+                adaptive_index, question, query_embedding, filters, num_hits
+            )
+            fixed_latencies.append(fixed_latency)
+            adaptive_latencies.append(adaptive_latency)
+            overlaps.append(
+                len(set(fixed_ids) & set(adaptive_ids)) / max(len(fixed_ids), 1)
+            )
+
+        print(
+            f"hits: {num_hits:>3} | targetHits fixed: "
+            f"{fixed_index.hybrid_target_hits(filters, num_hits):>5}, adaptive: "
+            f"{adaptive_index.hybrid_target_hits(filters, num_hits):>5} | "
+            f"top-{num_hits} overlap: {np.mean(overlaps):.3f} | p50 fixed: "
+            f"{np.percentile(fixed_latencies, 50) * 1000:6.1f}ms, adaptive: "
+            f"{np.percentile(adaptive_latencies, 50) * 1000:6.1f}ms | p95 fixed: "
+            f"{np.percentile(fixed_latencies, 95) * 1000:6.1f}ms, adaptive: "
+            f"{np.percentile(adaptive_latencies, 95) * 1000:6.1f}ms"
+        )
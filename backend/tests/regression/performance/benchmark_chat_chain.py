@@ -0,0 +1,124 @@
+"""Measures the latency of assembling the current message chain of long chat sessions
+with many edited (branched off) messages. The recursive CTE only loads the messages on
+the chain, so the latency should grow with the length of the chain and not with the
+number of messages in the session, and the chain must be the latest branch. Needs the Postgres configured
+through the usual POSTGRES_* env variables, the chat sessions created are deleted again
+at the end. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_chat_chain.py"""
+import argparse
+import random
+import time
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from danswer.chat.chat_utils import create_chat_chain
+from danswer.configs.constants import MessageType
+from danswer.db.chat import create_chat_session
+from danswer.db.engine import get_sqlalchemy_engine
+from danswer.db.models import ChatMessage
+from danswer.db.models import ChatSession
+
+
+def _create_session_with_edits(
+    num_messages: int, edit_rate: float, rng: random.Random, db_session: Session
+) -> tuple[int, list[int]]:
+    """Messages come in user / assistant pairs, one of the recent user messages is edited
+    (a new branch is started from its parent) with probability `edit_rate`. Also returns
+    the ids of the messages of the latest branch, without the root message"""
+    chat_session = create_chat_session(
+        db_session=db_session,
+        description="Chat chain benchmark",
+        user_id=None,
+        persona_id=0,
+    )
+    root_message = ChatMessage(
+        chat_session_id=chat_session.id,
+        parent_message=None,
+        latest_child_message=None,
+        message="",
+        token_count=0,
+        message_type=MessageType.SYSTEM,
+    )
+    db_session.add(root_message)
+    db_session.flush()
+
+    chain = [root_message]
+    for _ in range(num_messages // 2):
+        if len(chain) > 2 and rng.random() < edit_rate:
+            # one of the last 3 user messages (odd positions of the chain)
+            edited_ind = rng.randrange(max(1, len(chain) - 6), len(chain), 2)
+            chain = chain[:edited_ind]
+
+        for message_type in [MessageType.USER, MessageType.ASSISTANT]:
+            parent_message = chain[-1]
+            message = ChatMessage(
+                chat_session_id=chat_session.id,
+                parent_message=parent_message.id,
+                latest_child_message=None,
+                message=f"A {message_type.value} message about the deploy " * 20,
+                token_count=200,
+                message_type=message_type,
+            )
+            db_session.add(message)
+            db_session.flush()
+            parent_message.latest_child_message = message.id
+            chain.append(message)
+
+    db_session.commit()
+    return chat_session.id, [message.id for message in chain[1:]]
+
+
+def _time_chain(chat_session_id: int, num_runs: int) -> tuple[float, list[int]]:
+    best = float("inf")
+    chain_ids: list[int] = []
+    for _ in range(num_runs):
+        # a new session per turn, nothing is cached in the identity map
+        with Session(get_sqlalchemy_engine(), expire_on_commit=False) as db_session:
+            start = time.perf_counter()
+            final_msg, history_msgs = create_chat_chain(
+                chat_session_id=chat_session_id, db_session=db_session
+            )
+            best = min(best, time.perf_counter() - start)
+            chain_ids = [msg.id for msg in history_msgs + [final_msg]]
+    return best, chain_ids
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num-messages", type=int, nargs="+", default=[200, 1000, 5000]
+    )
+    parser.add_argument("--edit-rate", type=float, default=0.2)
+    parser.add_argument("--num-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    chat_session_ids: list[int] = []
+    try:
+        for num_messages in args.num_messages:
+            with Session(get_sqlalchemy_engine(), expire_on_commit=False) as db_session:
+                chat_session_id, expected_chain_ids = _create_session_with_edits(
+                    num_messages, args.edit_rate, rng, db_session
+                )
+            chat_session_ids.append(chat_session_id)
+
+            chain_time, chain_ids = _time_chain(chat_session_id, args.num_runs)
+            print(
+                f"{num_messages:>6} messages, {len(chain_ids)} on the chain | "
+                f"recursive CTE: {chain_time * 1000:8.2f}ms | "
+                f"per chain message: {chain_time / len(chain_ids) * 1e6:6.1f}us | "
+                # very long chains are cut to their most recent messages
+                f"latest branch: {chain_ids == expected_chain_ids[-len(chain_ids):]}"
+            )
+    finally:
+        with Session(get_sqlalchemy_engine()) as db_session:
+            db_session.execute(
+                delete(ChatMessage).where(
+                    ChatMessage.chat_session_id.in_(chat_session_ids)
+                )
+            )
+            db_session.execute(
+                delete(ChatSession).where(ChatSession.id.in_(chat_session_ids))
+            )
+            db_session.commit()
@@ -0,0 +1,121 @@
+"""Measures the DB time per chat turn spent persisting the retrieved documents, inserting
+and committing one `SearchDoc` at a time (previous behavior) compared to the single
+bulk insert. Needs the Postgres configured through the usual POSTGRES_* env variables,
+the rows created are deleted again at the end. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_chat_search_docs.py"""
+import argparse
+import time
+from collections.abc import Callable
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from danswer.configs.constants import DocumentSource
+from danswer.db.chat import create_db_search_doc
+from danswer.db.chat import create_db_search_docs
+from danswer.db.engine import get_sqlalchemy_engine
+from danswer.db.models import SearchDoc as DBSearchDoc
+from danswer.search.models import SearchDoc
+
+
+def _make_search_docs(num_docs: int) -> list[SearchDoc]:
+    return [
+        SearchDoc(
+            document_id=f"https://docs.example.com/page-{doc_ind}",
+            chunk_ind=doc_ind % 5,
+            semantic_identifier=f"Page {doc_ind}",
+            link=f"https://docs.example.com/page-{doc_ind}",
+            blurb="The deploy uses a blue-green rollout with a manual approval " * 3,
+            source_type=DocumentSource.WEB,
+            boost=0,
+            hidden=False,
+            metadata={"tags": ["deploy", "infra"], "owner": "platform"},
+            score=1.0 / (doc_ind + 1),
+            match_highlights=["The <hi>deploy</hi> uses a blue-green rollout"],
+            updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            primary_owners=["alice@example.com"],
+            secondary_owners=None,
+        )
+        for doc_ind in range(num_docs)
+    ]
+
+
+def _create_one_by_one(
+    search_docs: list[SearchDoc], db_session: Session
+) -> list[DBSearchDoc]:
+    return [
+        create_db_search_doc(server_search_doc=search_doc, db_session=db_session)
+        for search_doc in search_docs
+    ]
+
+
+def _create_bulk(
+    search_docs: list[SearchDoc], db_session: Session
+) -> list[DBSearchDoc]:
+    return create_db_search_docs(server_search_docs=search_docs, db_session=db_session)
+
+
+def _time_turns(
+    create: Callable[[list[SearchDoc], Session], list[DBSearchDoc]],
+    search_docs: list[SearchDoc],
+    num_turns: int,
+    created_ids: list[int],
+) -> tuple[float, int]:
+    engine = get_sqlalchemy_engine()
+    num_round_trips = 0
+
+    def _count_round_trip(*args: Any) -> None:
+        nonlocal num_round_trips
+        num_round_trips += 1
+
+    best = float("inf")
+    for _ in range(num_turns):
+        with Session(engine, expire_on_commit=False) as db_session:
+            num_round_trips = 0
+            event.listen(engine, "before_cursor_execute", _count_round_trip)
+            event.listen(engine, "commit", _count_round_trip)
+            start = time.perf_counter()
+            db_search_docs = create(search_docs, db_session)
+            best = min(best, time.perf_counter() - start)
+            event.remove(engine, "before_cursor_execute", _count_round_trip)
+            event.remove(engine, "commit", _count_round_trip)
+
+            assert [db_doc.document_id for db_doc in db_search_docs] == [
+                search_doc.document_id for search_doc in search_docs
+            ]
+            created_ids.extend(db_doc.id for db_doc in db_search_docs)
+    return best, num_round_trips
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-docs", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--num-turns", type=int, default=10)
+    args = parser.parse_args()
+
+    created_ids: list[int] = []
+    try:
+        for num_docs in args.num_docs:
+            search_docs = _make_search_docs(num_docs)
+            one_by_one_time, one_by_one_round_trips = _time_turns(
+                _create_one_by_one, search_docs, args.num_turns, created_ids
+            )
+            bulk_time, bulk_round_trips = _time_turns(
+                _create_bulk, search_docs, args.num_turns, created_ids
+            )
+            print(
+                f"{num_docs:>4} docs per turn | one by one: "
+                f"{one_by_one_time * 1000:7.2f}ms ({one_by_one_round_trips} round trips) "
+                f"| bulk: {bulk_time * 1000:7.2f}ms ({bulk_round_trips} round trips) "
+                f"({one_by_one_time / bulk_time:5.1f}x)"
+            )
+    finally:
+        with Session(get_sqlalchemy_engine()) as db_session:
+            db_session.execute(
+                delete(DBSearchDoc).where(DBSearchDoc.id.in_(created_ids))
+            )
+            db_session.commit()
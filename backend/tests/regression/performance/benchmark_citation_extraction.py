@@ -0,0 +1,86 @@
+"""Measures the per token overhead of `extract_citations_from_stream` on long streamed
+answers (text with citations every sentence and a few code blocks). The overhead is
+the time spent on top of building the same output pieces, it should not grow with the
+length of the answer. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_citation_extraction.py"""
+import argparse
+import gc
+import random
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import Any
+
+from danswer.chat.chat_utils import extract_citations_from_stream
+from tests.unit.danswer.chat.test_chat_utils import _make_docs
+
+
+def _make_answer_tokens(num_tokens: int, rng: random.Random) -> list[str]:
+    words = ["The", " answer", " is", " in", " the", " docs", ",", " see", " also"]
+    tokens: list[str] = []
+    while len(tokens) < num_tokens:
+        sentence_len = rng.randint(8, 20)
+        tokens.extend(rng.choice(words) for _ in range(sentence_len))
+        if rng.random() < 0.1:
+            tokens.extend(["\n```", "python\n", "x", " =", " [", "1", "]\n", "```\n"])
+        # models stream citations in all kinds of token splits
+        tokens.extend(
+            rng.choice(
+                [
+                    [" [", "1", "]."],
+                    [" [2]", "."],
+                    [" [", "3", "][", "1", "]."],
+                ]
+            )
+        )
+    return tokens[:num_tokens]
+
+
+def _time_per_token(
+    extract: Callable[..., Iterator[Any]], tokens: list[str], num_runs: int
+) -> tuple[float, list[Any]]:
+    context_docs, doc_id_to_rank_map = _make_docs()
+    best = float("inf")
+    output: list[Any] = []
+    gc.disable()
+    for _ in range(num_runs):
+        start = time.perf_counter()
+        output = list(extract(iter(tokens), context_docs, doc_id_to_rank_map, None))
+        best = min(best, time.perf_counter() - start)
+    gc.enable()
+    return best / len(tokens), output
+
+
+def _rebuild_output(output: list[Any]) -> Callable[..., Iterator[Any]]:
+    def _rebuild(*args: Any) -> Iterator[Any]:
+        for piece in output:
+            yield type(piece)(**piece.__dict__)
+
+    return _rebuild
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num-tokens", type=int, nargs="+", default=[1000, 4000, 16000, 64000]
+    )
+    parser.add_argument("--num-runs", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    first_overhead: float | None = None
+    for num_tokens in args.num_tokens:
+        tokens = _make_answer_tokens(num_tokens, rng)
+        per_token, output = _time_per_token(
+            extract_citations_from_stream, tokens, args.num_runs
+        )
+        baseline_per_token, _ = _time_per_token(
+            _rebuild_output(output), tokens, args.num_runs
+        )
+        overhead = per_token - baseline_per_token
+        if first_overhead is None:
+            first_overhead = overhead
+        print(
+            f"{num_tokens:>6} tokens | overhead per token: {overhead * 1e6:6.2f} us | "
+            f"vs {args.num_tokens[0]} tokens: {overhead / first_overhead:5.2f}x"
+        )
@@ -0,0 +1,137 @@
+"""Measures the latency of the LLM based time and source filter extraction done before
+every search, for a workload where the same questions are asked repeatedly (e.g. from
+Slack bots or shared links), with the LLM output cache disabled (previous behavior)
+compared to enabled. The LLM is replaced with a fake with a fixed latency and the
+available sources DB query with one with a fixed latency, so no LLM or Postgres is
+needed. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_filter_extraction.py"""
+import argparse
+import json
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import cast
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from danswer.configs.constants import DocumentSource
+from danswer.db import connector
+from danswer.prompts.constants import SOURCES_KEY
+from danswer.secondary_llm_flows import source_filter
+from danswer.secondary_llm_flows import time_filter
+from danswer.secondary_llm_flows.source_filter import extract_source_filter
+from danswer.secondary_llm_flows.time_filter import extract_time_filter
+from danswer.utils.ttl_cache import TTLCache
+
+_SOURCES = [DocumentSource.SLACK, DocumentSource.CONFLUENCE, DocumentSource.GITHUB]
+
+_QUESTIONS = [
+    "What changed in the deploy pipeline last week?",
+    "Where are the Confluence runbooks for the billing service?",
+    "Which Slack channel announces incidents?",
+    "How do I get access to the staging database?",
+    "What were the GitHub issues about flaky tests in January 2024?",
+]
+
+
+class _FakeLLM:
+    def __init__(self, latency_seconds: float) -> None:
+        self.latency_seconds = latency_seconds
+        self.num_calls = 0
+
+    def invoke(self, prompt: Any) -> str:
+        self.num_calls += 1
+        time.sleep(self.latency_seconds)
+        if SOURCES_KEY in str(prompt[0].content):
+            return json.dumps({SOURCES_KEY: [DocumentSource.SLACK.value]})
+        return json.dumps(
+            {"filter_type": "hard cutoff", "filter_value": "week", "value_multiple": 1}
+        )
+
+
+def _run_workload(
+    queries: list[str], cache_size: int, llm_latency: float, db_latency: float
+) -> tuple[float, int, list[Any]]:
+    llm = _FakeLLM(llm_latency)
+
+    def _fetch_sources(db_session: Session) -> list[DocumentSource]:
+        time.sleep(db_latency)
+        return list(_SOURCES)
+
+    time_filter._TIME_FILTER_LLM_OUTPUT_CACHE.clear()
+    source_filter._SOURCE_FILTER_LLM_OUTPUT_CACHE.clear()
+    connector._DOCUMENT_SOURCES_CACHE.clear()
+    caches: list[TTLCache[Any, Any]] = [
+        time_filter._TIME_FILTER_LLM_OUTPUT_CACHE,
+        source_filter._SOURCE_FILTER_LLM_OUTPUT_CACHE,
+        connector._DOCUMENT_SOURCES_CACHE,
+    ]
+    max_sizes = [cache.max_size for cache in caches]
+    for cache in caches:
+        cache.max_size = min(cache.max_size, cache_size)
+
+    outputs: list[Any] = []
+    try:
+        with patch.object(
+            time_filter, "get_default_llm", return_value=llm
+        ), patch.object(
+            source_filter, "get_default_llm", return_value=llm
+        ), patch.object(
+            connector, "fetch_unique_document_sources", _fetch_sources
+        ), patch.object(
+            # measure the cache alone, all of these queries would be checked anyway
+            time_filter,
+            "ENABLE_FILTER_EXTRACTION_PRECHECK",
+            False,
+        ):
+            start = time.perf_counter()
+            for query in queries:
+                cutoff, favor_recent = extract_time_filter(query)
+                sources = extract_source_filter(query, cast(Session, None))
+                # The relative cutoff moves with the current time, compare its age
+                cutoff_age = (
+                    round((datetime.now(timezone.utc) - cutoff).total_seconds() / 60)
+                    if cutoff
+                    else None
+                )
+                outputs.append((cutoff_age, favor_recent, sources))
+            total = time.perf_counter() - start
+    finally:
+        for cache, max_size in zip(caches, max_sizes):
+            cache.max_size = max_size
+    return total / len(queries), llm.num_calls, outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-queries", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--db-latency-ms", type=float, default=2)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    normalizers: list[Callable[[str], str]] = [str.lower, str.upper, str.strip]
+    queries = [
+        # users rarely type the exact same casing and spacing
+        rng.choice(normalizers)(rng.choice(_QUESTIONS) + " ")
+        for _ in range(args.num_queries)
+    ]
+
+    results = {}
+    for name, cache_size in [("no cache", 0), ("cached", 1024)]:
+        results[name] = _run_workload(
+            queries, cache_size, args.llm_latency_ms / 1000, args.db_latency_ms / 1000
+        )
+        per_query, num_llm_calls, _ = results[name]
+        print(
+            f"{name:<8} | {per_query * 1000:8.2f}ms per query | "
+            f"{num_llm_calls} LLM calls for {len(queries)} queries"
+        )
+    print(
+        f"speedup: {results['no cache'][0] / results['cached'][0]:5.1f}x | "
+        f"same filters: {results['no cache'][2] == results['cached'][2]}"
+    )
@@ -0,0 +1,165 @@
+"""Measures the p50 / p95 / p99 latency of the Vespa search queries (`_query_vespa`) with and
+without hedged queries, against a local fake Vespa with a fixed base latency where a small
+share of the requests hit a latency spike (e.g. a content node in a GC pause). Also
+reports the extra requests sent by the hedging. So no Vespa is needed. Run from the
+`backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_hedged_queries.py"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+
+from danswer.configs.constants import BLURB
+from danswer.configs.constants import CHUNK_ID
+from danswer.configs.constants import CONTENT
+from danswer.configs.constants import DOCUMENT_ID
+from danswer.configs.constants import SECTION_CONTINUATION
+from danswer.configs.constants import SEMANTIC_IDENTIFIER
+from danswer.configs.constants import SOURCE_LINKS
+from danswer.configs.constants import SOURCE_TYPE
+from danswer.document_index.vespa import index as vespa_index
+from danswer.document_index.vespa.index import _query_vespa
+from danswer.utils.hedging import HedgedCaller
+
+
+class _FakeVespa:
+    def __init__(
+        self,
+        base_latency_seconds: float,
+        spike_probability: float,
+        spike_latency_seconds: float,
+        num_hits: int,
+    ) -> None:
+        self.base_latency_seconds = base_latency_seconds
+        self.spike_probability = spike_probability
+        self.spike_latency_seconds = spike_latency_seconds
+        self.rng = random.Random(0)
+        self.num_requests = 0
+        self.lock = threading.Lock()
+        self.response = json.dumps(
+            {
+                "root": {
+                    "children": [
+                        {
+                            "id": f"id:default:danswer_chunk::{ind}",
+                            "relevance": 1.0 / (ind + 1),
+                            "fields": {
+                                DOCUMENT_ID: f"https://docs.example.com/doc{ind}",
+                                CHUNK_ID: 0,
+                                BLURB: "blurb",
+                                CONTENT: "lorem ipsum " * 100,
+                                SOURCE_TYPE: "web",
+                                SOURCE_LINKS: json.dumps(
+                                    {"0": "https://docs.example.com"}
+                                ),
+                                SEMANTIC_IDENTIFIER: f"doc {ind}",
+                                SECTION_CONTINUATION: False,
+                            },
+                        }
+                        for ind in range(num_hits)
+                    ]
+                }
+            }
+        ).encode()
+
+    def latency(self) -> float:
+        with self.lock:
+            self.num_requests += 1
+            spike = self.rng.random() < self.spike_probability
+        return self.spike_latency_seconds if spike else self.base_latency_seconds
+
+
+def _start_server(fake_vespa: _FakeVespa) -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(fake_vespa.latency())
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(fake_vespa.response)))
+            self.end_headers()
+            self.wfile.write(fake_vespa.response)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run_queries(num_queries: int, num_clients: int) -> list[float]:
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def _client() -> None:
+        for _ in range(num_queries // num_clients):
+            start = time.perf_counter()
+            _query_vespa({"yql": "select * from danswer_chunk where true", "hits": 10})
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    clients = [threading.Thread(target=_client) for _ in range(num_clients)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-queries", type=int, default=2000)
+    parser.add_argument("--num-clients", type=int, default=8)
+    parser.add_argument("--base-latency-ms", type=float, default=20)
+    parser.add_argument("--spike-probability", type=float, default=0.02)
+    parser.add_argument("--spike-latency-ms", type=float, default=1000)
+    parser.add_argument("--latency-percentile", type=float, default=95)
+    parser.add_argument("--min-delay-ms", type=float, default=20)
+    parser.add_argument("--max-hedges-in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    fake_vespa = _FakeVespa(
+        args.base_latency_ms / 1000,
+        args.spike_probability,
+        args.spike_latency_ms / 1000,
+        num_hits=10,
+    )
+    server = _start_server(fake_vespa)
+
+    hedged_caller: HedgedCaller = HedgedCaller(
+        latency_percentile=args.latency_percentile,
+        min_delay_seconds=args.min_delay_ms / 1000,
+        max_hedges_in_flight=args.max_hedges_in_flight,
+    )
+    with patch.object(
+        vespa_index,
+        "SEARCH_ENDPOINT",
+        f"http://127.0.0.1:{server.server_address[1]}/search/",
+    ):
+        for name, query_hedger in [("plain", None), ("hedged", hedged_caller)]:
+            fake_vespa.num_requests = 0
+            with patch.object(vespa_index, "_VESPA_QUERY_HEDGER", query_hedger):
+                latencies = _run_queries(args.num_queries, args.num_clients)
+            print(
+                f"{name:<6} | {len(latencies)} queries | p50: "
+                f"{np.percentile(latencies, 50) * 1000:7.1f}ms | p95: "
+                f"{np.percentile(latencies, 95) * 1000:7.1f}ms | p99: "
+                f"{np.percentile(latencies, 99) * 1000:7.1f}ms | requests per query: "
+                f"{fake_vespa.num_requests / len(latencies):.3f}"
+            )
+    print(
+        f"hedge delay: {(hedged_caller.hedge_delay() or 0) * 1000:.1f}ms | hedges: "
+        f"{hedged_caller.num_hedges}, answered first: {hedged_caller.num_hedge_wins}, "
+        f"skipped over the limit: {hedged_caller.num_hedges_skipped}"
+    )
+
+    server.shutdown()
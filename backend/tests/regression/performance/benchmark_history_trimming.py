@@ -0,0 +1,89 @@
+"""Measures the time per chat turn spent fitting the chat history into the LLM budgets,
+the prompt history (`drop_messages_history_overflow`) and the two secondary flows
+(search decision and query rephrasing, `combine_message_chain`), for sessions with an
+increasing number of turns. Only the messages that fit are translated for the LLM, so
+the time per turn should stay about the same once the history exceeds the budgets. Run
+from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_history_trimming.py"""
+import argparse
+import gc
+import random
+import time
+from typing import Any
+
+from langchain.schema.messages import HumanMessage
+from langchain.schema.messages import SystemMessage
+
+from danswer.chat.chat_utils import combine_message_chain
+from danswer.chat.chat_utils import drop_messages_history_overflow
+from danswer.configs.constants import MessageType
+from danswer.configs.model_configs import GEN_AI_HISTORY_CUTOFF
+from danswer.db.models import ChatMessage
+
+
+def _make_history(num_turns: int, rng: random.Random) -> list[ChatMessage]:
+    history = []
+    for _ in range(num_turns):
+        for message_type in [MessageType.USER, MessageType.ASSISTANT]:
+            token_count = rng.randint(20, 400)
+            history.append(
+                ChatMessage(
+                    message="word " * token_count,
+                    token_count=token_count,
+                    message_type=message_type,
+                )
+            )
+    return history
+
+
+def _assemble_history(
+    history: list[ChatMessage], max_input_tokens: int
+) -> tuple[Any, str]:
+    prompt = drop_messages_history_overflow(
+        SystemMessage(content="system"),
+        500,
+        history,
+        HumanMessage(content="final"),
+        2000,
+        max_input_tokens,
+    )
+    # once to decide whether to search and once to rephrase the query
+    combine_message_chain(history, GEN_AI_HISTORY_CUTOFF)
+    history_str = combine_message_chain(history, GEN_AI_HISTORY_CUTOFF)
+    return prompt, history_str
+
+
+def _time_per_turn(
+    history: list[ChatMessage], max_input_tokens: int, num_runs: int
+) -> tuple[float, tuple[Any, str]]:
+    best = float("inf")
+    output: tuple[Any, str] = ([], "")
+    gc.disable()
+    for _ in range(num_runs):
+        start = time.perf_counter()
+        output = _assemble_history(history, max_input_tokens)
+        best = min(best, time.perf_counter() - start)
+    gc.enable()
+    return best, output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-turns", type=int, nargs="+", default=[20, 200, 1000])
+    parser.add_argument("--max-input-tokens", type=int, default=16000)
+    parser.add_argument("--num-runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for num_turns in args.num_turns:
+        history = _make_history(num_turns, rng)
+        turn_time, output = _time_per_turn(
+            history, args.max_input_tokens, args.num_runs
+        )
+        prompt, history_str = output
+        num_combined = len(history_str.split("\n\n")) if history_str else 0
+        print(
+            f"{num_turns:>5} turns | per turn: {turn_time * 1e6:8.1f} us | "
+            f"{len(prompt) - 2} history messages in prompt, "
+            f"{num_combined} in the secondary flows"
+        )
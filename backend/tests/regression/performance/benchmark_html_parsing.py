@@ -0,0 +1,105 @@
+"""Compares the BeautifulSoup parser backends used by the HTML based connectors.
+
+Runs `web_html_cleanup` over a corpus of pages with each backend, checks that all of
+them produce identical cleaned text and reports throughput (MB/s) + per page latency.
+If no corpus directory is provided, a synthetic corpus of documentation style pages is
+generated instead."""
+import argparse
+import pathlib
+import random
+import time
+
+from danswer.connectors.cross_connector_utils.html_utils import web_html_cleanup
+
+_PARSERS = ["html.parser", "lxml"]
+_WORDS = (
+    "index connector document search answer query vespa slack confluence notion "
+    "drive permission embedding chunk model token latency throughput team access"
+).split()
+
+
+def _sentence(rng: random.Random, num_words: int = 14) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(num_words)).capitalize() + "."
+
+
+def _synthetic_page(rng: random.Random, num_sections: int) -> str:
+    body: list[str] = []
+    for section_ind in range(num_sections):
+        body.append(f"<h2>Section {section_ind}</h2>")
+        body.append(
+            "<p>" + " ".join(_sentence(rng) for _ in range(5)) + " <b>bold</b></p>"
+        )
+        body.append(
+            "<ul>"
+            + "".join(f"<li><a href='#'>{_sentence(rng, 6)}</a></li>" for _ in range(5))
+            + "</ul>"
+        )
+        if section_ind % 3 == 0:
+            rows = "".join(
+                "<tr>" + "".join(f"<td>{rng.choice(_WORDS)}</td>" for _ in range(4))
+                for _ in range(6)
+            )
+            body.append(f"<table>{rows}</table>")
+        if section_ind % 4 == 0:
+            body.append(f"<pre><code>{_sentence(rng)}\n{_sentence(rng)}</code></pre>")
+    return (
+        "<!DOCTYPE html><html><head><title>Synthetic Page</title>"
+        "<script>var x = 1;</script><style>p { color: red; }</style></head><body>"
+        "<nav><a href='/'>Home</a></nav><div class='sidebar'>Sidebar</div>"
+        f"<main>{''.join(body)}</main><footer>Footer</footer></body></html>"
+    )
+
+
+def load_corpus(corpus_dir: str | None, num_pages: int, seed: int) -> list[str]:
+    if corpus_dir:
+        paths = sorted(pathlib.Path(corpus_dir).glob("**/*.htm*"))
+        return [path.read_text(errors="ignore") for path in paths]
+
+    rng = random.Random(seed)
+    # real world pages range from a few KB up to several hundred KB
+    return [_synthetic_page(rng, rng.randint(5, 300)) for _ in range(num_pages)]
+
+
+def benchmark_parser(pages: list[str], parser: str) -> tuple[list[float], list[str]]:
+    latencies: list[float] = []
+    outputs: list[str] = []
+    for page in pages:
+        start = time.perf_counter()
+        outputs.append(web_html_cleanup(page, parser=parser).cleaned_text)
+        latencies.append(time.perf_counter() - start)
+    return latencies, outputs
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--corpus-dir", type=str, help="Directory of .html files to benchmark on"
+    )
+    parser.add_argument("--num-pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus_dir, args.num_pages, args.seed)
+    total_mb = sum(len(page.encode()) for page in pages) / 1_000_000
+    print(f"Corpus: {len(pages)} pages, {total_mb:.2f} MB")
+
+    baseline_outputs: list[str] | None = None
+    for backend in _PARSERS:
+        latencies, outputs = benchmark_parser(pages, backend)
+        if baseline_outputs is None:
+            baseline_outputs = outputs
+        mismatches = sum(a != b for a, b in zip(baseline_outputs, outputs))
+
+        total_time = sum(latencies)
+        print(
+            f"{backend:<12} {total_mb / total_time:7.2f} MB/s | "
+            f"mean {1000 * total_time / len(pages):7.2f} ms | "
+            f"p50 {1000 * _percentile(latencies, 0.5):7.2f} ms | "
+            f"p95 {1000 * _percentile(latencies, 0.95):7.2f} ms | "
+            f"output mismatches vs {_PARSERS[0]}: {mismatches}"
+        )
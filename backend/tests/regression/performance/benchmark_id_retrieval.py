@@ -0,0 +1,154 @@
+"""Measures the number of Vespa requests and the latency of fetching the full documents of
+a chat with selected documents, for an increasing number of selected documents. The
+chunks of many documents are fetched in a few batched queries, so the number of requests
+should grow with the number of batches and not with the number of chunks. Runs against
+a local fake Vespa with a fixed latency per request and a limited number of requests
+served at once, so no Vespa is needed. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_id_retrieval.py"""
+import argparse
+import json
+import re
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from unittest.mock import patch
+
+from danswer.configs.constants import BLURB
+from danswer.configs.constants import CHUNK_ID
+from danswer.configs.constants import CONTENT
+from danswer.configs.constants import DOCUMENT_ID
+from danswer.configs.constants import SECTION_CONTINUATION
+from danswer.configs.constants import SEMANTIC_IDENTIFIER
+from danswer.configs.constants import SOURCE_LINKS
+from danswer.configs.constants import SOURCE_TYPE
+from danswer.document_index.vespa import index as vespa_index
+from danswer.document_index.vespa.index import VespaIndex
+from danswer.search.search_runner import inference_documents_from_ids
+
+_INDEX_NAME = "danswer_chunk"
+
+
+class _FakeVespa:
+    def __init__(
+        self,
+        num_docs: int,
+        chunks_per_doc: int,
+        latency_seconds: float,
+        concurrency: int,
+    ) -> None:
+        self.chunks: dict[str, dict[str, Any]] = {}
+        for doc_ind in range(num_docs):
+            for chunk_ind in range(chunks_per_doc):
+                self.chunks[f"doc{doc_ind}_{chunk_ind}"] = {
+                    DOCUMENT_ID: f"https://docs.example.com/doc{doc_ind}",
+                    CHUNK_ID: chunk_ind,
+                    BLURB: "blurb",
+                    CONTENT: f"content {chunk_ind} " + "lorem ipsum " * 150,
+                    SOURCE_TYPE: "web",
+                    SOURCE_LINKS: json.dumps({"0": "https://docs.example.com"}),
+                    SEMANTIC_IDENTIFIER: f"doc {doc_ind}",
+                    SECTION_CONTINUATION: False,
+                }
+        self.latency_seconds = latency_seconds
+        self.semaphore = threading.Semaphore(concurrency)
+        self.num_requests = 0
+        self.lock = threading.Lock()
+
+    def search(self, params: dict[str, Any]) -> dict[str, Any]:
+        yql = params["yql"]
+        # JSON quoted ids of the batched lookup, single quoted ones of the old lookup
+        doc_ids = {
+            json.loads(doc_id)
+            for doc_id in re.findall(
+                rf'{DOCUMENT_ID} contains ("(?:[^"\\\\]|\\\\.)*")', yql
+            )
+        } | set(re.findall(rf"{DOCUMENT_ID} contains '([^']*)'", yql))
+        chunk_id_range = re.search(rf"{CHUNK_ID} >= (\d+) and {CHUNK_ID} < (\d+)", yql)
+        min_chunk_id, max_chunk_id = (
+            (int(chunk_id_range.group(1)), int(chunk_id_range.group(2)))
+            if chunk_id_range
+            else (0, len(self.chunks))
+        )
+        matches = [
+            (vespa_id, fields)
+            for vespa_id, fields in self.chunks.items()
+            if fields[DOCUMENT_ID] in doc_ids
+            and min_chunk_id <= fields[CHUNK_ID] < max_chunk_id
+        ]
+        offset = int(params.get("offset", 0))
+        page = matches[offset : offset + int(params.get("hits", 10))]
+        children = [{"relevance": 0.0, "fields": fields} for _, fields in page]
+        return {"root": {"children": children}}
+
+    def handle(self, respond: Callable[[], dict[str, Any]]) -> bytes:
+        with self.lock:
+            self.num_requests += 1
+        with self.semaphore:
+            time.sleep(self.latency_seconds)
+            return json.dumps(respond()).encode()
+
+
+def _start_server(fake_vespa: _FakeVespa) -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def _send(self, body: bytes) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            params = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            self._send(fake_vespa.handle(lambda: fake_vespa.search(params)))
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-docs", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--chunks-per-doc", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--server-concurrency", type=int, default=16)
+    parser.add_argument("--num-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    fake_vespa = _FakeVespa(
+        max(args.num_docs),
+        args.chunks_per_doc,
+        args.latency_ms / 1000,
+        args.server_concurrency,
+    )
+    server = _start_server(fake_vespa)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    document_index = VespaIndex(index_name=_INDEX_NAME, secondary_index_name=None)
+
+    with patch.object(vespa_index, "SEARCH_ENDPOINT", f"{base_url}/search/"):
+        for num_docs in args.num_docs:
+            doc_identifiers = [
+                (f"https://docs.example.com/doc{doc_ind}", 0)
+                for doc_ind in range(num_docs)
+            ]
+            best = float("inf")
+            for _ in range(args.num_runs):
+                fake_vespa.num_requests = 0
+                start = time.perf_counter()
+                llm_docs = inference_documents_from_ids(doc_identifiers, document_index)
+                best = min(best, time.perf_counter() - start)
+            assert len(llm_docs) == num_docs
+            print(
+                f"{num_docs:>4} documents x {args.chunks_per_doc} chunks | "
+                f"requests: {fake_vespa.num_requests:>4} | best: {best * 1000:7.1f}ms"
+            )
+
+    server.shutdown()
@@ -0,0 +1,111 @@
+"""Measures docs/sec of the paginated connectors (Confluence, GitHub, Notion) against
+local fake APIs with injected per request latency, comparing serial pagination
+(lookahead 0) with prefetching the next result pages. Every yielded batch is held for
+`--process-latency` seconds to stand in for the downstream indexing work. Run from the
+`backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_prefetch_pagination.py"""
+import argparse
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from danswer.connectors.confluence.connector import ConfluenceConnector
+from danswer.connectors.interfaces import LoadConnector
+from tests.unit.danswer.connectors.cross_connector_utils.test_pagination import (
+    FakeConfluenceClient,
+)
+from tests.unit.danswer.connectors.cross_connector_utils.test_pagination import (
+    make_fake_github_connector,
+)
+from tests.unit.danswer.connectors.cross_connector_utils.test_pagination import (
+    make_fake_notion_connector,
+)
+
+
+def _make_confluence_connector(
+    num_docs: int, batch_size: int, latency: float, lookahead: int
+) -> ConfluenceConnector:
+    connector = ConfluenceConnector(
+        "https://danswer.atlassian.net/wiki/spaces/SPACE/overview",
+        batch_size=batch_size,
+        prefetch_lookahead=lookahead,
+    )
+    connector.confluence_client = FakeConfluenceClient(num_docs, latency=latency)
+    return connector
+
+
+def _make_github_connector(
+    num_docs: int, batch_size: int, latency: float, lookahead: int
+) -> LoadConnector:
+    return make_fake_github_connector(
+        num_docs,
+        per_page=batch_size,
+        latency=latency,
+        batch_size=batch_size,
+        prefetch_lookahead=lookahead,
+    )
+
+
+def _make_notion_connector(
+    num_docs: int, batch_size: int, latency: float, lookahead: int
+) -> LoadConnector:
+    return make_fake_notion_connector(
+        num_docs, page_size=batch_size, latency=latency, prefetch_lookahead=lookahead
+    )
+
+
+_CONNECTOR_FACTORIES: dict[str, Callable[[int, int, float, int], Any]] = {
+    "confluence": _make_confluence_connector,
+    "github": _make_github_connector,
+    "notion": _make_notion_connector,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--connectors", nargs="+", default=list(_CONNECTOR_FACTORIES.keys())
+    )
+    parser.add_argument("--num-docs", type=int, default=400)
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="Seconds added to every API call"
+    )
+    parser.add_argument(
+        "--process-latency",
+        type=float,
+        default=0.1,
+        help="Seconds spent 'indexing' every yielded batch of documents",
+    )
+    parser.add_argument("--lookaheads", type=int, nargs="+", default=[0, 1, 2])
+    args = parser.parse_args()
+    # the connectors log every page / batch they read
+    logging.disable(logging.INFO)
+
+    for connector_name in args.connectors:
+        serial_docs_per_sec: float | None = None
+        reference_batches = None
+        for lookahead in args.lookaheads:
+            connector = _CONNECTOR_FACTORIES[connector_name](
+                args.num_docs, args.batch_size, args.latency, lookahead
+            )
+
+            start = time.monotonic()
+            batches = []
+            for doc_batch in connector.load_from_state():
+                batches.append(doc_batch)
+                time.sleep(args.process_latency)
+            elapsed = time.monotonic() - start
+
+            if reference_batches is None:
+                reference_batches = batches
+            num_docs = sum(len(doc_batch) for doc_batch in batches)
+            docs_per_sec = num_docs / elapsed
+            serial_docs_per_sec = serial_docs_per_sec or docs_per_sec
+            print(
+                f"{connector_name:<10} | lookahead={lookahead} | {num_docs} docs in "
+                f"{elapsed:6.2f}s | {docs_per_sec:7.1f} docs/sec "
+                f"({docs_per_sec / serial_docs_per_sec:4.1f}x) | "
+                f"same batches as first run: {batches == reference_batches}"
+            )
@@ -0,0 +1,65 @@
+"""Measures the per token time of `process_model_tokens` on streamed JSON answers with
+a long preamble before the answer starts followed by a long answer. Only the new token
+is looked at for every token, so the time per token should not grow with the length of
+the preamble. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_process_model_tokens.py"""
+import argparse
+import gc
+import json
+import logging
+import time
+from typing import Any
+
+from danswer.one_shot_answer.qa_utils import process_model_tokens
+
+
+def _make_tokens(num_preamble_tokens: int, num_answer_tokens: int) -> list[str]:
+    preamble = ["Let", " me", " think", " about", " this", " question", ".\n"]
+    answer = ["The", " deploy", " uses", " a", " blue", "-green", " rollout", "."]
+    preamble_tokens = [
+        preamble[ind % len(preamble)] for ind in range(num_preamble_tokens)
+    ]
+    answer_tokens = [answer[ind % len(answer)] for ind in range(num_answer_tokens)]
+    quotes = json.dumps(["The deploy uses a blue-green rollout"])
+    return (
+        preamble_tokens
+        + ["\n{", '"answer', '":', ' "']
+        + answer_tokens
+        + ['",', ' "quotes":', f" {quotes}", "}"]
+    )
+
+
+def _time_per_token(tokens: list[str], num_runs: int) -> tuple[float, list[Any]]:
+    best = float("inf")
+    output: list[Any] = []
+    gc.disable()
+    for _ in range(num_runs):
+        start = time.perf_counter()
+        output = list(process_model_tokens(iter(tokens), [], True))
+        best = min(best, time.perf_counter() - start)
+    gc.enable()
+    return best / len(tokens), output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num-preamble-tokens", type=int, nargs="+", default=[0, 1000, 4000, 16000]
+    )
+    parser.add_argument("--num-answer-tokens", type=int, default=1000)
+    parser.add_argument("--num-runs", type=int, default=5)
+    args = parser.parse_args()
+    # the processing logs the full model output / answer
+    logging.disable(logging.WARNING)
+
+    for num_preamble_tokens in args.num_preamble_tokens:
+        tokens = _make_tokens(num_preamble_tokens, args.num_answer_tokens)
+        per_token, output = _time_per_token(tokens, args.num_runs)
+        streamed_answer = "".join(
+            getattr(piece, "answer_piece", None) or "" for piece in output
+        )
+        print(
+            f"{num_preamble_tokens:>6} preamble + {args.num_answer_tokens} answer "
+            f"tokens | {per_token * 1e6:7.2f} us/token | "
+            f"streamed answer: {len(streamed_answer)} chars"
+        )
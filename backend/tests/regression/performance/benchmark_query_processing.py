@@ -0,0 +1,88 @@
+"""Measures the per query cost of `query_processing` (stop word removal and
+lemmatization of keyword queries), both for new queries (with the preloaded stop words
+and lemmatizer) and repeated ones (served from the cache). Also measures the latency
+of the first query of a fresh process, with and without warming up the NLTK resources
+at startup. Requires the NLTK stopwords, wordnet and punkt data to be downloaded. Run
+from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_query_processing.py"""
+import argparse
+import gc
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+
+from danswer.search.search_runner import query_processing
+from danswer.search.search_runner import warm_up_query_processing
+
+_QUERIES = [
+    "How do I configure the Slack connector for private channels?",
+    "What are the steps to rotate the database credentials?",
+    "Why is the indexing of the Confluence spaces failing?",
+    "Who owns the billing service and where are its runbooks?",
+    "What was decided in the last planning meeting about the roadmap?",
+]
+
+_FIRST_QUERY_SCRIPT = """
+import time
+start = time.perf_counter()
+from danswer.search.search_runner import query_processing
+from danswer.search.search_runner import warm_up_query_processing
+if {warm_up}:
+    warm_up_query_processing()
+startup = time.perf_counter() - start
+start = time.perf_counter()
+query_processing("How do I configure the Slack connector for private channels?")
+print(startup, time.perf_counter() - start)
+"""
+
+
+def _time_per_query(
+    process: Callable[[str], str], queries: list[str], num_runs: int
+) -> tuple[float, list[str]]:
+    best = float("inf")
+    output: list[str] = []
+    gc.disable()
+    for _ in range(num_runs):
+        start = time.perf_counter()
+        output = [process(query) for query in queries]
+        best = min(best, time.perf_counter() - start)
+    gc.enable()
+    return best / len(queries), output
+
+
+def _time_first_query(warm_up: bool) -> tuple[float, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", _FIRST_QUERY_SCRIPT.format(warm_up=warm_up)],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    startup, first_query = output.split()[-2:]
+    return float(startup), float(first_query)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for warm_up in [False, True]:
+        startup, first_query = _time_first_query(warm_up)
+        print(
+            f"fresh process, warm_up={str(warm_up):<5} | import + warm up: "
+            f"{startup * 1000:8.1f}ms | first query: {first_query * 1000:8.1f}ms"
+        )
+
+    warm_up_query_processing()
+    uncached_per_query, uncached_output = _time_per_query(
+        query_processing.__wrapped__, _QUERIES, args.num_runs
+    )
+    cached_per_query, cached_output = _time_per_query(
+        query_processing, _QUERIES, args.num_runs
+    )
+    print(
+        f"per query | preloaded resources: {uncached_per_query * 1e6:8.1f} us | "
+        f"cached query: {cached_per_query * 1e6:8.1f} us | same output: "
+        f"{uncached_output == cached_output}"
+    )
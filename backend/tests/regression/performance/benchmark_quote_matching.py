@@ -0,0 +1,91 @@
+"""Measures `match_quotes_to_docs` for answers with an increasing number of quotes
+against 30 large chunks (most quotes are found somewhere in the chunks, every fourth is
+hallucinated). Every chunk is only cleaned up once, so the time per quote should drop as
+the number of quotes grows. The fuzzy search is much slower so it is measured on smaller
+chunks. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_quote_matching.py"""
+import argparse
+import random
+import string
+import time
+from typing import Any
+
+from danswer.one_shot_answer.qa_utils import match_quotes_to_docs
+from tests.unit.danswer.direct_qa.test_qa_utils import _make_chunk
+
+
+def _make_vocabulary(num_words: int, rng: random.Random) -> list[str]:
+    return [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 10)))
+        for _ in range(num_words)
+    ]
+
+
+def _random_text(vocabulary: list[str], num_words: int, rng: random.Random) -> str:
+    # a realistic vocabulary, the unit tests use only a few words to get many near matches
+    separators = [" ", " ", " ", ", ", ".\n"]
+    return "".join(
+        rng.choice(vocabulary) + rng.choice(separators) for _ in range(num_words)
+    )
+
+
+def _make_quotes(
+    chunk_texts: list[str], num_quotes: int, rng: random.Random
+) -> list[str]:
+    quotes = []
+    for quote_ind in range(num_quotes):
+        if quote_ind % 4 == 3:
+            # hallucinated quote, compared against every chunk
+            quotes.append("This sentence is not in any of the documents at all")
+            continue
+        text = rng.choice(chunk_texts)
+        start = rng.randint(0, len(text) - 200)
+        # models change the casing and punctuation of the quotes
+        quotes.append(text[start : start + rng.randint(50, 150)].upper())
+    return quotes
+
+
+def _time_matching(
+    quotes: list[str], chunks: list[Any], fuzzy_search: bool
+) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = match_quotes_to_docs(quotes, chunks, fuzzy_search=fuzzy_search)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-quotes", type=int, nargs="+", default=[1, 10, 40])
+    parser.add_argument("--num-chunks", type=int, default=30)
+    parser.add_argument(
+        "--chunk-words", type=int, default=2000, help="Words per chunk, exact search"
+    )
+    parser.add_argument(
+        "--fuzzy-chunk-words",
+        type=int,
+        default=150,
+        help="Words per chunk, fuzzy search",
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = _make_vocabulary(5000, rng)
+    for fuzzy_search, chunk_words in [
+        (False, args.chunk_words),
+        (True, args.fuzzy_chunk_words),
+    ]:
+        chunk_texts = [
+            _random_text(vocabulary, chunk_words, rng) for _ in range(args.num_chunks)
+        ]
+        chunks = [_make_chunk(text) for text in chunk_texts]
+        for chunk_ind, chunk in enumerate(chunks):
+            chunk.document_id = f"doc {chunk_ind}"
+        for num_quotes in args.num_quotes:
+            quotes = _make_quotes(chunk_texts, num_quotes, rng)
+            match_time, result = _time_matching(quotes, chunks, fuzzy_search)
+            print(
+                f"fuzzy_search={str(fuzzy_search):<5} | {num_quotes:>3} quotes x "
+                f"{args.num_chunks} chunks of {chunk_words} words | "
+                f"{match_time * 1000:8.1f}ms, {match_time / num_quotes * 1000:7.2f}ms "
+                f"per quote | {len(result.quotes)} quotes matched"
+            )
@@ -0,0 +1,141 @@
+"""Throughput of the connector rate limiter under contention.
+
+Many threads (and, for the file backend, processes) share one rate limit key. Reports
+the achieved calls/sec against the configured limit, plus wait time statistics."""
+import argparse
+import multiprocessing
+import tempfile
+import threading
+import time
+
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    FileRateLimitBackend,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    get_rate_limit_metrics,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    InMemoryRateLimitBackend,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    rate_limit_builder,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    RateLimitBackend,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    reset_rate_limit_metrics,
+)
+
+_KEY = "benchmark"
+
+
+def _run_threads(
+    backend: RateLimitBackend,
+    num_threads: int,
+    calls_per_thread: int,
+    max_calls: int,
+    period: float,
+) -> None:
+    @rate_limit_builder(
+        max_calls=max_calls, period=period, sleep_time=0.05, key=_KEY, backend=backend
+    )
+    def func() -> None:
+        pass
+
+    def worker() -> None:
+        for _ in range(calls_per_thread):
+            func()
+
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _run_file_backend_process(
+    state_dir: str,
+    num_threads: int,
+    calls_per_thread: int,
+    max_calls: int,
+    period: float,
+) -> None:
+    _run_threads(
+        FileRateLimitBackend(state_dir),
+        num_threads,
+        calls_per_thread,
+        max_calls,
+        period,
+    )
+
+
+def _report(name: str, total_calls: int, elapsed: float, limit_rate: float) -> None:
+    print(
+        f"{name:<28} {total_calls} calls in {elapsed:6.2f}s | "
+        f"{total_calls / elapsed:8.1f} calls/sec (limit {limit_rate:.1f}/sec)"
+    )
+    metrics = get_rate_limit_metrics().get(_KEY)
+    if metrics:
+        print(
+            f"{'':<28} waits: {metrics.num_waits} | "
+            f"avg wait {1000 * metrics.avg_wait_time:.1f} ms | "
+            f"max wait {1000 * metrics.max_wait_time:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-calls", type=int, default=50)
+    parser.add_argument("--period", type=float, default=1.0)
+    parser.add_argument("--num-threads", type=int, default=16)
+    parser.add_argument("--num-processes", type=int, default=4)
+    parser.add_argument("--calls-per-thread", type=int, default=10)
+    args = parser.parse_args()
+
+    limit_rate = args.max_calls / args.period
+
+    reset_rate_limit_metrics()
+    start = time.monotonic()
+    _run_threads(
+        InMemoryRateLimitBackend(),
+        args.num_threads,
+        args.calls_per_thread,
+        args.max_calls,
+        args.period,
+    )
+    _report(
+        f"memory, {args.num_threads} threads",
+        args.num_threads * args.calls_per_thread,
+        time.monotonic() - start,
+        limit_rate,
+    )
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        threads_per_process = max(args.num_threads // args.num_processes, 1)
+        processes = [
+            multiprocessing.Process(
+                target=_run_file_backend_process,
+                args=(
+                    state_dir,
+                    threads_per_process,
+                    args.calls_per_thread,
+                    args.max_calls,
+                    args.period,
+                ),
+            )
+            for _ in range(args.num_processes)
+        ]
+        reset_rate_limit_metrics()
+        start = time.monotonic()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        # metrics are per process, so only throughput is reported here
+        _report(
+            f"file, {args.num_processes}x{threads_per_process} threads",
+            args.num_processes * threads_per_process * args.calls_per_thread,
+            time.monotonic() - start,
+            limit_rate,
+        )
@@ -0,0 +1,139 @@
+"""Replays a query log against `full_chunk_search_generator` with and without the search
+result cache and measures the hit rate, the staleness (results dropped as outdated by
+index changes, age of the served results) and the search latency. The log is either a
+file with one query per line (e.g. exported from the query history) or generated with
+Zipf distributed repetitions, the way dashboards, Slack bot retries and eval reruns repeat
+the same searches. Every `--index-every` searches, a batch of documents is indexed, which
+bumps the index generation kept in a temporary dynamic config store.
+
+The retrieval, reranking and LLM filter are replaced with a fake with a fixed latency, so
+no Vespa, model server or LLM is needed. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_search_result_cache.py"""
+import argparse
+import copy
+import logging
+import random
+import tempfile
+import time
+from collections.abc import Iterator
+from types import SimpleNamespace
+from typing import Any
+from typing import cast
+from unittest.mock import patch
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from danswer.document_index import document_index_utils
+from danswer.document_index.document_index_utils import bump_index_generation
+from danswer.document_index.interfaces import DocumentIndex
+from danswer.dynamic_configs.file_system.store import FileSystemBackedDynamicConfigStore
+from danswer.indexing.models import InferenceChunk
+from danswer.search import search_runner
+from danswer.search.models import IndexFilters
+from danswer.search.models import SearchQuery
+from danswer.search.search_result_cache import SearchResultCache
+from danswer.search.search_runner import full_chunk_search_generator
+from tests.unit.danswer.search.test_search_runner_scoring import _make_chunks
+
+
+def _query_log(
+    rng: random.Random, num_searches: int, num_distinct: int, zipf_exponent: float
+) -> list[str]:
+    weights = [1 / (rank + 1) ** zipf_exponent for rank in range(num_distinct)]
+    return [
+        f"question {rank}"
+        for rank in rng.choices(range(num_distinct), weights=weights, k=num_searches)
+    ]
+
+
+def _replay(
+    queries: list[str],
+    cache: SearchResultCache,
+    search_latency_seconds: float,
+    index_every: int,
+    chunks: list[InferenceChunk],
+) -> list[float]:
+    def _fake_search(**kwargs: Any) -> Iterator[list[InferenceChunk] | list[bool]]:
+        time.sleep(search_latency_seconds)
+        yield [copy.copy(chunk) for chunk in chunks]
+        yield [False for _ in chunks]
+
+    document_index = cast(DocumentIndex, SimpleNamespace(index_name="danswer_chunk"))
+    latencies = []
+    with tempfile.TemporaryDirectory() as dir_path, patch.object(
+        document_index_utils,
+        "get_dynamic_config_store",
+        lambda: FileSystemBackedDynamicConfigStore(dir_path),
+    ), patch.object(search_runner, "_SEARCH_RESULT_CACHE", cache), patch.object(
+        search_runner, "_uncached_full_chunk_search_generator", _fake_search
+    ):
+        for ind, query in enumerate(queries):
+            if index_every and ind and ind % index_every == 0:
+                bump_index_generation()
+
+            start = time.perf_counter()
+            search_generator = full_chunk_search_generator(
+                search_query=SearchQuery(
+                    query=query,
+                    filters=IndexFilters(access_control_list=["PUBLIC"]),
+                    recency_bias_multiplier=1.0,
+                ),
+                document_index=document_index,
+                db_session=cast(Session, None),
+            )
+            next(search_generator)
+            next(search_generator)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--query-log", type=str, default=None, help="File with one query per line"
+    )
+    parser.add_argument("--num-searches", type=int, default=5000)
+    parser.add_argument("--num-distinct", type=int, default=1000)
+    parser.add_argument("--zipf-exponent", type=float, default=1.1)
+    parser.add_argument("--search-latency-ms", type=float, default=5)
+    parser.add_argument("--index-every", type=int, nargs="+", default=[0, 500, 50])
+    parser.add_argument("--cache-size", type=int, default=256)
+    parser.add_argument("--ttl-seconds", type=int, default=600)
+    args = parser.parse_args()
+
+    # The top links of every search would drown the results
+    search_runner.logger.setLevel(logging.WARNING)
+    rng = random.Random(0)
+    if args.query_log:
+        with open(args.query_log) as file:
+            queries = [line.strip() for line in file if line.strip()]
+    else:
+        queries = _query_log(
+            rng, args.num_searches, args.num_distinct, args.zipf_exponent
+        )
+    chunks = _make_chunks(rng, 50)
+
+    for index_every in args.index_every:
+        for name, cache in [
+            ("no cache", SearchResultCache(max_size=0, ttl_seconds=0)),
+            (
+                "cache",
+                SearchResultCache(
+                    max_size=args.cache_size, ttl_seconds=args.ttl_seconds
+                ),
+            ),
+        ]:
+            latencies = _replay(
+                queries, cache, args.search_latency_ms / 1000, index_every, chunks
+            )
+            num_lookups = max(cache.num_hits + cache.num_misses, 1)
+            mean_hit_age = cache.total_hit_age_seconds / max(cache.num_hits, 1)
+            print(
+                f"{name:<8} | {len(queries)} searches, index changes every "
+                f"{index_every or '-':>4} | hit rate: "
+                f"{cache.num_hits / num_lookups:6.1%} | outdated: "
+                f"{cache.num_outdated:>4} | served age mean: {mean_hit_age:5.2f}s | "
+                f"p50: {np.percentile(latencies, 50) * 1000:6.2f}ms | "
+                f"mean: {np.mean(latencies) * 1000:6.2f}ms"
+            )
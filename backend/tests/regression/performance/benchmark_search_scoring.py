@@ -0,0 +1,70 @@
+"""Measures the score post-processing of `apply_boost`, `apply_boost_legacy` and
+`semantic_reranking` (boost and recency multipliers, normalization and sorting) at
+100, 1k and 10k chunks, with the time per chunk, which should drop as the fixed numpy
+overhead is spread over more chunks. The cross-encoders are replaced with a fake returning fixed scores,
+so no model server is needed. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_search_scoring.py"""
+import argparse
+import copy
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import patch
+
+from danswer.indexing.models import InferenceChunk
+from danswer.search import search_runner
+from danswer.search.search_runner import apply_boost
+from danswer.search.search_runner import apply_boost_legacy
+from danswer.search.search_runner import semantic_reranking
+from tests.unit.danswer.search.test_search_runner_scoring import _FakeCrossEncoders
+from tests.unit.danswer.search.test_search_runner_scoring import _make_chunks
+
+
+def _best_time(
+    score: Callable[[list[InferenceChunk]], Any],
+    chunks: list[InferenceChunk],
+    num_runs: int,
+) -> float:
+    best = float("inf")
+    for _ in range(num_runs):
+        # the scoring updates the chunk scores in place
+        run_chunks = [copy.copy(chunk) for chunk in chunks]
+        start = time.perf_counter()
+        score(run_chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-chunks", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--num-encoders", type=int, default=2)
+    parser.add_argument("--num-runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for num_chunks in args.num_chunks:
+        chunks = _make_chunks(rng, num_chunks)
+        _FakeCrossEncoders.sim_scores = [
+            [rng.uniform(-5, 5) for _ in chunks] for _ in range(args.num_encoders)
+        ]
+
+        scorings: list[tuple[str, Callable[[list[InferenceChunk]], Any]]] = [
+            ("apply_boost", lambda c: apply_boost(c, 10, 0.5, 0.8)),
+            ("apply_boost_legacy", lambda c: apply_boost_legacy(c, 0.5, 0.8)),
+            (
+                "semantic_reranking",
+                lambda c: semantic_reranking("query", c, model_min=-5, model_max=5),
+            ),
+        ]
+        with patch.object(
+            search_runner, "CrossEncoderEnsembleModel", _FakeCrossEncoders
+        ):
+            for name, score in scorings:
+                score_time = _best_time(score, chunks, args.num_runs)
+                print(
+                    f"{name:<18} | {num_chunks:>6} chunks | "
+                    f"{score_time * 1000:8.3f}ms | "
+                    f"{score_time / num_chunks * 1e6:6.2f}us per chunk"
+                )
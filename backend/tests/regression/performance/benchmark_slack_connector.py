@@ -0,0 +1,66 @@
+"""Measures threads/sec of the Slack connector against a local fake Slack API with
+injected per call latency, for serial and concurrent fetching.
+
+The fake enforces the (optionally scaled up) tier limits, the number of `ratelimited`
+responses is reported as well. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_slack_connector.py"""
+import argparse
+import time
+
+from danswer.connectors.slack.connector import get_all_docs
+from danswer.connectors.slack.utils import SlackMethodBudget
+from tests.unit.danswer.connectors.slack.test_slack_connector import FakeSlackClient
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-channels", type=int, default=10)
+    parser.add_argument("--threads-per-channel", type=int, default=40)
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="Seconds added to every API call"
+    )
+    parser.add_argument(
+        "--tier-multiplier",
+        type=float,
+        default=20,
+        help="Scales Slack's tier limits, real workspaces often allow more than documented",
+    )
+    parser.add_argument("--num-threads", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    requests_per_minute_by_tier: dict[int, float] = {
+        tier: int(limit * args.tier_multiplier)
+        for tier, limit in {1: 1, 2: 20, 3: 50, 4: 100}.items()
+    }
+
+    reference_ids: list[str] | None = None
+    for num_threads in args.num_threads:
+        client = FakeSlackClient(
+            num_channels=args.num_channels,
+            threads_per_channel=args.threads_per_channel,
+            requests_per_window_by_tier=requests_per_minute_by_tier,
+            latency=args.latency,
+        )
+        start = time.monotonic()
+        docs = list(
+            get_all_docs(
+                client=client,  # type: ignore
+                workspace="benchmark",
+                num_threads=num_threads,
+                budget=SlackMethodBudget(
+                    requests_per_minute_by_tier=requests_per_minute_by_tier
+                ),
+            )
+        )
+        elapsed = time.monotonic() - start
+
+        doc_ids = [doc.id for doc in docs]
+        if reference_ids is None:
+            reference_ids = doc_ids
+        num_threads_fetched = client.call_counts["conversations_replies"]
+        print(
+            f"num_threads={num_threads:<3} | {len(docs)} docs in {elapsed:6.2f}s | "
+            f"{num_threads_fetched / elapsed:7.2f} threads/sec | "
+            f"ratelimited responses: {client.num_rate_limited} | "
+            f"same order as first run: {doc_ids == reference_ids}"
+        )
@@ -0,0 +1,140 @@
+"""Measures the time to the first documents of a follow up chat message, from the start of
+the history based query rephrasing to the top chunks of the search, with the rephrase and
+search run one after the other (default) compared to the speculative retrieval which
+searches with the user message while the rephrase runs. For the speculative retrieval,
+both a rephrase close to the user message (results kept) and a rephrase adding context
+from the history (searched again) are measured. The LLM, the filter extraction and the
+search are replaced with fakes with fixed latencies, so no LLM, Postgres or Vespa is
+needed. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_speculative_retrieval.py"""
+import argparse
+import time
+from collections.abc import Iterator
+from typing import Any
+from typing import cast
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from danswer.chat import process_message
+from danswer.chat.process_message import _rephrase_and_retrieve
+from danswer.configs.constants import MessageType
+from danswer.db.models import ChatMessage
+from danswer.db.models import Persona
+from danswer.document_index.interfaces import DocumentIndex
+from danswer.llm.interfaces import LLM
+from danswer.search.models import RetrievalDetails
+
+_USER_MESSAGE = "How do I rotate the Postgres credentials?"
+_CLOSE_REPHRASE = "how do I rotate the postgres credentials"
+_CONTEXT_REPHRASE = "How to rotate the Postgres credentials of the staging cluster"
+
+
+class _FakeLLM:
+    def __init__(self, rephrase: str, latency_seconds: float) -> None:
+        self.rephrase = rephrase
+        self.latency_seconds = latency_seconds
+
+    def invoke(self, prompt: Any) -> str:
+        time.sleep(self.latency_seconds)
+        return self.rephrase
+
+
+def _make_history() -> list[ChatMessage]:
+    return [
+        ChatMessage(
+            message="We moved the staging cluster to the new Postgres version",
+            token_count=12,
+            message_type=MessageType.USER,
+        ),
+        ChatMessage(
+            message="The upgrade of the staging cluster is documented in the runbook",
+            token_count=13,
+            message_type=MessageType.ASSISTANT,
+        ),
+    ]
+
+
+def _time_to_first_docs(
+    rephrase: str,
+    speculative_retrieval: bool,
+    llm_latency: float,
+    preprocessing_latency: float,
+    search_latency: float,
+    num_runs: int,
+) -> tuple[float, list[str]]:
+    searched_queries: list[str] = []
+
+    def _fake_preprocessing(query: str, **kwargs: Any) -> tuple[str, None, None]:
+        time.sleep(preprocessing_latency)
+        return query, None, None
+
+    def _fake_search(search_query: str, **kwargs: Any) -> Iterator[list[str]]:
+        searched_queries.append(search_query)
+        time.sleep(search_latency)
+        yield [f"top chunks for {search_query}"]
+
+    query_message = ChatMessage(
+        message=_USER_MESSAGE, token_count=9, message_type=MessageType.USER
+    )
+    history = _make_history()
+    llm = cast(LLM, _FakeLLM(rephrase, llm_latency))
+
+    best = float("inf")
+    with patch.object(
+        process_message, "retrieval_preprocessing", _fake_preprocessing
+    ), patch.object(process_message, "full_chunk_search_generator", _fake_search):
+        for _ in range(num_runs):
+            searched_queries.clear()
+            start = time.perf_counter()
+            _rephrase_and_retrieve(
+                query_message=query_message,
+                history=history,
+                llm=llm,
+                query_override=None,
+                retrieval_details=RetrievalDetails(),
+                persona=cast(Persona, None),
+                user=None,
+                document_index=cast(DocumentIndex, None),
+                db_session=cast(Session, None),
+                speculative_retrieval=speculative_retrieval,
+            )
+            best = min(best, time.perf_counter() - start)
+    return best, list(searched_queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--preprocessing-latency-ms", type=float, default=300)
+    parser.add_argument("--search-latency-ms", type=float, default=150)
+    parser.add_argument("--num-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for rephrase_name, rephrase in [
+        ("close to the user message", _CLOSE_REPHRASE),
+        ("adds history context", _CONTEXT_REPHRASE),
+    ]:
+        sequential_time, _ = _time_to_first_docs(
+            rephrase,
+            False,
+            args.llm_latency_ms / 1000,
+            args.preprocessing_latency_ms / 1000,
+            args.search_latency_ms / 1000,
+            args.num_runs,
+        )
+        speculative_time, searched_queries = _time_to_first_docs(
+            rephrase,
+            True,
+            args.llm_latency_ms / 1000,
+            args.preprocessing_latency_ms / 1000,
+            args.search_latency_ms / 1000,
+            args.num_runs,
+        )
+        print(
+            f"rephrase {rephrase_name:<26} | sequential: "
+            f"{sequential_time * 1000:7.1f}ms | speculative: "
+            f"{speculative_time * 1000:7.1f}ms "
+            f"({sequential_time / speculative_time:4.2f}x, "
+            f"{len(searched_queries)} searches)"
+        )
@@ -0,0 +1,97 @@
+"""Measures the DB queries and the time the search preprocessing spends resolving the ACL
+of the user per search request, with and without the user ACL cache, for thousands of
+users of which some search much more often than others. The user group lookup (one DB
+query per resolution, as in the user group based ACL) is replaced with a fake with a
+fixed latency, so no Postgres is needed. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_user_acl_cache.py"""
+import argparse
+import random
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any
+from typing import cast
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from danswer.access import access
+from danswer.access.access import invalidate_acl_cache
+from danswer.access.access import prefix_user
+from danswer.configs.constants import PUBLIC_DOC_PAT
+from danswer.db.models import User
+from danswer.search.access_filters import build_access_filters_for_user
+from danswer.utils.ttl_cache import TTLCache
+
+
+def _run_requests(
+    users: list[User],
+    weights: list[float],
+    num_requests: int,
+    query_latency_seconds: float,
+    cache: TTLCache[str, frozenset[str]],
+) -> tuple[int, float]:
+    num_queries = 0
+
+    def _fake_get_acl_for_user(user: User | None, db_session: Any) -> set[str]:
+        nonlocal num_queries
+        # fetching the user groups of the user
+        num_queries += 1
+        time.sleep(query_latency_seconds)
+        if user is None:
+            return {PUBLIC_DOC_PAT}
+        return {prefix_user(str(user.id)), PUBLIC_DOC_PAT, "group:engineering"}
+
+    rng = random.Random(0)
+    request_users = rng.choices(users, weights=weights, k=num_requests)
+    with patch.object(access, "_USER_ACL_CACHE", cache), patch.object(
+        access,
+        "fetch_versioned_implementation",
+        lambda module, attribute: _fake_get_acl_for_user,
+    ):
+        invalidate_acl_cache()
+        start = time.perf_counter()
+        for user in request_users:
+            build_access_filters_for_user(user, cast(Session, None))
+        total_time = time.perf_counter() - start
+    return num_queries, total_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-users", type=int, default=5000)
+    parser.add_argument("--num-requests", type=int, default=20000)
+    parser.add_argument("--query-latency-ms", type=float, default=1.0)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument("--ttl-seconds", type=int, default=60)
+    args = parser.parse_args()
+
+    users = [
+        cast(User, SimpleNamespace(id=uuid.uuid4())) for _ in range(args.num_users)
+    ]
+    # Zipf-like, a few users search a lot and most rarely
+    weights = [1 / (rank + 1) for rank in range(args.num_users)]
+
+    for name, cache in [
+        ("no cache", TTLCache[str, frozenset[str]](max_size=0, ttl_seconds=0)),
+        (
+            "ACL cache",
+            TTLCache[str, frozenset[str]](
+                max_size=args.cache_size, ttl_seconds=args.ttl_seconds
+            ),
+        ),
+    ]:
+        num_queries, total_time = _run_requests(
+            users,
+            weights,
+            args.num_requests,
+            args.query_latency_ms / 1000,
+            cache,
+        )
+        print(
+            f"{name:<9} | {args.num_users} users, {args.num_requests} requests | "
+            f"DB queries per request: {num_queries / args.num_requests:.3f} | "
+            f"ACL resolution per request: "
+            f"{total_time / args.num_requests * 1e6:7.1f}us | "
+            f"hits: {cache.num_hits}, misses: {cache.num_misses}"
+        )
@@ -0,0 +1,157 @@
+"""Measures recall@k and latency of the nearest neighbor search on the chunk embeddings
+for different `hnsw.exploreAdditionalHits` values, against exact (brute force) search as
+the ground truth, to tune the recall / latency tradeoff of the HNSW index. A synthetic
+corpus of clustered random embeddings is fed into an existing Danswer index and deleted
+again at the end.
+
+Needs a running Vespa with the Danswer schema deployed, with VESPA_HNSW_ENABLED=true (and
+the VESPA_HNSW_MAX_LINKS_PER_NODE / VESPA_HNSW_NEIGHBORS_TO_EXPLORE_AT_INSERT to evaluate)
+set when the API server started. Without the HNSW index, all settings give exact results.
+Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_vespa_hnsw.py \
+        --index-name danswer_chunk_intfloat_e5_base_v2 --dim 768"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+
+from danswer.configs.constants import DOCUMENT_ID
+from danswer.configs.constants import EMBEDDINGS
+from danswer.configs.constants import SKIP_TITLE_EMBEDDING
+from danswer.configs.constants import TITLE_EMBEDDING
+from danswer.document_index.vespa.index import DOCUMENT_ID_ENDPOINT
+from danswer.document_index.vespa.index import SEARCH_ENDPOINT
+from danswer.document_index.vespa.index import VespaIndex
+
+_DOC_ID_PREFIX = "hnsw_benchmark_"
+
+
+def _make_embeddings(
+    num: int, dim: int, centers: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """Real embeddings are clustered by topic, uniformly random ones make the search
+    unrealistically hard"""
+    assigned_centers = centers[rng.integers(len(centers), size=num)]
+    embeddings = assigned_centers + 0.3 * rng.standard_normal((num, dim))
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def _feed_corpus(
+    embeddings: np.ndarray, index_name: str, http_client: httpx.Client
+) -> list[str]:
+    def _feed(ind: int) -> str:
+        vespa_id = f"{_DOC_ID_PREFIX}{ind}"
+        fields = {
+            DOCUMENT_ID: vespa_id,
+            EMBEDDINGS: {"full_chunk": embeddings[ind].tolist()},
+            TITLE_EMBEDDING: embeddings[ind].tolist(),
+            SKIP_TITLE_EMBEDDING: True,
+        }
+        response = http_client.post(
+            f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_id}",
+            json={"fields": fields},
+        )
+        response.raise_for_status()
+        return vespa_id
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return list(executor.map(_feed, range(len(embeddings))))
+
+
+def _delete_corpus(
+    vespa_ids: list[str], index_name: str, http_client: httpx.Client
+) -> None:
+    def _delete(vespa_id: str) -> None:
+        http_client.delete(
+            f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_id}"
+        ).raise_for_status()
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(_delete, vespa_ids))
+
+
+def _search(
+    nearest_neighbor_annotation: str,
+    query_embedding: list[float],
+    index_name: str,
+    k: int,
+    http_client: httpx.Client,
+) -> tuple[float, list[str]]:
+    params = {
+        "yql": f"select documentid from {index_name} where "
+        f"{nearest_neighbor_annotation}nearestNeighbor(embeddings, query_embedding)",
+        "input.query(query_embedding)": str(query_embedding),
+        "ranking.profile": f"semantic_search{len(query_embedding)}",
+        "hits": k,
+        "timeout": "10s",
+    }
+    start = time.perf_counter()
+    response = http_client.post(SEARCH_ENDPOINT, json=params)
+    latency = time.perf_counter() - start
+    response.raise_for_status()
+    hits = response.json()["root"].get("children", [])
+    return latency, [hit["fields"]["documentid"] for hit in hits]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--index-name", required=True)
+    parser.add_argument("--dim", type=int, required=True)
+    parser.add_argument("--num-docs", type=int, default=20000)
+    parser.add_argument("--num-clusters", type=int, default=200)
+    parser.add_argument("--num-queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--target-hits", type=int, default=1000)
+    parser.add_argument(
+        "--explore-additional-hits", type=int, nargs="+", default=[0, 100, 500, 2000]
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((args.num_clusters, args.dim))
+    corpus = _make_embeddings(args.num_docs, args.dim, centers, rng)
+    queries = _make_embeddings(args.num_queries, args.dim, centers, rng).tolist()
+
+    with httpx.Client(http2=True, timeout=30) as http_client:
+        print(f"Feeding {args.num_docs} synthetic chunks into {args.index_name}")
+        vespa_ids = _feed_corpus(corpus, args.index_name, http_client)
+        try:
+            exact_annotation = f"{{targetHits: {args.k}, approximate: false}}"
+            exact_results = [
+                _search(exact_annotation, query, args.index_name, args.k, http_client)
+                for query in queries
+            ]
+            exact_latencies = [latency for latency, _ in exact_results]
+            print(
+                f"exact                         | recall@{args.k}: 1.000 | "
+                f"p50: {np.percentile(exact_latencies, 50) * 1000:7.2f}ms | "
+                f"p95: {np.percentile(exact_latencies, 95) * 1000:7.2f}ms"
+            )
+
+            for explore_additional_hits in args.explore_additional_hits:
+                annotation = VespaIndex(
+                    index_name=args.index_name,
+                    secondary_index_name=None,
+                    hnsw_explore_additional_hits=explore_additional_hits,
+                )._nearest_neighbor_annotation(args.target_hits)
+
+                latencies = []
+                recalls = []
+                for query, (_, exact_ids) in zip(queries, exact_results):
+                    latency, ids = _search(
+                        annotation, query, args.index_name, args.k, http_client
+                    )
+                    latencies.append(latency)
+                    recalls.append(
+                        len(set(ids) & set(exact_ids)) / max(len(exact_ids), 1)
+                    )
+                print(
+                    f"exploreAdditionalHits: {explore_additional_hits:>6} | "
+                    f"recall@{args.k}: {np.mean(recalls):.3f} | "
+                    f"p50: {np.percentile(latencies, 50) * 1000:7.2f}ms | "
+                    f"p95: {np.percentile(latencies, 95) * 1000:7.2f}ms"
+                )
+        finally:
+            _delete_corpus(vespa_ids, args.index_name, http_client)
@@ -0,0 +1,154 @@
+"""Measures the time spent on json for Vespa, parsing a query response of 1000 hits (the
+hits and the json metadata and source links of each of them, as in
+`_vespa_hit_to_inference_chunk`) and serializing a feed batch of 100 chunks with their
+embeddings, with orjson compared to the stdlib json fallback. Runs on generated
+payloads, so no Vespa is needed. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_vespa_json.py"""
+import argparse
+import json
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import patch
+
+from danswer.configs.constants import ACCESS_CONTROL_LIST
+from danswer.configs.constants import BLURB
+from danswer.configs.constants import BOOST
+from danswer.configs.constants import CHUNK_ID
+from danswer.configs.constants import CONTENT
+from danswer.configs.constants import DOCUMENT_ID
+from danswer.configs.constants import DOCUMENT_SETS
+from danswer.configs.constants import EMBEDDINGS
+from danswer.configs.constants import METADATA
+from danswer.configs.constants import SECTION_CONTINUATION
+from danswer.configs.constants import SEMANTIC_IDENTIFIER
+from danswer.configs.constants import SOURCE_LINKS
+from danswer.configs.constants import SOURCE_TYPE
+from danswer.configs.constants import TITLE
+from danswer.document_index.vespa import utils
+from danswer.document_index.vespa.index import CONTENT_SUMMARY
+from danswer.document_index.vespa.utils import vespa_json_dumps
+from danswer.document_index.vespa.utils import vespa_json_loads
+
+
+def _query_response(rng: random.Random, num_hits: int) -> bytes:
+    children = [
+        {
+            "id": f"id:default:danswer_chunk::{hit_ind}",
+            "relevance": rng.random(),
+            "fields": {
+                DOCUMENT_ID: f"https://docs.example.com/doc{hit_ind // 4}",
+                CHUNK_ID: hit_ind % 4,
+                BLURB: "blurb " * 20,
+                CONTENT: "lorem ipsum dolor sit amet " * 80,
+                SOURCE_TYPE: "web",
+                SOURCE_LINKS: json.dumps(
+                    {str(i * 100): f"https://docs.example.com/{i}" for i in range(5)}
+                ),
+                SEMANTIC_IDENTIFIER: f"Document {hit_ind // 4}",
+                SECTION_CONTINUATION: False,
+                BOOST: 0,
+                METADATA: json.dumps({"tags": ["a", "b"], "owner": "someone"}),
+                "matchfeatures": {"closeness(field,embeddings)": rng.random()},
+            },
+        }
+        for hit_ind in range(num_hits)
+    ]
+    return json.dumps(
+        {"root": {"fields": {"totalCount": num_hits}, "children": children}}
+    ).encode()
+
+
+def _feed_batch(
+    rng: random.Random, num_chunks: int, embedding_dim: int, mini_chunks: int
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "fields": {
+                DOCUMENT_ID: f"https://docs.example.com/doc{chunk_ind // 4}",
+                CHUNK_ID: chunk_ind % 4,
+                BLURB: "blurb " * 20,
+                TITLE: f"Document {chunk_ind // 4}",
+                CONTENT: "lorem ipsum dolor sit amet " * 80,
+                CONTENT_SUMMARY: "lorem ipsum dolor sit amet " * 80,
+                SOURCE_TYPE: "web",
+                SOURCE_LINKS: json.dumps({"0": "https://docs.example.com"}),
+                SEMANTIC_IDENTIFIER: f"Document {chunk_ind // 4}",
+                SECTION_CONTINUATION: False,
+                METADATA: json.dumps({"tags": ["a", "b"]}),
+                EMBEDDINGS: {
+                    str(ind): [rng.uniform(-1, 1) for _ in range(embedding_dim)]
+                    for ind in range(mini_chunks)
+                },
+                BOOST: 0,
+                ACCESS_CONTROL_LIST: {"PUBLIC": 1},
+                DOCUMENT_SETS: {},
+            }
+        }
+        for chunk_ind in range(num_chunks)
+    ]
+
+
+def _parse_response(response: bytes) -> None:
+    for hit in vespa_json_loads(response)["root"]["children"]:
+        vespa_json_loads(hit["fields"][METADATA])
+        vespa_json_loads(hit["fields"][SOURCE_LINKS])
+
+
+def _serialize_batch(batch: list[dict[str, Any]]) -> None:
+    # one request per chunk, as in `_index_vespa_chunk`
+    for body in batch:
+        vespa_json_dumps(body)
+
+
+def _best_time(run: Callable[[], None], num_runs: int) -> float:
+    best = float("inf")
+    for _ in range(num_runs):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-hits", type=int, default=1000)
+    parser.add_argument("--num-chunks", type=int, default=100)
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    parser.add_argument(
+        "--mini-chunks",
+        type=int,
+        default=1,
+        help="Embeddings per chunk, more than 1 with mini chunks enabled",
+    )
+    parser.add_argument("--num-runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if utils.orjson is None:
+        raise RuntimeError("orjson is not installed")
+
+    rng = random.Random(0)
+    response = _query_response(rng, args.num_hits)
+    batch = _feed_batch(rng, args.num_chunks, args.embedding_dim, args.mini_chunks)
+
+    for name, run, size in [
+        (
+            f"parse {args.num_hits} hits",
+            lambda: _parse_response(response),
+            len(response),
+        ),
+        (
+            f"serialize {args.num_chunks} chunks",
+            lambda: _serialize_batch(batch),
+            sum(len(vespa_json_dumps(body)) for body in batch),
+        ),
+    ]:
+        with patch.object(utils, "orjson", None):
+            stdlib_time = _best_time(run, args.num_runs)
+        orjson_time = _best_time(run, args.num_runs)
+        print(
+            f"{name:<22} | {size / 1e6:5.2f}MB | json: {stdlib_time * 1000:7.2f}ms | "
+            f"orjson: {orjson_time * 1000:7.2f}ms "
+            f"({stdlib_time / orjson_time:5.2f}x)"
+        )
@@ -0,0 +1,145 @@
+"""Measures the query-side decoding of Vespa search responses (parsing the response and
+`_vespa_hit_to_inference_chunk` for every hit) with the metadata and source links stored
+as json strings, the way chunks indexed before the map fields are, and as native Vespa
+maps, both rendered as json objects and as lists of key / value objects. Also reports
+the size of the responses. With `--stdlib-json`, the responses are parsed with the
+stdlib json fallback instead of orjson. No Vespa is needed. Run from the `backend`
+directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_vespa_metadata_decode.py"""
+import argparse
+import json
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+
+from danswer.configs.constants import BLURB
+from danswer.configs.constants import CHUNK_ID
+from danswer.configs.constants import CONTENT
+from danswer.configs.constants import DOCUMENT_ID
+from danswer.configs.constants import METADATA
+from danswer.configs.constants import METADATA_LIST_MAP
+from danswer.configs.constants import METADATA_MAP
+from danswer.configs.constants import SECTION_CONTINUATION
+from danswer.configs.constants import SEMANTIC_IDENTIFIER
+from danswer.configs.constants import SOURCE_LINK_MAP
+from danswer.configs.constants import SOURCE_LINKS
+from danswer.configs.constants import SOURCE_TYPE
+from danswer.document_index.vespa import utils
+from danswer.document_index.vespa.index import _vespa_hit_to_inference_chunk
+from danswer.document_index.vespa.utils import metadata_to_vespa_maps
+from danswer.document_index.vespa.utils import vespa_json_loads
+
+
+def _as_json_string(
+    metadata: dict[str, str | list[str]], source_links: dict[int, str]
+) -> dict[str, Any]:
+    return {METADATA: json.dumps(metadata), SOURCE_LINKS: json.dumps(source_links)}
+
+
+def _as_maps(
+    metadata: dict[str, str | list[str]], source_links: dict[int, str]
+) -> dict[str, Any]:
+    metadata_map, metadata_list_map = metadata_to_vespa_maps(metadata)
+    return {
+        METADATA_MAP: metadata_map,
+        METADATA_LIST_MAP: metadata_list_map,
+        SOURCE_LINK_MAP: source_links,
+    }
+
+
+def _as_key_value_lists(
+    metadata: dict[str, str | list[str]], source_links: dict[int, str]
+) -> dict[str, Any]:
+    return {
+        field_name: [{"key": key, "value": value} for key, value in value_map.items()]
+        for field_name, value_map in _as_maps(metadata, source_links).items()
+    }
+
+
+def _make_response(
+    rng: random.Random,
+    num_hits: int,
+    num_metadata_keys: int,
+    num_links: int,
+    encode_fields: Callable[
+        [dict[str, str | list[str]], dict[int, str]], dict[str, Any]
+    ],
+) -> bytes:
+    children = []
+    for ind in range(num_hits):
+        metadata: dict[str, str | list[str]] = {
+            f"key_{key_ind}": (
+                [f"value {rng.randrange(1000)}" for _ in range(3)]
+                if key_ind % 3 == 0
+                else f"value {rng.randrange(1000)}"
+            )
+            for key_ind in range(num_metadata_keys)
+        }
+        source_links = {
+            link_ind * 200: f"https://docs.example.com/doc{ind}#section-{link_ind}"
+            for link_ind in range(num_links)
+        }
+        children.append(
+            {
+                "id": f"id:default:danswer_chunk::{ind}",
+                "relevance": 1.0 / (ind + 1),
+                "fields": {
+                    DOCUMENT_ID: f"https://docs.example.com/doc{ind}",
+                    CHUNK_ID: 1,
+                    BLURB: "blurb",
+                    CONTENT: "lorem ipsum " * 100,
+                    SOURCE_TYPE: "web",
+                    SEMANTIC_IDENTIFIER: f"doc {ind}",
+                    SECTION_CONTINUATION: False,
+                    **encode_fields(metadata, source_links),
+                },
+            }
+        )
+    return json.dumps({"root": {"children": children}}).encode()
+
+
+def _decode(response: bytes) -> None:
+    for hit in vespa_json_loads(response)["root"]["children"]:
+        _vespa_hit_to_inference_chunk(hit)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-hits", type=int, default=1000)
+    parser.add_argument("--num-metadata-keys", type=int, default=8)
+    parser.add_argument("--num-links", type=int, default=4)
+    parser.add_argument("--num-runs", type=int, default=50)
+    parser.add_argument("--stdlib-json", action="store_true")
+    args = parser.parse_args()
+
+    if args.stdlib_json:
+        patch.object(utils, "orjson", None).start()
+
+    for name, encode_fields in [
+        ("json strings", _as_json_string),
+        ("maps", _as_maps),
+        ("key/value lists", _as_key_value_lists),
+    ]:
+        response = _make_response(
+            random.Random(0),
+            args.num_hits,
+            args.num_metadata_keys,
+            args.num_links,
+            encode_fields,
+        )
+        _decode(response)
+        timings = []
+        for _ in range(args.num_runs):
+            start = time.perf_counter()
+            _decode(response)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{name:<15} | {args.num_hits} hits | response: "
+            f"{len(response) / 1024:7.1f}KiB | decode p50: "
+            f"{np.percentile(timings, 50) * 1000:6.2f}ms | mean: "
+            f"{np.mean(timings) * 1000:6.2f}ms"
+        )
@@ -0,0 +1,105 @@
+"""Measures the response size, the Vespa query latency and the response parsing time of
+keyword (weakAnd) queries with the default document summary, which returns every field
+of the matching chunks including the embeddings, compared to the lean summary classes
+used by the retrieval, admin search and id lookups, which only return the fields the
+search pipeline reads.
+
+Needs a running Vespa with the Danswer schema deployed and some documents indexed. Run
+from the `backend` directory:
+    PYTHONPATH=. python tests/regression/performance/benchmark_vespa_summaries.py \
+        --index-name danswer_chunk_intfloat_e5_base_v2"""
+import argparse
+import json
+import time
+
+import httpx
+import numpy as np
+
+from danswer.document_index.vespa.index import ADMIN_SUMMARY
+from danswer.document_index.vespa.index import ID_LOOKUP_SUMMARY
+from danswer.document_index.vespa.index import RETRIEVAL_SUMMARY
+from danswer.document_index.vespa.index import SEARCH_ENDPOINT
+from danswer.document_index.vespa.index import VespaIndex
+
+_QUERIES = [
+    "How do I deploy Danswer?",
+    "rotate the postgres credentials",
+    "what is the onboarding checklist for new engineers",
+    "slack connector setup",
+    "release notes",
+    "how to configure the embedding model",
+    "who owns the billing service",
+    "incident postmortem database outage",
+]
+
+
+def _run_query(
+    query: str,
+    yql_base: str,
+    summary: str | None,
+    index_name: str,
+    num_hits: int,
+    http_client: httpx.Client,
+) -> tuple[float, float, int]:
+    params: dict[str, str | int] = {
+        "yql": yql_base.format(index_name=index_name)
+        + '({grammar: "weakAnd"}userInput(@query))',
+        "query": query,
+        "ranking.profile": "keyword_search",
+        "hits": num_hits,
+        "timeout": "10s",
+    }
+    if summary is not None:
+        params["presentation.summary"] = summary
+
+    start = time.perf_counter()
+    response = http_client.post(SEARCH_ENDPOINT, json=params)
+    response.raise_for_status()
+    query_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    json.loads(response.content)
+    parse_time = time.perf_counter() - start
+    return query_time, parse_time, len(response.content)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--index-name", required=True)
+    parser.add_argument("--num-hits", type=int, default=50)
+    parser.add_argument("--num-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # `select *` without a summary class is what every field being returned costs
+    configurations = [
+        ("default (all fields)", "select * from {index_name} where ", None),
+        ("default (selected)", VespaIndex.yql_base, None),
+        (RETRIEVAL_SUMMARY, VespaIndex.yql_base, RETRIEVAL_SUMMARY),
+        (ADMIN_SUMMARY, VespaIndex.admin_yql_base, ADMIN_SUMMARY),
+        (ID_LOOKUP_SUMMARY, VespaIndex.id_lookup_yql_base, ID_LOOKUP_SUMMARY),
+    ]
+
+    with httpx.Client(http2=True, timeout=30) as http_client:
+        for name, yql_base, summary in configurations:
+            query_times = []
+            parse_times = []
+            sizes = []
+            for _ in range(args.num_runs):
+                for query in _QUERIES:
+                    query_time, parse_time, size = _run_query(
+                        query,
+                        yql_base,
+                        summary,
+                        args.index_name,
+                        args.num_hits,
+                        http_client,
+                    )
+                    query_times.append(query_time)
+                    parse_times.append(parse_time)
+                    sizes.append(size)
+            print(
+                f"{name:<22} | response: {np.mean(sizes) / 1024:8.1f} KiB | "
+                f"query p50: {np.percentile(query_times, 50) * 1000:7.2f}ms | "
+                f"query p95: {np.percentile(query_times, 95) * 1000:7.2f}ms | "
+                f"parse: {np.mean(parse_times) * 1000:6.2f}ms"
+            )
@@ -0,0 +1,111 @@
+"""Evaluates the checks which skip the LLM time / source filter extraction for queries
+without any time expressions or source names. Reports the false negative rate (a filter
+the LLM should have found is skipped) and skip rate on the labelled query set, and the
+skip rate and the LLM latency saved on the regression question set. Both extractions
+run in parallel, so a query only saves on latency if both are skipped. No LLM is called,
+the latency per LLM call is an argument. Run from the `backend` directory:
+    PYTHONPATH=. python tests/regression/search_quality/eval_filter_precheck.py"""
+import argparse
+import os
+import time
+
+import yaml
+
+from danswer.configs.constants import DocumentSource
+from danswer.secondary_llm_flows.source_filter import query_may_have_source_filter
+from danswer.secondary_llm_flows.time_filter import query_may_have_time_filter
+
+_DIR = os.path.dirname(__file__)
+_LABELLED_QUERIES_PATH = os.path.join(_DIR, "filter_extraction_queries.yaml")
+_REGRESSION_QUESTIONS_PATH = os.path.join(
+    _DIR, "../answer_quality/sample_questions.yaml"
+)
+# The sources indexed for the regression question set, see its metadata
+_REGRESSION_SOURCES = [
+    DocumentSource.WEB,
+    DocumentSource.GITHUB,
+    DocumentSource.SLACK,
+    DocumentSource.FILE,
+]
+
+
+def _rate(numerator: int, denominator: int) -> str:
+    return f"{numerator}/{denominator} ({numerator / max(denominator, 1):.0%})"
+
+
+def evaluate_labelled_queries() -> None:
+    with open(_LABELLED_QUERIES_PATH, "r") as file:
+        labelled_queries = yaml.safe_load(file)["queries"]
+
+    all_sources = list(DocumentSource)
+    time_positives = [q for q in labelled_queries if q["time_filter"]]
+    time_negatives = [q for q in labelled_queries if not q["time_filter"]]
+    source_positives = [q for q in labelled_queries if q["sources"]]
+    source_negatives = [q for q in labelled_queries if not q["sources"]]
+
+    time_misses = [
+        q["query"] for q in time_positives if not query_may_have_time_filter(q["query"])
+    ]
+    source_misses = [
+        q["query"]
+        for q in source_positives
+        if not query_may_have_source_filter(q["query"], all_sources)
+    ]
+    time_skips = sum(not query_may_have_time_filter(q["query"]) for q in time_negatives)
+    source_skips = sum(
+        not query_may_have_source_filter(q["query"], all_sources)
+        for q in source_negatives
+    )
+
+    print(f"Labelled query set ({len(labelled_queries)} queries, all sources indexed)")
+    print(
+        f"  time filter   | false negatives: {_rate(len(time_misses), len(time_positives))}"
+        f" | skipped without filter: {_rate(time_skips, len(time_negatives))}"
+    )
+    print(
+        f"  source filter | false negatives: "
+        f"{_rate(len(source_misses), len(source_positives))}"
+        f" | skipped without filter: {_rate(source_skips, len(source_negatives))}"
+    )
+    for query in time_misses + source_misses:
+        print(f"  missed: {query}")
+
+
+def evaluate_regression_questions(llm_latency_ms: float) -> None:
+    with open(_REGRESSION_QUESTIONS_PATH, "r") as file:
+        questions = [q["question"] for q in yaml.safe_load(file)["questions"]]
+
+    start = time.perf_counter()
+    time_checks = [query_may_have_time_filter(question) for question in questions]
+    source_checks = [
+        query_may_have_source_filter(question, _REGRESSION_SOURCES)
+        for question in questions
+    ]
+    check_time = (time.perf_counter() - start) / len(questions)
+
+    num_calls_skipped = time_checks.count(False) + source_checks.count(False)
+    num_fully_skipped = sum(
+        not time_check and not source_check
+        for time_check, source_check in zip(time_checks, source_checks)
+    )
+    print(f"Regression question set ({len(questions)} questions)")
+    print(
+        f"  time filter skipped: {_rate(time_checks.count(False), len(questions))}"
+        f" | source filter skipped: {_rate(source_checks.count(False), len(questions))}"
+        f" | checks: {check_time * 1e6:.1f} us per query"
+    )
+    print(
+        f"  LLM calls saved: {_rate(num_calls_skipped, 2 * len(questions))}"
+        f" | no LLM call before the search: {_rate(num_fully_skipped, len(questions))}"
+        f" | mean latency saved at {llm_latency_ms:.0f}ms per LLM call: "
+        f"{llm_latency_ms * num_fully_skipped / len(questions):.0f}ms per query"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    evaluate_labelled_queries()
+    evaluate_regression_questions(args.llm_latency_ms)
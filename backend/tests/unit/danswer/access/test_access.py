@@ -0,0 +1,72 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from typing import cast
+from unittest.mock import patch
+
+from danswer.access import access
+from danswer.access.access import get_acl_for_user
+from danswer.access.access import invalidate_acl_cache
+from danswer.configs.constants import PUBLIC_DOC_PAT
+from danswer.db.models import User
+
+
+class TestUserAclCache(unittest.TestCase):
+    def setUp(self) -> None:
+        invalidate_acl_cache()
+        self.resolved_users: list[User | None] = []
+
+        def _fake_get_acl_for_user(user: User | None, db_session: None) -> set[str]:
+            self.resolved_users.append(user)
+            return access._get_acl_for_user(user, db_session)  # type: ignore
+
+        patcher = patch.object(
+            access,
+            "fetch_versioned_implementation",
+            lambda module, attribute: _fake_get_acl_for_user,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _make_user(self) -> User:
+        return cast(User, SimpleNamespace(id=uuid.uuid4()))
+
+    def test_resolved_once_per_user(self) -> None:
+        user_a = self._make_user()
+        user_b = self._make_user()
+        for _ in range(3):
+            self.assertEqual(
+                get_acl_for_user(user_a),
+                {access.prefix_user(str(user_a.id)), PUBLIC_DOC_PAT},
+            )
+            self.assertEqual(
+                get_acl_for_user(user_b),
+                {access.prefix_user(str(user_b.id)), PUBLIC_DOC_PAT},
+            )
+            self.assertEqual(get_acl_for_user(None), {PUBLIC_DOC_PAT})
+        self.assertEqual(self.resolved_users, [user_a, user_b, None])
+
+    def test_returned_acl_is_a_copy(self) -> None:
+        user = self._make_user()
+        get_acl_for_user(user).add("group:admins")
+        self.assertNotIn("group:admins", get_acl_for_user(user))
+
+    def test_invalidation(self) -> None:
+        user_a = self._make_user()
+        user_b = self._make_user()
+        get_acl_for_user(user_a)
+        get_acl_for_user(user_b)
+
+        invalidate_acl_cache([user_a.id])
+        get_acl_for_user(user_a)
+        get_acl_for_user(user_b)
+        self.assertEqual(self.resolved_users, [user_a, user_b, user_a])
+
+        invalidate_acl_cache()
+        get_acl_for_user(user_a)
+        get_acl_for_user(user_b)
+        self.assertEqual(self.resolved_users, [user_a, user_b, user_a, user_a, user_b])
+
+
+if __name__ == "__main__":
+    unittest.main()
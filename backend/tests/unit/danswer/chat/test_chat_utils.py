@@ -0,0 +1,401 @@
+import json
+import os
+import random
+import unittest
+
+from langchain.schema.messages import BaseMessage
+from langchain.schema.messages import HumanMessage
+from langchain.schema.messages import SystemMessage
+
+from danswer.chat.chat_utils import _CodeBlockTracker
+from danswer.chat.chat_utils import combine_message_chain
+from danswer.chat.chat_utils import drop_messages_history_overflow
+from danswer.chat.chat_utils import extract_citations_from_stream
+from danswer.chat.models import CitationInfo
+from danswer.chat.models import DanswerAnswerPiece
+from danswer.chat.models import LlmDoc
+from danswer.configs.constants import DocumentSource
+from danswer.configs.constants import MessageType
+from danswer.db.models import ChatMessage
+from danswer.llm.utils import translate_danswer_msg_to_langchain
+
+
+# pieces that exercise citations, back to back citations, code blocks, newlines
+# (`$` matches before a final newline), unicode digits and stop patterns
+_ANSWER_FRAGMENTS = [
+    "Some text ",
+    "more words. ",
+    "[",
+    "]",
+    "][",
+    "[1]",
+    "[2]",
+    "[3]",
+    "[4]",
+    "[12]",
+    "[0]",
+    "[01]",
+    "[\u0663]",
+    "[x]",
+    "1",
+    "23",
+    "\n",
+    "`",
+    "``",
+    "```",
+    "```python\n",
+    "STOP",
+    "ST",
+]
+
+
+def _make_docs() -> tuple[list[LlmDoc], dict[str, int]]:
+    context_docs = [
+        LlmDoc(
+            document_id=f"doc_{doc_ind}",
+            content=f"Content {doc_ind}",
+            semantic_identifier=f"Doc {doc_ind}",
+            source_type=DocumentSource.WEB,
+            metadata={},
+            updated_at=None,
+            link=None if doc_ind == 2 else f"https://docs.example.com/{doc_ind}",
+        )
+        for doc_ind in range(1, 4)
+    ]
+    doc_id_to_rank_map = {"doc_1": 3, "doc_2": 1, "doc_3": 2}
+    return context_docs, doc_id_to_rank_map
+
+
+def _random_token_split(text: str, rng: random.Random) -> list[str]:
+    cut_points = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 30)))
+    bounds = [0] + cut_points + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _extract(
+    tokens: list[str], stop_stream: str | None = None
+) -> list[DanswerAnswerPiece | CitationInfo]:
+    context_docs, doc_id_to_rank_map = _make_docs()
+    return list(
+        extract_citations_from_stream(
+            iter(tokens), context_docs, doc_id_to_rank_map, stop_stream
+        )
+    )
+
+
+def _answer(pieces: list[DanswerAnswerPiece | CitationInfo]) -> str:
+    return "".join(
+        piece.answer_piece or ""
+        for piece in pieces
+        if isinstance(piece, DanswerAnswerPiece)
+    )
+
+
+def _citations(pieces: list[DanswerAnswerPiece | CitationInfo]) -> list[CitationInfo]:
+    return [piece for piece in pieces if isinstance(piece, CitationInfo)]
+
+
+_CITATION_STREAM_CASES_PATH = os.path.join(
+    os.path.dirname(__file__), "citation_stream_cases.json"
+)
+
+_DOC_1_CITATION = "[[3]](https://docs.example.com/1)"
+_DOC_3_CITATION = "[[2]](https://docs.example.com/3)"
+
+
+class TestExtractCitationsFromStream(unittest.TestCase):
+    def test_links_citations(self) -> None:
+        result = _extract(["Something ", "[", "1", "][", "3", "]", " and ", "[2]", "."])
+        # citations use the documents' rank, the second document has no link
+        self.assertEqual(
+            _answer(result),
+            f"Something {_DOC_1_CITATION}{_DOC_3_CITATION} and [1].",
+        )
+        self.assertEqual(
+            _citations(result),
+            [
+                CitationInfo(citation_num=3, document_id="doc_1"),
+                CitationInfo(citation_num=2, document_id="doc_3"),
+                CitationInfo(citation_num=1, document_id="doc_2"),
+            ],
+        )
+
+    def test_each_document_is_cited_once(self) -> None:
+        result = _extract(["See [1]", " and again [", "1].", " Also [3]"])
+        self.assertEqual(
+            _answer(result),
+            f"See {_DOC_1_CITATION} and again {_DOC_1_CITATION}. Also "
+            f"{_DOC_3_CITATION}",
+        )
+        self.assertEqual(
+            _citations(result),
+            [
+                CitationInfo(citation_num=3, document_id="doc_1"),
+                CitationInfo(citation_num=2, document_id="doc_3"),
+            ],
+        )
+
+    def test_citation_completed_before_newline(self) -> None:
+        result = _extract(["Answer [1", "]\n", "next line"])
+        self.assertEqual(_answer(result), f"Answer {_DOC_1_CITATION}\nnext line")
+
+    def test_leaves_other_brackets_alone(self) -> None:
+        tokens = ["Out of range [0] [4] [12], ", "list[", "x] and [", "] end ["]
+        result = _extract(tokens)
+        self.assertEqual(_answer(result), "".join(tokens))
+        self.assertEqual(_citations(result), [])
+
+    def test_no_citations_in_code_blocks(self) -> None:
+        # the backticks opening / closing the block are split across tokens
+        tokens = ["``", "`python\n", "x = a[1]\n", "y = b[", "2]\n`", "``", " see [1]"]
+        result = _extract(tokens)
+        self.assertEqual(
+            _answer(result),
+            "```python\nx = a[1]\ny = b[2]\n``` see " + _DOC_1_CITATION,
+        )
+        self.assertEqual(
+            _citations(result), [CitationInfo(citation_num=3, document_id="doc_1")]
+        )
+
+    def test_stops_at_stop_pattern(self) -> None:
+        result = _extract(["Answer [2]", " ", "ST", "OP", " not streamed"], "STOP")
+        self.assertEqual(_answer(result), "Answer [1] ")
+        self.assertEqual(
+            _citations(result), [CitationInfo(citation_num=1, document_id="doc_2")]
+        )
+
+        # a held back start of the pattern is released if the pattern doesn't follow
+        result = _extract(["Answer ", "ST", "AND [2]"], "STOP")
+        self.assertEqual(_answer(result), "Answer STAND [1]")
+
+    def test_text_without_citations_is_streamed_unchanged(self) -> None:
+        # any way of splitting the answer into tokens, with held back brackets that
+        # turn out not to be citations
+        fragments = [
+            fragment
+            for fragment in _ANSWER_FRAGMENTS
+            if not any(map(str.isdigit, fragment)) and "ST" not in fragment
+        ]
+        rng = random.Random(1234)
+        for _ in range(2000):
+            text = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 25)))
+            tokens = _random_token_split(text, rng)
+            self.assertEqual(_answer(_extract(tokens)), text, f"tokens: {tokens!r}")
+
+            # nothing after a stop pattern token is streamed
+            rest = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 5)))
+            tokens = _random_token_split(text, rng)
+            while len(tokens) > 1 and "STOP".startswith(tokens[-1]):
+                tokens[-2:] = ["".join(tokens[-2:])]
+            tokens += ["ST", "OP" + rest, rest]
+            self.assertEqual(
+                _answer(_extract(tokens, "STOP")), text, f"tokens: {tokens!r}"
+            )
+
+    def test_matches_recorded_outputs_for_random_splits(self) -> None:
+        # answers with citations, split at random and around the "[", digits and "]"
+        # of citations, recorded with the implementation that rescanned the whole
+        # answer for every token, the streamed output must stay byte-identical
+        with open(_CITATION_STREAM_CASES_PATH) as cases_file:
+            cases = json.load(cases_file)
+        self.assertTrue(any(case["citations"] for case in cases))
+        for case in cases:
+            result = _extract(case["tokens"], case["stop_stream"])
+            self.assertEqual(
+                _answer(result), case["answer"], f"tokens: {case['tokens']!r}"
+            )
+            self.assertEqual(
+                [
+                    [citation.citation_num, citation.document_id]
+                    for citation in _citations(result)
+                ],
+                case["citations"],
+                f"tokens: {case['tokens']!r}",
+            )
+
+    def test_nothing_is_cited_in_an_unclosed_code_block(self) -> None:
+        fragments = [fragment for fragment in _ANSWER_FRAGMENTS if "`" not in fragment]
+        rng = random.Random(5678)
+        for _ in range(1000):
+            text = "```\n" + "".join(
+                rng.choice(fragments) for _ in range(rng.randint(1, 25))
+            )
+            tokens = _random_token_split(text, rng)
+            result = _extract(tokens)
+            self.assertEqual(_answer(result), text, f"tokens: {tokens!r}")
+            self.assertEqual(_citations(result), [])
+
+
+class TestCodeBlockTracker(unittest.TestCase):
+    def test_tracks_triple_backticks(self) -> None:
+        for text, expected in [
+            ("", False),
+            ("```", True),
+            ("```python\nx = 1\n```", False),
+            ("``` `` ```", False),
+            ("````", True),
+            ("``````", False),
+            ("```````", False),
+            ("text ```` more ``` text ``", False),
+            ("a`b``c```", True),
+        ]:
+            # regardless of how the text is split into pieces
+            for num_pieces in range(1, len(text) + 2):
+                tracker = _CodeBlockTracker()
+                piece_len = max(len(text) // num_pieces, 1)
+                for start in range(0, len(text), piece_len):
+                    tracker.update(text[start : start + piece_len])
+                self.assertEqual(tracker.in_code_block, expected, text)
+
+
+_PER_MESSAGE_TOKEN_BUFFER = 7
+
+
+def _make_history(num_messages: int, rng: random.Random) -> list[ChatMessage]:
+    history = []
+    for msg_ind in range(num_messages):
+        # every few turns, a message without a prompt (no tokens counted)
+        token_count = 0 if rng.random() < 0.1 else rng.randint(1, 300)
+        history.append(
+            ChatMessage(
+                message=f"Message {msg_ind}",
+                token_count=token_count,
+                message_type=MessageType.USER
+                if msg_ind % 2 == 0
+                else MessageType.ASSISTANT,
+            )
+        )
+    return history
+
+
+class TestHistoryTrimming(unittest.TestCase):
+    def test_keeps_most_recent_messages_within_budget(self) -> None:
+        history = [
+            ChatMessage(message=f"{msg_ind}", token_count=10, message_type=msg_type)
+            for msg_ind, msg_type in enumerate(
+                [MessageType.USER, MessageType.ASSISTANT] * 3
+            )
+        ]
+        # system and final message take 2 * (10 + 7), every history message 17
+        prompt = drop_messages_history_overflow(
+            system_msg=SystemMessage(content="system"),
+            system_token_count=10,
+            history_msgs=history,
+            final_msg=HumanMessage(content="final"),
+            final_msg_token_count=10,
+            max_allowed_tokens=34 + 2 * 17 + 16,
+        )
+        self.assertEqual([msg.content for msg in prompt], ["system", "4", "5", "final"])
+
+    def test_final_message_too_large(self) -> None:
+        with self.assertRaises(ValueError):
+            drop_messages_history_overflow(
+                system_msg=None,
+                system_token_count=0,
+                history_msgs=[],
+                final_msg=HumanMessage(content="final"),
+                final_msg_token_count=100,
+                max_allowed_tokens=100,
+            )
+
+    def test_keeps_the_longest_suffix_within_budget(self) -> None:
+        rng = random.Random(42)
+        for _ in range(2000):
+            history = _make_history(rng.randint(0, 30), rng)
+            system_msg = rng.choice([None, SystemMessage(content="system")])
+            system_token_count = rng.randint(0, 300)
+            final_msg = HumanMessage(content="final")
+            final_msg_token_count = rng.randint(1, 500)
+            max_allowed_tokens = rng.randint(0, 4000)
+
+            def _trim() -> list[BaseMessage]:
+                return drop_messages_history_overflow(
+                    system_msg=system_msg,
+                    system_token_count=system_token_count,
+                    history_msgs=history,
+                    final_msg=final_msg,
+                    final_msg_token_count=final_msg_token_count,
+                    max_allowed_tokens=max_allowed_tokens,
+                )
+
+            budget = (
+                max_allowed_tokens - final_msg_token_count - _PER_MESSAGE_TOKEN_BUFFER
+            )
+            if budget < 0:
+                with self.assertRaises(ValueError):
+                    _trim()
+                continue
+            prompt = _trim()
+
+            # the system message goes in first, it is counted even if it's not given
+            budget -= system_token_count + _PER_MESSAGE_TOKEN_BUFFER
+            keep_system_msg = system_msg is not None and budget >= 0
+
+            # then the most recent messages, messages without tokens counted are
+            # never part of the prompt
+            counted_history = [msg for msg in history if msg.token_count != 0]
+            num_kept = 0
+            while num_kept < len(counted_history):
+                budget -= (
+                    counted_history[-num_kept - 1].token_count
+                    + _PER_MESSAGE_TOKEN_BUFFER
+                )
+                if budget < 0:
+                    break
+                num_kept += 1
+            expected_history = [
+                translate_danswer_msg_to_langchain(msg)
+                for msg in counted_history[len(counted_history) - num_kept :]
+            ]
+
+            self.assertEqual(
+                prompt,
+                ([system_msg] if keep_system_msg else [])
+                + expected_history
+                + [final_msg],
+            )
+
+
+class TestCombineMessageChain(unittest.TestCase):
+    def setUp(self) -> None:
+        self.history = [
+            ChatMessage(
+                message=f"Message {msg_ind}",
+                token_count=10 * (msg_ind + 1),
+                message_type=MessageType.USER
+                if msg_ind % 2 == 0
+                else MessageType.ASSISTANT,
+            )
+            for msg_ind in range(4)
+        ]
+
+    def test_keeps_most_recent_messages_within_token_limit(self) -> None:
+        self.assertEqual(
+            combine_message_chain(self.history, token_limit=70),
+            "USER:\nMessage 2\n\nASSISTANT:\nMessage 3",
+        )
+        self.assertEqual(
+            combine_message_chain(self.history, token_limit=100),
+            "USER:\nMessage 0\n\nASSISTANT:\nMessage 1\n\n"
+            "USER:\nMessage 2\n\nASSISTANT:\nMessage 3",
+        )
+        self.assertEqual(combine_message_chain(self.history, token_limit=39), "")
+
+    def test_stops_at_first_message_over_the_limit(self) -> None:
+        # message 1 doesn't fit, so message 0 is not included either
+        self.history[1].token_count = 1000
+        self.assertEqual(
+            combine_message_chain(self.history, token_limit=100),
+            "USER:\nMessage 2\n\nASSISTANT:\nMessage 3",
+        )
+
+    def test_message_limit(self) -> None:
+        self.assertEqual(
+            combine_message_chain(self.history, token_limit=100, msg_limit=1),
+            "ASSISTANT:\nMessage 3",
+        )
+        self.assertEqual(combine_message_chain([], token_limit=100), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
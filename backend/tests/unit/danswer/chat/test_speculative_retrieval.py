@@ -0,0 +1,168 @@
+import threading
+import unittest
+from collections.abc import Iterator
+from typing import Any
+from typing import cast
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from danswer.chat import process_message
+from danswer.chat.process_message import _rephrase_and_retrieve
+from danswer.configs.constants import MessageType
+from danswer.db.models import ChatMessage
+from danswer.db.models import Persona
+from danswer.document_index.interfaces import DocumentIndex
+from danswer.llm.interfaces import LLM
+from danswer.search.models import RetrievalDetails
+
+_USER_MESSAGE = "How do I rotate the Postgres credentials?"
+_CLOSE_REPHRASE = "how do I rotate the postgres credentials"
+_CONTEXT_REPHRASE = "How to rotate the Postgres credentials of the staging cluster"
+
+
+class _FakeLLM:
+    def __init__(self, rephrase: str | Exception) -> None:
+        self.rephrase = rephrase
+        self.prompts: list[Any] = []
+        self.threads: list[threading.Thread] = []
+
+    def invoke(self, prompt: Any) -> str:
+        self.prompts.append(prompt)
+        self.threads.append(threading.current_thread())
+        if isinstance(self.rephrase, Exception):
+            raise self.rephrase
+        return self.rephrase
+
+
+class TestRephraseAndRetrieve(unittest.TestCase):
+    def setUp(self) -> None:
+        self.searched_queries: list[str] = []
+        self.search_threads: list[threading.Thread] = []
+        self.search_error: Exception | None = None
+
+        def _fake_preprocessing(query: str, **kwargs: Any) -> tuple[str, None, None]:
+            return query, None, None
+
+        def _fake_search(search_query: str, **kwargs: Any) -> Iterator[list[str]]:
+            self.searched_queries.append(search_query)
+            self.search_threads.append(threading.current_thread())
+            if self.search_error is not None:
+                raise self.search_error
+            yield [f"top chunks for {search_query}"]
+
+        patchers: list[Any] = [
+            patch.object(
+                process_message, "retrieval_preprocessing", _fake_preprocessing
+            ),
+            patch.object(process_message, "full_chunk_search_generator", _fake_search),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.history = [
+            ChatMessage(
+                message="We moved the staging cluster to the new Postgres version",
+                token_count=12,
+                message_type=MessageType.USER,
+            ),
+            ChatMessage(
+                message="The upgrade is documented in the runbook",
+                token_count=8,
+                message_type=MessageType.ASSISTANT,
+            ),
+        ]
+
+    def _rephrase_and_retrieve(
+        self, llm: _FakeLLM, speculative_retrieval: bool = True
+    ) -> tuple[str, Any]:
+        return _rephrase_and_retrieve(
+            query_message=ChatMessage(
+                message=_USER_MESSAGE, token_count=9, message_type=MessageType.USER
+            ),
+            history=self.history,
+            llm=cast(LLM, llm),
+            query_override=None,
+            retrieval_details=RetrievalDetails(),
+            persona=cast(Persona, None),
+            user=None,
+            document_index=cast(DocumentIndex, None),
+            db_session=cast(Session, None),
+            speculative_retrieval=speculative_retrieval,
+        )
+
+    def test_keeps_results_for_close_rephrase(self) -> None:
+        query, (retrieval_request, _, _, _, top_chunks) = self._rephrase_and_retrieve(
+            _FakeLLM(_CLOSE_REPHRASE)
+        )
+        self.assertEqual(query, _USER_MESSAGE)
+        self.assertEqual(retrieval_request, _USER_MESSAGE)
+        self.assertEqual(top_chunks, [f"top chunks for {_USER_MESSAGE}"])
+        self.assertEqual(self.searched_queries, [_USER_MESSAGE])
+
+    def test_discards_results_for_different_rephrase(self) -> None:
+        query, (retrieval_request, _, _, _, top_chunks) = self._rephrase_and_retrieve(
+            _FakeLLM(_CONTEXT_REPHRASE)
+        )
+        self.assertEqual(query, _CONTEXT_REPHRASE)
+        self.assertEqual(retrieval_request, _CONTEXT_REPHRASE)
+        self.assertEqual(top_chunks, [f"top chunks for {_CONTEXT_REPHRASE}"])
+        self.assertEqual(self.searched_queries, [_USER_MESSAGE, _CONTEXT_REPHRASE])
+
+    def test_same_rephrase_prompt_as_sequential(self) -> None:
+        sequential_llm = _FakeLLM(_CONTEXT_REPHRASE)
+        speculative_llm = _FakeLLM(_CONTEXT_REPHRASE)
+        sequential_query, _ = self._rephrase_and_retrieve(
+            sequential_llm, speculative_retrieval=False
+        )
+        speculative_query, _ = self._rephrase_and_retrieve(speculative_llm)
+
+        self.assertEqual(speculative_query, sequential_query)
+        self.assertEqual(len(sequential_llm.prompts), 1)
+        # the history is combined before it is handed to the other thread
+        self.assertEqual(speculative_llm.prompts, sequential_llm.prompts)
+        self.assertIn(self.history[0].message, str(speculative_llm.prompts[0]))
+
+    def test_rephrases_without_history_like_sequential(self) -> None:
+        # unlike for threads, a first message is rephrased as well
+        self.history = []
+        for speculative_retrieval in [False, True]:
+            llm = _FakeLLM(_CONTEXT_REPHRASE)
+            query, _ = self._rephrase_and_retrieve(
+                llm, speculative_retrieval=speculative_retrieval
+            )
+            self.assertEqual(query, _CONTEXT_REPHRASE)
+            self.assertEqual(len(llm.prompts), 1)
+
+    def test_rephrase_runs_in_another_thread(self) -> None:
+        llm = _FakeLLM(_CLOSE_REPHRASE)
+        with patch.object(
+            process_message,
+            "thread_based_query_rephrase",
+            wraps=process_message.thread_based_query_rephrase,
+        ) as rephrase:
+            self._rephrase_and_retrieve(llm)
+
+        # only plain values cross the thread, the ORM objects stay with the DB session
+        for value in rephrase.call_args.kwargs.values():
+            self.assertNotIsInstance(value, ChatMessage)
+            self.assertNotIsInstance(value, list)
+        self.assertIsNot(llm.threads[0], threading.current_thread())
+        self.assertEqual(self.search_threads, [threading.current_thread()])
+
+    def test_rephrase_error_propagates(self) -> None:
+        with self.assertRaisesRegex(RuntimeError, "LLM is down"):
+            self._rephrase_and_retrieve(_FakeLLM(RuntimeError("LLM is down")))
+
+    def test_search_error_propagates(self) -> None:
+        self.search_error = RuntimeError("Vespa is down")
+        llm = _FakeLLM(_CLOSE_REPHRASE)
+        with self.assertRaisesRegex(RuntimeError, "Vespa is down"):
+            self._rephrase_and_retrieve(llm)
+        # the rephrase was still waited for before raising
+        self.assertEqual(len(llm.prompts), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
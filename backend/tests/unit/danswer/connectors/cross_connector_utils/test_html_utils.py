@@ -2,6 +2,10 @@ import pathlib
 import unittest
 
 from danswer.connectors.cross_connector_utils.html_utils import parse_html_page_basic
+from danswer.connectors.cross_connector_utils.html_utils import web_html_cleanup
+
+_SUPPORTED_PARSERS = ["html.parser", "lxml"]
+_GOLDEN_PAGES = ["docs_page", "kb_article"]
 
 
 class TestQAPostprocessing(unittest.TestCase):
@@ -10,9 +14,30 @@ class TestQAPostprocessing(unittest.TestCase):
         with open(f"{dir_path}/test_table.html", "r") as file:
             content = file.read()
 
-        parsed = parse_html_page_basic(content)
-        expected = "\n\thello\tthere\tgeneral\n\tkenobi\ta\tb\n\tc\td\te"
-        self.assertIn(expected, parsed)
+        for parser in _SUPPORTED_PARSERS:
+            parsed = parse_html_page_basic(content, parser=parser)
+            expected = "\n\thello\tthere\tgeneral\n\tkenobi\ta\tb\n\tc\td\te"
+            self.assertIn(expected, parsed)
+
+    def test_parser_backends_match_golden_pages(self) -> None:
+        pages_path = pathlib.Path(__file__).parent.resolve() / "test_pages"
+        for page in _GOLDEN_PAGES:
+            with open(pages_path / f"{page}.html", "r") as file:
+                content = file.read()
+            with open(pages_path / f"{page}.txt", "r") as file:
+                expected = file.read().rstrip("\n")
+
+            for parser in _SUPPORTED_PARSERS:
+                parsed = web_html_cleanup(content, parser=parser)
+                self.assertEqual(parsed.cleaned_text, expected, f"{page} - {parser}")
+                self.assertEqual(
+                    parse_html_page_basic(content, parser="html.parser"),
+                    parse_html_page_basic(content, parser=parser),
+                )
+
+    def test_unavailable_parser_falls_back(self) -> None:
+        parsed = parse_html_page_basic("<p>hello</p>", parser="not-a-real-parser")
+        self.assertEqual(parsed, "hello")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,294 @@
+import threading
+import time
+import unittest
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from danswer.connectors.confluence import connector as confluence_connector
+from danswer.connectors.confluence.connector import ConfluenceConnector
+from danswer.connectors.cross_connector_utils.pagination import prefetch_pages
+from danswer.connectors.github.connector import GithubConnector
+from danswer.connectors.models import Document
+from danswer.connectors.notion.connector import NotionConnector
+from danswer.connectors.notion.connector import NotionSearchResponse
+
+
+class FakePaginatedApi:
+    """Serves `num_pages` pages of `page_size` integers with a fixed latency per call"""
+
+    def __init__(
+        self,
+        num_pages: int,
+        page_size: int = 10,
+        latency: float = 0,
+        fail_at_page: int | None = None,
+    ) -> None:
+        self.num_pages = num_pages
+        self.page_size = page_size
+        self.latency = latency
+        self.fail_at_page = fail_at_page
+        self.num_fetched = 0
+        self.fetch_threads: set[str] = set()
+        self._lock = threading.Lock()
+
+    def fetch_page(self, page_num: int) -> tuple[list[int], int | None]:
+        time.sleep(self.latency)
+        if page_num == self.fail_at_page:
+            raise RuntimeError(f"Failed to fetch page {page_num}")
+
+        with self._lock:
+            self.num_fetched += 1
+            self.fetch_threads.add(threading.current_thread().name)
+
+        page = list(range(page_num * self.page_size, (page_num + 1) * self.page_size))
+        return page, page_num + 1 if page_num + 1 < self.num_pages else None
+
+
+class FakeConfluenceClient:
+    """Serves the pages of a single space through `get_all_pages_from_space`"""
+
+    def __init__(self, num_pages: int, latency: float = 0) -> None:
+        self.latency = latency
+        self.page_fetch_threads: set[str] = set()
+        self.comment_fetch_threads: set[str] = set()
+        self.pages = [
+            {
+                "id": str(page_ind),
+                "title": f"Page {page_ind}",
+                "version": {
+                    "when": f"2024-01-01T00:{page_ind % 60:02d}:00+00:00",
+                    "by": {"email": f"user{page_ind % 3}@example.com"},
+                },
+                "body": {"storage": {"value": f"<p>Content of page {page_ind}</p>"}},
+                "_links": {"webui": f"/spaces/SPACE/pages/{page_ind}"},
+            }
+            for page_ind in range(num_pages)
+        ]
+
+    def get_all_pages_from_space(
+        self, space: str, start: int, limit: int, expand: str
+    ) -> list[dict[str, Any]]:
+        time.sleep(self.latency)
+        self.page_fetch_threads.add(threading.current_thread().name)
+        return self.pages[start : start + limit]
+
+    def get_page_child_by_type(self, *args: Any, **kwargs: Any) -> list[Any]:
+        self.comment_fetch_threads.add(threading.current_thread().name)
+        return []
+
+
+class FakeGithubPaginatedList:
+    """Stand-in for `github.PaginatedList` of pull requests, newest first"""
+
+    def __init__(self, num_objects: int, per_page: int, latency: float = 0) -> None:
+        self.per_page = per_page
+        self.latency = latency
+        now = datetime(2024, 1, 1)
+        self.objects = [
+            MagicMock(
+                html_url=f"https://github.com/owner/repo/pull/{obj_ind}",
+                body=f"Description of pull request {obj_ind}",
+                title=f"Pull request {obj_ind}",
+                updated_at=now - timedelta(hours=obj_ind),
+                merged=obj_ind % 2 == 0,
+                state="closed",
+            )
+            for obj_ind in range(num_objects)
+        ]
+
+    def get_page(self, page_num: int) -> list[Any]:
+        time.sleep(self.latency)
+        return self.objects[page_num * self.per_page : (page_num + 1) * self.per_page]
+
+
+def make_fake_github_connector(
+    num_prs: int, per_page: int, latency: float = 0, **kwargs: Any
+) -> GithubConnector:
+    connector = GithubConnector(repo_owner="owner", repo_name="repo", **kwargs)
+    pull_requests = FakeGithubPaginatedList(num_prs, per_page, latency)
+    repo = MagicMock()
+    repo.get_pulls.return_value = pull_requests
+    connector.github_client = MagicMock()
+    connector._get_github_repo = MagicMock(return_value=repo)  # type: ignore
+    return connector
+
+
+def make_fake_notion_connector(
+    num_pages: int,
+    page_size: int,
+    latency: float = 0,
+    block_latency: float = 0,
+    **kwargs: Any,
+) -> NotionConnector:
+    """Search results are served `page_size` at a time with `latency` seconds per search
+    and every page has a couple of blocks, read in `block_latency` seconds."""
+    connector = NotionConnector(batch_size=page_size, **kwargs)
+    pages = [
+        {
+            "id": f"page-{page_ind}",
+            "created_time": "2024-01-01T00:00:00.000Z",
+            "last_edited_time": "2024-01-02T00:00:00.000Z",
+            "archived": False,
+            "properties": {
+                "title": {"type": "title", "title": [{"plain_text": f"P{page_ind}"}]}
+            },
+            "url": f"https://notion.so/page-{page_ind}",
+        }
+        for page_ind in range(num_pages)
+    ]
+
+    def _search_notion(query_dict: dict[str, Any]) -> NotionSearchResponse:
+        time.sleep(latency)
+        start = int(query_dict.get("start_cursor") or 0)
+        end = start + query_dict["page_size"]
+        # built from the JSON body like the connector does
+        response: dict[str, Any] = {
+            "results": pages[start:end],
+            "next_cursor": str(end) if end < len(pages) else None,
+            "has_more": end < len(pages),
+        }
+        return NotionSearchResponse(**response)
+
+    def _read_blocks(page_id: str) -> tuple[list[tuple[str, str]], list[str]]:
+        time.sleep(block_latency)
+        return [
+            (f"Block {i} of {page_id}", f"{page_id}-block-{i}") for i in range(2)
+        ], []
+
+    connector._search_notion = _search_notion  # type: ignore
+    connector._read_blocks = _read_blocks  # type: ignore
+    return connector
+
+
+def _doc_ids(doc_batches: list[list[Document]]) -> list[list[str]]:
+    return [[doc.id for doc in doc_batch] for doc_batch in doc_batches]
+
+
+class TestPrefetchPages(unittest.TestCase):
+    def test_yields_same_pages_as_serial_loop(self) -> None:
+        serial = list(prefetch_pages(FakePaginatedApi(7).fetch_page, 0, lookahead=0))
+        for lookahead in [1, 3, 10]:
+            prefetched = list(
+                prefetch_pages(FakePaginatedApi(7).fetch_page, 0, lookahead=lookahead)
+            )
+            self.assertEqual(prefetched, serial)
+        self.assertEqual(len(serial), 7)
+
+    def test_serial_fetches_in_calling_thread(self) -> None:
+        api = FakePaginatedApi(3)
+        list(prefetch_pages(api.fetch_page, 0, lookahead=0))
+        self.assertEqual(api.fetch_threads, {threading.current_thread().name})
+
+    def test_lookahead_is_bounded(self) -> None:
+        for lookahead in [1, 2]:
+            api = FakePaginatedApi(10)
+            num_fetched_ahead = []
+            pages = prefetch_pages(api.fetch_page, 0, lookahead=lookahead)
+            for num_received, _ in enumerate(pages, start=1):
+                # give the fetcher plenty of time to run ahead
+                time.sleep(0.02)
+                num_fetched_ahead.append(api.num_fetched - num_received)
+            self.assertEqual(max(num_fetched_ahead), lookahead)
+            self.assertEqual(num_fetched_ahead[-1], 0)
+
+    def test_overlaps_fetching_with_processing(self) -> None:
+        api = FakePaginatedApi(6, latency=0.05)
+        start = time.monotonic()
+        for _ in prefetch_pages(api.fetch_page, 0, lookahead=1):
+            time.sleep(0.05)
+        # serially this would take 6 * (0.05 + 0.05) = 0.6 seconds
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_error_is_raised_after_preceding_pages(self) -> None:
+        api = FakePaginatedApi(5, fail_at_page=3)
+        pages = []
+        with self.assertRaisesRegex(RuntimeError, "Failed to fetch page 3"):
+            for page in prefetch_pages(api.fetch_page, 0, lookahead=2):
+                pages.append(page)
+        self.assertEqual(len(pages), 3)
+
+    def test_stopping_early_stops_fetching(self) -> None:
+        api = FakePaginatedApi(100)
+        pages = prefetch_pages(api.fetch_page, 0, lookahead=2)
+        next(pages)
+        pages.close()
+        time.sleep(0.05)
+        self.assertLessEqual(api.num_fetched, 4)
+
+
+class TestConnectorsWithPrefetching(unittest.TestCase):
+    def test_confluence(self) -> None:
+        results = []
+        for lookahead in [0, 2]:
+            connector = ConfluenceConnector(
+                "https://danswer.atlassian.net/wiki/spaces/SPACE/overview",
+                batch_size=4,
+                prefetch_lookahead=lookahead,
+            )
+            connector.confluence_client = FakeConfluenceClient(num_pages=10)
+            results.append(list(connector.load_from_state()))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual([len(doc_batch) for doc_batch in results[0]], [4, 4, 2])
+
+    def test_confluence_prefetch_thread_has_its_own_client(self) -> None:
+        clients: list[FakeConfluenceClient] = []
+
+        def _make_client(**kwargs: Any) -> FakeConfluenceClient:
+            clients.append(FakeConfluenceClient(num_pages=10))
+            return clients[-1]
+
+        connector = ConfluenceConnector(
+            "https://danswer.atlassian.net/wiki/spaces/SPACE/overview",
+            batch_size=4,
+            prefetch_lookahead=2,
+        )
+        with patch.object(confluence_connector, "Confluence", _make_client):
+            connector.load_credentials(
+                {"confluence_username": "user", "confluence_access_token": "token"}
+            )
+            doc_batches = list(connector.load_from_state())
+
+        self.assertEqual([len(doc_batch) for doc_batch in doc_batches], [4, 4, 2])
+        self.assertEqual(len(clients), 2)
+        main_client, prefetch_client = clients
+        self.assertEqual(main_client.page_fetch_threads, set())
+        self.assertEqual(
+            main_client.comment_fetch_threads, {threading.current_thread().name}
+        )
+        self.assertNotIn(
+            threading.current_thread().name, prefetch_client.page_fetch_threads
+        )
+        self.assertEqual(prefetch_client.comment_fetch_threads, set())
+
+    def test_github_stops_at_poll_start(self) -> None:
+        results = []
+        for lookahead in [0, 2]:
+            connector = make_fake_github_connector(
+                num_prs=50, per_page=5, batch_size=5, prefetch_lookahead=lookahead
+            )
+            # only the first 12 pull requests are in the polling window
+            poll_start = datetime(2024, 1, 1) - timedelta(hours=11, minutes=30)
+            results.append(
+                list(connector._fetch_from_github(start=poll_start, end=None))
+            )
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(sum(len(doc_batch) for doc_batch in results[0]), 12)
+
+    def test_notion(self) -> None:
+        results = []
+        for lookahead in [0, 2]:
+            connector = make_fake_notion_connector(
+                num_pages=23, page_size=5, prefetch_lookahead=lookahead
+            )
+            results.append(_doc_ids(list(connector.load_from_state())))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(
+            sum(results[0], []), [f"page-{page_ind}" for page_ind in range(23)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,96 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
 import time
 import unittest
+from collections.abc import Callable
+from typing import Any
 
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    credential_rate_limit_key,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    FileRateLimitBackend,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    get_rate_limit_metrics,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    InMemoryRateLimitBackend,
+)
 from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
     rate_limit_builder,
 )
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    RateLimitBackend,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    RateLimitTriedTooManyTimesError,
+)
+
+
+class _GrantTimeRecordingBackend(RateLimitBackend):
+    """Passes the clock reading the wrapped backend granted each call at to `on_grant`.
+    Timestamps taken in the rate limited function itself would be shifted by threads /
+    processes which are scheduled late after acquiring their slot."""
+
+    def __init__(
+        self,
+        backend: InMemoryRateLimitBackend | FileRateLimitBackend,
+        on_grant: Callable[[float], Any],
+    ) -> None:
+        self._backend = backend
+        self._clock = backend.clock
+        backend.clock = self._read_clock
+        self._on_grant = on_grant
+        self._local = threading.local()
+
+    def _read_clock(self) -> float:
+        self._local.now = self._clock()
+        return self._local.now
+
+    def try_acquire(self, key: str, max_calls: int, period: float) -> float:
+        wait_time = self._backend.try_acquire(key, max_calls, period)
+        if wait_time == 0:
+            self._on_grant(self._local.now)
+        return wait_time
+
+
+def _max_calls_in_any_window(call_times: list[float], period: float) -> int:
+    # same comparison as the backends, so that float rounding can't add a call
+    call_times = sorted(call_times)
+    return max(
+        sum(1 for other in call_times if start <= other and other - period < start)
+        for start in call_times
+    )
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _make_file_backed_calls(
+    state_dir: str, num_calls: int, call_times: "multiprocessing.Queue[float]"
+) -> None:
+    @rate_limit_builder(
+        max_calls=4,
+        period=0.5,
+        key="shared-across-processes",
+        backend=_GrantTimeRecordingBackend(
+            FileRateLimitBackend(state_dir), call_times.put
+        ),
+    )
+    def func() -> None:
+        pass
+
+    for _ in range(num_calls):
+        func()
 
 
 class TestRateLimit(unittest.TestCase):
@@ -31,6 +118,155 @@ class TestRateLimit(unittest.TestCase):
         self.assertLess(time_to_finish_non_ratelimited, 1)
         self.assertGreater(time_to_finish_ratelimited, 5)
 
+    def test_rate_limit_thread_safe(self) -> None:
+        call_times: list[float] = []
+
+        @rate_limit_builder(
+            max_calls=5,
+            period=0.5,
+            sleep_time=0.05,
+            backend=_GrantTimeRecordingBackend(
+                InMemoryRateLimitBackend(), call_times.append
+            ),
+        )
+        def func() -> None:
+            pass
+
+        threads = [
+            threading.Thread(target=lambda: [func() for _ in range(4)])
+            for _ in range(8)
+        ]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(call_times), 32)
+        self.assertLessEqual(_max_calls_in_any_window(call_times, 0.5), 5)
+        # 32 calls at 5 calls per 0.5 seconds need at least 6 full periods
+        self.assertGreaterEqual(time.monotonic() - start, 3)
+
+    def test_rate_limit_shared_key(self) -> None:
+        call_times: list[float] = []
+        backend = _GrantTimeRecordingBackend(
+            InMemoryRateLimitBackend(), call_times.append
+        )
+
+        @rate_limit_builder(max_calls=3, period=0.5, key="shared", backend=backend)
+        def func_a() -> None:
+            pass
+
+        @rate_limit_builder(max_calls=3, period=0.5, key="shared", backend=backend)
+        def func_b() -> None:
+            pass
+
+        for _ in range(3):
+            func_a()
+            func_b()
+
+        self.assertLessEqual(_max_calls_in_any_window(call_times, 0.5), 3)
+        metrics = get_rate_limit_metrics()["shared"]
+        self.assertEqual(metrics.num_calls, 6)
+        self.assertGreater(metrics.num_waits, 0)
+        self.assertGreater(metrics.total_wait_time, 0)
+
+    def test_rate_limit_max_num_sleep(self) -> None:
+        @rate_limit_builder(max_calls=1, period=5, sleep_time=0.01, max_num_sleep=2)
+        def func() -> None:
+            pass
+
+        func()
+        with self.assertRaises(RateLimitTriedTooManyTimesError):
+            func()
+
+    def test_rate_limit_across_processes(self) -> None:
+        with tempfile.TemporaryDirectory() as state_dir:
+            call_times: multiprocessing.Queue[float] = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(
+                    target=_make_file_backed_calls, args=(state_dir, 4, call_times)
+                )
+                for _ in range(3)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+            times = [call_times.get(timeout=1) for _ in range(12)]
+            self.assertLessEqual(_max_calls_in_any_window(times, 0.5), 4)
+
+    def test_key_from_call_arguments(self) -> None:
+        backend = InMemoryRateLimitBackend(clock=_FakeClock())
+
+        @rate_limit_builder(
+            max_calls=1,
+            period=60,
+            max_num_sleep=1,
+            sleep_time=0.01,
+            key=lambda token: credential_rate_limit_key("source", token),
+            backend=backend,
+        )
+        def func(token: str) -> None:
+            pass
+
+        # every credential has its own budget
+        func("token-a")
+        func("token-b")
+        with self.assertRaises(RateLimitTriedTooManyTimesError):
+            func("token-a")
+
+    def test_credential_rate_limit_key(self) -> None:
+        key = credential_rate_limit_key("google_drive", "client", "secret-token")
+        self.assertEqual(
+            key, credential_rate_limit_key("google_drive", "client", "secret-token")
+        )
+        self.assertNotEqual(
+            key, credential_rate_limit_key("google_drive", "client", "other-token")
+        )
+        self.assertNotEqual(
+            key, credential_rate_limit_key("document360", "client", "secret-token")
+        )
+        self.assertTrue(key.startswith("google_drive_"))
+        self.assertNotIn("secret-token", key)
+
+
+class TestFileRateLimitBackend(unittest.TestCase):
+    def test_same_decisions_as_in_memory_backend(self) -> None:
+        clock = _FakeClock()
+        rng = random.Random(0)
+        with tempfile.TemporaryDirectory() as state_dir:
+            file_backend = FileRateLimitBackend(state_dir, clock=clock)
+            memory_backend = InMemoryRateLimitBackend(clock=clock)
+            for _ in range(500):
+                clock.now += rng.choice([0, 0.01, 0.1, 0.3, 1.5])
+                self.assertAlmostEqual(
+                    file_backend.try_acquire("key", 5, 1.0),
+                    memory_backend.try_acquire("key", 5, 1.0),
+                )
+
+    def test_state_size_does_not_grow_with_calls(self) -> None:
+        clock = _FakeClock()
+        with tempfile.TemporaryDirectory() as state_dir:
+            backend = FileRateLimitBackend(state_dir, clock=clock)
+            file_sizes = set()
+            for _ in range(3000):
+                clock.now += 0.001
+                self.assertEqual(backend.try_acquire("drive", 12000, 60), 0)
+                file_sizes.add(os.path.getsize(backend._get_file_path("drive")))
+            self.assertEqual(len(file_sizes), 1)
+
+    def test_changed_max_calls_starts_over(self) -> None:
+        clock = _FakeClock()
+        with tempfile.TemporaryDirectory() as state_dir:
+            backend = FileRateLimitBackend(state_dir, clock=clock)
+            self.assertEqual(backend.try_acquire("key", 1, 60), 0)
+            self.assertAlmostEqual(backend.try_acquire("key", 1, 60), 60)
+            self.assertEqual(backend.try_acquire("key", 2, 60), 0)
+            self.assertEqual(backend.try_acquire("key", 2, 60), 0)
+            self.assertGreater(backend.try_acquire("key", 2, 60), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
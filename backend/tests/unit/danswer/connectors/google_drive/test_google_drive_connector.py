@@ -0,0 +1,148 @@
+import threading
+import time
+from typing import Any
+
+import pytest
+from pytest_mock import MockFixture
+
+from danswer.connectors.google_drive.connector import GDriveMimeType
+from danswer.connectors.google_drive.connector import GoogleDriveConnector
+from danswer.connectors.models import Document
+
+
+class _FakeRequest:
+    def __init__(self, response: Any, latency: float) -> None:
+        self._response = response
+        self._latency = latency
+
+    def execute(self) -> Any:
+        if self._latency:
+            time.sleep(self._latency)
+        return self._response
+
+
+class FakeDriveService:
+    """Stand-in for the `discovery.Resource` of the Drive v3 API. Serves a flat drive
+    of Google Docs / Sheets and adds `latency` to every request. Tracks the peak number
+    of concurrent export calls."""
+
+    def __init__(self, num_files: int, latency: float = 0) -> None:
+        self.latency = latency
+        self.files_by_id = {
+            f"file-{ind}": {
+                "id": f"file-{ind}",
+                "name": f"File {ind}",
+                "mimeType": GDriveMimeType.SPREADSHEET.value
+                if ind % 3 == 0
+                else GDriveMimeType.DOC.value,
+                "modifiedTime": "2024-01-01T00:00:00+00:00",
+                "webViewLink": f"https://docs.google.com/document/d/file-{ind}",
+                "permissions": [{"type": "domain" if ind % 2 else "user"}],
+            }
+            for ind in range(num_files)
+        }
+        self.num_exports = 0
+        self.max_concurrent_exports = 0
+        self._concurrent_exports = 0
+        self._lock = threading.Lock()
+
+    def files(self) -> "FakeDriveService":
+        return self
+
+    def list(
+        self, pageSize: int, pageToken: str, q: str, **kwargs: Any
+    ) -> _FakeRequest:
+        if "mimeType = 'application/vnd.google-apps.folder'" in q:
+            return _FakeRequest({"files": []}, self.latency)
+        all_files = list(self.files_by_id.values())
+        start = int(pageToken) if pageToken else 0
+        end = start + pageSize
+        response: dict[str, Any] = {"files": all_files[start:end]}
+        if end < len(all_files):
+            response["nextPageToken"] = str(end)
+        return _FakeRequest(response, self.latency)
+
+    def export(self, fileId: str, mimeType: str) -> _FakeRequest:
+        service = self
+
+        class _ExportRequest(_FakeRequest):
+            def execute(self) -> Any:
+                with service._lock:
+                    service.num_exports += 1
+                    service._concurrent_exports += 1
+                    service.max_concurrent_exports = max(
+                        service.max_concurrent_exports, service._concurrent_exports
+                    )
+                try:
+                    return super().execute()
+                finally:
+                    with service._lock:
+                        service._concurrent_exports -= 1
+
+        return _ExportRequest(
+            f"Contents of {fileId} as {mimeType}".encode("utf-8"), self.latency
+        )
+
+
+def load_all_batches(
+    mocker: MockFixture, service: FakeDriveService, **connector_kwargs: Any
+) -> list[list[Document]]:
+    mocker.patch(
+        "danswer.connectors.google_drive.connector.discovery.build",
+        return_value=service,
+    )
+    connector = GoogleDriveConnector(**connector_kwargs)
+    connector.creds = mocker.MagicMock()
+    connector.rate_limit_key = "google_drive_test"
+    return list(connector.load_from_state())
+
+
+def test_parallel_export_matches_serial_batches(mocker: MockFixture) -> None:
+    serial_batches = load_all_batches(
+        mocker, FakeDriveService(num_files=50), batch_size=8, num_threads=1
+    )
+    parallel_service = FakeDriveService(num_files=50, latency=0.01)
+    parallel_batches = load_all_batches(
+        mocker, parallel_service, batch_size=8, num_threads=8
+    )
+
+    assert [len(batch) for batch in serial_batches] == [8, 8, 8, 8, 8, 8, 2]
+    assert parallel_batches == serial_batches
+    assert parallel_service.num_exports == 50
+    assert 1 < parallel_service.max_concurrent_exports <= 8
+
+
+def test_parallel_export_keeps_filtered_batches(mocker: MockFixture) -> None:
+    # only odd files are org public, so every batch still shows up (even if smaller)
+    serial_batches = load_all_batches(
+        mocker,
+        FakeDriveService(num_files=10),
+        batch_size=4,
+        num_threads=1,
+        only_org_public=True,
+    )
+    parallel_batches = load_all_batches(
+        mocker,
+        FakeDriveService(num_files=10),
+        batch_size=4,
+        num_threads=4,
+        only_org_public=True,
+    )
+
+    assert [len(batch) for batch in serial_batches] == [2, 2, 1]
+    assert parallel_batches == serial_batches
+
+
+def test_parallel_export_failure(mocker: MockFixture) -> None:
+    service = FakeDriveService(num_files=10)
+    service.files_by_id["file-4"]["mimeType"] = GDriveMimeType.PDF.value
+    # PDFs are downloaded via get_media, which the fake does not support
+    batches = load_all_batches(
+        mocker, service, batch_size=4, num_threads=4, continue_on_failure=True
+    )
+    assert [len(batch) for batch in batches] == [4, 3, 2]
+
+    with pytest.raises(AttributeError):
+        load_all_batches(
+            mocker, service, batch_size=4, num_threads=4, continue_on_failure=False
+        )
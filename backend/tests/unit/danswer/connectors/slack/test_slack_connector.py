@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import defaultdict
+from collections import deque
+from typing import Any
+
+from slack_sdk.web import SlackResponse
+
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import TokenBucket
+from danswer.connectors.slack.connector import get_all_docs
+from danswer.connectors.slack.utils import SLACK_METHOD_TIERS
+from danswer.connectors.slack.utils import SLACK_TIER_REQUESTS_PER_MINUTE
+from danswer.connectors.slack.utils import SlackMethodBudget
+
+
+class FakeSlackClient:
+    """Minimal stand-in for `slack_sdk.WebClient` which serves a generated workspace
+    and enforces a per method limit of calls over a sliding window, answering with
+    `ratelimited` errors like the real API does."""
+
+    def __init__(
+        self,
+        num_channels: int,
+        threads_per_channel: int,
+        requests_per_window_by_tier: dict[int, float],
+        window_seconds: float = 60,
+        latency: float = 0,
+    ) -> None:
+        self.requests_per_window_by_tier = requests_per_window_by_tier
+        self.window_seconds = window_seconds
+        self.latency = latency
+        self.call_counts: dict[str, int] = defaultdict(int)
+        self.num_rate_limited = 0
+        self._call_times: dict[str, deque[float]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+        self.channels: list[dict[str, Any]] = [
+            {
+                "id": f"C{channel_ind}",
+                "name": f"channel-{channel_ind}",
+                "is_member": True,
+                "is_private": False,
+            }
+            for channel_ind in range(num_channels)
+        ]
+        self.history: dict[str, list[dict[str, Any]]] = {}
+        self.replies: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        for channel in self.channels:
+            messages = []
+            for thread_ind in range(threads_per_channel):
+                ts = f"{1700000000 + thread_ind}.000100"
+                root = {"ts": ts, "text": f"root {thread_ind}", "user": "U1"}
+                # every other message starts a thread with a couple of replies
+                if thread_ind % 2 == 0:
+                    root["thread_ts"] = ts
+                    self.replies[(channel["id"], ts)] = [root] + [
+                        {
+                            "ts": f"{1700000000 + thread_ind}.00020{reply_ind}",
+                            "thread_ts": ts,
+                            "text": f"reply {reply_ind} to {thread_ind}",
+                            "user": "U2",
+                        }
+                        for reply_ind in range(3)
+                    ]
+                messages.append(root)
+            self.history[channel["id"]] = list(reversed(messages))
+
+    def _response(self, method: str, data: dict[str, Any]) -> SlackResponse:
+        tier = SLACK_METHOD_TIERS.get(method, 3)
+        now = time.monotonic()
+        with self._lock:
+            self.call_counts[method] += 1
+            call_times = self._call_times[method]
+            while call_times and call_times[0] <= now - self.window_seconds:
+                call_times.popleft()
+            if len(call_times) >= self.requests_per_window_by_tier[tier]:
+                self.num_rate_limited += 1
+                data = {"ok": False, "error": "ratelimited"}
+            else:
+                call_times.append(now)
+                data = {"ok": True, **data}
+
+        if self.latency:
+            time.sleep(self.latency)
+        return SlackResponse(
+            client=self,
+            http_verb="POST",
+            api_url=f"https://slack.com/api/{method}",
+            req_args={},
+            data=data,
+            headers={"Retry-After": "0"},
+            status_code=200 if data["ok"] else 429,
+        )
+
+    @staticmethod
+    def _page(
+        items: list[dict[str, Any]], cursor: str | None, limit: int
+    ) -> tuple[list[dict[str, Any]], dict[str, str]]:
+        start = int(cursor) if cursor else 0
+        end = start + limit
+        next_cursor = str(end) if end < len(items) else ""
+        return items[start:end], {"next_cursor": next_cursor}
+
+    def conversations_list(
+        self, cursor: str | None = None, limit: int = 100, **kwargs: Any
+    ) -> SlackResponse:
+        channels, metadata = self._page(self.channels, cursor, limit)
+        return self._response(
+            "conversations_list",
+            {"channels": channels, "response_metadata": metadata},
+        )
+
+    def conversations_history(
+        self, channel: str, cursor: str | None = None, limit: int = 100, **kwargs: Any
+    ) -> SlackResponse:
+        # small pages to exercise pagination
+        messages, metadata = self._page(self.history[channel], cursor, 7)
+        return self._response(
+            "conversations_history",
+            {"messages": messages, "response_metadata": metadata},
+        )
+
+    def conversations_replies(
+        self,
+        channel: str,
+        ts: str,
+        cursor: str | None = None,
+        limit: int = 100,
+        **kwargs: Any,
+    ) -> SlackResponse:
+        messages, metadata = self._page(self.replies[(channel, ts)], cursor, limit)
+        return self._response(
+            "conversations_replies",
+            {"messages": messages, "response_metadata": metadata},
+        )
+
+    def users_info(self, user: str) -> SlackResponse:
+        return self._response(
+            "users_info",
+            {"user": {"real_name": f"User {user}", "profile": {"display_name": ""}}},
+        )
+
+
+def _get_docs(client: FakeSlackClient, **kwargs: Any) -> list[Any]:
+    return list(
+        get_all_docs(client=client, workspace="test-workspace", **kwargs)  # type: ignore
+    )
+
+
+def test_concurrent_fetch_matches_serial_order() -> None:
+    limits: dict[int, float] = {1: 1000, 2: 1000, 3: 1000, 4: 1000}
+    serial_docs = _get_docs(
+        FakeSlackClient(
+            num_channels=5, threads_per_channel=20, requests_per_window_by_tier=limits
+        ),
+        num_threads=1,
+    )
+    concurrent_client = FakeSlackClient(
+        num_channels=5,
+        threads_per_channel=20,
+        requests_per_window_by_tier=limits,
+        latency=0.001,
+    )
+    concurrent_docs = _get_docs(
+        concurrent_client,
+        num_threads=8,
+        budget=SlackMethodBudget(requests_per_minute_by_tier=limits),
+    )
+
+    assert len(serial_docs) == 100
+    assert [doc.id for doc in concurrent_docs] == [doc.id for doc in serial_docs]
+    assert concurrent_docs == serial_docs
+    assert concurrent_client.call_counts["conversations_replies"] == 50
+    assert concurrent_client.num_rate_limited == 0
+
+
+def test_channel_history_is_streamed() -> None:
+    limits: dict[int, float] = {1: 1000, 2: 1000, 3: 1000, 4: 1000}
+    # 15 history pages of 7 messages
+    client = FakeSlackClient(
+        num_channels=1, threads_per_channel=100, requests_per_window_by_tier=limits
+    )
+    docs = get_all_docs(
+        client=client, workspace="test-workspace", num_threads=2  # type: ignore
+    )
+    next(docs)
+    # the page being processed and the one fetched ahead
+    assert client.call_counts["conversations_history"] <= 2
+    assert len(list(docs)) == 99
+
+
+def test_budget_stays_within_tier_limits() -> None:
+    budget = SlackMethodBudget()
+    for method_name, tier in SLACK_METHOD_TIERS.items():
+        budget.acquire(method_name)
+        bucket = budget._get_bucket(method_name)
+        requests_per_minute = SLACK_TIER_REQUESTS_PER_MINUTE[tier]
+        # the burst plus a full minute of refills must fit in the tier limit
+        assert bucket.capacity + 60 * bucket.rate <= requests_per_minute
+
+
+def test_tier_1_budget_allows_one_call_per_minute() -> None:
+    budget = SlackMethodBudget(method_tiers={"team_info": 1})
+    budget.acquire("team_info")
+    # the next call has to wait for a full minute
+    assert budget._get_bucket("team_info").try_acquire() > 59
+
+
+def test_token_bucket_limits_rate_across_threads() -> None:
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    workers = [
+        threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)])
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    # 20 tokens total, 5 available immediately and the remaining 15 refill at 50/s
+    assert time.monotonic() - start >= 15 / 50 * 0.9
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from danswer.configs.constants import DocumentSource
+from danswer.db import connector as connector_db
+
+
+class TestDocumentSourcesCache(unittest.TestCase):
+    def setUp(self) -> None:
+        connector_db._DOCUMENT_SOURCES_CACHE.clear()
+        self.addCleanup(connector_db._DOCUMENT_SOURCES_CACHE.clear)
+
+    def test_cached_until_cleared(self) -> None:
+        db_session = MagicMock()
+        with patch.object(
+            connector_db,
+            "fetch_unique_document_sources",
+            side_effect=[[DocumentSource.WEB], [DocumentSource.SLACK]],
+        ) as fetch_sources:
+            for _ in range(3):
+                self.assertEqual(
+                    connector_db.fetch_unique_document_sources_cached(db_session),
+                    [DocumentSource.WEB],
+                )
+            connector_db._DOCUMENT_SOURCES_CACHE.clear()
+            self.assertEqual(
+                connector_db.fetch_unique_document_sources_cached(db_session),
+                [DocumentSource.SLACK],
+            )
+        self.assertEqual(fetch_sources.call_count, 2)
+
+    def test_delete_connector_clears_cache_after_commit(self) -> None:
+        connector_db._DOCUMENT_SOURCES_CACHE.set("sources", [DocumentSource.WEB])
+        cached_at_commit = []
+        db_session = MagicMock()
+        # cleared only once committed, a request refilling the cache in between would
+        # otherwise cache the deleted connector's source again
+        db_session.commit.side_effect = lambda: cached_at_commit.append(
+            connector_db._DOCUMENT_SOURCES_CACHE.get("sources")
+        )
+
+        with patch.object(
+            connector_db, "fetch_connector_by_id", return_value=MagicMock()
+        ):
+            connector_db.delete_connector(connector_id=1, db_session=db_session)
+
+        db_session.delete.assert_called_once()
+        self.assertEqual(cached_at_commit, [[DocumentSource.WEB]])
+        self.assertIsNone(connector_db._DOCUMENT_SOURCES_CACHE.get("sources"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,109 @@
+import random
+import re
 import textwrap
 import unittest
+from collections.abc import Iterator
+from unittest.mock import patch
 
+import regex
+
+from danswer.chat.models import DanswerAnswerPiece
+from danswer.chat.models import DanswerQuotes
 from danswer.configs.constants import DocumentSource
 from danswer.indexing.models import InferenceChunk
+from danswer.one_shot_answer import qa_utils
+from danswer.one_shot_answer.qa_utils import _may_match_fuzzy
 from danswer.one_shot_answer.qa_utils import match_quotes_to_docs
+from danswer.one_shot_answer.qa_utils import process_model_tokens
 from danswer.one_shot_answer.qa_utils import separate_answer_quotes
+from danswer.prompts.constants import QUOTE_PAT
+from danswer.utils.logger import setup_logger
+from danswer.utils.text_processing import shared_precompare_cleanup
+
+logger = setup_logger()
+
+
+_CHUNK_CONTENT = "A dog is a man's best friend. Air Bud was a movie."
+
+# model output, whether it's a json answer, the answer streamed when the output comes
+# in character by character, whether the end of the answer is found, and the quotes
+# found in the chunk (or the error raised)
+_MODEL_OUTPUTS: list[tuple[str, bool, str, bool, list[str] | str]] = [
+    (
+        '{"answer": "Dogs are loyal", "quotes": ["A dog is a man\'s best friend"]}',
+        True,
+        "Dogs are loyal",
+        True,
+        ["A dog is a man's best friend"],
+    ),
+    (
+        '{\n  "answer": "He said \\"woof\\" twice",\n  "quotes": []\n}',
+        True,
+        'He said \\"woof\\" twice',
+        True,
+        [],
+    ),
+    (
+        '```json\n{"answer":"Yes, see the \\\\ docs","quote":"best friend"}\n```',
+        True,
+        "Yes, see the \\\\ docs",
+        True,
+        ["best friend"],
+    ),
+    (
+        "Sure! Here is a long preamble before the json that the model should not have "
+        'written { "answer" : "Late answer", "quotes": ["Air Bud"] }',
+        True,
+        # nothing is streamed once the answer starts too late
+        "",
+        False,
+        ["Air Bud"],
+    ),
+    (
+        '{"answer": "Unterminated quotes list", "quotes": ["best friend"]',
+        True,
+        "Unterminated quotes list",
+        True,
+        ["best friend"],
+    ),
+    (
+        "I don't know how to answer that",
+        True,
+        "",
+        False,
+        "ValueError('No valid json found')",
+    ),
+    (
+        "It seems many people love dogs\nQuote: A dog is a man's best friend",
+        False,
+        "It seems many people love dogs",
+        True,
+        ["A dog is a man's best friend"],
+    ),
+    (
+        # the quote pattern is case sensitive while streaming
+        "It seems many people love dogs\n\nquote: A dog is a man's best friend",
+        False,
+        "It seems many people love dogs\n\nquote: A dog is a man's best friend",
+        False,
+        ["A dog is a man's best friend"],
+    ),
+    (
+        f"Answer: Dogs\n\n{QUOTE_PAT[:-1]}\nAir Bud was a movie about dogs",
+        False,
+        "Answer: Dogs",
+        True,
+        [],
+    ),
+    (
+        "No quotes at all in this answer, just text\nwith a newline",
+        False,
+        # the last character could still be part of the quote pattern
+        "No quotes at all in this answer, just text\nwith a newlin",
+        False,
+        [],
+    ),
+]
 
 
 class TestQAPostprocessing(unittest.TestCase):
@@ -196,5 +295,238 @@ class TestQAPostprocessing(unittest.TestCase):
         )
 
 
+def _random_token_split(text: str, rng: random.Random) -> list[str]:
+    cut_points = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 40)))
+    bounds = [0] + cut_points + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _collect_output(
+    pieces: Iterator[DanswerAnswerPiece | DanswerQuotes],
+) -> tuple[list[DanswerAnswerPiece | DanswerQuotes], str | None]:
+    """Yielded pieces and the error raised at the end, if any"""
+    output: list[DanswerAnswerPiece | DanswerQuotes] = []
+    try:
+        for piece in pieces:
+            output.append(piece)
+    except Exception as e:
+        return output, repr(e)
+    return output, None
+
+
+def _make_chunk(content: str) -> InferenceChunk:
+    return InferenceChunk(
+        document_id="test doc",
+        source_type=DocumentSource.FILE,
+        chunk_id=0,
+        content=content,
+        source_links={0: "doc base"},
+        blurb="anything",
+        semantic_identifier="anything",
+        section_continuation=False,
+        recency_bias=1,
+        boost=0,
+        hidden=False,
+        score=1,
+        metadata={},
+        match_highlights=[],
+        updated_at=None,
+    )
+
+
+class TestProcessModelTokens(unittest.TestCase):
+    def _process(
+        self, tokens: list[str], is_json: bool
+    ) -> tuple[str, bool, list[str] | str]:
+        """Streamed answer, whether its end was found and the quotes or the error"""
+        output, error = _collect_output(
+            process_model_tokens(iter(tokens), [_make_chunk(_CHUNK_CONTENT)], is_json)
+        )
+        answer_pieces = [
+            piece for piece in output if isinstance(piece, DanswerAnswerPiece)
+        ]
+        quotes = [piece for piece in output if isinstance(piece, DanswerQuotes)]
+        if error is None:
+            # the quotes come last, once the full output is known
+            self.assertEqual(output[-1:], quotes)
+            for quote in quotes[0].quotes:
+                self.assertEqual(quote.link, "doc base")
+
+        return (
+            "".join(piece.answer_piece or "" for piece in answer_pieces),
+            any(piece.answer_piece is None for piece in answer_pieces),
+            error if error is not None else [quote.quote for quote in quotes[0].quotes],
+        )
+
+    def test_streams_json_answer(self) -> None:
+        tokens = [
+            '{"',
+            "answer",
+            '":',
+            ' "',
+            "Dogs",
+            " are",
+            ' loyal"',
+            ', "quotes": []}',
+        ]
+        result = list(process_model_tokens(iter(tokens), [], is_json_prompt=True))
+        self.assertEqual(
+            result,
+            [
+                DanswerAnswerPiece(answer_piece="Dogs"),
+                DanswerAnswerPiece(answer_piece=" are"),
+                DanswerAnswerPiece(answer_piece=None),
+                DanswerQuotes(quotes=[]),
+            ],
+        )
+
+    def test_single_characters(self) -> None:
+        for output, is_json, answer, answer_ended, quotes in _MODEL_OUTPUTS:
+            self.assertEqual(
+                self._process(list(output), is_json),
+                (answer, answer_ended, quotes),
+                output,
+            )
+
+    def test_random_token_splits(self) -> None:
+        rng = random.Random(42)
+        for _ in range(300):
+            for output, is_json, _, _, quotes in _MODEL_OUTPUTS:
+                tokens = _random_token_split(output, rng)
+                streamed, _, result_quotes = self._process(tokens, is_json)
+                # where the answer starts and ends while streaming depends on the
+                # tokens, the quotes only on the full output
+                self.assertIn(streamed, output, f"tokens: {tokens!r}")
+                self.assertEqual(result_quotes, quotes, f"tokens: {tokens!r}")
+
+
+_WORDS = ["dog", "Air", "bud", "movie", "friend", "best", "loved", "people", "a"]
+
+
+def _random_text(rng: random.Random, num_words: int) -> str:
+    text = ""
+    for _ in range(num_words):
+        text += rng.choice(_WORDS) + rng.choice([" ", " ", ", ", ".\n", " - ", ": "])
+    return text
+
+
+def _random_quote(rng: random.Random, chunks: list[InferenceChunk]) -> str:
+    if rng.random() < 0.2:
+        return _random_text(rng, rng.randint(1, 8))
+
+    content = rng.choice(chunks).content
+    start = rng.randint(0, len(content) - 1)
+    quote = list(content[start : start + rng.randint(5, 40)])
+    # models change the casing / whitespace and make small mistakes
+    for _ in range(rng.randint(0, 3)):
+        edit_ind = rng.randint(0, len(quote) - 1)
+        quote[edit_ind] = rng.choice(["x", "", " ", "\n", quote[edit_ind].upper()])
+    return '"' + "".join(quote) + '"' if rng.random() < 0.3 else "".join(quote)
+
+
+class TestMatchQuotesToDocs(unittest.TestCase):
+    def test_matches_exact_quotes(self) -> None:
+        chunk = _make_chunk("A dog is a man's best friend. Air Bud was a movie.")
+        chunk.source_links = {0: "first link", 10: "second link"}
+        quotes = match_quotes_to_docs(
+            ['"A Dog is a man\'s"', "air bud, was a movie", "not in the docs"],
+            [_make_chunk("No links here"), chunk],
+        )
+        self.assertEqual(
+            [(quote.quote, quote.link) for quote in quotes.quotes],
+            [
+                ('"A Dog is a man\'s"', "first link"),
+                ("air bud, was a movie", "second link"),
+            ],
+        )
+
+    def test_first_matching_chunk_and_link_at_offset(self) -> None:
+        chunk_0 = _make_chunk("Here's a doc with some LINK embedded in the text")
+        chunk_0.document_id = "doc 0"
+        chunk_0.source_links = {0: "doc 0 base", 12: "doc 0 middle"}
+        chunk_1 = _make_chunk("Some different text here, also embedded in the text")
+        chunk_1.document_id = "doc 1"
+        chunk_1.source_links = {0: "doc 1 base"}
+
+        quotes = match_quotes_to_docs(
+            ["a doc with", "embedded in THE text", "different text"],
+            [chunk_0, chunk_1],
+        )
+        # the offsets are of the quote in the chunk without whitespace / punctuation
+        self.assertEqual(
+            [(quote.document_id, quote.link) for quote in quotes.quotes],
+            [
+                ("doc 0", "doc 0 base"),
+                ("doc 0", "doc 0 middle"),
+                ("doc 1", "doc 1 base"),
+            ],
+        )
+
+    def test_only_the_start_of_long_quotes_must_match(self) -> None:
+        chunk = _make_chunk("A dog is a man's best friend. Air Bud was a movie.")
+        quote = "A dog is a man's best friend, the model says more after this"
+        self.assertEqual(match_quotes_to_docs([quote], [chunk]).quotes, [])
+        self.assertEqual(
+            len(match_quotes_to_docs([quote], [chunk], prefix_only_length=28).quotes),
+            1,
+        )
+
+    def test_fuzzy_search(self) -> None:
+        chunk = _make_chunk("Some completely different text here")
+        quotes = ["different taxt", "completely diferent", "Some complitali"]
+        self.assertEqual(match_quotes_to_docs(quotes, [chunk]).quotes, [])
+        self.assertEqual(
+            [
+                quote.quote
+                for quote in match_quotes_to_docs(
+                    quotes, [chunk], fuzzy_search=True
+                ).quotes
+            ],
+            ["different taxt", "completely diferent"],
+        )
+        self.assertEqual(
+            match_quotes_to_docs(
+                quotes, [chunk], fuzzy_search=True, max_error_percent=0.0
+            ).quotes,
+            [],
+        )
+
+    def test_fuzzy_precheck_has_no_false_negatives(self) -> None:
+        rng = random.Random(7)
+        for _ in range(300):
+            chunk_clean = shared_precompare_cleanup(_random_text(rng, 40))
+            quote_clean = shared_precompare_cleanup(
+                _random_quote(rng, [_make_chunk(chunk_clean)])
+            )
+            for max_edits in range(4):
+                if regex.search(
+                    r"(" + re.escape(quote_clean) + r"){e<=" + str(max_edits) + r"}",
+                    chunk_clean,
+                ):
+                    self.assertTrue(
+                        _may_match_fuzzy(quote_clean, chunk_clean, max_edits),
+                        f"{quote_clean!r} in {chunk_clean!r}",
+                    )
+
+    def test_chunks_are_cleaned_up_once(self) -> None:
+        chunks = [_make_chunk(f"Chunk number {chunk_ind}") for chunk_ind in range(5)]
+        cleaned_texts: list[str] = []
+
+        def _counting_cleanup(text: str) -> str:
+            cleaned_texts.append(text)
+            return shared_precompare_cleanup(text)
+
+        with patch.object(qa_utils, "shared_precompare_cleanup", _counting_cleanup):
+            quotes = match_quotes_to_docs(
+                ["not in any chunk", "also not there", "chunk NUMBER 4"],
+                chunks,
+                fuzzy_search=True,
+            )
+
+        self.assertEqual(len(quotes.quotes), 1)
+        for chunk in chunks:
+            self.assertEqual(cleaned_texts.count(chunk.content), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from danswer.document_index import document_index_utils
+from danswer.document_index.document_index_utils import bump_index_generation
+from danswer.document_index.document_index_utils import compute_target_hits
+from danswer.document_index.document_index_utils import get_index_generation
+from danswer.dynamic_configs.file_system.store import FileSystemBackedDynamicConfigStore
+
+
+class TestComputeTargetHits(unittest.TestCase):
+    def test_recall_target(self) -> None:
+        # 20 candidates per hit, the previous fixed minimum for the default 50 hits
+        self.assertEqual(compute_target_hits(50, 0.95), 1000)
+        self.assertEqual(compute_target_hits(10, 0.95), 200)
+        self.assertEqual(compute_target_hits(10, 0.9), 100)
+        self.assertEqual(compute_target_hits(10, 0.0), 10)
+
+    def test_capped_by_matching_chunks(self) -> None:
+        self.assertEqual(compute_target_hits(50, 0.95, num_matching_chunks=300), 300)
+        self.assertEqual(compute_target_hits(50, 0.95, num_matching_chunks=5000), 1000)
+
+    def test_at_least_num_hits(self) -> None:
+        self.assertEqual(compute_target_hits(50, 0.95, num_matching_chunks=20), 50)
+        self.assertEqual(compute_target_hits(0, 0.95, num_matching_chunks=0), 1)
+
+
+class TestIndexGeneration(unittest.TestCase):
+    def test_bump(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_path, patch.object(
+            document_index_utils,
+            "get_dynamic_config_store",
+            lambda: FileSystemBackedDynamicConfigStore(dir_path),
+        ):
+            generations = {get_index_generation()}
+            for _ in range(3):
+                bump_index_generation()
+                generations.add(get_index_generation())
+            self.assertEqual(len(generations), 4)
+
+    def test_concurrent_bumps_store_different_generations(self) -> None:
+        # Two workers bumping at once both see the generation before either bump, a
+        # result cached after the first bump must be outdated by the second one
+        config_store = MagicMock()
+        config_store.load.return_value = "before"
+        with patch.object(
+            document_index_utils, "get_dynamic_config_store", lambda: config_store
+        ):
+            bump_index_generation()
+            bump_index_generation()
+        stored = [call.args[1] for call in config_store.store.call_args_list]
+        self.assertEqual(len(stored), 2)
+        self.assertNotEqual(stored[0], stored[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import unittest
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from danswer.document_index.vespa import index as vespa_index
+from danswer.document_index.vespa.index import VespaIndex
+from danswer.search.models import IndexFilters
+from danswer.utils.ttl_cache import TTLCache
+
+
+class TestAdaptiveTargetHits(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document_index = VespaIndex(
+            index_name="danswer_chunk",
+            secondary_index_name=None,
+            adaptive_target_hits=True,
+            target_hits_recall_target=0.95,
+        )
+        response = MagicMock()
+        response.content = json.dumps({"root": {"fields": {"totalCount": 300}}})
+        self.post = MagicMock(return_value=response)
+
+        patchers: list[Any] = [
+            patch.object(vespa_index.requests, "post", self.post),
+            patch.object(
+                vespa_index,
+                "_NUM_MATCHING_CHUNKS_CACHE",
+                TTLCache(max_size=16, ttl_seconds=300),
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_count_is_capped_by_matching_chunks(self) -> None:
+        filters = IndexFilters(access_control_list=["PUBLIC"])
+        self.assertEqual(self.document_index.hybrid_target_hits(filters, 50), 300)
+        self.assertEqual(self.document_index.hybrid_target_hits(filters, 5), 100)
+        self.assertEqual(self.post.call_count, 1)
+
+    def test_time_cutoff_does_not_miss_the_cache(self) -> None:
+        now = datetime.now(timezone.utc)
+        for seconds_ago in range(5):
+            filters = IndexFilters(
+                access_control_list=["PUBLIC"],
+                time_cutoff=now - timedelta(days=7, seconds=seconds_ago),
+            )
+            self.assertEqual(self.document_index.hybrid_target_hits(filters, 50), 300)
+
+        self.assertEqual(self.post.call_count, 1)
+        count_yql = json.loads(self.post.call_args.kwargs["data"])["yql"]
+        self.assertNotIn("doc_updated_at", count_yql)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import json
+import re
+import unittest
+from typing import Any
+from unittest.mock import patch
+
+from danswer.configs.constants import DocumentSource
+from danswer.document_index.vespa import index as vespa_index
+from danswer.document_index.vespa.index import VespaIndex
+from danswer.indexing.models import InferenceChunk
+from danswer.search.models import IndexFilters
+
+
+def _chunk(document_id: str, chunk_id: int) -> InferenceChunk:
+    return InferenceChunk(
+        chunk_id=chunk_id,
+        blurb="blurb",
+        content="content",
+        source_links=None,
+        section_continuation=False,
+        document_id=document_id,
+        source_type=DocumentSource.WEB,
+        semantic_identifier=document_id,
+        boost=0,
+        recency_bias=1.0,
+        score=None,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        updated_at=None,
+    )
+
+
+class _FakeQueryVespa:
+    """Serves the chunks of the documents the way Vespa does, with its hit limit and
+    without offset support past `maxOffset`"""
+
+    def __init__(self, num_chunks_by_document_id: dict[str, int]) -> None:
+        self.num_chunks_by_document_id = num_chunks_by_document_id
+        self.failing_document_ids: set[str] = set()
+        self.num_queries = 0
+
+    def __call__(self, query_params: dict[str, Any]) -> list[InferenceChunk]:
+        self.num_queries += 1
+        if int(query_params.get("offset", 0)) > 1000:
+            raise RuntimeError("offset past maxOffset")
+
+        yql = query_params["yql"]
+        min_chunk_id, max_chunk_id = map(
+            int, re.search(r"chunk_id >= (\d+) and chunk_id < (\d+)", yql).groups()  # type: ignore
+        )
+        document_ids = [
+            json.loads(document_id)
+            for document_id in re.findall(
+                r'document_id contains ("(?:[^"\\]|\\.)*")', yql
+            )
+        ]
+        if self.failing_document_ids.intersection(document_ids):
+            raise RuntimeError("query failed")
+
+        hits = [
+            _chunk(document_id, chunk_id)
+            for document_id in document_ids
+            for chunk_id in range(
+                min_chunk_id,
+                min(max_chunk_id, self.num_chunks_by_document_id.get(document_id, 0)),
+            )
+        ]
+        assert len(hits) <= int(query_params["hits"]) <= 400
+        return hits
+
+
+class TestBatchIdBasedRetrieval(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document_index = VespaIndex(
+            index_name="danswer_chunk", secondary_index_name=None
+        )
+        self.filters = IndexFilters(access_control_list=None)
+
+    def test_fetches_all_chunks_of_long_documents(self) -> None:
+        # far more chunks than Vespa can page through by offset
+        num_chunks_by_document_id = {f"doc{ind}": 150 + ind for ind in range(20)}
+        num_chunks_by_document_id["short"] = 3
+        fake_query_vespa = _FakeQueryVespa(num_chunks_by_document_id)
+
+        with patch.object(vespa_index, "_query_vespa", fake_query_vespa):
+            chunks_by_document_id = self.document_index.batch_id_based_retrieval(
+                document_ids=[*num_chunks_by_document_id, "missing"],
+                filters=self.filters,
+            )
+
+        self.assertEqual(chunks_by_document_id["missing"], [])
+        for document_id, num_chunks in num_chunks_by_document_id.items():
+            self.assertEqual(
+                [chunk.chunk_id for chunk in chunks_by_document_id[document_id]],
+                list(range(num_chunks)),
+            )
+
+    def test_failed_batch_is_raised(self) -> None:
+        num_chunks_by_document_id = {f"doc{ind}": 5 for ind in range(40)}
+        fake_query_vespa = _FakeQueryVespa(num_chunks_by_document_id)
+        fake_query_vespa.failing_document_ids = {"doc0"}
+
+        # not passed off as documents without chunks
+        with patch.object(vespa_index, "_query_vespa", fake_query_vespa):
+            with self.assertRaisesRegex(RuntimeError, "query failed"):
+                self.document_index.batch_id_based_retrieval(
+                    document_ids=list(num_chunks_by_document_id), filters=self.filters
+                )
+
+    def test_yql_matches_document_ids_with_contains(self) -> None:
+        # `document_id in (...)` is rejected by the pinned Vespa version
+        fake_query_vespa = _FakeQueryVespa({'quoted "id"': 1, "doc\\1": 1})
+        queries: list[dict[str, Any]] = []
+
+        def _record_query(query_params: dict[str, Any]) -> list[InferenceChunk]:
+            queries.append(query_params)
+            return fake_query_vespa(query_params)
+
+        with patch.object(vespa_index, "_query_vespa", _record_query):
+            chunks_by_document_id = self.document_index.batch_id_based_retrieval(
+                document_ids=['quoted "id"', "doc\\1"], filters=self.filters
+            )
+
+        self.assertEqual(len(chunks_by_document_id['quoted "id"']), 1)
+        self.assertEqual(len(chunks_by_document_id["doc\\1"]), 1)
+        self.assertEqual(
+            queries[0]["yql"],
+            VespaIndex.id_lookup_yql_base.format(index_name="danswer_chunk")
+            + "chunk_id >= 0 and chunk_id < 200 and "
+            + '(document_id contains "quoted \\"id\\"" '
+            + 'or document_id contains "doc\\\\1")',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
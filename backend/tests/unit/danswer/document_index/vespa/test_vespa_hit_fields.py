@@ -0,0 +1,126 @@
+import json
+import unittest
+from typing import Any
+
+from danswer.configs.constants import BLURB
+from danswer.configs.constants import CHUNK_ID
+from danswer.configs.constants import CONTENT
+from danswer.configs.constants import DOCUMENT_ID
+from danswer.configs.constants import METADATA
+from danswer.configs.constants import METADATA_LIST_MAP
+from danswer.configs.constants import METADATA_MAP
+from danswer.configs.constants import SECTION_CONTINUATION
+from danswer.configs.constants import SEMANTIC_IDENTIFIER
+from danswer.configs.constants import SOURCE_LINK_MAP
+from danswer.configs.constants import SOURCE_LINKS
+from danswer.configs.constants import SOURCE_TYPE
+from danswer.document_index.vespa.index import _vespa_hit_to_inference_chunk
+from danswer.document_index.vespa.utils import metadata_to_vespa_maps
+
+_METADATA: dict[str, str | list[str]] = {
+    "owner": "alice",
+    "tags": ["engineering", "onboarding"],
+}
+_SOURCE_LINKS = {0: "https://docs.example.com", 120: "https://docs.example.com#setup"}
+
+
+def _hit(extra_fields: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": "id:default:danswer_chunk::1",
+        "relevance": 0.5,
+        "fields": {
+            DOCUMENT_ID: "https://docs.example.com",
+            CHUNK_ID: 1,
+            BLURB: "blurb",
+            CONTENT: "content",
+            SOURCE_TYPE: "web",
+            SEMANTIC_IDENTIFIER: "Docs",
+            SECTION_CONTINUATION: False,
+            **extra_fields,
+        },
+    }
+
+
+class TestVespaHitFields(unittest.TestCase):
+    def test_legacy_json_strings(self) -> None:
+        chunk = _vespa_hit_to_inference_chunk(
+            _hit(
+                {
+                    METADATA: json.dumps(_METADATA),
+                    SOURCE_LINKS: json.dumps(_SOURCE_LINKS),
+                }
+            )
+        )
+        self.assertEqual(chunk.metadata, _METADATA)
+        self.assertEqual(chunk.source_links, _SOURCE_LINKS)
+
+    def test_map_fields(self) -> None:
+        metadata_map, metadata_list_map = metadata_to_vespa_maps(_METADATA)
+        chunk = _vespa_hit_to_inference_chunk(
+            _hit(
+                {
+                    METADATA_MAP: metadata_map,
+                    METADATA_LIST_MAP: metadata_list_map,
+                    # keys of json objects are always strings
+                    SOURCE_LINK_MAP: {
+                        str(offset): link for offset, link in _SOURCE_LINKS.items()
+                    },
+                }
+            )
+        )
+        self.assertEqual(chunk.metadata, _METADATA)
+        self.assertEqual(chunk.source_links, _SOURCE_LINKS)
+
+    def test_map_fields_as_key_value_lists(self) -> None:
+        chunk = _vespa_hit_to_inference_chunk(
+            _hit(
+                {
+                    METADATA_MAP: [{"key": "owner", "value": "alice"}],
+                    METADATA_LIST_MAP: [
+                        {"key": "tags", "value": ["engineering", "onboarding"]}
+                    ],
+                    SOURCE_LINK_MAP: [
+                        {"key": offset, "value": link}
+                        for offset, link in _SOURCE_LINKS.items()
+                    ],
+                }
+            )
+        )
+        self.assertEqual(chunk.metadata, _METADATA)
+        self.assertEqual(chunk.source_links, _SOURCE_LINKS)
+
+    def test_map_fields_take_precedence(self) -> None:
+        chunk = _vespa_hit_to_inference_chunk(
+            _hit(
+                {
+                    METADATA: json.dumps({"owner": "bob"}),
+                    METADATA_MAP: {"owner": "alice"},
+                    SOURCE_LINKS: json.dumps({0: "https://old.example.com"}),
+                    SOURCE_LINK_MAP: {"0": "https://docs.example.com"},
+                }
+            )
+        )
+        self.assertEqual(chunk.metadata, {"owner": "alice"})
+        self.assertEqual(chunk.source_links, {0: "https://docs.example.com"})
+
+    def test_no_metadata_or_links(self) -> None:
+        # empty maps are left out of the hits, as are cleared legacy strings
+        all_extra_fields: list[dict[str, Any]] = [
+            {},
+            {METADATA: "", SOURCE_LINKS: ""},
+        ]
+        for extra_fields in all_extra_fields:
+            chunk = _vespa_hit_to_inference_chunk(_hit(extra_fields))
+            self.assertEqual(chunk.metadata, {})
+            self.assertEqual(chunk.source_links, {})
+
+    def test_metadata_to_vespa_maps(self) -> None:
+        metadata_map, metadata_list_map = metadata_to_vespa_maps(
+            {"owner": "ali\x00ce", "tags": ["a\x1fb", "c"]}
+        )
+        self.assertEqual(metadata_map, {"owner": "alice"})
+        self.assertEqual(metadata_list_map, {"tags": ["ab", "c"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
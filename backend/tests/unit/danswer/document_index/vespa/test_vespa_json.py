@@ -0,0 +1,52 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from danswer.document_index.vespa import utils
+from danswer.document_index.vespa.utils import vespa_json_dumps
+from danswer.document_index.vespa.utils import vespa_json_loads
+
+
+class TestVespaJson(unittest.TestCase):
+    def setUp(self) -> None:
+        self.feed_body = {
+            "fields": {
+                "document_id": "https://docs.example.com/ünïcode",
+                "chunk_id": 3,
+                "boost": 1.5,
+                "hidden": False,
+                "embeddings": {"0": [0.1, -0.25, 3.0], "1": [1e-7, 0.0, 2.5]},
+                "access_control_list": {"PUBLIC": 1},
+                "metadata": json.dumps({"tags": ["a", "b"]}),
+            }
+        }
+
+    def test_round_trip(self) -> None:
+        for orjson_module in [utils.orjson, None]:
+            with patch.object(utils, "orjson", orjson_module):
+                data = vespa_json_dumps(self.feed_body)
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(json.loads(data), self.feed_body)
+                self.assertEqual(vespa_json_loads(data), self.feed_body)
+                self.assertEqual(vespa_json_loads(data.decode()), self.feed_body)
+
+    def test_same_values_with_and_without_orjson(self) -> None:
+        with patch.object(utils, "orjson", None):
+            stdlib_data = vespa_json_dumps(self.feed_body)
+        self.assertEqual(
+            vespa_json_loads(vespa_json_dumps(self.feed_body)),
+            vespa_json_loads(stdlib_data),
+        )
+
+    @unittest.skipIf(utils.orjson is None, "orjson is not installed")
+    def test_numpy_embeddings(self) -> None:
+        body = {"embeddings": {"0": np.array([0.5, 0.25], dtype=np.float32)}}
+        self.assertEqual(
+            vespa_json_loads(vespa_json_dumps(body)), {"embeddings": {"0": [0.5, 0.25]}}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from danswer.configs.constants import DocumentSource
+from danswer.indexing.models import InferenceChunk
+from danswer.search import search_runner
+from danswer.search.models import IndexFilters
+from danswer.search.models import RetrievalMetricsContainer
+from danswer.search.models import SearchQuery
+from danswer.search.models import SearchType
+from danswer.search.search_runner import retrieve_chunks
+
+
+def _chunk(document_id: str) -> InferenceChunk:
+    return InferenceChunk(
+        chunk_id=0,
+        blurb="blurb",
+        content="content",
+        source_links=None,
+        section_continuation=False,
+        document_id=document_id,
+        source_type=DocumentSource.WEB,
+        semantic_identifier=document_id,
+        boost=0,
+        recency_bias=1.0,
+        score=0.5,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        updated_at=None,
+    )
+
+
+class TestRetrieveChunksTargetHits(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document_index = MagicMock()
+        # a count query which fails or expires would give a different value next time
+        self.document_index.hybrid_target_hits.side_effect = [200, 1000]
+        self.document_index.hybrid_retrieval.side_effect = lambda **kwargs: [
+            _chunk(kwargs["query"])
+        ]
+
+        for patcher in [
+            patch.object(search_runner, "get_current_db_embedding_model"),
+            patch.object(search_runner, "EmbeddingModel"),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _retrieve(
+        self, multilingual_expansion_str: str | None
+    ) -> list[RetrievalMetricsContainer]:
+        metrics: list[RetrievalMetricsContainer] = []
+        retrieve_chunks(
+            query=SearchQuery(
+                query="What is Danswer?",
+                filters=IndexFilters(access_control_list=None),
+                recency_bias_multiplier=1.0,
+                search_type=SearchType.HYBRID,
+            ),
+            document_index=self.document_index,
+            db_session=MagicMock(),
+            multilingual_expansion_str=multilingual_expansion_str,
+            retrieval_metrics_callback=metrics.append,
+        )
+        return metrics
+
+    def test_metrics_report_the_target_hits_used(self) -> None:
+        metrics = self._retrieve(multilingual_expansion_str=None)
+
+        self.assertEqual(self.document_index.hybrid_target_hits.call_count, 1)
+        self.assertEqual(
+            self.document_index.hybrid_retrieval.call_args.kwargs["target_hits"], 200
+        )
+        self.assertEqual([container.target_hits for container in metrics], [200])
+
+    def test_query_rephrases_share_the_target_hits(self) -> None:
+        with patch.object(
+            search_runner,
+            "multilingual_query_expansion",
+            return_value=["What is Danswer?", "Qué es Danswer?"],
+        ):
+            metrics = self._retrieve(multilingual_expansion_str="English,Spanish")
+
+        self.assertEqual(self.document_index.hybrid_target_hits.call_count, 1)
+        self.assertEqual(self.document_index.hybrid_retrieval.call_count, 2)
+        for call in self.document_index.hybrid_retrieval.call_args_list:
+            self.assertEqual(call.kwargs["target_hits"], 200)
+        self.assertEqual([container.target_hits for container in metrics], [200])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import copy
+import random
+import unittest
+from collections.abc import Iterator
+from types import SimpleNamespace
+from typing import Any
+from typing import cast
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from danswer.document_index.interfaces import DocumentIndex
+from danswer.indexing.models import InferenceChunk
+from danswer.search import search_runner
+from danswer.search.models import IndexFilters
+from danswer.search.models import SearchQuery
+from danswer.search.search_result_cache import search_result_cache_key
+from danswer.search.search_result_cache import SearchResultCache
+from danswer.search.search_runner import full_chunk_search_generator
+from tests.unit.danswer.search.test_search_runner_scoring import _make_chunks
+
+
+def _search_query(query: str, acl: list[str]) -> SearchQuery:
+    return SearchQuery(
+        query=query,
+        filters=IndexFilters(access_control_list=acl),
+        recency_bias_multiplier=1.0,
+    )
+
+
+class TestSearchResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.chunks = _make_chunks(random.Random(0), 3)
+
+    def test_cache_key(self) -> None:
+        key = search_result_cache_key(
+            _search_query("query", ["user_id:a", "PUBLIC"]), "index", 0.62, None
+        )
+        self.assertEqual(
+            key,
+            search_result_cache_key(
+                _search_query("query", ["PUBLIC", "user_id:a"]), "index", 0.62, None
+            ),
+        )
+        for other_key in [
+            search_result_cache_key(
+                _search_query("other query", ["PUBLIC", "user_id:a"]),
+                "index",
+                0.62,
+                None,
+            ),
+            search_result_cache_key(
+                _search_query("query", ["PUBLIC", "user_id:b"]), "index", 0.62, None
+            ),
+            search_result_cache_key(
+                _search_query("query", ["PUBLIC", "user_id:a"]),
+                "other_index",
+                0.62,
+                None,
+            ),
+            search_result_cache_key(
+                _search_query("query", ["PUBLIC", "user_id:a"]), "index", 0.5, None
+            ),
+        ]:
+            self.assertNotEqual(key, other_key)
+
+    def test_outdated_by_index_generation(self) -> None:
+        cache = SearchResultCache(max_size=10, ttl_seconds=60)
+        cache.set("key", "a", self.chunks, [True, False, True])
+        self.assertIsNone(cache.get("other key", "a"))
+        self.assertEqual(cache.get("key", "a"), (self.chunks, [True, False, True]))
+        self.assertIsNone(cache.get("key", "b"))
+        # Dropped, even for the generation it was computed from
+        self.assertIsNone(cache.get("key", "a"))
+        self.assertEqual(cache.num_hits, 1)
+        self.assertEqual(cache.num_misses, 3)
+        self.assertEqual(cache.num_outdated, 1)
+
+    def test_returns_copies(self) -> None:
+        cache = SearchResultCache(max_size=10, ttl_seconds=60)
+        cache.set("key", "a", self.chunks, [False] * 3)
+        cached_result = cache.get("key", "a")
+        assert cached_result is not None
+        cached_result[0][0].score = 123.0
+        cached_result[1][0] = True
+        self.assertEqual(cache.get("key", "a"), (self.chunks, [False] * 3))
+
+
+class TestFullChunkSearchGeneratorCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.chunks = _make_chunks(random.Random(0), 3)
+        self.num_searches = 0
+        self.index_generation = "a"
+
+    def _fake_search(
+        self, **kwargs: Any
+    ) -> Iterator[list[InferenceChunk] | list[bool]]:
+        self.num_searches += 1
+        yield [copy.copy(chunk) for chunk in self.chunks]
+        yield [True, False, False]
+
+    def _search(self, query: str) -> tuple[list[InferenceChunk], list[bool]]:
+        search_generator = full_chunk_search_generator(
+            search_query=_search_query(query, ["PUBLIC"]),
+            document_index=cast(DocumentIndex, SimpleNamespace(index_name="index")),
+            db_session=cast(Session, None),
+        )
+        return cast(list[InferenceChunk], next(search_generator)), cast(
+            list[bool], next(search_generator)
+        )
+
+    def test_cached_until_index_changes(self) -> None:
+        with patch.object(
+            search_runner,
+            "_SEARCH_RESULT_CACHE",
+            SearchResultCache(max_size=10, ttl_seconds=60),
+        ), patch.object(
+            search_runner, "_uncached_full_chunk_search_generator", self._fake_search
+        ), patch.object(
+            search_runner, "get_index_generation", lambda: self.index_generation
+        ):
+            first_result = self._search("query")
+            # callers may modify the chunks they were given
+            first_result[0][0].score = 123.0
+            self.assertEqual(self._search("query"), (self.chunks, [True, False, False]))
+            self.assertEqual(self.num_searches, 1)
+
+            self._search("other query")
+            self.assertEqual(self.num_searches, 2)
+
+            self.index_generation = "b"
+            self._search("query")
+            self.assertEqual(self.num_searches, 3)
+
+    def test_disabled(self) -> None:
+        with patch.object(
+            search_runner,
+            "_SEARCH_RESULT_CACHE",
+            SearchResultCache(max_size=0, ttl_seconds=60),
+        ), patch.object(
+            search_runner, "_uncached_full_chunk_search_generator", self._fake_search
+        ):
+            self._search("query")
+            self._search("query")
+            self.assertEqual(self.num_searches, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import random
+import unittest
+from typing import Any
+from unittest.mock import patch
+
+from danswer.configs.constants import DocumentSource
+from danswer.document_index.document_index_utils import (
+    translate_boost_count_to_multiplier,
+)
+from danswer.indexing.models import InferenceChunk
+from danswer.search import search_runner
+from danswer.search.models import RerankMetricsContainer
+from danswer.search.search_runner import apply_boost
+from danswer.search.search_runner import apply_boost_legacy
+from danswer.search.search_runner import semantic_reranking
+
+
+class _FakeCrossEncoders:
+    sim_scores: list[list[float]] = []
+
+    def predict(self, query: str, passages: list[str]) -> list[list[float]]:
+        return self.sim_scores
+
+
+def _make_chunks(rng: random.Random, num_chunks: int) -> list[InferenceChunk]:
+    # Few distinct scores, boosts and recency biases so that there are many ties
+    return [
+        InferenceChunk(
+            document_id=f"doc {ind}",
+            source_type=DocumentSource.FILE,
+            chunk_id=0,
+            content=f"content {ind}",
+            source_links=None,
+            blurb="blurb",
+            semantic_identifier=f"doc {ind}",
+            section_continuation=False,
+            recency_bias=rng.choice([1.0, 1.0, 0.5, 0.75, 0.9]),
+            boost=rng.choice([0, 0, 0, -1, 1, -10, 10, 3]),
+            hidden=False,
+            score=rng.choice([None, 0.0, round(rng.uniform(-0.5, 1.5), 2)]),
+            metadata={},
+            match_highlights=[],
+            updated_at=None,
+        )
+        for ind in range(num_chunks)
+    ]
+
+
+def _chunk(
+    ind: int, score: float | None, boost: int = 0, recency_bias: float = 1.0
+) -> InferenceChunk:
+    return InferenceChunk(
+        document_id=f"doc {ind}",
+        source_type=DocumentSource.FILE,
+        chunk_id=0,
+        content=f"content {ind}",
+        source_links=None,
+        blurb="blurb",
+        semantic_identifier=f"doc {ind}",
+        section_continuation=False,
+        recency_bias=recency_bias,
+        boost=boost,
+        hidden=False,
+        score=score,
+        metadata={},
+        match_highlights=[],
+        updated_at=None,
+    )
+
+
+def _ranked(chunks: list[InferenceChunk]) -> list[tuple[str, Any]]:
+    return [(chunk.document_id, chunk.score) for chunk in chunks]
+
+
+class TestSearchRunnerScoring(unittest.TestCase):
+    def setUp(self) -> None:
+        self.boost_3 = translate_boost_count_to_multiplier(3)
+
+    def _assert_ranked(
+        self, chunks: list[InferenceChunk], expected: list[tuple[str, float]]
+    ) -> None:
+        self.assertEqual(
+            [chunk.document_id for chunk in chunks], [d for d, _ in expected]
+        )
+        for chunk, (_, score) in zip(chunks, expected):
+            self.assertAlmostEqual(chunk.score, score)  # type: ignore
+
+    def test_apply_boost_legacy(self) -> None:
+        chunks = [_chunk(0, 0.2), _chunk(1, 0.9, recency_bias=0.5), _chunk(2, 0.6, 3)]
+        # the boost scales the score above the lowest one, recency is not used
+        self._assert_ranked(
+            apply_boost_legacy(chunks, norm_min=0.0, norm_max=1.0),
+            [("doc 1", 0.9), ("doc 2", 0.4 * self.boost_3 + 0.2), ("doc 0", 0.2)],
+        )
+
+        # normalized to the wider of the given and the actual range of the scores
+        chunks = [_chunk(0, 0.2), _chunk(1, 0.9), _chunk(2, 0.6, 3)]
+        self._assert_ranked(
+            apply_boost_legacy(chunks, norm_min=0.5, norm_max=0.8),
+            [
+                ("doc 1", 1.0),
+                ("doc 2", 0.4 * self.boost_3 / 0.7),
+                ("doc 0", 0.0),
+            ],
+        )
+
+    def test_apply_boost_legacy_equal_scores(self) -> None:
+        chunks = [_chunk(0, 0.5), _chunk(1, 0.5, 3)]
+        self._assert_ranked(
+            apply_boost_legacy(chunks, norm_min=0.0, norm_max=1.0),
+            [("doc 1", 0.5 * self.boost_3), ("doc 0", 0.5)],
+        )
+
+    def test_apply_boost(self) -> None:
+        chunks = [
+            _chunk(0, 0.2),
+            _chunk(1, 0.9, recency_bias=0.5),
+            _chunk(2, None),
+            _chunk(3, 0.6, 3),
+        ]
+        # only the first 2 scores widen the normalization range to 0.2 - 0.9, scores
+        # below it are clipped to 0
+        self._assert_ranked(
+            apply_boost(chunks, norm_cutoff=2, norm_min=0.5, norm_max=0.8),
+            [
+                ("doc 3", 0.4 * self.boost_3 / 0.7),
+                ("doc 1", 0.5),
+                ("doc 0", 0.0),
+                ("doc 2", 0.0),
+            ],
+        )
+
+    def test_semantic_reranking(self) -> None:
+        chunks = [
+            _chunk(0, 0.1, recency_bias=0.5),
+            _chunk(1, 0.2, 3),
+            _chunk(2, 0.3),
+        ]
+        _FakeCrossEncoders.sim_scores = [[1, 3, -1], [3, 1, -3]]
+        rerank_metrics: list[RerankMetricsContainer] = []
+        with patch.object(
+            search_runner, "CrossEncoderEnsembleModel", _FakeCrossEncoders
+        ):
+            ranked_chunks, ranked_indices = semantic_reranking(
+                "query",
+                chunks,
+                rerank_metrics_callback=rerank_metrics.append,
+                model_min=-5,
+                model_max=5,
+            )
+
+        # the mean scores shifted by the lowest score of all models are [5, 5, 1], then
+        # boosted and shifted back into the model's range
+        self.assertEqual(ranked_indices, [1, 0, 2])
+        self._assert_ranked(
+            ranked_chunks,
+            [("doc 1", (5 * self.boost_3 + 2) / 10), ("doc 0", 0.45), ("doc 2", 0.3)],
+        )
+        self.assertEqual(rerank_metrics[0].raw_similarity_scores, [2, 2, -2])
+
+    def test_ties_keep_the_retrieval_order(self) -> None:
+        chunks = [_chunk(ind, 0.5) for ind in range(20)]
+        expected = [f"doc {ind}" for ind in range(20)]
+        self.assertEqual(
+            [chunk.document_id for chunk in apply_boost(chunks, 5, 0.0, 1.0)],
+            expected,
+        )
+        self.assertEqual(
+            [chunk.document_id for chunk in apply_boost_legacy(chunks, 0.0, 1.0)],
+            expected,
+        )
+
+        _FakeCrossEncoders.sim_scores = [[1.0] * 20]
+        with patch.object(
+            search_runner, "CrossEncoderEnsembleModel", _FakeCrossEncoders
+        ):
+            _, ranked_indices = semantic_reranking("query", chunks)
+        self.assertEqual(ranked_indices, list(range(20)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from danswer.configs.constants import DocumentSource
+from danswer.secondary_llm_flows import time_filter
+from danswer.secondary_llm_flows.source_filter import query_may_have_source_filter
+from danswer.secondary_llm_flows.time_filter import extract_time_filter
+from danswer.secondary_llm_flows.time_filter import filter_extraction_precheck_applies
+from danswer.secondary_llm_flows.time_filter import query_may_have_time_filter
+from danswer.utils.ttl_cache import TTLCache
+
+_QUERIES_WITH_TIME_FILTER = [
+    "What documents were written in the last two quarters?",
+    "What's the latest on project Corgies?",
+    "Which customer asked about security features in February of 2022?",
+    "What was decided in yesterday's planning meeting?",
+    "What changed in the deploy process recently?",
+    "What happened during the outage 3 days ago?",
+    "Roadmap priorities for Q3",
+    "Any announcements since 05/01/2023?",
+    "What's the current status of the SOC 2 audit?",
+    "Is the migration still blocked?",
+    "Release notes from last Tuesday",
+    "What's new in the mobile app?",
+]
+
+_QUERIES_WITH_SOURCE_FILTER: list[tuple[str, DocumentSource]] = [
+    (
+        "What documents in Confluence cover engineer onboarding?",
+        DocumentSource.CONFLUENCE,
+    ),
+    ("Find the Slack thread about the flaky integration tests", DocumentSource.SLACK),
+    ("Which Jira tickets mention the checkout bug?", DocumentSource.JIRA),
+    ("Search my emails for the vendor contract", DocumentSource.GMAIL),
+    ("Google Drive spreadsheets with the hiring budget", DocumentSource.GOOGLE_DRIVE),
+    ("Pull requests that touched the auth module", DocumentSource.GITHUB),
+    ("Merge requests for the payments service in GitLab", DocumentSource.GITLAB),
+    ("What is in the uploaded PDF about the security review?", DocumentSource.FILE),
+]
+
+_QUERIES_WITHOUT_FILTERS = [
+    "What is Danswer?",
+    "How do I reset my password?",
+    "What is our parental leave policy?",
+    "How does the billing service compute invoices?",
+    "How do I set up SSO with Okta?",
+    "What port does the API server listen on?",
+    "Who owns the onboarding flow?",
+    "What embedding model do we use?",
+]
+
+# The checks only know English words, these must always go to the LLM
+_NON_ENGLISH_QUERIES = [
+    "documentos de slack de la semana pasada",
+    "Was hat sich letzte Woche geändert?",
+    "上周的Slack消息",
+]
+
+
+class TestFilterPrecheck(unittest.TestCase):
+    def test_no_time_filter_false_negatives(self) -> None:
+        for query in _QUERIES_WITH_TIME_FILTER:
+            self.assertTrue(query_may_have_time_filter(query), query)
+
+    def test_no_source_filter_false_negatives(self) -> None:
+        for query, source in _QUERIES_WITH_SOURCE_FILTER:
+            # also when the labelled source is the only one available
+            for valid_sources in [list(DocumentSource), [source]]:
+                self.assertTrue(
+                    query_may_have_source_filter(query, valid_sources), query
+                )
+
+    def test_skips_queries_without_filters(self) -> None:
+        valid_sources = [DocumentSource.WEB, DocumentSource.SLACK]
+        for query in _QUERIES_WITHOUT_FILTERS:
+            self.assertFalse(query_may_have_time_filter(query), query)
+            self.assertFalse(query_may_have_source_filter(query, valid_sources), query)
+
+    def test_source_aliases_and_name_variants(self) -> None:
+        valid_sources = [DocumentSource.GOOGLE_DRIVE, DocumentSource.JIRA]
+        for query in [
+            "files in googledrive",
+            "the google-drive folder",
+            "open JIRA tickets",
+            "the epic for onboarding",
+        ]:
+            self.assertTrue(query_may_have_source_filter(query, valid_sources), query)
+        for query in ["How do I deploy?", "Slack channel for alerts"]:
+            self.assertFalse(query_may_have_source_filter(query, valid_sources), query)
+
+    def test_precheck_is_opt_in(self) -> None:
+        with patch.object(time_filter, "ENABLE_FILTER_EXTRACTION_PRECHECK", False):
+            self.assertFalse(filter_extraction_precheck_applies("How do I deploy?"))
+        with patch.object(time_filter, "ENABLE_FILTER_EXTRACTION_PRECHECK", True):
+            self.assertTrue(filter_extraction_precheck_applies("How do I deploy?"))
+
+    def test_precheck_not_applied_to_other_languages(self) -> None:
+        with patch.object(time_filter, "ENABLE_FILTER_EXTRACTION_PRECHECK", True):
+            for query in _NON_ENGLISH_QUERIES[1:]:
+                self.assertFalse(filter_extraction_precheck_applies(query), query)
+            with patch.object(
+                time_filter, "MULTILINGUAL_QUERY_EXPANSION", "English,Spanish"
+            ):
+                for query in _NON_ENGLISH_QUERIES:
+                    self.assertFalse(filter_extraction_precheck_applies(query), query)
+
+    def test_non_english_query_reaches_the_llm(self) -> None:
+        llm = MagicMock()
+        llm.invoke.return_value = json.dumps(
+            {"filter_type": "hard cutoff", "filter_value": "week", "value_multiple": 1}
+        )
+        with patch.object(
+            time_filter, "ENABLE_FILTER_EXTRACTION_PRECHECK", True
+        ), patch.object(time_filter, "get_default_llm", return_value=llm), patch.object(
+            time_filter,
+            "_TIME_FILTER_LLM_OUTPUT_CACHE",
+            TTLCache(max_size=0, ttl_seconds=0),
+        ):
+            cutoff, _ = extract_time_filter("Was hat sich letzte Woche geändert?")
+            self.assertIsNotNone(cutoff)
+            self.assertEqual(llm.invoke.call_count, 1)
+
+            # an English query without time words still skips the LLM
+            self.assertEqual(extract_time_filter("How do I deploy?"), (None, False))
+            self.assertEqual(llm.invoke.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
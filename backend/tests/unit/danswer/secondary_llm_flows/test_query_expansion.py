@@ -0,0 +1,41 @@
+import unittest
+
+from danswer.secondary_llm_flows.query_expansion import query_rephrase_differs
+
+
+class TestQueryRephraseDiffers(unittest.TestCase):
+    def test_same_words(self) -> None:
+        for rephrased_query in [
+            "How do I rotate the Postgres credentials?",
+            "how do i rotate the postgres credentials",
+            "  How do I rotate   the Postgres credentials ",
+            "the Postgres credentials, how do I rotate?",
+        ]:
+            self.assertFalse(
+                query_rephrase_differs(
+                    "How do I rotate the Postgres credentials?", rephrased_query
+                ),
+                rephrased_query,
+            )
+
+    def test_context_added(self) -> None:
+        self.assertTrue(
+            query_rephrase_differs("How do I deploy it?", "How do I deploy Danswer?")
+        )
+        self.assertTrue(
+            query_rephrase_differs(
+                "What about the staging one?",
+                "How to rotate the Postgres credentials of the staging cluster",
+            )
+        )
+
+    def test_min_overlap(self) -> None:
+        query = "steps to rotate the postgres credentials"
+        # 6 of the 7 words are shared
+        rephrased_query = "steps to rotate the postgres database credentials"
+        self.assertFalse(query_rephrase_differs(query, rephrased_query, 0.8))
+        self.assertTrue(query_rephrase_differs(query, rephrased_query, 0.9))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import itertools
+import threading
+import time
+import unittest
+from collections.abc import Callable
+
+from danswer.utils.hedging import HedgedCaller
+
+
+def _warm_up(hedged_caller: HedgedCaller[int]) -> None:
+    # enough fast calls for a hedge delay
+    for _ in range(20):
+        hedged_caller.call(lambda: 0)
+
+
+def _slow_first_call(
+    first_call_seconds: float, first_call_error: bool = False
+) -> Callable[[], int]:
+    call_inds = itertools.count()
+    lock = threading.Lock()
+
+    def _call() -> int:
+        with lock:
+            call_ind = next(call_inds)
+        if call_ind == 0:
+            time.sleep(first_call_seconds)
+            if first_call_error:
+                raise RuntimeError("first call failed")
+        return call_ind
+
+    return _call
+
+
+class TestHedgedCaller(unittest.TestCase):
+    def test_no_hedging_without_latencies(self) -> None:
+        hedged_caller: HedgedCaller[int] = HedgedCaller(
+            latency_percentile=95, min_delay_seconds=0.01, max_hedges_in_flight=4
+        )
+        self.assertIsNone(hedged_caller.hedge_delay())
+        self.assertEqual(hedged_caller.call(_slow_first_call(0.1)), 0)
+        self.assertEqual(hedged_caller.num_hedges, 0)
+
+        _warm_up(hedged_caller)
+        self.assertEqual(hedged_caller.hedge_delay(), 0.01)
+
+    def test_hedge_answers_first(self) -> None:
+        hedged_caller: HedgedCaller[int] = HedgedCaller(
+            latency_percentile=95, min_delay_seconds=0.01, max_hedges_in_flight=4
+        )
+        _warm_up(hedged_caller)
+
+        start = time.monotonic()
+        self.assertEqual(hedged_caller.call(_slow_first_call(2)), 1)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(hedged_caller.num_hedges, 1)
+        self.assertEqual(hedged_caller.num_hedge_wins, 1)
+
+    def test_hedge_answers_when_first_call_fails(self) -> None:
+        hedged_caller: HedgedCaller[int] = HedgedCaller(
+            latency_percentile=95, min_delay_seconds=0.01, max_hedges_in_flight=4
+        )
+        _warm_up(hedged_caller)
+
+        self.assertEqual(
+            hedged_caller.call(_slow_first_call(0.05, first_call_error=True)), 1
+        )
+
+    def test_both_calls_fail(self) -> None:
+        hedged_caller: HedgedCaller[int] = HedgedCaller(
+            latency_percentile=95, min_delay_seconds=0.01, max_hedges_in_flight=4
+        )
+        _warm_up(hedged_caller)
+
+        def _failing_call() -> int:
+            time.sleep(0.05)
+            raise RuntimeError("failed")
+
+        with self.assertRaises(RuntimeError):
+            hedged_caller.call(_failing_call)
+        self.assertEqual(hedged_caller.num_hedges, 1)
+
+    def test_hedges_in_flight_limit(self) -> None:
+        hedged_caller: HedgedCaller[int] = HedgedCaller(
+            latency_percentile=95, min_delay_seconds=0.01, max_hedges_in_flight=0
+        )
+        _warm_up(hedged_caller)
+
+        self.assertEqual(hedged_caller.call(_slow_first_call(0.1)), 0)
+        self.assertEqual(hedged_caller.num_hedges, 0)
+        self.assertEqual(hedged_caller.num_hedges_skipped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
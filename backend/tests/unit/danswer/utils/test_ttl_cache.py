@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+
+from danswer.utils.ttl_cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_get_set(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("a", 2)
+        self.assertEqual(cache.get("a"), 2)
+
+    def test_least_recently_used_evicted(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # "a" is now more recently used than "b"
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_expiry(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=10)
+        with patch("danswer.utils.ttl_cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("danswer.utils.ttl_cache.time.monotonic", return_value=109.0):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("danswer.utils.ttl_cache.time.monotonic", return_value=110.0):
+            self.assertIsNone(cache.get("a"))
+
+    def test_disabled_and_clear(self) -> None:
+        disabled_cache: TTLCache[str, int] = TTLCache(max_size=0, ttl_seconds=60)
+        disabled_cache.set("a", 1)
+        self.assertIsNone(disabled_cache.get("a"))
+
+        cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+
+    def test_delete(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a")
+        cache.delete("missing")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_hit_and_miss_counts(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=10)
+        with patch("danswer.utils.ttl_cache.time.monotonic", return_value=100.0):
+            cache.get("a")
+            cache.set("a", 1)
+            cache.get("a")
+            cache.get("a")
+        with patch("danswer.utils.ttl_cache.time.monotonic", return_value=110.0):
+            # expired
+            cache.get("a")
+        self.assertEqual(cache.num_hits, 2)
+        self.assertEqual(cache.num_misses, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()